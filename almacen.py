@@ -0,0 +1,178 @@
+# ---------------------------------------------------------
+# INTERFAZ DE ALMACENAMIENTO
+# ---------------------------------------------------------
+# La app habla con la base de datos siempre con la misma cadena fluida del
+# cliente de Supabase:
+#
+#   cliente.table(t).select("a, b", count="exact")   .eq/.neq/.gt/.gte/.lt/.lte/.in_/.ilike/.match
+#                                                    .order(col, desc=False) .limit(n) .range(desde, hasta)
+#   cliente.table(t).insert(filas)
+#   cliente.table(t).upsert(filas, on_conflict="id", ignore_duplicates=False)
+#   cliente.table(t).update(valores)  + filtros
+#   cliente.table(t).delete()         + filtros
+#   cliente.rpc(funcion, parametros)
+#   ... .execute() -> respuesta con .data (lista de dicts) y .count
+#
+# Cualquier almacenamiento que implemente esta interfaz sirve para la app:
+# el cliente de Supabase, ClienteSQLite (cliente_sqlite.py) y ClienteMemoria
+# (cliente_memoria.py). Aquí está la parte común: las consultas acumulan
+# filtros, orden y límite y cada almacenamiento decide cómo ejecutarlas.
+
+import re
+
+# Operadores de filtro admitidos (los mismos que datos.aplicar_filtros)
+OPERADORES = ("eq", "neq", "gt", "gte", "lt", "lte", "in", "ilike")
+
+
+def like_a_regex(patron):
+    """
+    Patrón de LIKE -> expresión regular equivalente (\\% y \\_ son literales).
+    """
+    partes, escapado = [], False
+    for caracter in patron:
+        if escapado:
+            partes.append(re.escape(caracter))
+            escapado = False
+        elif caracter == "\\":
+            escapado = True
+        elif caracter == "%":
+            partes.append(".*")
+        elif caracter == "_":
+            partes.append(".")
+        else:
+            partes.append(re.escape(caracter))
+    return "".join(partes)
+
+
+def escapar_like(texto):
+    """
+    Texto que el usuario escribe en un buscador -> literal seguro dentro de un patrón de LIKE.
+    """
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class Respuesta:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def columnas_de(texto):
+    """
+    "alumno_id, fecha" -> ["alumno_id", "fecha"]; "*" -> None (todas).
+    """
+    if texto.strip() == "*":
+        return None
+    return [c.strip() for c in texto.split(",") if c.strip()]
+
+
+class ConsultaBase:
+    """
+    Consulta en construcción. accion es select, insert, upsert, update o delete;
+    las subclases implementan _ejecutar_<accion>().
+    """
+
+    def __init__(self, cliente, tabla, accion, columnas="*", valores=None, on_conflict="id",
+                 ignore_duplicates=False, count=None):
+        self._cliente = cliente
+        self._tabla = tabla
+        self._accion = accion
+        self._columnas = columnas
+        self._valores = valores
+        self._on_conflict = on_conflict
+        self._ignore_duplicates = ignore_duplicates
+        self._count = count
+        self._filtros = []
+        self._orden = []
+        self._limite = None
+        self._desde = 0
+
+    # --- filtros ---
+    def _filtro(self, columna, operador, valor):
+        self._filtros.append((columna, operador, valor))
+        return self
+
+    def eq(self, columna, valor):
+        return self._filtro(columna, "eq", valor)
+
+    def neq(self, columna, valor):
+        return self._filtro(columna, "neq", valor)
+
+    def gt(self, columna, valor):
+        return self._filtro(columna, "gt", valor)
+
+    def gte(self, columna, valor):
+        return self._filtro(columna, "gte", valor)
+
+    def lt(self, columna, valor):
+        return self._filtro(columna, "lt", valor)
+
+    def lte(self, columna, valor):
+        return self._filtro(columna, "lte", valor)
+
+    def in_(self, columna, valores):
+        return self._filtro(columna, "in", list(valores))
+
+    def ilike(self, columna, patron):
+        # Patrón de LIKE sin distinguir mayúsculas: % cualquier texto, _ un carácter
+        return self._filtro(columna, "ilike", patron)
+
+    def match(self, condiciones):
+        for columna, valor in condiciones.items():
+            self.eq(columna, valor)
+        return self
+
+    def order(self, columna, desc=False):
+        self._orden.append((columna, desc))
+        return self
+
+    def limit(self, n):
+        self._limite = n
+        return self
+
+    def range(self, desde, hasta):
+        # Filas desde..hasta, ambas incluidas (como PostgREST)
+        self._desde = desde
+        self._limite = hasta - desde + 1
+        return self
+
+    def _filas(self):
+        # insert/upsert aceptan un dict o una lista de dicts
+        return [dict(f) for f in ([self._valores] if isinstance(self._valores, dict) else self._valores)]
+
+    def execute(self):
+        return getattr(self, f"_ejecutar_{self._accion}")()
+
+
+class TablaBase:
+    """
+    Punto de entrada de cada tabla; consulta es la subclase de ConsultaBase del almacenamiento.
+    """
+
+    consulta = ConsultaBase
+
+    def __init__(self, cliente, nombre):
+        self._cliente = cliente
+        self._nombre = nombre
+
+    def select(self, columnas="*", count=None):
+        return self.consulta(self._cliente, self._nombre, "select", columnas=columnas, count=count)
+
+    def insert(self, filas, **kwargs):
+        return self.consulta(self._cliente, self._nombre, "insert", valores=filas)
+
+    def upsert(self, filas, on_conflict="id", ignore_duplicates=False, **kwargs):
+        return self.consulta(self._cliente, self._nombre, "upsert", valores=filas,
+                             on_conflict=on_conflict, ignore_duplicates=ignore_duplicates)
+
+    def update(self, valores, **kwargs):
+        return self.consulta(self._cliente, self._nombre, "update", valores=valores)
+
+    def delete(self, **kwargs):
+        return self.consulta(self._cliente, self._nombre, "delete")
+
+
+class RpcSinEfecto:
+    # Las funciones SQL de Supabase (p. ej. reajustar_secuencias) que no hacen falta en local
+    def execute(self):
+        return Respuesta(None)
@@ -0,0 +1,224 @@
+# ---------------------------------------------------------
+# ARCHIVO DE TEMPORADAS (PARQUET + DUCKDB)
+# ---------------------------------------------------------
+# Las temporadas pasadas salen de las tablas vivas y se guardan en ficheros
+# Parquet locales, separados por colegio y particionados por curso académico:
+#   archivo/colegio_id=1/asistencia/curso_academico=2025-2026/part-20260801T101500.parquet
+# Los informes históricos se consultan sobre esos ficheros con DuckDB, así
+# las tablas de Supabase solo contienen la temporada en curso.
+import glob
+import os
+from datetime import datetime
+
+import duckdb
+import pandas as pd
+
+from datos import db_select, db_select_paginado, db_delete_por_lotes, colegio_actual
+from copias import escribir_parquet
+
+DIR_ARCHIVO = os.environ.get("COMEDOR_ARCHIVO", "archivo")
+
+# Tablas que crecen cada día y pueden archivarse por temporada
+TABLAS_ARCHIVABLES = ["asistencia", "maestros_comidas", "maestros_agua"]
+
+
+def curso_academico_de_fecha(fecha):
+    """
+    "2026-03-12" -> "2025/2026". La temporada va de septiembre a agosto.
+    """
+    año, mes = int(fecha[:4]), int(fecha[5:7])
+    if mes >= 9:
+        return f"{año}/{año + 1}"
+    return f"{año - 1}/{año}"
+
+
+def rango_temporada(curso_academico):
+    año_ini = int(curso_academico.split("/")[0])
+    return f"{año_ini}-09-01", f"{año_ini + 1}-08-31"
+
+
+def _valor_particion(curso_academico):
+    # "/" no puede ir en un nombre de carpeta
+    return curso_academico.replace("/", "-")
+
+
+def dir_colegio():
+    # Cada colegio tiene su propio archivo: nunca se mezclan temporadas de colegios distintos
+    return os.path.join(DIR_ARCHIVO, f"colegio_id={colegio_actual()}")
+
+
+def ruta_particion(tabla, curso_academico):
+    return os.path.join(dir_colegio(), tabla, f"curso_academico={_valor_particion(curso_academico)}")
+
+
+def temporadas_archivadas(tabla="asistencia"):
+    ficheros = glob.glob(os.path.join(dir_colegio(), tabla, "curso_academico=*", "*.parquet"))
+    carpetas = {os.path.basename(os.path.dirname(f)) for f in ficheros}
+    temporadas = [c.split("=", 1)[1].replace("-", "/") for c in carpetas]
+    return sorted(temporadas, reverse=True)
+
+
+def _catalogos():
+    df_alumnos = db_select("alumnos")
+    df_cursos = db_select("cursos")
+    df_profes = db_select("profesores")
+    return {
+        "alumnos": dict(zip(df_alumnos["id"], df_alumnos["nombre"])) if not df_alumnos.empty else {},
+        "cursos": dict(zip(df_cursos["id"], df_cursos["nombre"])) if not df_cursos.empty else {},
+        "profesores": dict(zip(df_profes["id"], df_profes["usuario"])) if not df_profes.empty else {},
+    }
+
+
+def _ids_archivados(tabla, curso_academico):
+    # id ya guardados en la partición por un intento anterior (p. ej. si falló el borrado)
+    patron = os.path.join(ruta_particion(tabla, curso_academico), "*.parquet")
+    if not glob.glob(patron):
+        return pd.Series([], dtype="int64")
+    return duckdb.sql(f"select id from read_parquet('{patron}')").df()["id"]
+
+
+def _paginas_para_archivo(tabla, filtros, catalogos, estado, ids_previos):
+    for pagina in db_select_paginado(tabla, filtros=filtros):
+        estado["ultimo_id"] = int(pagina["id"].iloc[-1])
+        # Lo ya archivado no se vuelve a escribir: repetir el archivado no duplica filas
+        pagina = pagina[~pagina["id"].isin(ids_previos)]
+        if pagina.empty:
+            continue
+
+        # Guardamos los nombres: los alumnos graduados se borran y el histórico debe seguir legible
+        if tabla == "asistencia":
+            pagina["alumno"] = pagina["alumno_id"].map(catalogos["alumnos"])
+            pagina["curso"] = pagina["curso_id"].map(catalogos["cursos"])
+        else:
+            pagina["maestro"] = pagina["maestro_id"].map(catalogos["profesores"])
+        pagina["fecha"] = pd.to_datetime(pagina["fecha"]).dt.date
+        # El colegio y el curso académico van en la ruta de la partición
+        pagina = pagina.drop(columns=["colegio_id", "curso_academico"], errors="ignore")
+        yield pagina
+
+
+def archivar_temporada(curso_academico, tablas=None, progreso=None):
+    """
+    Copia a Parquet las filas de la temporada y, una vez verificado el fichero,
+    las borra de la tabla viva por tramos. Devuelve {tabla: (archivadas, borradas)}.
+    Se puede repetir sin duplicar filas: las que ya están en la partición solo se borran.
+    progreso(tabla, fase, filas) se llama con fase "archivando" o "borrando".
+    """
+    f_ini, f_fin = rango_temporada(curso_academico)
+    catalogos = _catalogos()
+    marca = datetime.now().strftime("%Y%m%dT%H%M%S")
+    resultado = {}
+
+    for tabla in tablas or TABLAS_ARCHIVABLES:
+        filtros = [("fecha", "gte", f_ini), ("fecha", "lte", f_fin)]
+        estado = {"ultimo_id": None}
+
+        carpeta = ruta_particion(tabla, curso_academico)
+        os.makedirs(carpeta, exist_ok=True)
+        ruta_final = os.path.join(carpeta, f"part-{marca}.parquet")
+        ruta_tmp = ruta_final + ".tmp"
+
+        if progreso:
+            progreso(tabla, "archivando", 0)
+        ids_previos = _ids_archivados(tabla, curso_academico)
+        paginas = _paginas_para_archivo(tabla, filtros, catalogos, estado, ids_previos)
+        filas, _ = escribir_parquet(paginas, ruta_tmp, tabla)
+
+        if filas == 0:
+            if os.path.exists(ruta_tmp):
+                os.remove(ruta_tmp)
+        else:
+            # Solo se borra lo que está comprobado en disco
+            leidas = duckdb.sql(f"select count(*) from read_parquet('{ruta_tmp}')").fetchone()[0]
+            if leidas != filas:
+                os.remove(ruta_tmp)
+                raise ValueError(f"{tabla}: se leyeron {filas} filas pero el fichero contiene {leidas}.")
+            os.replace(ruta_tmp, ruta_final)
+
+        if estado["ultimo_id"] is None:
+            resultado[tabla] = (0, 0)
+            continue
+
+        # Filas insertadas después de leer la temporada tendrán un id mayor: no se tocan
+        filtros_borrado = filtros + [("id", "lte", estado["ultimo_id"])]
+        borradas = db_delete_por_lotes(
+            tabla,
+            filtros_borrado,
+            progreso=(lambda n, tabla=tabla: progreso(tabla, "borrando", n)) if progreso else None
+        )
+        resultado[tabla] = (filas, borradas)
+
+    return resultado
+
+
+# ---------------------------------------------------------
+# CONSULTAS HISTÓRICAS
+# ---------------------------------------------------------
+def consultar_archivo(sql, parametros=None):
+    """
+    Ejecuta una consulta DuckDB sobre el archivo del colegio. Cada tabla
+    archivada está disponible como vista con su mismo nombre y la columna
+    curso_academico ("2025-2026") sacada de la partición.
+    """
+    con = duckdb.connect()
+    try:
+        for tabla in TABLAS_ARCHIVABLES:
+            patron = os.path.join(dir_colegio(), tabla, "*", "*.parquet")
+            if glob.glob(patron):
+                con.execute(
+                    f"create view {tabla} as select * from read_parquet('{patron}', "
+                    "hive_partitioning = true, union_by_name = true, "
+                    "hive_types = {'curso_academico': VARCHAR})"
+                )
+        return con.execute(sql, parametros or []).df()
+    finally:
+        con.close()
+
+
+def resumen_temporada(curso_academico):
+    """
+    Totales de una temporada archivada: comidas y faltas por curso y por mes,
+    y consumo de los maestros.
+    """
+    particion = [_valor_particion(curso_academico)]
+    resumen = {}
+
+    if curso_academico in temporadas_archivadas("asistencia"):
+        resumen["por_curso"] = consultar_archivo("""
+            select curso,
+                   count(*) filter (where asiste) as comidas,
+                   count(*) filter (where not asiste) as faltas
+            from asistencia
+            where curso_academico = ?
+            group by curso
+            order by curso
+        """, particion)
+        resumen["por_mes"] = consultar_archivo("""
+            select strftime(fecha, '%Y-%m') as mes,
+                   count(*) filter (where asiste) as comidas,
+                   count(*) filter (where not asiste) as faltas
+            from asistencia
+            where curso_academico = ?
+            group by mes
+            order by mes
+        """, particion)
+
+    if curso_academico in temporadas_archivadas("maestros_comidas"):
+        resumen["maestros_comidas"] = consultar_archivo("""
+            select maestro, count(*) filter (where come) as comidas
+            from maestros_comidas
+            where curso_academico = ?
+            group by maestro
+            order by maestro
+        """, particion)
+
+    if curso_academico in temporadas_archivadas("maestros_agua"):
+        resumen["maestros_agua"] = consultar_archivo("""
+            select maestro, sum(agua_025) as agua_025, sum(agua_060) as agua_060
+            from maestros_agua
+            where curso_academico = ?
+            group by maestro
+            order by maestro
+        """, particion)
+
+    return resumen
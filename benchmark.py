@@ -0,0 +1,267 @@
+# ---------------------------------------------------------
+# BENCHMARK DE ACCESO A DATOS E INFORMES
+# ---------------------------------------------------------
+# Mide las lecturas de datos y los generadores de informes de la app sobre
+# datos sintéticos deterministas (datos_sinteticos.py) cargados en un cliente
+# en memoria o en SQLite: no necesita red ni Supabase.
+#
+#   python benchmark.py                          # 1, 5 y 20 colegios
+#   python benchmark.py --colegios 1 --repeticiones 5
+#   python benchmark.py --backend sqlite
+#   python benchmark.py --comparar benchmarks/antes.json benchmarks/despues.json
+#
+# Cada ejecución guarda sus resultados en benchmarks/<fecha>-<commit>.json
+# para poder comparar versiones.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+import datos
+from datos import db_select, db_select_paginado
+from tipos import tipar
+from cliente_memoria import ClienteMemoria
+from cliente_sqlite import ClienteSQLite
+from datos_sinteticos import generar
+from informes import pdf_informe_mensual, pdf_informe_faltas, pdf_cuadrante_maestros, pdf_facturas_maestros
+from promocion import alumnos_promocionables, aplicar_promocion
+
+DIR_RESULTADOS = "benchmarks"
+
+# Almacenamientos que se pueden medir (ver almacen.py)
+BACKENDS = ("memoria", "sqlite")
+
+# Mes de la temporada sintética 2025/2026 que se usa en los informes mensuales
+AÑO, MES = 2026, 3
+F_INI, F_FIN = "2026-03-01", "2026-03-31"
+
+PRECIOS = (4.50, 0.25, 0.60)
+
+
+def _version():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+
+# ---------------------------------------------------------
+# PRUEBAS
+# ---------------------------------------------------------
+# Cada prueba recibe el contexto y devuelve (filas, bytes) de lo que produce.
+def _asistencia_mes(asiste):
+    return datos.supabase.table("asistencia")\
+        .select("alumno_id, fecha, asiste")\
+        .gte("fecha", F_INI)\
+        .lte("fecha", F_FIN)\
+        .eq("asiste", asiste)\
+        .execute().data
+
+
+def prueba_select_alumnos(ctx):
+    return len(db_select("alumnos")), None
+
+
+def prueba_select_asistencia(ctx):
+    # Gestión de asistencias lee la tabla entera
+    return len(db_select("asistencia")), None
+
+
+def prueba_paginado_asistencia(ctx):
+    return sum(len(p) for p in db_select_paginado("asistencia")), None
+
+
+def prueba_asistencia_mes(ctx):
+    return len(_asistencia_mes(True)), None
+
+
+def prueba_informe_mensual(ctx):
+    pdf = pdf_informe_mensual(ctx["asis_mes"], ctx["alumnos"], ctx["cursos"], MES, AÑO)
+    return len(ctx["asis_mes"]), len(pdf)
+
+
+def prueba_informe_faltas(ctx):
+    pdf = pdf_informe_faltas(ctx["faltas_mes"], ctx["alumnos"], ctx["cursos"], MES, AÑO)
+    return len(ctx["faltas_mes"]), len(pdf)
+
+
+def prueba_cuadrante(ctx):
+    pdf = pdf_cuadrante_maestros(
+        ctx["profesores"], ctx["comidas"], ctx["agua"],
+        date.fromisoformat(F_INI), date.fromisoformat(F_FIN)
+    )
+    return len(ctx["profesores"]), len(pdf or b"")
+
+
+def prueba_facturas(ctx):
+    pdf, n = pdf_facturas_maestros(
+        ctx["profesores"].to_dict(orient="records"), ctx["comidas"], ctx["agua"], F_INI, F_FIN, *PRECIOS
+    )
+    return n, len(pdf or b"")
+
+
+def preparar_promocion(ctx):
+    # La promoción modifica alumnos y promociones_log: se parte siempre del mismo estado
+    ctx["cliente"].cargar("alumnos", ctx["tablas"]["alumnos"])
+    ctx["cliente"].cargar("promociones_log", ctx["tablas"]["promociones_log"])
+
+
+def prueba_promocion(ctx):
+    promocionables = alumnos_promocionables(db_select("alumnos"), db_select("cursos"))
+    aplicar_promocion(promocionables, fecha="2026-06-30")
+    return len(promocionables), None
+
+
+# (nombre, función, preparación que no se cronometra)
+PRUEBAS = [
+    ("db_select alumnos", prueba_select_alumnos, None),
+    ("db_select asistencia (tabla completa)", prueba_select_asistencia, None),
+    ("db_select_paginado asistencia", prueba_paginado_asistencia, None),
+    ("asistencia de un mes", prueba_asistencia_mes, None),
+    ("informe mensual", prueba_informe_mensual, None),
+    ("informe de faltas (todos los cursos)", prueba_informe_faltas, None),
+    ("cuadrante de maestros (un mes)", prueba_cuadrante, None),
+    ("facturas masivas (un mes)", prueba_facturas, None),
+    ("promoción de curso", prueba_promocion, preparar_promocion),
+]
+
+
+# ---------------------------------------------------------
+# EJECUCIÓN
+# ---------------------------------------------------------
+def crear_cliente(backend, tablas):
+    if backend == "sqlite":
+        cliente = ClienteSQLite(":memory:")
+        for nombre, df in tablas.items():
+            cliente.cargar(nombre, df)
+        return cliente
+    return ClienteMemoria(tablas)
+
+
+def contexto(colegios, semilla, backend="memoria"):
+    """
+    Genera los datos, los carga en el almacenamiento indicado limitado al
+    colegio 1 y precarga lo que necesitan los generadores de informes.
+    """
+    tablas = generar(colegios, semilla=semilla)
+    cliente = crear_cliente(backend, tablas)
+    datos.configurar_cliente(datos.ClienteColegio(cliente, colegio_id=1))
+
+    ctx = {"tablas": tablas, "cliente": cliente}
+    ctx["alumnos"] = db_select("alumnos")
+    ctx["cursos"] = db_select("cursos")
+    ctx["profesores"] = db_select("profesores")
+    ctx["comidas"] = db_select("maestros_comidas")
+    ctx["agua"] = db_select("maestros_agua")
+    ctx["asis_mes"] = tipar("asistencia", pd.DataFrame(_asistencia_mes(True)))
+    ctx["faltas_mes"] = _asistencia_mes(False)
+    return ctx
+
+
+def ejecutar(colegios, repeticiones, semilla, filtro=None, backend="memoria"):
+    resultados = []
+    for n in colegios:
+        print(f"\n== {n} colegio(s) ==")
+        inicio = time.perf_counter()
+        ctx = contexto(n, semilla, backend)
+        filas_totales = {t: len(df) for t, df in ctx["tablas"].items()}
+        print(f"   datos generados en {time.perf_counter() - inicio:.1f} s "
+              f"({filas_totales['asistencia']} filas de asistencia)")
+
+        for nombre, prueba, preparar in PRUEBAS:
+            if filtro and filtro not in nombre:
+                continue
+            tiempos = []
+            for _ in range(repeticiones):
+                if preparar:
+                    preparar(ctx)
+                t0 = time.perf_counter()
+                filas, tam = prueba(ctx)
+                tiempos.append(time.perf_counter() - t0)
+
+            resultado = {
+                "colegios": n,
+                "prueba": nombre,
+                "filas": filas,
+                "bytes": tam,
+                "min_s": round(min(tiempos), 6),
+                "mediana_s": round(statistics.median(tiempos), 6),
+                "max_s": round(max(tiempos), 6),
+            }
+            resultados.append(resultado)
+            print(f"   {nombre:<42} {resultado['mediana_s'] * 1000:>10.1f} ms   ({filas} filas)")
+    return resultados
+
+
+def guardar(resultados, args):
+    os.makedirs(DIR_RESULTADOS, exist_ok=True)
+    version = _version()
+    informe = {
+        "version": version,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "backend": args.backend,
+        "semilla": args.semilla,
+        "repeticiones": args.repeticiones,
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    ruta = os.path.join(DIR_RESULTADOS, f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{version}.json")
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    return ruta
+
+
+def comparar(ruta_a, ruta_b):
+    """
+    Tabla con la mediana de cada prueba en dos ejecuciones y la variación.
+    """
+    with open(ruta_a, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(ruta_b, encoding="utf-8") as f:
+        b = json.load(f)
+
+    clave = lambda r: (r["colegios"], r["prueba"])
+    medianas_a = {clave(r): r["mediana_s"] for r in a["resultados"]}
+    print(f"{a.get('backend', 'memoria')} -> {b.get('backend', 'memoria')}")
+    print(f"{'colegios':>8}  {'prueba':<42} {a['version']:>12} {b['version']:>12}  variación")
+    for r in b["resultados"]:
+        antes = medianas_a.get(clave(r))
+        if antes is None:
+            continue
+        variacion = (r["mediana_s"] - antes) / antes * 100 if antes else 0
+        print(f"{r['colegios']:>8}  {r['prueba']:<42} {antes * 1000:>10.1f}ms {r['mediana_s'] * 1000:>10.1f}ms  {variacion:+.0f} %")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de datos e informes del comedor (sin red).")
+    parser.add_argument("--colegios", type=int, nargs="+", default=[1, 5, 20], help="Tamaños a medir (número de colegios)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--backend", choices=BACKENDS, default="memoria", help="Almacenamiento sobre el que se mide")
+    parser.add_argument("--prueba", help="Ejecuta solo las pruebas cuyo nombre contenga este texto")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DESPUES"), help="Compara dos ficheros de resultados")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    # Los informes cargan logo.png con ruta relativa
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    resultados = ejecutar(args.colegios, args.repeticiones, args.semilla, args.prueba, args.backend)
+    print(f"\nResultados guardados en {guardar(resultados, args)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# ---------------------------------------------------------
+# BÚSQUEDA DE ALUMNOS Y PROFESORES
+# ---------------------------------------------------------
+# Índice de trigramas sobre los nombres normalizados (sin tildes ni
+# mayúsculas): "Ruíz" y "ruiz" son el mismo nombre. Buscar solo recorre los
+# nombres que comparten algún trigrama con lo escrito, no el catálogo entero,
+# y los duplicados exactos se encuentran con una sola búsqueda en un dict.
+#
+# Hay un índice por colegio y catálogo, común a todas las sesiones. Cada
+# catálogo tiene un número de versión: las altas, cambios y bajas hechos desde
+# la app actualizan el índice en el momento (actualizar/eliminar); los cambios
+# masivos (restaurar una copia, importar) lo invalidan y se reconstruye al
+# volver a usarlo. El índice guarda además datos.version_tablas del catálogo:
+# los cambios hechos desde fuera de la app (panel de Supabase, otro proceso)
+# lo reconstruyen en cuanto se ven, sin esperar a EDAD_MAXIMA.
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+import streamlit as st
+
+import datos
+
+# Catálogo -> columna con el nombre
+CATALOGOS = {"alumnos": "nombre", "profesores": "usuario"}
+
+# Aunque no cambie ninguna versión, el índice se reconstruye pasado este
+# tiempo (sin la migración 007 no se ven los cambios hechos desde fuera)
+EDAD_MAXIMA = 600
+
+# Parecido mínimo (Jaccard de trigramas) para avisar de un posible duplicado
+UMBRAL_PARECIDO = 0.75
+
+# Con menos trigramas (una o dos letras escritas) se recorren todos los nombres
+MIN_TRIGRAMAS = 3
+
+
+def normalizar(texto):
+    if not isinstance(texto, str):
+        return ""
+    texto = texto.strip().lower()
+    texto = unicodedata.normalize("NFD", texto)
+    texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
+    return texto
+
+
+def trigramas(texto_normalizado):
+    """
+    Trigramas de cada palabra con un espacio delante y detrás, así "ru" encuentra
+    las palabras que empiezan por "ru" y el orden de las palabras no importa.
+    """
+    resultado = set()
+    for palabra in texto_normalizado.replace(",", " ").split():
+        palabra = f" {palabra} "
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+class IndiceNombres:
+    """
+    Índice {trigrama: ids} y {nombre normalizado: ids} que se actualiza fila a fila.
+    """
+
+    def __init__(self, registros=()):
+        self._nombres = {}
+        self._normalizados = {}
+        self._trigramas = {}
+        self._por_nombre = defaultdict(set)
+        self._por_trigrama = defaultdict(set)
+        for id_, nombre in registros:
+            self.agregar(id_, nombre)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def nombre(self, id_):
+        return self._nombres.get(id_)
+
+    def ids(self):
+        return list(self._nombres)
+
+    def normalizados(self):
+        """
+        Conjunto de nombres normalizados (para comprobar muchos nombres de una vez con isin).
+        """
+        return set(self._por_nombre)
+
+    def agregar(self, id_, nombre):
+        """
+        Alta o cambio de nombre de un id.
+        """
+        if id_ in self._nombres:
+            self.quitar(id_)
+        normalizado = normalizar(nombre)
+        tris = trigramas(normalizado)
+        self._nombres[id_] = nombre
+        self._normalizados[id_] = normalizado
+        self._trigramas[id_] = tris
+        self._por_nombre[normalizado].add(id_)
+        for t in tris:
+            self._por_trigrama[t].add(id_)
+
+    def quitar(self, id_):
+        if id_ not in self._nombres:
+            return
+        normalizado = self._normalizados.pop(id_)
+        self._por_nombre[normalizado].discard(id_)
+        if not self._por_nombre[normalizado]:
+            del self._por_nombre[normalizado]
+        for t in self._trigramas.pop(id_):
+            self._por_trigrama[t].discard(id_)
+            if not self._por_trigrama[t]:
+                del self._por_trigrama[t]
+        del self._nombres[id_]
+
+    def _candidatos(self, tris):
+        # Cuántos trigramas comparte cada id con la consulta (solo los ids que comparten alguno).
+        # tuple() copia cada lista de una vez por si otra sesión actualiza el índice a la vez.
+        comunes = defaultdict(int)
+        for t in tris:
+            for id_ in tuple(self._por_trigrama.get(t, ())):
+                comunes[id_] += 1
+        return comunes
+
+    def buscar(self, texto, limite=50):
+        """
+        Ids de los nombres que contienen lo escrito (en cualquier orden de
+        palabras y sin tildes), los más parecidos primero. Vacío si no se ha escrito nada.
+        """
+        consulta = normalizar(texto)
+        tris = trigramas(consulta)
+        if not tris:
+            return []
+        palabras = consulta.replace(",", " ").split()
+        if len(tris) < MIN_TRIGRAMAS:
+            return self._buscar_recorriendo(palabras, limite)
+        puntuados = []
+        for id_, n in self._candidatos(tris).items():
+            # Todas las palabras escritas aparecen en el nombre: primero; si no, por parecido
+            contiene = all(p in self._normalizados[id_] for p in palabras)
+            if contiene or n / len(tris) >= 0.6:
+                puntuados.append((not contiene, -n / len(tris), self._normalizados[id_], id_))
+        puntuados.sort()
+        return [p[-1] for p in puntuados[:limite]]
+
+    def _buscar_recorriendo(self, palabras, limite):
+        # " m " solo coincide con la palabra "m": con una o dos letras se buscan
+        # a mano, primero los nombres con alguna palabra que empieza así
+        puntuados = []
+        for id_, normalizado in tuple(self._normalizados.items()):
+            if all(p in normalizado for p in palabras):
+                prefijo = any(w.startswith(palabras[0]) for w in normalizado.replace(",", " ").split())
+                puntuados.append((not prefijo, normalizado, id_))
+        puntuados.sort()
+        return [p[-1] for p in puntuados[:limite]]
+
+    def duplicados(self, nombre, umbral=UMBRAL_PARECIDO):
+        """
+        (iguales, parecidos): ids con el mismo nombre normalizado e ids con un
+        nombre muy parecido (erratas, una letra de más...).
+        """
+        normalizado = normalizar(nombre)
+        iguales = sorted(self._por_nombre.get(normalizado, ()))
+        tris = trigramas(normalizado)
+        parecidos = []
+        for id_, n in self._candidatos(tris).items():
+            if id_ in iguales:
+                continue
+            jaccard = n / len(tris | self._trigramas[id_])
+            if jaccard >= umbral:
+                parecidos.append((-jaccard, id_))
+        return iguales, [id_ for _, id_ in sorted(parecidos)]
+
+
+# ---------------------------------------------------------
+# ÍNDICES COMPARTIDOS POR COLEGIO Y CATÁLOGO
+# ---------------------------------------------------------
+_indices = {}
+_versiones = defaultdict(int)
+_cerrojo = threading.RLock()
+
+
+def _clave(catalogo):
+    return catalogo, datos.colegio_actual()
+
+
+def version(catalogo):
+    return _versiones[_clave(catalogo)]
+
+
+def _version_completa(catalogo, clave):
+    # Versión manual del índice + versión de la tabla (ver datos.version_tablas)
+    return _versiones[clave], datos.version_tablas(catalogo)
+
+
+def _version_tras_cambio(catalogo, clave):
+    # El cambio ya está escrito y su disparador ha subido versiones_tablas: se
+    # vuelve a leer ahora para que, al caducar TTL_VERSIONES, no parezca un
+    # cambio externo y se reconstruya el índice entero
+    datos.refrescar_versiones()
+    return _version_completa(catalogo, clave)
+
+
+def indice(catalogo):
+    """
+    Índice del catálogo ("alumnos" o "profesores") del colegio de la sesión;
+    se construye con una sola consulta (id y nombre) si no existe, si se
+    invalidó, si la tabla ha cambiado o si tiene más de EDAD_MAXIMA segundos.
+    """
+    clave = _clave(catalogo)
+    with _cerrojo:
+        version_actual = _version_completa(catalogo, clave)
+        actual = _indices.get(clave)
+        if actual is not None:
+            construido, version_indice, idx = actual
+            if version_indice == version_actual and time.monotonic() - construido < EDAD_MAXIMA:
+                return idx
+
+        columna = CATALOGOS[catalogo]
+        filas = datos.supabase.table(catalogo).select(f"id, {columna}").execute().data or []
+        idx = IndiceNombres((f["id"], f[columna]) for f in filas)
+        _indices[clave] = (time.monotonic(), version_actual, idx)
+        return idx
+
+
+def actualizar(catalogo, id_, nombre):
+    """
+    Alta o cambio de nombre hecho desde la app (después de escribirlo): se
+    aplica al índice sin reconstruirlo.
+    """
+    clave = _clave(catalogo)
+    with _cerrojo:
+        _versiones[clave] += 1
+        if clave in _indices:
+            construido, _, idx = _indices[clave]
+            idx.agregar(id_, nombre)
+            _indices[clave] = (construido, _version_tras_cambio(catalogo, clave), idx)
+
+
+def eliminar(catalogo, ids):
+    clave = _clave(catalogo)
+    with _cerrojo:
+        _versiones[clave] += 1
+        if clave in _indices:
+            construido, _, idx = _indices[clave]
+            for id_ in ids:
+                idx.quitar(id_)
+            _indices[clave] = (construido, _version_tras_cambio(catalogo, clave), idx)
+
+
+def invalidar(catalogo):
+    """
+    Tras cambios masivos: el índice se reconstruye la próxima vez que se use.
+    """
+    with _cerrojo:
+        _versiones[_clave(catalogo)] += 1
+
+
+# ---------------------------------------------------------
+# SELECTOR CON BÚSQUEDA
+# ---------------------------------------------------------
+def selector(etiqueta, catalogo, key, etiquetas=None, limite=50):
+    """
+    Cuadro de búsqueda + selectbox con los ids que coinciden (todos, ordenados,
+    si no se ha escrito nada). etiquetas: {id: texto a mostrar}; si no se
+    indica, el nombre del índice. Devuelve el id elegido o None.
+    """
+    idx = indice(catalogo)
+    if etiquetas is None:
+        etiquetas = {id_: idx.nombre(id_) for id_ in idx.ids()}
+
+    texto = st.text_input(f"Buscar ({etiqueta.lower()})", key=f"{key}_buscar", placeholder="Escribe parte del nombre")
+    if texto.strip():
+        opciones = [id_ for id_ in idx.buscar(texto, limite) if id_ in etiquetas]
+        if not opciones:
+            st.caption("Ningún nombre coincide con la búsqueda.")
+    else:
+        opciones = sorted(etiquetas, key=lambda id_: normalizar(etiquetas[id_]))
+
+    return st.selectbox(etiqueta, opciones, format_func=etiquetas.get, key=key)
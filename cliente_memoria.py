@@ -0,0 +1,170 @@
+# ---------------------------------------------------------
+# CLIENTE EN MEMORIA (SIN RED)
+# ---------------------------------------------------------
+# Implementa la interfaz de almacen.py sin base de datos: cada tabla se guarda
+# como un DataFrame y los filtros se evalúan de forma vectorizada, así sirve
+# para benchmark.py con cientos de miles de filas. Los datos no se guardan.
+import pandas as pd
+
+from almacen import ConsultaBase, TablaBase, Respuesta, RpcSinEfecto, columnas_de, like_a_regex
+
+
+def _a_registros(df):
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict(orient="records")
+
+
+def _mismo_tipo(serie, valor):
+    # PostgREST compara "3" con una columna entera como 3: hacemos lo mismo
+    if isinstance(valor, str) and pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        try:
+            return float(valor)
+        except ValueError:
+            return valor
+    return valor
+
+
+class _Consulta(ConsultaBase):
+    # --- ejecución ---
+    def _mascara(self, df):
+        mascara = pd.Series(True, index=df.index)
+        for columna, operador, valor in self._filtros:
+            if columna not in df.columns:
+                raise KeyError(f"La columna {columna} no existe en {self._tabla}.")
+            serie = df[columna]
+            if operador == "in":
+                mascara &= serie.isin([_mismo_tipo(serie, v) for v in valor])
+                continue
+            if operador == "ilike":
+                mascara &= serie.notna() & serie.astype(str).str.fullmatch(like_a_regex(valor), case=False)
+                continue
+            valor = _mismo_tipo(serie, valor)
+            if operador == "eq":
+                mascara &= serie == valor
+            elif operador == "neq":
+                mascara &= serie != valor
+            elif operador == "gt":
+                mascara &= serie > valor
+            elif operador == "gte":
+                mascara &= serie >= valor
+            elif operador == "lt":
+                mascara &= serie < valor
+            elif operador == "lte":
+                mascara &= serie <= valor
+        return mascara
+
+    def _ejecutar_select(self):
+        df = self._cliente._df(self._tabla)
+        df = df[self._mascara(df)]
+        total = len(df)
+        if self._orden:
+            df = df.sort_values([c for c, _ in self._orden], ascending=[not d for _, d in self._orden])
+        if self._desde or self._limite is not None:
+            df = df.iloc[self._desde:None if self._limite is None else self._desde + self._limite]
+        if columnas_de(self._columnas):
+            df = df.reindex(columns=columnas_de(self._columnas))
+        return Respuesta(_a_registros(df), total if self._count else None)
+
+    def _ejecutar_insert(self):
+        filas = self._cliente._insertar(self._tabla, self._valores)
+        return Respuesta(filas)
+
+    def _ejecutar_upsert(self):
+        filas = self._cliente._upsert(self._tabla, self._valores, columnas_de(self._on_conflict), self._ignore_duplicates)
+        return Respuesta(filas)
+
+    def _ejecutar_update(self):
+        df = self._cliente._df(self._tabla)
+        mascara = self._mascara(df)
+        for columna, valor in self._valores.items():
+            if columna not in df.columns:
+                df[columna] = None
+            if isinstance(valor, list):
+                # Columnas de tipo array (p. ej. dietas): una lista por celda
+                for i in df.index[mascara]:
+                    df.at[i, columna] = valor
+            else:
+                df.loc[mascara, columna] = valor
+        return Respuesta(_a_registros(df[mascara]))
+
+    def _ejecutar_delete(self):
+        df = self._cliente._df(self._tabla)
+        mascara = self._mascara(df)
+        borradas = _a_registros(df[mascara])
+        self._cliente._tablas[self._tabla] = df[~mascara].reset_index(drop=True)
+        return Respuesta(borradas)
+
+
+class _Tabla(TablaBase):
+    consulta = _Consulta
+
+
+class ClienteMemoria:
+    """
+    Base de datos en memoria con la misma interfaz fluida que el cliente de Supabase.
+    """
+
+    def __init__(self, tablas=None):
+        self._tablas = {}
+        for nombre, filas in (tablas or {}).items():
+            self.cargar(nombre, filas)
+
+    def cargar(self, nombre, filas):
+        """
+        Sustituye el contenido de una tabla (lista de dicts o DataFrame).
+        """
+        self._tablas[nombre] = filas.reset_index(drop=True) if isinstance(filas, pd.DataFrame) else pd.DataFrame(filas)
+
+    def _df(self, nombre):
+        if nombre not in self._tablas:
+            self._tablas[nombre] = pd.DataFrame(columns=["id"])
+        return self._tablas[nombre]
+
+    def _siguiente_id(self, df):
+        if df.empty or "id" not in df.columns or df["id"].isna().all():
+            return 1
+        return int(df["id"].max()) + 1
+
+    def _insertar(self, nombre, filas):
+        filas = [dict(f) for f in ([filas] if isinstance(filas, dict) else filas)]
+        if not filas:
+            return []
+        df = self._df(nombre)
+        siguiente = self._siguiente_id(df)
+        for f in filas:
+            if f.get("id") is None:
+                f["id"] = siguiente
+                siguiente += 1
+        nuevas = pd.DataFrame(filas)
+        self._tablas[nombre] = nuevas if df.empty else pd.concat([df, nuevas], ignore_index=True)
+        return filas
+
+    def _upsert(self, nombre, filas, claves, ignorar_duplicados):
+        filas = [dict(f) for f in ([filas] if isinstance(filas, dict) else filas)]
+        df = self._df(nombre)
+        if df.empty or any(c not in df.columns for c in claves):
+            return self._insertar(nombre, filas)
+
+        posiciones = {k: i for i, k in enumerate(df[claves].itertuples(index=False, name=None))}
+        nuevas = []
+        for f in filas:
+            clave = tuple(_mismo_tipo(df[c], f.get(c)) for c in claves)
+            if clave in posiciones:
+                if ignorar_duplicados:
+                    continue
+                fila = posiciones[clave]
+                for columna, valor in f.items():
+                    if columna not in df.columns:
+                        df[columna] = None
+                    df.at[df.index[fila], columna] = valor
+            else:
+                nuevas.append(f)
+        self._insertar(nombre, nuevas)
+        return filas
+
+    def table(self, nombre):
+        return _Tabla(self, nombre)
+
+    def rpc(self, funcion, parametros=None):
+        # Las funciones SQL (p. ej. reajustar_secuencias) no tienen efecto en memoria
+        return RpcSinEfecto()
@@ -0,0 +1,309 @@
+# ---------------------------------------------------------
+# CLIENTE SQLITE (ALMACENAMIENTO LOCAL)
+# ---------------------------------------------------------
+# Implementa la interfaz de almacen.py sobre un fichero SQLite, para usar la
+# app sin conexión (BACKEND = "sqlite" en secrets.toml) o en un colegio que
+# no quiera depender de Supabase. Las consultas fluidas se traducen a SQL
+# con parámetros; el esquema está en sql/sqlite/esquema.sql.
+#
+#   python cliente_sqlite.py comedor.db --admin admin   # crea la base y el usuario admin
+import argparse
+import getpass
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
+import pandas as pd
+
+from almacen import ConsultaBase, TablaBase, Respuesta, RpcSinEfecto, columnas_de, like_a_regex
+
+ESQUEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "sqlite", "esquema.sql")
+
+# Columnas que se añadieron al esquema después de crear la tabla: en una
+# base de datos anterior "create table if not exists" no las crea
+COLUMNAS_NUEVAS = {
+    "cursos": {"curso_siguiente_id": "integer references cursos(id) on delete set null"},
+}
+
+# Operador de la interfaz -> operador SQL
+_SQL = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+@lru_cache(maxsize=256)
+def _regex_like(patron):
+    return re.compile(like_a_regex(patron), re.IGNORECASE | re.DOTALL)
+
+
+def _ilike(valor, patron):
+    # LIKE de SQLite solo ignora mayúsculas en ASCII; ILIKE de Postgres también en "Á"/"á"
+    if valor is None or patron is None:
+        return None
+    return _regex_like(patron).fullmatch(str(valor)) is not None
+
+
+def _valor(valor):
+    """
+    Valor de Python/pandas -> valor que acepta sqlite3.
+    """
+    if hasattr(valor, "tolist"):
+        # Escalares y arrays de numpy (int64, bool_, listas de dietas en Parquet...)
+        valor = valor.tolist()
+    if isinstance(valor, (list, tuple)):
+        return json.dumps(list(valor), ensure_ascii=False)
+    if pd.isna(valor):
+        return None
+    if isinstance(valor, bool):
+        return int(valor)
+    if isinstance(valor, datetime):
+        return valor.date().isoformat() if valor.time() == datetime.min.time() else valor.isoformat(sep=" ")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def _array_postgres(texto):
+    """
+    Literal de array de Postgres ({a,"b c"}) -> lista, como lo acepta PostgREST
+    en las columnas text[] (así llegan las dietas al restaurar una copia CSV).
+    """
+    elementos, actual, entre_comillas, escapado, citado = [], "", False, False, False
+    for caracter in texto.strip()[1:-1]:
+        if escapado:
+            actual += caracter
+            escapado = False
+        elif caracter == "\\":
+            escapado = True
+        elif caracter == '"':
+            entre_comillas = not entre_comillas
+            citado = True
+        elif caracter == "," and not entre_comillas:
+            elementos.append(actual if citado else actual.strip())
+            actual, citado = "", False
+        else:
+            actual += caracter
+    if actual or citado:
+        elementos.append(actual if citado else actual.strip())
+    return elementos
+
+
+class _Consulta(ConsultaBase):
+
+    def _info(self):
+        return self._cliente._columnas(self._tabla)
+
+    def _col(self, columna):
+        # Solo nombres de columna reales: nunca se concatena texto del usuario en el SQL
+        if columna not in self._info():
+            raise KeyError(f"La columna {columna} no existe en {self._tabla}.")
+        return f'"{columna}"'
+
+    def _valor_de(self, columna, valor):
+        if self._info()[columna] == "json" and isinstance(valor, str) and valor.startswith("{"):
+            valor = _array_postgres(valor)
+        return _valor(valor)
+
+    def _where(self):
+        condiciones, parametros = [], []
+        for columna, operador, valor in self._filtros:
+            if operador == "in":
+                if not valor:
+                    condiciones.append("0")
+                    continue
+                condiciones.append(f"{self._col(columna)} in ({', '.join('?' * len(valor))})")
+                parametros.extend(_valor(v) for v in valor)
+            elif operador == "ilike":
+                condiciones.append(f"ilike({self._col(columna)}, ?)")
+                parametros.append(valor)
+            else:
+                condiciones.append(f"{self._col(columna)} {_SQL[operador]} ?")
+                parametros.append(_valor(valor))
+        return (" where " + " and ".join(condiciones)) if condiciones else "", parametros
+
+    def _ejecutar_select(self):
+        columnas = columnas_de(self._columnas)
+        lista = ", ".join(self._col(c) for c in columnas) if columnas else "*"
+        where, parametros = self._where()
+        sql = f'select {lista} from "{self._tabla}"{where}'
+        if self._orden:
+            # Mismo orden de nulos que PostgREST: al final en ascendente, al principio en descendente
+            sql += " order by " + ", ".join(
+                f"{self._col(c)} {'desc nulls first' if d else 'asc nulls last'}" for c, d in self._orden
+            )
+        if self._limite is not None or self._desde:
+            sql += f" limit {-1 if self._limite is None else int(self._limite)} offset {int(self._desde)}"
+
+        filas = self._cliente._consultar(self._tabla, sql, parametros)
+        total = None
+        if self._count:
+            total = self._cliente._escalar(f'select count(*) from "{self._tabla}"{where}', parametros)
+        return Respuesta(filas, total)
+
+    def _insertar(self, fila, conflicto=""):
+        columnas = list(fila)
+        sql = (f'insert into "{self._tabla}" ({", ".join(self._col(c) for c in columnas)}) '
+               f'values ({", ".join("?" * len(columnas))}){conflicto} returning *')
+        return sql, [self._valor_de(c, fila[c]) for c in columnas]
+
+    def _ejecutar_insert(self):
+        sentencias = [self._insertar(f) for f in self._filas()]
+        return Respuesta(self._cliente._modificar(self._tabla, sentencias))
+
+    def _ejecutar_upsert(self):
+        claves = columnas_de(self._on_conflict)
+        objetivo = ", ".join(self._col(c) for c in claves)
+        sentencias = []
+        for fila in self._filas():
+            resto = [c for c in fila if c not in claves]
+            if self._ignore_duplicates or not resto:
+                conflicto = f" on conflict ({objetivo}) do nothing"
+            else:
+                conflicto = (f" on conflict ({objetivo}) do update set "
+                             + ", ".join(f"{self._col(c)} = excluded.{self._col(c)}" for c in resto))
+            sentencias.append(self._insertar(fila, conflicto))
+        return Respuesta(self._cliente._modificar(self._tabla, sentencias))
+
+    def _ejecutar_update(self):
+        valores = dict(self._valores)
+        where, parametros = self._where()
+        asignaciones = ", ".join(f"{self._col(c)} = ?" for c in valores)
+        sql = f'update "{self._tabla}" set {asignaciones}{where} returning *'
+        return Respuesta(self._cliente._modificar(self._tabla, [(sql, [self._valor_de(c, v) for c, v in valores.items()] + parametros)]))
+
+    def _ejecutar_delete(self):
+        where, parametros = self._where()
+        sql = f'delete from "{self._tabla}"{where} returning *'
+        return Respuesta(self._cliente._modificar(self._tabla, [(sql, parametros)]))
+
+
+class _Tabla(TablaBase):
+    consulta = _Consulta
+
+
+class ClienteSQLite:
+    """
+    Base de datos SQLite con la misma interfaz fluida que el cliente de Supabase.
+    ruta puede ser ":memory:" (p. ej. para benchmark.py).
+    """
+
+    def __init__(self, ruta="comedor.db"):
+        self.ruta = ruta
+        # Streamlit atiende cada sesión en un hilo: una conexión compartida protegida con un cerrojo
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._cerrojo = threading.RLock()
+        with self._cerrojo, self._conexion:
+            if ruta != ":memory:":
+                self._conexion.execute("pragma journal_mode = wal")
+            self._conexion.execute("pragma foreign_keys = on")
+            self._conexion.create_function("ilike", 2, _ilike, deterministic=True)
+            with open(ESQUEMA, encoding="utf-8") as f:
+                self._conexion.executescript(f.read())
+            for tabla, columnas in COLUMNAS_NUEVAS.items():
+                existentes = {fila[1] for fila in self._conexion.execute(f'pragma table_info("{tabla}")')}
+                for columna, definicion in columnas.items():
+                    if columna not in existentes:
+                        self._conexion.execute(f'alter table "{tabla}" add column "{columna}" {definicion}')
+        self._tipos = {}
+
+    # --- esquema ---
+    def _columnas(self, tabla):
+        """
+        {columna: tipo declarado} de la tabla (se lee una vez).
+        """
+        if tabla not in self._tipos:
+            with self._cerrojo:
+                info = self._conexion.execute(f'pragma table_info("{tabla.replace(chr(34), "")}")').fetchall()
+            if not info:
+                raise KeyError(f"La tabla {tabla} no existe.")
+            self._tipos[tabla] = {fila[1]: fila[2].lower() for fila in info}
+        return self._tipos[tabla]
+
+    def _a_dict(self, tabla, cursor, filas):
+        tipos = self._columnas(tabla)
+        nombres = [d[0] for d in cursor.description]
+        conversiones = []
+        for i, nombre in enumerate(nombres):
+            if tipos.get(nombre) == "boolean":
+                conversiones.append((i, lambda v: None if v is None else bool(v)))
+            elif tipos.get(nombre) == "json":
+                conversiones.append((i, lambda v: None if v is None else json.loads(v)))
+        registros = []
+        for fila in filas:
+            fila = list(fila)
+            for i, convertir in conversiones:
+                fila[i] = convertir(fila[i])
+            registros.append(dict(zip(nombres, fila)))
+        return registros
+
+    # --- ejecución ---
+    def _consultar(self, tabla, sql, parametros):
+        with self._cerrojo:
+            cursor = self._conexion.execute(sql, parametros)
+            return self._a_dict(tabla, cursor, cursor.fetchall())
+
+    def _escalar(self, sql, parametros):
+        with self._cerrojo:
+            return self._conexion.execute(sql, parametros).fetchone()[0]
+
+    def _modificar(self, tabla, sentencias):
+        """
+        Ejecuta las sentencias en una sola transacción (como una petición a PostgREST)
+        y devuelve las filas afectadas.
+        """
+        resultado = []
+        with self._cerrojo, self._conexion:
+            # Como en Postgres, las claves ajenas se comprueban al final y no fila a fila
+            self._conexion.execute("pragma defer_foreign_keys = on")
+            for sql, parametros in sentencias:
+                cursor = self._conexion.execute(sql, parametros)
+                resultado.extend(self._a_dict(tabla, cursor, cursor.fetchall()))
+        return resultado
+
+    def cargar(self, nombre, filas):
+        """
+        Sustituye el contenido de una tabla (lista de dicts o DataFrame) de una vez.
+        """
+        df = filas if isinstance(filas, pd.DataFrame) else pd.DataFrame(filas)
+        columnas = [c for c in df.columns if c in self._columnas(nombre)]
+        sql = (f'insert into "{nombre}" ({", ".join(f"{chr(34)}{c}{chr(34)}" for c in columnas)}) '
+               f'values ({", ".join("?" * len(columnas))})')
+        valores = df[columnas].astype(object).itertuples(index=False, name=None)
+        with self._cerrojo, self._conexion:
+            # Las claves ajenas se comprueban al confirmar: una fila puede apuntar a otra
+            # de la misma tabla que viene después (p. ej. cursos.curso_siguiente_id)
+            self._conexion.execute("pragma defer_foreign_keys = on")
+            self._conexion.execute(f'delete from "{nombre}"')
+            if columnas:
+                self._conexion.executemany(sql, ([_valor(v) for v in fila] for fila in valores))
+
+    def table(self, nombre):
+        return _Tabla(self, nombre)
+
+    def rpc(self, funcion, parametros=None):
+        # AUTOINCREMENT ya continúa desde el mayor id: reajustar_secuencias no hace falta
+        return RpcSinEfecto()
+
+
+# ---------------------------------------------------------
+# ALTA DE UNA BASE DE DATOS NUEVA
+# ---------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Crea la base de datos SQLite del comedor.")
+    parser.add_argument("ruta", nargs="?", default="comedor.db")
+    parser.add_argument("--admin", metavar="USUARIO", help="Crea un usuario administrador en el colegio 1")
+    args = parser.parse_args()
+
+    cliente = ClienteSQLite(args.ruta)
+    if args.admin:
+        password = getpass.getpass(f"Contraseña para {args.admin}: ")
+        cliente.table("profesores").insert({
+            "usuario": args.admin, "password": password, "rol": "admin", "colegio_id": 1
+        }).execute()
+    print(f"Base de datos lista en {args.ruta}")
+
+
+if __name__ == "__main__":
+    main()
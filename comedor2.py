@@ -1,59 +1,38 @@
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from supabase import create_client
-from reportlab.lib.pagesizes import A4, landscape
+import os
+from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.platypus import Table, TableStyle
 from reportlab.lib import colors
 import io
+import re
 import calendar
-st.cache_data.clear()
+import time
 # ---------------------------------------------------------
-# CONFIGURACIÓN SUPABASE
+# FUNCIONES DE BASE DE DATOS (ver datos.py)
 # ---------------------------------------------------------
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# ---------------------------------------------------------
-# FUNCIONES DE BASE DE DATOS
-# ---------------------------------------------------------
-
-def db_select(table):
-    try:
-        response = supabase.table(table).select("*").execute()
-        data = response.data or []
-        return pd.DataFrame(data)
-    except Exception as e:
-        st.error(f"Error leyendo {table}: {e}")
-        return pd.DataFrame()
-
-
-def db_insert(table, rows):
-    supabase.table(table).insert(rows).execute()
-
-def db_upsert(table, rows, conflict_cols=None):
-    if conflict_cols:
-        supabase.table(table).upsert(rows, on_conflict=conflict_cols).execute()
-    else:
-        supabase.table(table).upsert(rows).execute()
+import datos
+import rendimiento
+from datos import (
+    db_select, db_select_cacheado, db_select_pagina, db_insert, db_upsert, db_delete, colegio_actual
+)
+from tipos import tipar
 
+# Un solo despliegue para todos los colegios: cada consulta se limita al
+# colegio elegido al iniciar sesión (st.session_state.colegio_id).
+# El almacenamiento (Supabase o SQLite local) se elige en secrets.toml con BACKEND.
+# Cada llamada queda anotada para la página de Rendimiento.
+supabase = datos.ClienteColegio(rendimiento.ClienteMedido(datos.crear_cliente(st.secrets)))
+datos.configurar_cliente(supabase)
 
-def db_delete(table, conditions):
-    supabase.table(table).delete().match(conditions).execute()
+# Medición de esta ejecución (llamadas, filas, tiempos y caché)
+rendimiento.empezar()
 
-import unicodedata
-
-def normalizar(texto):
-    if not isinstance(texto, str):
-        return ""
-    texto = texto.strip().lower()
-    texto = unicodedata.normalize("NFD", texto)
-    texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
-    return texto
+# Búsqueda sin tildes ni mayúsculas sobre alumnos y profesores (índice compartido)
+import busqueda
+from busqueda import normalizar
 
 
 # ---------------------------------------------------------
@@ -67,76 +46,63 @@ def login():
         st.session_state.profesor = None
 
     if not st.session_state.logged:
+        colegios = supabase.table("colegios").select("id, nombre").order("nombre").execute().data
+        if not colegios:
+            st.sidebar.error("No hay ningún colegio dado de alta.")
+            st.stop()
+        nombres_colegios = {c["id"]: c["nombre"] for c in colegios}
+        if len(colegios) == 1:
+            colegio_id = colegios[0]["id"]
+        else:
+            colegio_id = st.sidebar.selectbox("Colegio", list(nombres_colegios), format_func=nombres_colegios.get)
+
         usuario_input = st.sidebar.text_input("Usuario")
         password_input = st.sidebar.text_input("Contraseña", type="password")
 
         if st.sidebar.button("Entrar"):
+            # A partir de aquí todas las consultas se limitan a este colegio
+            st.session_state.colegio_id = colegio_id
+            st.session_state.colegio = nombres_colegios[colegio_id]
 
-            # Normalizar lo que escribe el profesor
-            usuario_norm = normalizar(usuario_input)
-
-            # Traer todos los profesores
-            profesores = supabase.table("profesores").select("*").execute().data
-
-            # Buscar coincidencia normalizada
+            # Coincidencia sin tildes ni mayúsculas en el índice de profesores;
+            # solo se trae de la base de datos el profesor encontrado
+            iguales, _ = busqueda.indice("profesores").duplicados(usuario_input)
             profesor_encontrado = None
-            for prof in profesores:
-                if normalizar(prof["usuario"]) == usuario_norm:
-                    profesor_encontrado = prof
-                    break
+            if iguales:
+                encontrados = supabase.table("profesores").select("*").eq("id", iguales[0]).execute().data
+                profesor_encontrado = encontrados[0] if encontrados else None
 
             # Validar
             if profesor_encontrado and profesor_encontrado["password"] == password_input:
                 st.session_state.logged = True
                 st.session_state.profesor = profesor_encontrado
+                # Mientras carga la primera página, el resto de datos del rol se leen en segundo plano
+                from precarga import precargar
+                precargar(profesor_encontrado, colegio_id)
                 st.sidebar.success("Acceso concedido")
                 st.rerun()
             else:
+                st.session_state.colegio_id = None
                 st.sidebar.error("Usuario o contraseña incorrectos")
 
     else:
-        st.sidebar.success(f"Conectado como {st.session_state.profesor['usuario']}")
+        st.sidebar.success(f"Conectado como {st.session_state.profesor['usuario']} ({st.session_state.colegio})")
         if st.sidebar.button("Cerrar sesión"):
             st.session_state.logged = False
             st.session_state.profesor = None
+            st.session_state.colegio_id = None
             st.rerun()
 
 
 
-def draw_logo_centered(c, page_width, y):
-    logo_width = 300
-    logo_height = 300
-    x = (page_width - logo_width) / 2
-    c.drawImage("logo.png", x, y, width=logo_width, height=logo_height, preserveAspectRatio=True)
-
 # ---------------------------------------------------------
-# FUNCIÓN PARA NUMERAR PÁGINAS EN REPORTLAB
+# LOGO Y NÚMERO DE PÁGINA EN REPORTLAB (ver informes.py)
 # ---------------------------------------------------------
 from reportlab.pdfgen import canvas
-
-def add_page_number(pdf_canvas):
-    """
-    Añade número de página en la parte inferior centrada.
-    """
-    page_num = pdf_canvas.getPageNumber()
-    pdf_canvas.setFont("Helvetica", 9)
-    pdf_canvas.drawCentredString(
-        pdf_canvas._pagesize[0] / 2,   # centro horizontal
-        20,                            # altura desde abajo
-        f"Página {page_num}"
-    )
-
-def obtener_info_etapa(nombre_curso):
-    nombre = nombre_curso.upper()
-    if any(x in nombre for x in ["INF", "INFANTIL"]):
-        return 1, colors.Color(0.9, 0.9, 1) # Azul muy claro
-    if any(x in nombre for x in ["1º", "2º"]):
-        return 2, colors.Color(0.9, 1, 0.9) # Verde muy claro
-    if any(x in nombre for x in ["3º", "4º"]):
-        return 3, colors.Color(1, 1, 0.8) # Amarillento
-    if any(x in nombre for x in ["5º", "6º"]):
-        return 4, colors.Color(1, 0.9, 0.9) # Rojizo/Salmón
-    return 5, colors.white
+from informes import (
+    draw_logo_centered, add_page_number, pdf_informe_mensual, pdf_informe_faltas,
+    pdf_cuadrante_maestros, pdf_facturas_maestros
+)
 
 # ---------------------------------------------------------
 # CONFIGURACIÓN DE PÁGINA
@@ -227,7 +193,7 @@ with st.sidebar:
         with st.expander("📄 Informes", expanded=False):
 
             if rol == "admin":
-                opciones_informes = ["📝 Informes PDF"]
+                opciones_informes = ["📝 Informes PDF", "📤 Exportar datos", "🗄️ Histórico de temporadas", "⏱️ Rendimiento"]
 
             elif rol == "cocina":
                 opciones_informes = ["📊 Informe de situación en mesa"]
@@ -291,156 +257,58 @@ with st.sidebar:
                 args=(st.session_state.get("maestros"), "maestros")
             )
 
+# Página elegida en el menú, para la medición de rendimiento
+rendimiento.nombrar_pagina(next(
+    (st.session_state.get(g) for g in ["diario", "informes", "gestion", "fin_curso", "maestros"] if st.session_state.get(g)),
+    None
+))
+
 # ---------------------------------------------------------
 # INFORME PARA COCINA (solo rol cocina)
 # ---------------------------------------------------------
 if rol == "cocina" and st.session_state.informes == "📊 Informe de situación en mesa":
+    from mesas import plan_del_dia
+    from informes import pdf_situacion_mesa
+    from dietas import conteo_dietas
 
     st.header("Informe de situación en mesa")
 
-    # Cargar datos
-    df_asistencia = db_select("asistencia")
-    df_alumnos = db_select("alumnos")
-    df_cursos = db_select("cursos")
-
-    # Cargar configuración de mesas (creada por admin)
-    try:
-        df_config = db_select("config_mesas")
-    except:
-        df_config = pd.DataFrame()
-
-    if df_config.empty:
-        st.warning("No hay configuración de mesas guardada por el administrador.")
-        st.stop()
-
     # Fecha de hoy
     fecha_hoy = datetime.now().strftime("%Y-%m-%d")
 
-    # Filtrar asistencia de hoy
-    df_hoy = df_asistencia[
-        (df_asistencia["fecha"] == fecha_hoy) &
-        (df_asistencia["asiste"] == True)
-    ]
+    # Plan de mesas del día (calculado una vez y compartido con el informe del administrador)
+    plan, df_filas, avisos = plan_del_dia(fecha_hoy, colegio_actual())
 
-    if df_hoy.empty:
+    if plan.empty:
         st.warning("No hay alumnos registrados hoy en el comedor.")
         st.stop()
 
-    # IDs de alumnos que asisten hoy
-    ids_hoy = df_hoy["alumno_id"].astype(int).tolist()
-
-    # Unir alumnos con cursos
-    df_cursos_ren = df_cursos.rename(columns={"nombre": "nombre_curso"})
-    df_alumnos_full = df_alumnos.merge(
-        df_cursos_ren[["id", "nombre_curso"]],
-        left_on="curso_id",
-        right_on="id",
-        suffixes=("", "_c")
-    )
+    for aviso in avisos:
+        st.warning(aviso)
 
-    # Filtrar solo alumnos que asisten hoy
-    df_alumnos_hoy = df_alumnos_full[df_alumnos_full["id"].isin(ids_hoy)]
+    st.metric("TOTAL COMENSALES HOY", len(plan))
 
-    # Preparar listas por fila
-    m1 = df_alumnos_hoy[df_alumnos_hoy["id"].isin(df_config[df_config["fila"] == 1]["id_alumno"])]
-    m2 = df_alumnos_hoy[df_alumnos_hoy["id"].isin(df_config[df_config["fila"] == 2]["id_alumno"])]
-    m3 = df_alumnos_hoy[df_alumnos_hoy["id"].isin(df_config[df_config["fila"] == 3]["id_alumno"])]
+    dietas_hoy = conteo_dietas(plan)
+    if not dietas_hoy.empty:
+        st.markdown("### 🥗 Dietas especiales por curso")
+        st.dataframe(dietas_hoy, use_container_width=True)
 
-    # Ordenar por curso
-    m1 = m1.sort_values("curso_id")
-    m2 = m2.sort_values("curso_id")
-    m3 = m3.sort_values("curso_id")
+    columnas_filas = st.columns(len(df_filas))
+    for col, (_, f) in zip(columnas_filas, df_filas.iterrows()):
+        with col:
+            del_plan = plan[plan["fila"] == f["fila"]]
+            st.markdown(f"### 🪑 {f['nombre']} ({len(del_plan)})")
+            st.dataframe(
+                del_plan[["mesa", "nombre", "nombre_curso"]].rename(columns={"mesa": "Mesa", "nombre": "Alumno", "nombre_curso": "Curso"}),
+                hide_index=True,
+                use_container_width=True
+            )
 
     # Botón para generar PDF
     if st.button("📄 Descargar PDF de situación en mesa", type="primary", use_container_width=True):
-
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(A4),
-            rightMargin=30, leftMargin=30, topMargin=40, bottomMargin=30
-        )
-
-        elementos = []
-        estilos = getSampleStyleSheet()
-
-        # Título
-        titulo = f"SITUACIÓN EN MESA - {datetime.now().strftime('%d/%m/%Y')}"
-        elementos.append(Paragraph(f"<b>{titulo}</b>", estilos['Title']))
-        elementos.append(Spacer(1, 15))
-
-        # Preparar tabla
-        tabla_data = [["INFANTIL", "MEDIANOS", "GRANDES"]]
-
-        # Estilos base de la tabla (cabecera, grid, alineación…)
-        estilos_tabla = [
-            ("BACKGROUND", (0,0), (-1,0), colors.black),
-            ("TEXTCOLOR", (0,0), (-1,0), colors.white),
-            ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-            ("ALIGN", (0,0), (-1,-1), "CENTER"),
-            ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-            ("FONTSIZE", (0,0), (-1,-1), 9),
-        ]
-
-        max_filas = max(len(m1), len(m2), len(m3))
-
-        for i in range(max_filas):
-            fila = []
-            for col_idx, lista in enumerate([m1, m2, m3]):
-                if i < len(lista):
-                    alu = lista.iloc[i]
-                    fila.append(f"{alu['nombre']}\n({alu['nombre_curso']})")
-
-                    # Obtener color según etapa
-                    _, color_f = obtener_info_etapa(alu['nombre_curso'])
-
-                    # Aplicar color a la celda
-                    estilos_tabla.append(
-                        ("BACKGROUND", (col_idx, i+1), (col_idx, i+1), color_f)
-                    )
-                else:
-                    fila.append("")
-            tabla_data.append(fila)
-
-        # Totales por columna
-        tabla_data.append([
-            f"Total: {len(m1)}",
-            f"Total: {len(m2)}",
-            f"Total: {len(m3)}"
-        ])
-
-        # Resaltar fila de totales
-        estilos_tabla.append(
-            ("BACKGROUND", (0, len(tabla_data)-1), (-1, len(tabla_data)-1), colors.lightgrey)
-        )
-        estilos_tabla.append(
-            ("FONTNAME", (0, len(tabla_data)-1), (-1, len(tabla_data)-1), "Helvetica-Bold")
-        )
-
-        # Crear tabla
-        ancho_util = landscape(A4)[0] - 60
-        tabla = Table(tabla_data, colWidths=[ancho_util/3]*3, repeatRows=1)
-        tabla.setStyle(TableStyle(estilos_tabla))
-
-        elementos.append(tabla)
-
-        # -----------------------------
-        # TOTAL GENERAL DE COMENSALES
-        # -----------------------------
-        total_general = len(m1) + len(m2) + len(m3)
-
-        elementos.append(Spacer(1, 20))
-        elementos.append(Paragraph(
-            f"<para align='right' size='14'><b>TOTAL COMENSALES HOY: {total_general}</b></para>",
-            estilos['Normal']
-        ))
-
-        # Construir PDF
-        doc.build(elementos)
-
         st.download_button(
             "📥 Descargar PDF",
-            buffer.getvalue(),
+            pdf_situacion_mesa(plan, df_filas, fecha_hoy),
             f"situacion_mesa_{fecha_hoy}.pdf",
             "application/pdf",
             use_container_width=True
@@ -460,67 +328,78 @@ if rol == "cocina" and st.session_state.informes == "📊 Informe de situación
 if diario == "📋 Pasar lista":
     st.header("📋 Pasar Lista")
 
-    # 1. Carga de datos base
-    res_alu = supabase.table("alumnos").select("*").execute()
-    df_alumnos = pd.DataFrame(res_alu.data)
-    
-    res_cur = supabase.table("cursos").select("*").execute()
-    df_cursos = pd.DataFrame(res_cur.data)
-    
-    # 2. Cargar asistencia de hoy
-    fecha_hoy = datetime.now().strftime("%Y-%m-%d")
-    res_asist = supabase.table("asistencia").select("*").eq("fecha", fecha_hoy).execute()
-    
-    # --- LA RED DE SEGURIDAD DEFINITIVA ---
-    # Si res_asist.data está vacío, creamos un DF con las columnas para que Pandas no proteste
-    if not res_asist.data:
-        asist_actual_global = pd.DataFrame(columns=["id", "fecha", "alumno_id", "curso_id", "asiste"])
-    else:
-        asist_actual_global = pd.DataFrame(res_asist.data)
-
-    # 3. Filtrar cursos según el profesor
-    if rol == "admin":
-        cursos_disponibles = df_cursos.to_dict(orient="records")
-    else:
-        ids_profe = str(prof.get("curso_id", "")).split(",")
-        cursos_disponibles = df_cursos[df_cursos["id"].astype(str).isin(ids_profe)].to_dict(orient="records")
+    from profesorado import cursos_del_profesor, lista_de_clase
 
-    if not cursos_disponibles:
-        st.warning("No tienes cursos asignados.")
-    else:
-        curso_sel = st.selectbox("Selecciona curso:", cursos_disponibles, format_func=lambda x: x["nombre"], key="sel_v4")
-        c_id = int(curso_sel["id"])
+    # 1. Carga de datos base: un profesor solo recibe sus cursos y sus alumnos
+    # (filtrados en la base de datos con profesores_cursos); admin, todos.
+    # Cursos y alumnos salen de la caché (se precargan al iniciar sesión)
+    fecha_hoy = datetime.now().strftime("%Y-%m-%d")
+    filtros_asist = [("fecha", "eq", fecha_hoy)]
+    ids_profe = None
+    if rol != "admin":
+        ids_profe = cursos_del_profesor(prof["id"], colegio_actual())
+        filtros_asist.append(("curso_id", "in_", list(ids_profe)))
+
+    # 2. Lista de clase y asistencia de hoy a la vez (ver datos.db_select_varias).
+    # Las columnas se piden siempre, así el DataFrame las tiene aunque esté vacío
+    leido = datos.db_select_varias({
+        "lista": lambda: lista_de_clase(ids_profe, colegio_actual()),
+        "asistencia": ("asistencia", "id, fecha, alumno_id, curso_id, asiste", filtros_asist),
+    })
+    df_cursos, df_alumnos = leido["lista"]
+    asist_actual_global = leido["asistencia"]
+
+    # 3. Cursos del selector (ya vienen filtrados según el profesor): solo los
+    # ids como opciones, el nombre se muestra con format_func
+    nombres_cursos = dict(zip(df_cursos["id"].tolist(), df_cursos["nombre"])) if not df_cursos.empty else {}
+
+    # Selector de curso y lista en un fragmento: cambiar de curso solo vuelve
+    # a ejecutar este bloque, con los datos ya cargados arriba (sin repetir el
+    # menú ni las consultas). Guardar recarga la página entera.
+    @st.fragment
+    def pasar_lista(nombres_cursos, df_alumnos, asist_actual_global, fecha_hoy):
+        c_id = st.selectbox("Selecciona curso:", list(nombres_cursos), format_func=nombres_cursos.get, key="sel_v4")
 
         # Alumnos del curso
         alumnos_curso = df_alumnos[df_alumnos["curso_id"] == c_id].copy().sort_values(by="nombre")
         
         # Filtramos la asistencia de este curso específico
         # Usamos .get() o verificamos columnas para evitar el fallo de la línea 494
-        asist_del_curso = asist_actual_global[asist_actual_global["curso_id"].astype(str) == str(c_id)] if not asist_actual_global.empty else pd.DataFrame()
+        asist_del_curso = asist_actual_global[asist_actual_global["curso_id"] == c_id] if not asist_actual_global.empty else pd.DataFrame()
 
         # Creamos un diccionario de búsqueda: {alumno_id: asiste_boolean}
         # Esto es mucho más seguro que filtrar el DataFrame en cada vuelta del bucle
         dict_asistencia = {}
         if not asist_del_curso.empty:
-            dict_asistencia = {str(row["alumno_id"]): row["asiste"] for _, row in asist_del_curso.iterrows()}
-
-        # 4. Mostrar el formulario
-        estado_checks = {}
-        for _, alu in alumnos_curso.iterrows():
-            id_alu_str = str(alu["id"])
-            
-            # Buscamos en el diccionario. Si no existe, por defecto es True (asiste)
-            valor_db = dict_asistencia.get(id_alu_str, True)
-
-            # Checkbox individual
-            estado_checks[alu["id"]] = st.checkbox(
-                alu["nombre"], 
-                value=bool(valor_db), 
-                key=f"chk_{c_id}_{id_alu_str}"
+            dict_asistencia = dict(zip(asist_del_curso["alumno_id"], asist_del_curso["asiste"]))
+
+        # 4. Mostrar el formulario: una tabla editable dentro de st.form, así
+        # marcar alumnos no provoca ninguna ejecución hasta pulsar Guardar.
+        # Si no hay registro del alumno, por defecto asiste.
+        lista = pd.DataFrame({
+            "id": alumnos_curso["id"].to_numpy(),
+            "Alumno": alumnos_curso["nombre"].to_numpy(),
+            "Asiste": [bool(dict_asistencia.get(a_id, True)) for a_id in alumnos_curso["id"]],
+        })
+
+        with st.form(f"form_lista_{c_id}"):
+            st.caption("Todos asisten por defecto: desmarca solo a los que faltan.")
+            lista_editada = st.data_editor(
+                lista,
+                column_config={
+                    "id": None,
+                    "Alumno": st.column_config.TextColumn("Alumno", disabled=True),
+                    "Asiste": st.column_config.CheckboxColumn("Asiste"),
+                },
+                hide_index=True,
+                num_rows="fixed",
+                use_container_width=True,
+                key=f"editor_lista_{c_id}"
             )
+            guardar_lista = st.form_submit_button("💾 GUARDAR ASISTENCIA", type="primary")
 
-        # 5. Guardado
-        if st.button("💾 GUARDAR ASISTENCIA", type="primary"):
+        # 5. Guardado (solo el estado final de la tabla)
+        if guardar_lista:
             registros = [
                 {
                     "fecha": fecha_hoy, 
@@ -529,7 +408,7 @@ if diario == "📋 Pasar lista":
                     "asiste": bool(v), 
                     "motivo": ""
                 } 
-                for a_id, v in estado_checks.items()
+                for a_id, v in zip(lista_editada["id"], lista_editada["Asiste"])
             ]
             
             # Ejecutar en base de datos
@@ -539,32 +418,34 @@ if diario == "📋 Pasar lista":
                     supabase.table("asistencia").insert(registros).execute()
                 
                 st.success("¡Datos guardados correctamente!")
-                st.cache_data.clear()
                 st.rerun()
             except Exception as e:
                 st.error(f"Error al conectar con la base de datos: {e}")
-                    
+
+    if not nombres_cursos:
+        st.warning("No tienes cursos asignados.")
+    else:
+        pasar_lista(nombres_cursos, df_alumnos, asist_actual_global, fecha_hoy)
+
 # ---------------------------------------------------------
 # PANEL DE COCINA (VERSIÓN TIEMPO REAL)
 # ---------------------------------------------------------
 elif diario == "🍽️ Panel cocina":
     st.header("🍽️ Panel para Cocina")
-    st.cache_data.clear() # Limpieza total al entrar
+
+    from mesas import asistencia_del_dia
 
     fecha_hoy = datetime.now().strftime("%Y-%m-%d")
     
-    # Consultas directas a Supabase (Saltándonos tu función db_select por si tiene caché)
-    asist_data = supabase.table("asistencia").select("*").eq("fecha", fecha_hoy).eq("asiste", True).execute().data
-    cursos_data = supabase.table("cursos").select("*").execute().data
+    # La asistencia de hoy sale de la caché: se renueva cuando cambia la
+    # asistencia y se precarga al iniciar sesión
+    df_hoy = asistencia_del_dia(fecha_hoy, colegio_actual())
+    df_asist = df_hoy[df_hoy["asiste"]]
     
-    if not asist_data:
+    if df_asist.empty:
         st.warning(f"No hay comensales registrados para hoy ({fecha_hoy}).")
     else:
-        df_asist = pd.DataFrame(asist_data)
-        df_curs = pd.DataFrame(cursos_data)
-        
-        df_asist["curso_id"] = df_asist["curso_id"].astype(int)
-        df_curs["id"] = df_curs["id"].astype(int)
+        df_curs = db_select_cacheado("cursos")
 
         # Merge directo
         resumen = df_asist.merge(df_curs, left_on="curso_id", right_on="id")
@@ -577,24 +458,19 @@ elif diario == "🍽️ Panel cocina":
 # ---------------------------------------------------------
 elif diario == "✔️ Control de asistencia" and rol == "admin":
     st.header("✔️ Control de Asistencia")
-    st.cache_data.clear() # Limpieza total
+
+    from mesas import asistencia_del_dia
 
     fecha_hoy = datetime.now().strftime("%Y-%m-%d")
 
-    # CONSULTA DIRECTA (Sin db_select)
-    asist_data = supabase.table("asistencia").select("curso_id").eq("fecha", fecha_hoy).execute().data
-    cursos_data = supabase.table("cursos").select("id, nombre").execute().data
-    
-    df_cursos_raw = pd.DataFrame(cursos_data)
+    # Asistencia de hoy desde la caché (como en el panel de cocina)
+    df_hoy = asistencia_del_dia(fecha_hoy, colegio_actual())
+    df_cursos_raw = db_select_cacheado("cursos")
     # Excluimos "Ninguno"
-    df_cursos = df_cursos_raw[df_cursos_raw["nombre"].str.lower() != "ninguno"].copy()
-    df_cursos["id"] = df_cursos["id"].astype(int)
+    df_cursos = df_cursos_raw[df_cursos_raw["nombre"].str.lower() != "ninguno"]
 
     # IDs de cursos que han pasado lista hoy
-    if asist_data:
-        cursos_con_lista = pd.DataFrame(asist_data)["curso_id"].unique().astype(int).tolist()
-    else:
-        cursos_con_lista = []
+    cursos_con_lista = df_hoy["curso_id"].unique()
 
     col1, col2 = st.columns(2)
 
@@ -625,100 +501,231 @@ if rol == "admin":
     if gestion == "👨‍🎓 Gestión de alumnos":
         st.header("Gestión de Alumnos")
 
-        df_cursos = db_select("cursos")
-        df_alumnos = db_select("alumnos")
+        from dietas import DIETAS, columna_dietas, nombre_dieta
+
+        TAM_PAGINA_ALUMNOS = 50
+
+        df_cursos = db_select_cacheado("cursos").sort_values("orden")
+        nombre_curso = dict(zip(df_cursos["id"], df_cursos["nombre"]))
+        id_por_nombre = {nombre: c_id for c_id, nombre in nombre_curso.items()}
+
+        if "aviso_alumnos" in st.session_state:
+            st.success(st.session_state.pop("aviso_alumnos"))
 
-        st.subheader("Alumnos existentes (agrupados por curso)")
+        # Alumnos por curso: un recuento por curso, sin traer filas (una lectura
+        # normal se corta en 1000 filas)
+        por_curso = datos.alumnos_por_curso(tuple(int(c) for c in df_cursos["id"]), colegio_actual())
+        total_alumnos = sum(por_curso.values())
 
-        for _, curso in df_cursos.sort_values("orden").iterrows():
-            alumnos_curso = df_alumnos[df_alumnos["curso_id"] == curso["id"]]
+        st.subheader(f"Alumnos existentes ({total_alumnos})")
 
-            with st.expander(f"{curso['nombre']}  ({len(alumnos_curso)} alumnos)", expanded=False):
-                if alumnos_curso.empty:
-                    st.info("No hay alumnos en este curso.")
+        # Búsqueda y filtro por curso: se aplican en la base de datos y solo llega la página visible
+        col_busqueda, col_curso = st.columns([2, 1])
+        texto_buscado = col_busqueda.text_input("Buscar por nombre", key="buscar_alumno").strip()
+        curso_filtro = col_curso.selectbox(
+            "Curso",
+            [None] + df_cursos["id"].tolist(),
+            format_func=lambda c: f"Todos ({total_alumnos})" if c is None else f"{nombre_curso[c]} ({int(por_curso.get(c, 0))})",
+            key="filtro_curso_alumnos"
+        )
+
+        filtros = []
+        if texto_buscado:
+            # El índice resuelve la búsqueda (sin tildes, con erratas); la consulta solo trae esos ids
+            filtros.append(("id", "in_", busqueda.indice("alumnos").buscar(texto_buscado, limite=500)))
+        if curso_filtro is not None:
+            filtros.append(("curso_id", "eq", curso_filtro))
+
+        # Al cambiar la búsqueda o el curso se vuelve a la primera página
+        firma_filtros = (normalizar(texto_buscado), curso_filtro)
+        if st.session_state.get("firma_filtros_alumnos") != firma_filtros:
+            st.session_state["firma_filtros_alumnos"] = firma_filtros
+            st.session_state["pagina_alumnos"] = 1
+        pagina = st.session_state.get("pagina_alumnos", 1)
+
+        df_pagina, total_filtrados = db_select_pagina(
+            "alumnos", "id, nombre, curso_id, dietas", filtros, orden="nombre",
+            pagina=pagina - 1, tam_pagina=TAM_PAGINA_ALUMNOS
+        )
+        total_paginas = max(1, -(-total_filtrados // TAM_PAGINA_ALUMNOS))
+        if pagina > total_paginas:
+            # Tras borrar alumnos la página puede haberse quedado vacía
+            st.session_state["pagina_alumnos"] = total_paginas
+            st.rerun()
+
+        if df_pagina.empty:
+            st.info("No hay alumnos que coincidan con la búsqueda.")
+        else:
+            dietas_pagina = columna_dietas(df_pagina)
+            tabla_alumnos = pd.DataFrame({
+                "id": df_pagina["id"],
+                "Alumno": df_pagina["nombre"],
+                "Curso": df_pagina["curso_id"].map(nombre_curso),
+                "Dietas": dietas_pagina,
+                "Eliminar": False,
+            })
+            # Las dietas que no están en el catálogo se conservan
+            opciones_dietas = list(DIETAS) + sorted({d for lista in dietas_pagina for d in lista if d not in DIETAS})
+
+            # Edición y borrado en la propia tabla; nada se envía hasta pulsar Guardar
+            with st.form("form_alumnos"):
+                alumnos_editados = st.data_editor(
+                    tabla_alumnos,
+                    column_config={
+                        "id": None,
+                        "Alumno": st.column_config.TextColumn("Alumno", required=True),
+                        "Curso": st.column_config.SelectboxColumn("Curso", options=list(nombre_curso.values()), required=True),
+                        "Dietas": st.column_config.MultiselectColumn("Dietas y alergias", options=opciones_dietas, format_func=nombre_dieta),
+                        "Eliminar": st.column_config.CheckboxColumn("Eliminar"),
+                    },
+                    hide_index=True,
+                    num_rows="fixed",
+                    use_container_width=True,
+                    key=f"editor_alumnos_{pagina}_{firma_filtros}"
+                )
+                guardar_alumnos = st.form_submit_button("💾 Guardar cambios")
+
+            desde = (pagina - 1) * TAM_PAGINA_ALUMNOS
+            st.caption(f"Mostrando {desde + 1}–{desde + len(df_pagina)} de {total_filtrados}")
+
+            if guardar_alumnos:
+                # Cambios por id: un borrado y un upsert para toda la página
+                a_borrar = [int(i) for i in alumnos_editados.loc[alumnos_editados["Eliminar"], "id"]]
+                conservados = alumnos_editados[~alumnos_editados["Eliminar"]]
+                originales = tabla_alumnos.loc[conservados.index]
+                modificados = conservados[
+                    (conservados["Alumno"].str.strip() != originales["Alumno"])
+                    | (conservados["Curso"] != originales["Curso"])
+                    | (conservados["Dietas"].map(lambda d: tuple(d or [])) != originales["Dietas"].map(tuple))
+                ]
+
+                if (modificados["Alumno"].str.strip() == "").any():
+                    st.error("El nombre no puede estar vacío.")
+                elif a_borrar or not modificados.empty:
+                    if a_borrar:
+                        supabase.table("alumnos").delete().in_("id", a_borrar).execute()
+                        busqueda.eliminar("alumnos", a_borrar)
+                    if not modificados.empty:
+                        for _, r in modificados.iterrows():
+                            busqueda.actualizar("alumnos", int(r["id"]), r["Alumno"].strip())
+                        db_upsert("alumnos", [
+                            {
+                                "id": int(r["id"]),
+                                "nombre": r["Alumno"].strip(),
+                                "curso_id": int(id_por_nombre[r["Curso"]]),
+                                "dietas": list(r["Dietas"] or [])
+                            }
+                            for _, r in modificados.iterrows()
+                        ])
+                    st.session_state["aviso_alumnos"] = f"Alumnos modificados: {len(modificados)}. Eliminados: {len(a_borrar)}."
+                    st.rerun()
                 else:
-                    st.table(
-                        alumnos_curso[["nombre"]].rename(columns={"nombre": "Alumno"}),
-                    )
+                    st.info("No hay cambios que guardar.")
 
+        st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, step=1, key="pagina_alumnos")
 
         st.subheader("Añadir nuevo alumno")
 
         with st.form("nuevo_alumno"):
             nombre = st.text_input("Nombre del alumno")
-            curso = st.selectbox(
-                "Curso",
-                df_cursos.to_dict(orient="records"),
-                format_func=lambda x: x["nombre"]
-            )
+            curso_id = st.selectbox("Curso", list(nombre_curso), format_func=nombre_curso.get)
+            dietas = st.multiselect("Dietas y alergias", list(DIETAS), format_func=nombre_dieta)
+            aun_parecidos = st.checkbox("Añadir aunque haya nombres parecidos")
 
             if st.form_submit_button("Guardar"):
-                # Normalizar nombre (evitar mayúsculas/minúsculas y espacios)
-                nombre_normalizado = nombre.strip().lower()
-
-                # Comprobar si ya existe un alumno con ese nombre
-                existe = df_alumnos[
-                    df_alumnos["nombre"].str.strip().str.lower() == nombre_normalizado
-                ]
+                # Duplicados en el índice: mismo nombre sin tildes ni mayúsculas, o casi igual
+                indice_alumnos = busqueda.indice("alumnos")
+                iguales, parecidos = indice_alumnos.duplicados(nombre)
 
-                if not existe.empty:
+                if not nombre.strip():
+                    st.error("El nombre no puede estar vacío.")
+                    st.stop()
+                if iguales:
                     st.error("Este alumno ya está registrado en la base de datos.")
                     st.stop()
+                if parecidos and not aun_parecidos:
+                    st.warning(
+                        "Hay alumnos con un nombre parecido: "
+                        + ", ".join(indice_alumnos.nombre(i) for i in parecidos[:5])
+                        + ". Marca «Añadir aunque haya nombres parecidos» si no es ninguno de ellos."
+                    )
+                    st.stop()
     
                 # Insertar alumno si no existe
-                db_insert("alumnos", [{
+                nuevos = db_insert("alumnos", [{
                     "nombre": nombre.strip(),
-                    "curso_id": curso["id"]
+                    "curso_id": curso_id,
+                    "dietas": dietas
                 }])
+                for fila in nuevos or []:
+                    busqueda.actualizar("alumnos", fila["id"], fila["nombre"])
 
                 st.success("Alumno añadido correctamente")
                 st.rerun()
 
-        st.subheader("Modificar alumno")
+        # ======================================================
+        # IMPORTAR ALUMNOS DESDE CSV / EXCEL
+        # ======================================================
+        st.subheader("Importar alumnos desde un fichero")
 
-        if df_alumnos.empty:
-            st.info("No hay alumnos para modificar.")
-        else:
-            alumno_sel = st.selectbox(
-                "Selecciona alumno",
-                df_alumnos.to_dict(orient="records"),
-                format_func=lambda x: x["nombre"],
-                key="mod_alumno"
+        with st.expander("📥 Importar desde CSV o Excel (p. ej. el listado oficial del centro)"):
+            from importacion import (
+                leer_fichero, adivinar_columna, preparar_importacion, importar_alumnos,
+                COLUMNAS_NOMBRE, COLUMNAS_CURSO, COLUMNAS_DIETAS, NUEVO
             )
 
-            nuevo_nombre = st.text_input("Nuevo nombre", value=alumno_sel["nombre"])
-            nuevo_curso = st.selectbox(
-                "Nuevo curso",
-                df_cursos.to_dict(orient="records"),
-                format_func=lambda x: x["nombre"],
-                index=df_cursos.index[df_cursos["id"] == alumno_sel["curso_id"]].tolist()[0]
-            )
+            fichero = st.file_uploader("Fichero de alumnos", type=["csv", "xlsx", "xls"], key="fichero_alumnos")
+            df_fichero = None
+            if fichero is not None:
+                try:
+                    df_fichero = leer_fichero(fichero.getvalue(), fichero.name)
+                except Exception as e:
+                    st.error(f"No se ha podido leer el fichero: {e}")
 
-            if st.button("Guardar cambios"):
-                supabase.table("alumnos").update({
-                    "nombre": nuevo_nombre.strip(),
-                    "curso_id": nuevo_curso["id"]
-                }).eq("id", alumno_sel["id"]).execute()
+            if df_fichero is not None:
+                columnas = list(df_fichero.columns)
+                sin_columna = [None] + columnas
 
-                st.success("Alumno modificado correctamente.")
-                st.rerun()
+                def columna_por_defecto(candidatas):
+                    return sin_columna.index(adivinar_columna(columnas, candidatas))
 
-        st.subheader("Eliminar alumno")
+                col_i1, col_i2, col_i3 = st.columns(3)
+                col_nombre = col_i1.selectbox("Columna del nombre", sin_columna, index=columna_por_defecto(COLUMNAS_NOMBRE), key="imp_col_nombre")
+                col_curso = col_i2.selectbox("Columna del curso", sin_columna, index=columna_por_defecto(COLUMNAS_CURSO), key="imp_col_curso")
+                col_dietas = col_i3.selectbox("Columna de dietas (opcional)", sin_columna, index=columna_por_defecto(COLUMNAS_DIETAS), key="imp_col_dietas")
 
-        if df_alumnos.empty:
-            st.info("No hay alumnos para eliminar.")
-        else:
-            alumno_del = st.selectbox(
-                "Selecciona alumno a eliminar",
-                df_alumnos.to_dict(orient="records"),
-                format_func=lambda x: x["nombre"],
-                key="del_alumno"
-            )
+                if col_nombre is None or col_curso is None:
+                    st.info("Indica qué columnas tienen el nombre y el curso.")
+                else:
+                    vista = preparar_importacion(df_fichero, col_nombre, col_curso, df_cursos, col_dietas)
+                    recuento = vista["Estado"].value_counts()
 
-            if st.button("Eliminar alumno"):
-                db_delete("alumnos", {"id": alumno_del["id"]})
-                st.success("Alumno eliminado correctamente.")
-                st.rerun()
+                    st.write(
+                        f"**{int(recuento.get(NUEVO, 0))}** alumnos nuevos de {len(vista)} filas. "
+                        + " · ".join(f"{estado}: {n}" for estado, n in recuento.items() if estado != NUEVO)
+                    )
+                    cursos_desconocidos = sorted(set(vista.loc[vista["curso_id"].isna(), "Curso"]) - {""})
+                    if cursos_desconocidos:
+                        st.warning("Cursos que no existen en la aplicación: " + ", ".join(cursos_desconocidos))
+
+                    st.dataframe(
+                        vista.drop(columns="curso_id").sort_values("Estado", key=lambda e: e != NUEVO, kind="stable"),
+                        column_config={"Dietas": st.column_config.ListColumn("Dietas y alergias")},
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
+                    if recuento.get(NUEVO, 0) and st.button(f"📥 Importar {int(recuento[NUEVO])} alumnos nuevos"):
+                        barra = st.progress(0.0, text="Importando...")
+                        try:
+                            insertadas = importar_alumnos(
+                                vista,
+                                progreso=lambda hechas, total: barra.progress(hechas / total, text=f"Importados {hechas}/{total}")
+                            )
+                            st.session_state["aviso_alumnos"] = f"Alumnos importados: {len(insertadas)}."
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error durante la importación: {e}")
 
 
     # ---------------------------------------------------------
@@ -727,23 +734,24 @@ if rol == "admin":
     elif gestion == "👩‍🏫 Gestión de profesores":
         st.header("Gestión de Profesores")
 
-        df_profes = db_select("profesores")
-        df_cursos = db_select("cursos")
+        from profesorado import asignaciones, asignar_cursos
+
+        df_profes = db_select_cacheado("profesores")
+        df_cursos = db_select_cacheado("cursos")
+        cursos_por_profesor = asignaciones(colegio_actual())
+
+        # Diccionario auxiliar para buscar nombres de cursos rápido por su ID
+        # (también son las opciones de los selectores de cursos: solo los ids)
+        dict_cursos = dict(zip(df_cursos['id'], df_cursos['nombre'])) if not df_cursos.empty else {}
 
         st.subheader("Profesores registrados")
 
         if not df_profes.empty:
-            # --- NUEVA LÓGICA PARA MOSTRAR MÚLTIPLES CURSOS EN LA TABLA ---
+            # --- CURSOS DE CADA PROFESOR (tabla profesores_cursos) ---
             lista_final = []
-            
-            # Diccionario auxiliar para buscar nombres de cursos rápido por su ID
-            dict_cursos = dict(zip(df_cursos['id'].astype(str), df_cursos['nombre']))
 
             for _, p in df_profes.iterrows():
-                # Obtenemos los IDs del string "1,2" -> ["1", "2"]
-                ids_str = str(p["curso_id"]).split(",")
-                # Buscamos los nombres correspondientes
-                nombres_cursos = [dict_cursos.get(i.strip(), "Desconocido") for i in ids_str]
+                nombres_cursos = [dict_cursos.get(c, "Desconocido") for c in cursos_por_profesor.get(int(p["id"]), ())]
                 
                 lista_final.append({
                     "usuario": p["usuario"],
@@ -765,30 +773,26 @@ if rol == "admin":
             password = st.text_input("Contraseña", type="password")
     
             # Multiselección para permitir varios cursos
-            cursos_sel = st.multiselect(
-                "Cursos asignados", 
-                df_cursos.to_dict(orient="records"), 
-                format_func=lambda x: x["nombre"]
-            )
+            cursos_sel = st.multiselect("Cursos asignados", list(dict_cursos), format_func=dict_cursos.get)
 
             if st.form_submit_button("Guardar"):
-                usuario_norm = normalizar(usuario)
-                duplicado = any(normalizar(u) == usuario_norm for u in df_profes["usuario"].tolist())
+                duplicado, _ = busqueda.indice("profesores").duplicados(usuario)
 
-                if duplicado:
+                if not usuario.strip():
+                    st.error("El usuario no puede estar vacío.")
+                elif duplicado:
                     st.error("Este profesor ya está registrado.")
                 elif not cursos_sel:
                     st.error("Debes asignar al menos un curso al profesor.")
                 else:
                     try:
-                        # Convertimos la lista de IDs seleccionados en un string separado por comas: "1,4,7"
-                        ids_cursos_str = ",".join([str(c["id"]) for c in cursos_sel])
-                
-                        db_insert("profesores", [{
+                        nuevos = db_insert("profesores", [{
                             "usuario": usuario.strip(),
-                            "password": password,
-                            "curso_id": ids_cursos_str
+                            "password": password
                         }])
+                        for fila in nuevos or []:
+                            asignar_cursos(fila["id"], cursos_sel)
+                            busqueda.actualizar("profesores", fila["id"], fila["usuario"])
                         st.success(f"Profesor {usuario} añadido con {len(cursos_sel)} cursos.")
                         st.rerun()
                     except Exception as e:
@@ -800,52 +804,51 @@ if rol == "admin":
         st.subheader("Modificar datos del profesor")
 
         if not df_profes.empty:
-            prof_sel = st.selectbox(
-                "Selecciona profesor",
-                df_profes.to_dict(orient="records"),
-                format_func=lambda x: x["usuario"],
-                key="prof_mod"
-            )
+            # Opciones y nombres salen del índice de profesores (ver busqueda.py)
+            prof_id = busqueda.selector("Selecciona profesor", "profesores", key="prof_mod")
 
             col_edit1, col_edit2 = st.columns(2)
 
             with col_edit1:
                 # --- MODIFICAR NOMBRE Y CONTRASEÑA ---
-                nuevo_nombre = st.text_input("Nuevo nombre", value=prof_sel.get("usuario", ""))
+                nuevo_nombre = st.text_input("Nuevo nombre", value=busqueda.indice("profesores").nombre(prof_id) or "")
                 nueva_pass = st.text_input("Nueva contraseña (vacío para no cambiar)", type="password")
         
                 if st.button("Actualizar Datos Básicos"):
-                    if nuevo_nombre.strip() == "":
+                    if prof_id is None:
+                        st.error("Selecciona un profesor.")
+                    elif nuevo_nombre.strip() == "":
                         st.error("El nombre no puede estar vacío.")
                     else:
                         update_data = {"usuario": nuevo_nombre.strip()}
                         if nueva_pass.strip() != "":
                             update_data["password"] = nueva_pass
                 
-                        supabase.table("profesores").update(update_data).eq("id", prof_sel["id"]).execute()
+                        supabase.table("profesores").update(update_data).eq("id", prof_id).execute()
+                        busqueda.actualizar("profesores", prof_id, update_data["usuario"])
                         st.success("Datos actualizados.")
                         st.rerun()
 
             with col_edit2:
                 # --- MODIFICAR CURSOS (MULTIPLE) ---
-                # Recuperar IDs actuales y convertirlos en objetos para el multiselect
-                ids_actuales = [i.strip() for i in str(prof_sel.get("curso_id", "")).split(",") if i.strip()]
-                cursos_default = df_cursos[df_cursos["id"].astype(str).isin(ids_actuales)].to_dict(orient="records")
+                # Cursos actuales del profesor (un multiselect por profesor)
+                ids_actuales = [c for c in cursos_por_profesor.get(prof_id, ()) if c in dict_cursos]
 
                 nuevos_cursos_multi = st.multiselect(
                     "Modificar cursos asignados",
-                    df_cursos.to_dict(orient="records"),
-                    default=cursos_default,
-                    format_func=lambda x: x["nombre"],
-                    key="multi_mod_cursos"
+                    list(dict_cursos),
+                    default=ids_actuales,
+                    format_func=dict_cursos.get,
+                    key=f"multi_mod_cursos_{prof_id}"
                 )
 
                 if st.button("Actualizar Cursos"):
-                    if not nuevos_cursos_multi:
+                    if prof_id is None:
+                        st.error("Selecciona un profesor.")
+                    elif not nuevos_cursos_multi:
                         st.error("Debe tener al menos un curso.")
                     else:
-                        nuevos_ids_str = ",".join([str(c["id"]) for c in nuevos_cursos_multi])
-                        supabase.table("profesores").update({"curso_id": nuevos_ids_str}).eq("id", prof_sel["id"]).execute()
+                        asignar_cursos(prof_id, nuevos_cursos_multi)
                         st.success("Lista de cursos actualizada.")
                         st.rerun()
 
@@ -855,9 +858,11 @@ if rol == "admin":
         st.write("---")
         st.subheader("Eliminar profesor")
         if not df_profes.empty:
-            prof_del = st.selectbox("Profesor a eliminar", df_profes.to_dict(orient="records"), format_func=lambda x: x["usuario"], key="del_prof")
-            if st.button("Eliminar profesor"):
-                db_delete("profesores", {"id": prof_del["id"]})
+            prof_del = busqueda.selector("Profesor a eliminar", "profesores", key="del_prof")
+            if st.button("Eliminar profesor") and prof_del is not None:
+                # Sus filas de profesores_cursos se borran en cascada
+                db_delete("profesores", {"id": prof_del})
+                busqueda.eliminar("profesores", [prof_del])
                 st.success("Profesor eliminado")
                 st.rerun()
 
@@ -867,22 +872,39 @@ if rol == "admin":
     elif gestion == "🏫 Gestión de cursos":
         st.header("Gestión de Cursos")
 
-        df_cursos = db_select("cursos")
+        from mesas import ETAPAS, FILA_POR_ETAPA, cargar_filas, completar_cursos
+
+        df_cursos = db_select_cacheado("cursos")
+        if not df_cursos.empty:
+            df_cursos = completar_cursos(df_cursos)
+        filas_mesas = cargar_filas()
+        nombres_filas = dict(zip(filas_mesas["fila"].astype(int), filas_mesas["nombre"]))
 
         st.subheader("Cursos existentes")
         st.dataframe(df_cursos, hide_index=True)
 
+        # Los selectores de curso solo llevan el id; la fila se busca al elegir
+        nombres_cursos = dict(zip(df_cursos["id"], df_cursos["nombre"])) if not df_cursos.empty else {}
+
         st.subheader("Añadir nuevo curso")
         with st.form("nuevo_curso"):
             nombre = st.text_input("Nombre del curso (ej: 2ºA)")
             orden = st.number_input("Orden (nivel)", min_value=1, step=1)
             letra = st.text_input("Letra", max_chars=1)
+            etapa = st.selectbox("Etapa", list(ETAPAS), format_func=lambda e: ETAPAS[e][0])
+            fila = st.selectbox(
+                "Fila del comedor (vacío = la de su etapa)",
+                [None] + list(nombres_filas),
+                format_func=lambda f: "Según la etapa" if f is None else nombres_filas[f]
+            )
 
             if st.form_submit_button("Guardar"):
                 db_insert("cursos", [{
                     "nombre": nombre,
                     "orden": orden,
-                    "letra": letra.upper()
+                    "letra": letra.upper(),
+                    "etapa": etapa,
+                    "fila": fila if fila is not None else FILA_POR_ETAPA[etapa]
                 }])
                 st.success("Curso añadido")
                 st.rerun()
@@ -892,12 +914,13 @@ if rol == "admin":
 
         if not df_cursos.empty:
 
-            curso_mod = st.selectbox(
+            curso_mod_id = st.selectbox(
                 "Selecciona curso a modificar",
-                df_cursos.to_dict(orient="records"),
-                format_func=lambda x: x["nombre"],
+                list(nombres_cursos),
+                format_func=nombres_cursos.get,
                 key="curso_mod"
             )
+            curso_mod = df_cursos.loc[df_cursos["id"] == curso_mod_id].iloc[0]
 
             # Normalizar orden para evitar errores
             try:
@@ -928,6 +951,23 @@ if rol == "admin":
                 key="nueva_letra_curso"
             )
 
+            nueva_etapa = st.selectbox(
+                "Etapa",
+                list(ETAPAS),
+                index=list(ETAPAS).index(int(curso_mod["etapa"])),
+                format_func=lambda e: ETAPAS[e][0],
+                key="nueva_etapa_curso"
+            )
+
+            opciones_fila = list(nombres_filas)
+            nueva_fila = st.selectbox(
+                "Fila del comedor",
+                opciones_fila,
+                index=opciones_fila.index(int(curso_mod["fila"])) if int(curso_mod["fila"]) in opciones_fila else 0,
+                format_func=nombres_filas.get,
+                key="nueva_fila_curso"
+            )
+
             if st.button("Actualizar curso"):
                 if nuevo_nombre.strip() == "":
                     st.error("El nombre no puede estar vacío.")
@@ -935,16 +975,19 @@ if rol == "admin":
                     supabase.table("cursos").update({
                         "nombre": nuevo_nombre.strip(),
                         "orden": nuevo_orden,
-                        "letra": nueva_letra.upper()
-                    }).eq("id", curso_mod["id"]).execute()
+                        "letra": nueva_letra.upper(),
+                        "etapa": nueva_etapa,
+                        "fila": nueva_fila
+                    }).eq("id", curso_mod_id).execute()
 
                     st.success("Curso actualizado correctamente.")
                     st.rerun()
 
         st.subheader("Eliminar curso")
-        curso_del = st.selectbox("Selecciona curso", df_cursos.to_dict(orient="records"), format_func=lambda x: x["nombre"])
-        if st.button("Eliminar curso"):
-            db_delete("cursos", {"id": curso_del["id"]})
+        curso_del = st.selectbox("Selecciona curso", list(nombres_cursos), format_func=nombres_cursos.get)
+        if st.button("Eliminar curso") and curso_del is not None:
+            db_delete("cursos", {"id": curso_del})
+            # Las asignaciones de profesores a este curso se borran en cascada
             st.success("Curso eliminado")
             st.rerun()
 
@@ -955,29 +998,29 @@ if rol == "admin":
         st.header("Gestión de asistencias por día")
 
         df_asistencia = db_select("asistencia")
-        df_alumnos = db_select("alumnos")
+        df_alumnos = db_select_cacheado("alumnos")
 
         fecha_sel = st.date_input("Selecciona un día", datetime.now())
         fecha_str = fecha_sel.strftime("%Y-%m-%d")
 
         # 1. Filtrar asistencias del día
-        datos = df_asistencia[df_asistencia["fecha"] == fecha_str].copy()
+        df_dia = df_asistencia[df_asistencia["fecha"] == fecha_str].copy()
 
-        if datos.empty:
+        if df_dia.empty:
             st.info("No hay registros de asistencia para este día.")
             st.stop()
 
         # 2. Unir con alumnos para obtener los nombres
-        datos = datos.merge(df_alumnos, left_on="alumno_id", right_on="id", suffixes=("", "_alumno"))
+        df_dia = df_dia.merge(df_alumnos, left_on="alumno_id", right_on="id", suffixes=("", "_alumno"))
 
         # --- CAMBIO CLAVE: ORDENADO ALFABÉTICO ---
         # Ordenamos los datos por el nombre del alumno antes de mostrarlos en el editor
-        datos = datos.sort_values(by="nombre")
+        df_dia = df_dia.sort_values(by="nombre")
 
         st.subheader(f"Asistencias del {fecha_sel.strftime('%d/%m/%Y')}")
 
         # 3. Selección segura de columnas
-        columnas_disponibles = datos.columns.tolist()
+        columnas_disponibles = df_dia.columns.tolist()
         columnas_a_mostrar = ["alumno_id", "nombre", "asiste", "curso_id"]
         
         if "curso_academico" in columnas_disponibles:
@@ -985,7 +1028,7 @@ if rol == "admin":
 
         # 4. Mostrar el editor de datos (ya ordenado)
         editable = st.data_editor(
-            datos[columnas_a_mostrar],
+            df_dia[columnas_a_mostrar],
             num_rows="fixed",
             hide_index=True,
             key="editor_gest_asistencia_ordenado"
@@ -1014,7 +1057,6 @@ if rol == "admin":
                 ).execute()
 
                 st.success("✅ Cambios guardados y ordenados correctamente.")
-                st.cache_data.clear()
             except Exception as e:
                 st.error(f"Error al guardar: {e}")
 
@@ -1035,689 +1077,462 @@ if rol == "admin":
     if st.session_state.informes == "📝 Informes PDF":
 
         st.header("Generación de Informes PDF")
-    
-        # 1. CARGA DIRECTA Y LIMPIEZA DE CACHÉ
-        st.cache_data.clear()
 
-        with st.spinner("Sincronizando con la base de datos..."):
-            # Asistencia
-            res_asist = supabase.table("asistencia").select("*").execute()
-            df_asistencia = pd.DataFrame(res_asist.data)
-        
-            # Alumnos
-            res_alu = supabase.table("alumnos").select("*").execute()
-            df_alumnos = pd.DataFrame(res_alu.data)
-        
-            # Cursos
-            res_cur = supabase.table("cursos").select("*").execute()
-            df_cursos = pd.DataFrame(res_cur.data)
-
-            # Maestros (puedes dejarlos como estaban o directos)
-            df_comidas = db_select("maestros_comidas")
-            df_agua = db_select("maestros_agua")
-
-        # 2. CRÍTICO: NORMALIZACIÓN DE TIPOS (Evita fallos en el Merge)
-        # Esto asegura que los IDs sean siempre números y no den error al comparar
-        if not df_asistencia.empty:
-            df_asistencia["alumno_id"] = pd.to_numeric(df_asistencia["alumno_id"], errors='coerce')
-            df_asistencia["curso_id"] = pd.to_numeric(df_asistencia["curso_id"], errors='coerce')
-    
-        if not df_alumnos.empty:
-            df_alumnos["id"] = pd.to_numeric(df_alumnos["id"], errors='coerce')
-            df_alumnos["curso_id"] = pd.to_numeric(df_alumnos["curso_id"], errors='coerce')
-            
-        if not df_cursos.empty:
-            df_cursos["id"] = pd.to_numeric(df_cursos["id"], errors='coerce')
+        # Cada informe va en su pestaña y lee solo lo que necesita: únicamente
+        # se ejecuta la pestaña abierta (on_change="rerun") y las consultas
+        # grandes esperan al botón de generar. Abrir la página no lee ninguna tabla.
 
-        fecha_hoy = datetime.now().strftime("%Y-%m-%d")
-
-      
         # =========================
         # INFORME DIARIO PARA COCINA (CONEXIÓN DIRECTA SIN CACHÉ)
         # =========================
-        st.subheader("Informe Diario para Cocina")
+        def informe_diario():
+            st.subheader("Informe Diario para Cocina")
 
-        fecha_diario = st.date_input(
-            "Selecciona la fecha del informe",
-            value=datetime.now().date(),
-            key="fecha_informe_diario"
-        )
-        fecha_diario_str = fecha_diario.strftime("%Y-%m-%d")
+            fecha_diario = st.date_input(
+                "Selecciona la fecha del informe",
+                value=datetime.now().date(),
+                key="fecha_informe_diario"
+            )
+            fecha_diario_str = fecha_diario.strftime("%Y-%m-%d")
+
+            from dietas import columna_dietas, conteo_dietas
+            from informes import tabla_dietas
+
+            if st.button("Generar PDF Diario", type="primary"):
+                # --- PASO 1: CARGA DE DATOS ---
+                # Las tres lecturas a la vez. La asistencia del día se lee siempre;
+                # alumnos y cursos salen de la caché si no han cambiado (ver datos.version_tablas)
+                with st.spinner("Obteniendo datos actualizados de Supabase..."):
+                    leido = datos.db_select_varias({
+                        "asistencia": ("asistencia", "*", [("fecha", "eq", fecha_diario_str)]),
+                        "alumnos": "alumnos",
+                        "cursos": "cursos",
+                    })
+                    df_asis_fresco, df_alu_fresco, df_cur_fresco = leido["asistencia"], leido["alumnos"], leido["cursos"]
+
+                if df_asis_fresco.empty:
+                    st.warning(f"No hay registros de asistencia para el día {fecha_diario.strftime('%d/%m/%Y')}")
+                else:
+                    # --- PASO 2: MAPEO DE NOMBRES Y DIETAS ---
+                    dict_cursos = dict(zip(df_cur_fresco["id"], df_cur_fresco["nombre"]))
+                    dict_alu_nombre = dict(zip(df_alu_fresco["id"], df_alu_fresco["nombre"]))
+
+                    # Solo los que asisten, con el curso y las dietas del alumno (una sola pasada)
+                    comensales_hoy = df_asis_fresco[df_asis_fresco["asiste"]][["alumno_id"]].merge(
+                        df_alu_fresco.assign(dietas=columna_dietas(df_alu_fresco))[["id", "curso_id", "dietas"]],
+                        left_on="alumno_id",
+                        right_on="id",
+                        how="left"
+                    )
+                    # Si el curso ya no existe se muestra su id
+                    id_curso = comensales_hoy["curso_id"].astype("string").fillna("Sin ID")
+                    comensales_hoy["curso"] = comensales_hoy["curso_id"].map(dict_cursos).fillna(id_curso)
 
-        if st.button("Generar PDF Diario", type="primary"):
-            # --- PASO 1: LIMPIEZA DE CACHÉ Y CARGA FRESCA ---
-            # Forzamos a que Streamlit olvide los datos viejos
-            st.cache_data.clear()
-            
-            with st.spinner("Obteniendo datos actualizados de Supabase..."):
-                # Cargamos directamente sin pasar por funciones previas
-                r_asis = supabase.table("asistencia").select("*").eq("fecha", fecha_diario_str).execute()
-                df_asis_fresco = pd.DataFrame(r_asis.data)
-                
-                r_alu = supabase.table("alumnos").select("*").execute()
-                df_alu_fresco = pd.DataFrame(r_alu.data)
-                
-                r_cur = supabase.table("cursos").select("*").execute()
-                df_cur_fresco = pd.DataFrame(r_cur.data)
+                    conteo = comensales_hoy.groupby("curso").size().reset_index(name="Total")
+                    conteo = conteo.sort_values("curso")
+                    conteo_dietas_hoy = conteo_dietas(comensales_hoy, columna_curso="curso")
 
-            if df_asis_fresco.empty:
-                st.warning(f"No hay registros de asistencia para el día {fecha_diario.strftime('%d/%m/%Y')}")
-            else:
-                # --- PASO 2: MAPEO DE NOMBRES ---
-                # Creamos diccionarios con los datos RECIÉN TRAÍDOS
-                dict_cursos = {str(row['id']): str(row['nombre']) for _, row in df_cur_fresco.iterrows()}
-                dict_alu_nombre = {str(row['id']): str(row['nombre']) for _, row in df_alu_fresco.iterrows()}
-                dict_alu_curso = {str(row['id']): str(row['curso_id']) for _, row in df_alu_fresco.iterrows()}
-
-                # Solo los que asisten
-                comensales_hoy = df_asis_fresco[df_asis_fresco["asiste"] == True].copy()
-                
-                lista_nombres_cursos = []
-                for _, fila in comensales_hoy.iterrows():
-                    id_alumno = str(fila["alumno_id"])
-                    id_curso_del_alumno = dict_alu_curso.get(id_alumno, "Sin ID")
-                    
-                    # Buscamos el nombre del curso. Si no existe el ID, usamos el valor que tenga (por si ya es un nombre)
-                    nombre_final = dict_cursos.get(id_curso_del_alumno, id_curso_del_alumno)
-                    lista_nombres_cursos.append(nombre_final)
-
-                df_pdf = pd.DataFrame({"curso": lista_nombres_cursos})
-                conteo = df_pdf.groupby("curso").size().reset_index(name="Total")
-                conteo = conteo.sort_values("curso")
-
-                # --- PASO 3: CONSTRUCCIÓN DEL PDF ---
-                buffer = io.BytesIO()
-                c = canvas.Canvas(buffer, pagesize=A4)
-                page_width, page_height = A4
-
-                draw_logo_centered(c, page_width, page_height - 190)
-                c.setFont("Helvetica-Bold", 18)
-                c.drawCentredString(page_width/2, 750, f"Informe Diario - {fecha_diario.strftime('%d/%m/%Y')}")
-
-                tabla_data = [["Curso", "Comensales"]]
-                for _, row in conteo.iterrows():
-                    tabla_data.append([str(row["curso"]), row["Total"]])
-                
-                tabla_data.append(["TOTAL GENERAL", conteo["Total"].sum()])
-
-                tabla = Table(tabla_data, colWidths=[250, 100])
-                tabla.setStyle(TableStyle([
-                    ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-                    ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-                    ("ALIGN", (0,0), (-1,-1), "CENTER"),
-                    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-                    ("FONTNAME", (0,-1), (-1,-1), "Helvetica-Bold"),
-                    ("BACKGROUND", (0,-1), (-1,-1), colors.whitesmoke),
-                ]))
-
-                w, h = tabla.wrap(page_width, page_height)
-                y_pos = 700 - h
-                tabla.drawOn(c, 50, y_pos)
-
-                # Observaciones
-                y_pos -= 40
-                c.setFont("Helvetica-Bold", 14)
-                c.drawString(50, y_pos, "Observaciones:")
-                y_pos -= 20
-                c.setFont("Helvetica", 10)
-                
-                obs_hoy = df_asis_fresco[df_asis_fresco["motivo"].fillna("") != ""]
-                if obs_hoy.empty:
-                    c.drawString(60, y_pos, "Sin observaciones.")
-                else:
-                    for _, row in obs_hoy.iterrows():
-                        nombre_a = dict_alu_nombre.get(str(row["alumno_id"]), "Alumno")
-                        c.drawString(60, y_pos, f"• {nombre_a}: {row['motivo']}")
-                        y_pos -= 15
+                    # --- PASO 3: CONSTRUCCIÓN DEL PDF ---
+                    inicio_pdf = time.perf_counter()
+                    buffer = io.BytesIO()
+                    c = canvas.Canvas(buffer, pagesize=A4)
+                    page_width, page_height = A4
 
-                add_page_number(c)
-                c.save()
+                    draw_logo_centered(c, page_width, page_height - 190)
+                    c.setFont("Helvetica-Bold", 18)
+                    c.drawCentredString(page_width/2, 750, f"Informe Diario - {fecha_diario.strftime('%d/%m/%Y')}")
+
+                    tabla_data = [["Curso", "Comensales"]]
+                    for _, row in conteo.iterrows():
+                        tabla_data.append([str(row["curso"]), row["Total"]])
+
+                    tabla_data.append(["TOTAL GENERAL", conteo["Total"].sum()])
+
+                    tabla = Table(tabla_data, colWidths=[250, 100])
+                    tabla.setStyle(TableStyle([
+                        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+                        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+                        ("ALIGN", (0,0), (-1,-1), "CENTER"),
+                        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+                        ("FONTNAME", (0,-1), (-1,-1), "Helvetica-Bold"),
+                        ("BACKGROUND", (0,-1), (-1,-1), colors.whitesmoke),
+                    ]))
+
+                    w, h = tabla.wrap(page_width, page_height)
+                    y_pos = 700 - h
+                    tabla.drawOn(c, 50, y_pos)
+
+                    # Dietas por curso
+                    if not conteo_dietas_hoy.empty:
+                        y_pos -= 30
+                        c.setFont("Helvetica-Bold", 14)
+                        c.drawString(50, y_pos, "Dietas especiales:")
+                        t_dietas = tabla_dietas(conteo_dietas_hoy)
+                        w, h = t_dietas.wrap(page_width, page_height)
+                        y_pos -= 10 + h
+                        t_dietas.drawOn(c, 50, y_pos)
+
+                    # Observaciones
+                    y_pos -= 40
+                    c.setFont("Helvetica-Bold", 14)
+                    c.drawString(50, y_pos, "Observaciones:")
+                    y_pos -= 20
+                    c.setFont("Helvetica", 10)
+
+                    obs_hoy = df_asis_fresco[df_asis_fresco["motivo"].notna() & (df_asis_fresco["motivo"] != "")]
+                    if obs_hoy.empty:
+                        c.drawString(60, y_pos, "Sin observaciones.")
+                    else:
+                        for _, row in obs_hoy.iterrows():
+                            nombre_a = dict_alu_nombre.get(row["alumno_id"], "Alumno")
+                            c.drawString(60, y_pos, f"• {nombre_a}: {row['motivo']}")
+                            y_pos -= 15
+
+                    add_page_number(c)
+                    c.save()
+                    rendimiento.sumar("reportlab", time.perf_counter() - inicio_pdf)
+
+                    st.success("PDF generado con datos frescos de la base de datos.")
+                    st.download_button(
+                        label="📥 Descargar Informe Diario",
+                        data=buffer.getvalue(),
+                        file_name=f"informe_diario_{fecha_diario_str}.pdf",
+                        mime="application/pdf",
+                        use_container_width=True
+                    )
 
-                st.success("PDF generado con datos frescos de la base de datos.")
-                st.download_button(
-                    label="📥 Descargar Informe Diario",
-                    data=buffer.getvalue(),
-                    file_name=f"informe_diario_{fecha_diario_str}.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
         # =========================================================
         # INFORME DE SITUACIÓN EN MESA (VERSIÓN CORREGIDA)
         # =========================================================
-        st.write("---")
-        st.subheader("📍 Informe de Situación en Mesa")
-        st.info("Configura la distribución de los alumnos. Esta configuración se guarda permanentemente.")
+        def informe_mesa():
+            st.subheader("📍 Informe de Situación en Mesa")
+            st.info(
+                "Los comensales de hoy se reparten automáticamente en la fila de su curso (ver 'Gestión de cursos') "
+                "y por mesas según la capacidad configurada. Aquí solo se ajustan las mesas y las excepciones."
+            )
 
-        # 1. CARGA DE DATOS FRESCOS
-        st.cache_data.clear() # Limpiamos para asegurar datos reales
-        df_cursos = db_select("cursos")
-        df_alumnos = db_select("alumnos")
-        
-        try:
-            df_config_prev = db_select("config_mesas")
-        except:
-            df_config_prev = pd.DataFrame()
-
-        # --- MAPEO ROBUSTO (SIN MERGES) ---
-        # Creamos diccionarios para evitar el error de columnas inexistentes
-        dict_nombres_curso = {str(k): str(v) for k, v in zip(df_cursos["id"], df_cursos["nombre"])}
-        
-        # Preparamos la lista de alumnos con su nombre de curso ya integrado
-        lista_alumnos_procesada = []
-        for _, alu in df_alumnos.iterrows():
-            id_cur = str(alu["curso_id"])
-            nombre_c = dict_nombres_curso.get(id_cur, id_cur) # Si no hay ID, usa el valor (por si ya es nombre)
-            lista_alumnos_procesada.append({
-                "id": alu["id"],
-                "nombre": alu["nombre"],
-                "nombre_curso": nombre_c,
-                "curso_id": alu["curso_id"]
-            })
-        
-        df_alumnos_full = pd.DataFrame(lista_alumnos_procesada)
-        df_alumnos_full = df_alumnos_full.sort_values(by="nombre_curso")
-
-        # --- FUNCIÓN DE DEFAULTS ---
-        def obtener_defaults(fila_num):
-            if df_config_prev is not None and not df_config_prev.empty:
-                if "fila" in df_config_prev.columns and "id_alumno" in df_config_prev.columns:
-                    ids_en_fila = df_config_prev[df_config_prev["fila"] == fila_num]["id_alumno"].tolist()
-                    seleccionados = df_alumnos_full[df_alumnos_full["id"].isin(ids_en_fila)]
-                    return seleccionados.to_dict('records')
-            return []
-            
-        # 2. INTERFAZ DE EDICIÓN
-        col_m1, col_m2, col_m3 = st.columns(3)
-
-        with col_m1:
-            st.markdown("### 🪑 INFANTIL")
-            m1_sel = st.multiselect("Fila 1", df_alumnos_full.to_dict('records'), 
-                                   default=obtener_defaults(1), 
-                                   format_func=lambda x: f"{x['nombre']} ({x['nombre_curso']})", 
-                                   key="m1_final")
-        with col_m2:
-            st.markdown("### 🪑 MEDIANOS")
-            m2_sel = st.multiselect("Fila 2", df_alumnos_full.to_dict('records'), 
-                                   default=obtener_defaults(2), 
-                                   format_func=lambda x: f"{x['nombre']} ({x['nombre_curso']})", 
-                                   key="m2_final")
-        with col_m3:
-            st.markdown("### 🪑 GRANDES")
-            m3_sel = st.multiselect("Fila 3", df_alumnos_full.to_dict('records'), 
-                                   default=obtener_defaults(3), 
-                                   format_func=lambda x: f"{x['nombre']} ({x['nombre_curso']})", 
-                                   key="m3_final")
-
-        # 3. ACCIONES
-        c_btn1, c_btn2 = st.columns(2)
-
-        with c_btn1:
-            if st.button("💾 Guardar Cambios de Mesa", use_container_width=True):
-                try:
-                    supabase.table("config_mesas").delete().neq("id", -1).execute() 
-                    nuevos_reg = []
-                    for a in m1_sel: nuevos_reg.append({"id_alumno": a["id"], "fila": 1})
-                    for a in m2_sel: nuevos_reg.append({"id_alumno": a["id"], "fila": 2})
-                    for a in m3_sel: nuevos_reg.append({"id_alumno": a["id"], "fila": 3})
-                    
-                    if nuevos_reg:
-                        db_insert("config_mesas", nuevos_reg)
-                        st.success("Configuración guardada.")
+            from mesas import plan_del_dia
+            from informes import pdf_situacion_mesa
+            from dietas import conteo_dietas
+
+            fecha_mesa = datetime.now().strftime("%Y-%m-%d")
+            plan, df_filas, avisos = plan_del_dia(fecha_mesa, colegio_actual())
+
+            # 1. FILAS Y CAPACIDAD
+            with st.expander("⚙️ Filas y capacidad de las mesas"):
+                filas_editadas = st.data_editor(
+                    df_filas[["fila", "nombre", "mesas", "plazas_por_mesa"]],
+                    disabled=["fila"],
+                    hide_index=True,
+                    column_config={
+                        "fila": "Fila",
+                        "nombre": "Nombre",
+                        "mesas": st.column_config.NumberColumn("Mesas", min_value=1, step=1),
+                        "plazas_por_mesa": st.column_config.NumberColumn("Plazas por mesa", min_value=1, step=1),
+                    },
+                    key="editor_filas_mesas"
+                )
+                if st.button("💾 Guardar filas"):
+                    try:
+                        db_upsert("config_filas", filas_editadas.to_dict(orient="records"), "colegio_id,fila")
+                        st.success("Capacidad de las mesas guardada.")
                         st.rerun()
-                except Exception as e:
-                    st.error(f"Error al guardar: {e}")
+                    except Exception as e:
+                        st.error(f"Error al guardar: {e}")
+
+            # 2. EXCEPCIONES MANUALES
+            with st.expander("✋ Excepciones manuales"):
+                df_alumnos = db_select_cacheado("alumnos")
+                df_cursos = db_select_cacheado("cursos")
+                df_alumnos_mesa = df_alumnos.merge(
+                    df_cursos[["id", "nombre"]].rename(columns={"id": "curso_id", "nombre": "nombre_curso"}),
+                    on="curso_id",
+                    how="left"
+                ).sort_values(["nombre_curso", "nombre"])
+                etiquetas_alumnos = {
+                    int(a.id): f"{a.nombre} ({a.nombre_curso})"
+                    for a in df_alumnos_mesa.itertuples(index=False)
+                }
+                nombres_filas = dict(zip(df_filas["fila"], df_filas["nombre"]))
+
+                col_x1, col_x2, col_x3 = st.columns([2, 1, 1])
+                with col_x1:
+                    alumno_exc = busqueda.selector("Alumno", "alumnos", key="alumno_excepcion", etiquetas=etiquetas_alumnos)
+                with col_x2:
+                    fila_exc = st.selectbox("Fila", list(nombres_filas), format_func=nombres_filas.get, key="fila_excepcion")
+                with col_x3:
+                    mesa_exc = st.number_input("Mesa (0 = automática)", min_value=0, step=1, key="mesa_excepcion")
 
-        with c_btn2:
-            if st.button("🖨️ Generar PDF de Situación", type="primary", use_container_width=True):
-                # OBTENER ASISTENCIA REAL DE HOY (CARGA DIRECTA)
-                fecha_hoy_str = datetime.now().strftime("%Y-%m-%d")
-                res_asis = supabase.table("asistencia").select("alumno_id").eq("fecha", fecha_hoy_str).eq("asiste", True).execute()
-                ids_asisten_hoy = [r["alumno_id"] for r in res_asis.data]
+                if st.button("➕ Añadir excepción"):
+                    try:
+                        supabase.table("config_mesas").delete().eq("id_alumno", alumno_exc).execute()
+                        db_insert("config_mesas", [{
+                            "id_alumno": alumno_exc,
+                            "fila": int(fila_exc),
+                            "mesa": int(mesa_exc) if mesa_exc > 0 else None
+                        }])
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error al guardar: {e}")
 
-                if not any([m1_sel, m2_sel, m3_sel]):
-                    st.error("Asigna alumnos a las mesas primero.")
+                df_excepciones = db_select("config_mesas")
+                if df_excepciones.empty:
+                    st.write("No hay excepciones: todos los alumnos se colocan automáticamente.")
                 else:
-                    # Si no hay nadie marcado hoy, por cortesía mostramos todos los asignados
-                    if not ids_asisten_hoy:
-                        st.warning("No hay asistencia marcada hoy. Mostrando todos los asignados.")
-                        ids_asisten_hoy = [a["id"] for a in (m1_sel + m2_sel + m3_sel)] 
+                    vista_exc = pd.DataFrame({
+                        "id_alumno": df_excepciones["id_alumno"],
+                        "Alumno": df_excepciones["id_alumno"].map(etiquetas_alumnos),
+                        "Fila": df_excepciones["fila"].map(nombres_filas),
+                        "Mesa": df_excepciones["mesa"] if "mesa" in df_excepciones.columns else None,
+                        "Quitar": False,
+                    })
+                    vista_exc = st.data_editor(
+                        vista_exc,
+                        disabled=["id_alumno", "Alumno", "Fila", "Mesa"],
+                        column_config={"id_alumno": None},
+                        hide_index=True,
+                        key="editor_excepciones_mesa"
+                    )
 
-                    # Filtrar listas para el PDF
-                    m1_pdf = [a for a in m1_sel if a["id"] in ids_asisten_hoy]
-                    m2_pdf = [a for a in m2_sel if a["id"] in ids_asisten_hoy]
-                    m3_pdf = [a for a in m3_sel if a["id"] in ids_asisten_hoy]
+                    c_exc1, c_exc2 = st.columns(2)
+                    with c_exc1:
+                        if st.button("🗑️ Quitar seleccionadas", use_container_width=True):
+                            ids_quitar = vista_exc.loc[vista_exc["Quitar"], "id_alumno"].astype(int).tolist()
+                            if ids_quitar:
+                                supabase.table("config_mesas").delete().in_("id_alumno", ids_quitar).execute()
+                                st.rerun()
+                    with c_exc2:
+                        if st.button("🧹 Quitar todas las excepciones", use_container_width=True):
+                            supabase.table("config_mesas").delete().neq("id", -1).execute()
+                            st.rerun()
+
+            # 3. PLAN DE HOY
+            if plan.empty:
+                st.warning("No hay asistencia marcada hoy: no hay comensales que sentar.")
+            else:
+                for aviso in avisos:
+                    st.warning(aviso)
+
+                col_filas = st.columns(len(df_filas))
+                for col, (_, f) in zip(col_filas, df_filas.iterrows()):
+                    with col:
+                        del_plan = plan[plan["fila"] == f["fila"]]
+                        st.markdown(f"### 🪑 {f['nombre']} ({len(del_plan)})")
+                        st.dataframe(
+                            del_plan[["mesa", "nombre", "nombre_curso"]].rename(columns={"mesa": "Mesa", "nombre": "Alumno", "nombre_curso": "Curso"}),
+                            hide_index=True,
+                            use_container_width=True
+                        )
 
-                    buffer = io.BytesIO()
-                    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=30, leftMargin=30, topMargin=40, bottomMargin=30)
-                    elementos = []
-                    estilos_p = getSampleStyleSheet()
-
-                    # Título
-                    titulo = f"SITUACIÓN EN MESA - {datetime.now().strftime('%d/%m/%Y')}"
-                    elementos.append(Paragraph(f"<b>{titulo}</b>", estilos_p['Title']))
-                    elementos.append(Spacer(1, 15))
-
-                    # Tabla
-                    max_filas = max(len(m1_pdf), len(m2_pdf), len(m3_pdf))
-                    tabla_data = [["INFANTIL", "MEDIANOS", "GRANDES"]]
-                    
-                    estilos_tabla = [
-                        ("BACKGROUND", (0,0), (-1,0), colors.black),
-                        ("TEXTCOLOR", (0,0), (-1,0), colors.white),
-                        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-                        ("ALIGN", (0,0), (-1,-1), "CENTER"),
-                        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-                        ("FONTSIZE", (0,0), (-1,-1), 10),
-                    ]
-
-                    alertas_gluten = ["Ceballos Ruíz, Lucía", "García Ruíz, Lucía"]
-
-                    for i in range(max_filas):
-                        fila_cont = []
-                        for col_idx, lista in enumerate([m1_pdf, m2_pdf, m3_pdf]):
-                            if i < len(lista):
-                                alu = lista[i]
-                                nombre = alu['nombre']
-                                curso = alu['nombre_curso']
-                                
-                                # Color por etapa (Infantil, Primaria...)
-                                _, color_base = obtener_info_etapa(curso)
-                                
-                                # Alerta Alergia
-                                if nombre in alertas_gluten:
-                                    color_base = colors.orange
-                                
-                                fila_cont.append(f"{nombre}\n({curso})")
-                                estilos_tabla.append(("BACKGROUND", (col_idx, i+1), (col_idx, i+1), color_base))
-                            else:
-                                fila_cont.append("")
-                        tabla_data.append(fila_cont)
-
-                    # Subtotales
-                    tabla_data.append([f"Total: {len(m1_pdf)}", f"Total: {len(m2_pdf)}", f"Total: {len(m3_pdf)}"])
-                    idx_last = len(tabla_data) - 1
-                    estilos_tabla.append(("BACKGROUND", (0, idx_last), (-1, idx_last), colors.lightgrey))
-                    estilos_tabla.append(("FONTNAME", (0, idx_last), (-1, idx_last), "Helvetica-Bold"))
-
-                    ancho_util = landscape(A4)[0] - 60
-                    t_mesas = Table(tabla_data, colWidths=[ancho_util/3]*3)
-                    t_mesas.setStyle(TableStyle(estilos_tabla))
-                    elementos.append(t_mesas)
-
-                    # Total Final
-                    elementos.append(Spacer(1, 20))
-                    total_hoy = len(m1_pdf) + len(m2_pdf) + len(m3_pdf)
-                    elementos.append(Paragraph(f"<para align='right' size='14'><b>TOTAL COMENSALES: <font color='blue'>{total_hoy}</font></b></para>", estilos_p['Normal']))
-
-                    def add_page_number(canvas, doc):
-                        canvas.setFont("Helvetica", 9)
-                        canvas.drawRightString(landscape(A4)[0] - 30, 20, f"Página {canvas.getPageNumber()}")
-
-                    doc.build(elementos, onFirstPage=add_page_number, onLaterPages=add_page_number)
-                    
+                dietas_hoy = conteo_dietas(plan)
+                if not dietas_hoy.empty:
+                    st.markdown("#### 🥗 Dietas especiales por curso")
+                    st.dataframe(dietas_hoy, use_container_width=True)
+
+                if st.button("🖨️ Generar PDF de Situación", type="primary", use_container_width=True):
                     st.download_button(
-                        "📩 Descargar PDF de Situación", 
-                        buffer.getvalue(), 
-                        f"situacion_mesas_{fecha_hoy_str}.pdf", 
-                        "application/pdf", 
+                        "📩 Descargar PDF de Situación",
+                        pdf_situacion_mesa(plan, df_filas, fecha_mesa),
+                        f"situacion_mesas_{fecha_mesa}.pdf",
+                        "application/pdf",
                         use_container_width=True
                     )
+
         # =========================
         # INFORME POR CURSO (CARGA FRESCA FORZADA)
         # =========================
-        st.subheader("Informe por Curso")
+        def informe_curso():
+            st.subheader("Informe por Curso")
 
-        opciones_cursos = ["Todos los cursos"] + df_cursos[df_cursos["nombre"].str.lower() != "ninguno"]["nombre"].tolist()
-        curso_sel = st.selectbox("Selecciona curso", opciones_cursos, key="curso_pdf")
+            df_cursos = db_select_cacheado("cursos")
+            opciones_cursos = ["Todos los cursos"] + df_cursos[df_cursos["nombre"].str.lower() != "ninguno"]["nombre"].tolist()
+            curso_sel = st.selectbox("Selecciona curso", opciones_cursos, key="curso_pdf")
 
-        fecha_curso = st.date_input(
-            "Selecciona la fecha",
-            value=datetime.now().date(),
-            key="fecha_informe_curso"
-        )
-        fecha_curso_str = fecha_curso.strftime("%Y-%m-%d")
-
-        if st.button("Generar PDF por Curso", type="primary"):
-            with st.spinner("Actualizando datos..."):
-                # PASO 1: Forzamos lectura fresca de la DB
-                df_alumnos_fresco = db_select("alumnos")
-                df_cursos_fresco = db_select("cursos")
-                # Traemos la asistencia de ese día específico directamente
-                res_asis = supabase.table("asistencia").select("*").eq("fecha", fecha_curso_str).execute()
-                df_dia_fresco = pd.DataFrame(res_asis.data)
-
-            if df_dia_fresco.empty:
-                st.warning(f"No hay registros de asistencia para el día {fecha_curso.strftime('%d/%m/%Y')}")
-            else:
-                # PASO 2: Preparar mapeos con datos frescos
-                # Usamos diccionarios para que la búsqueda sea instantánea
-                dict_alu_curso = {str(k): str(v) for k, v in zip(df_alumnos_fresco["id"], df_alumnos_fresco["curso_id"])}
-                dict_nombres_alu = {str(k): str(v) for k, v in zip(df_alumnos_fresco["id"], df_alumnos_fresco["nombre"])}
-                
-                # Definir qué cursos procesar
-                if curso_sel == "Todos los cursos":
-                    cursos_a_procesar = df_cursos_fresco[df_cursos_fresco["nombre"].str.lower() != "ninguno"].to_dict(orient="records")
+            fecha_curso = st.date_input(
+                "Selecciona la fecha",
+                value=datetime.now().date(),
+                key="fecha_informe_curso"
+            )
+            fecha_curso_str = fecha_curso.strftime("%Y-%m-%d")
+
+            if st.button("Generar PDF por Curso", type="primary"):
+                with st.spinner("Actualizando datos..."):
+                    # PASO 1: alumnos (de la caché si no han cambiado) y la asistencia
+                    # de ese día específico, a la vez
+                    leido = datos.db_select_varias({
+                        "alumnos": "alumnos",
+                        "asistencia": ("asistencia", "*", [("fecha", "eq", fecha_curso_str)]),
+                    })
+                    df_alumnos_fresco, df_dia_fresco = leido["alumnos"], leido["asistencia"]
+                    df_cursos_fresco = df_cursos  # recién leídos al abrir la pestaña
+
+                if df_dia_fresco.empty:
+                    st.warning(f"No hay registros de asistencia para el día {fecha_curso.strftime('%d/%m/%Y')}")
                 else:
-                    cursos_a_procesar = df_cursos_fresco[df_cursos_fresco["nombre"] == curso_sel].to_dict(orient="records")
+                    # PASO 2: Curso y nombre actuales de cada alumno de la lista del día (un solo map por columna)
+                    alumnos_por_id = df_alumnos_fresco.set_index("id")
+                    df_dia_fresco = df_dia_fresco.assign(
+                        curso_alumno=df_dia_fresco["alumno_id"].map(alumnos_por_id["curso_id"]),
+                        nombre_alumno=df_dia_fresco["alumno_id"].map(alumnos_por_id["nombre"]).fillna("Desconocido"),
+                    )
 
-                buffer = io.BytesIO()
-                c = canvas.Canvas(buffer, pagesize=A4)
-                page_width, page_height = A4
-                primera_pagina = True 
-                
-                for curso in cursos_a_procesar:
-                    nombre_curso = curso["nombre"]
-                    id_curso_target = str(curso["id"])
-
-                    # Filtrar alumnos de este curso en la asistencia de hoy
-                    filas_curso = []
-                    for _, row in df_dia_fresco.iterrows():
-                        id_alu = str(row["alumno_id"])
-                        # Verificamos si el alumno de esta fila de asistencia pertenece al curso actual
-                        if dict_alu_curso.get(id_alu) == id_curso_target:
-                            filas_curso.append([
-                                dict_nombres_alu.get(id_alu, "Desconocido"),
-                                "Sí" if row["asiste"] else "No"
-                            ])
-                    
-                    # Si el curso no tiene alumnos hoy, y seleccionamos "Todos", saltamos página vacía
-                    if not filas_curso and curso_sel == "Todos los cursos":
-                        continue
+                    # Definir qué cursos procesar
+                    if curso_sel == "Todos los cursos":
+                        cursos_a_procesar = df_cursos_fresco[df_cursos_fresco["nombre"].str.lower() != "ninguno"].to_dict(orient="records")
+                    else:
+                        cursos_a_procesar = df_cursos_fresco[df_cursos_fresco["nombre"] == curso_sel].to_dict(orient="records")
 
-                    if not primera_pagina: 
-                        c.showPage() 
-                    primera_pagina = False
+                    inicio_pdf = time.perf_counter()
+                    buffer = io.BytesIO()
+                    c = canvas.Canvas(buffer, pagesize=A4)
+                    page_width, page_height = A4
+                    primera_pagina = True 
 
-                    draw_logo_centered(c, page_width, page_height - 190)
+                    for curso in cursos_a_procesar:
+                        nombre_curso = curso["nombre"]
 
-                    c.setFont("Helvetica-Bold", 18)
-                    c.drawCentredString(page_width/2, 750, f"Informe por Curso - {nombre_curso}")
-                    c.setFont("Helvetica", 12)
-                    c.drawCentredString(page_width/2, 720, f"Fecha: {fecha_curso.strftime('%d/%m/%Y')}")
-
-                    # Tabla
-                    tabla_data = [["Alumno", "Asiste"]]
-                    filas_curso.sort(key=lambda x: x[0]) # Orden alfabético
-                    tabla_data.extend(filas_curso if filas_curso else [["Sin alumnos registrados", "-"]])
-
-                    anchos = [300, 100]
-                    x_centrada = (page_width - sum(anchos)) / 2
-                    tabla = Table(tabla_data, colWidths=anchos)
-                    tabla.setStyle(TableStyle([
-                        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-                        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-                        ("ALIGN", (0,0), (-1,-1), "CENTER"),
-                        ("ALIGN", (0,0), (0,-1), "LEFT"),
-                        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-                        ("LEFTPADDING", (0,0), (0,-1), 15),
-                        ("FONTSIZE", (0,0), (-1,-1), 11),
-                    ]))
+                        # Filas de asistencia de hoy de los alumnos que están en este curso
+                        del_curso = df_dia_fresco[df_dia_fresco["curso_alumno"] == curso["id"]]
+                        filas_curso = [
+                            [nombre_a, "Sí" if asiste else "No"]
+                            for nombre_a, asiste in zip(del_curso["nombre_alumno"], del_curso["asiste"])
+                        ]
 
-                    w, h = tabla.wrap(page_width, page_height)
-                    tabla.drawOn(c, x_centrada, 680 - h)
-                    add_page_number(c)
+                        # Si el curso no tiene alumnos hoy, y seleccionamos "Todos", saltamos página vacía
+                        if not filas_curso and curso_sel == "Todos los cursos":
+                            continue
+
+                        if not primera_pagina: 
+                            c.showPage() 
+                        primera_pagina = False
+
+                        draw_logo_centered(c, page_width, page_height - 190)
+
+                        c.setFont("Helvetica-Bold", 18)
+                        c.drawCentredString(page_width/2, 750, f"Informe por Curso - {nombre_curso}")
+                        c.setFont("Helvetica", 12)
+                        c.drawCentredString(page_width/2, 720, f"Fecha: {fecha_curso.strftime('%d/%m/%Y')}")
+
+                        # Tabla
+                        tabla_data = [["Alumno", "Asiste"]]
+                        filas_curso.sort(key=lambda x: x[0]) # Orden alfabético
+                        tabla_data.extend(filas_curso if filas_curso else [["Sin alumnos registrados", "-"]])
+
+                        anchos = [300, 100]
+                        x_centrada = (page_width - sum(anchos)) / 2
+                        tabla = Table(tabla_data, colWidths=anchos)
+                        tabla.setStyle(TableStyle([
+                            ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+                            ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+                            ("ALIGN", (0,0), (-1,-1), "CENTER"),
+                            ("ALIGN", (0,0), (0,-1), "LEFT"),
+                            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+                            ("LEFTPADDING", (0,0), (0,-1), 15),
+                            ("FONTSIZE", (0,0), (-1,-1), 11),
+                        ]))
+
+                        w, h = tabla.wrap(page_width, page_height)
+                        tabla.drawOn(c, x_centrada, 680 - h)
+                        add_page_number(c)
+
+                    c.save()
+                    rendimiento.sumar("reportlab", time.perf_counter() - inicio_pdf)
+                    st.success("PDF generado con datos actualizados.")
+                    st.download_button(
+                        label="📥 Descargar PDF por Curso",
+                        data=buffer.getvalue(),
+                        file_name=f"informe_{curso_sel}_{fecha_curso_str}.pdf",
+                        mime="application/pdf",
+                        use_container_width=True
+                    )
 
-                c.save()
-                st.success("PDF generado con datos actualizados.")
-                st.download_button(
-                    label="📥 Descargar PDF por Curso",
-                    data=buffer.getvalue(),
-                    file_name=f"informe_{curso_sel}_{fecha_curso_str}.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
-    
         # =========================
         # INFORME MENSUAL (CARGA TOTAL FORZADA)
         # =========================
-        st.subheader("Informe Mensual")
-        col_m, col_a = st.columns(2)
-        with col_m:
-            mes = st.selectbox("Selecciona mes", list(range(1, 13)), index=datetime.now().month - 1, key="mes_pdf")
-        with col_a:
-            año = st.number_input("Año", min_value=2024, max_value=2030, value=datetime.now().year, key="año_pdf_input")
-
-        if st.button("Generar PDF Mensual", type="primary"):
-            with st.spinner("Recopilando datos mensuales..."):
-                # 1. CARGA FRESCA DE DATOS BÁSICOS
-                df_alumnos_fresco = db_select("alumnos")
-                df_cursos_fresco = db_select("cursos")
-                
-                # 2. CARGA DE ASISTENCIA DEL MES DIRECTAMENTE DESDE SUPABASE
-                dias_mes = calendar.monthrange(año, mes)[1]
-                fecha_inicio = f"{año}-{mes:02d}-01"
-                fecha_fin = f"{año}-{mes:02d}-{dias_mes:02d}"
-                
-                res_asis = supabase.table("asistencia")\
-                    .select("alumno_id, fecha, asiste")\
-                    .gte("fecha", fecha_inicio)\
-                    .lte("fecha", fecha_fin)\
-                    .eq("asiste", True)\
-                    .execute()
-                
-                df_asis_mes = pd.DataFrame(res_asis.data)
-
-            if df_asis_mes.empty:
-                st.warning(f"No hay registros de asistencia para el mes {mes}/{año}")
-            else:
-                # 3. PREPARAR MAPEOS
-                # Diccionario Alumno -> Curso ID
-                dict_alu_curso = {str(k): str(v) for k, v in zip(df_alumnos_fresco["id"], df_alumnos_fresco["curso_id"])}
-                # Cursos válidos (excluyendo 'ninguno')
-                df_cur_filt = df_cursos_fresco[df_cursos_fresco["nombre"].str.lower() != "ninguno"].copy()
-                df_cur_filt = df_cur_filt.sort_values("nombre")
-
-                # 4. CONSTRUIR MATRIZ (Curso x Días)
-                tabla_data = [["Curso"] + [str(d) for d in range(1, dias_mes+1)] + ["Total"]]
-                totales_diarios = [0] * dias_mes
-
-                for _, curso in df_cur_filt.iterrows():
-                    id_curso_str = str(curso["id"])
-                    fila = [curso["nombre"]]
-                    total_curso = 0
-
-                    for d in range(1, dias_mes+1):
-                        f_busqueda = f"{año}-{mes:02d}-{d:02d}"
-                        # Buscamos en los datos del mes
-                        asis_dia = df_asis_mes[df_asis_mes["fecha"] == f_busqueda]
-                        
-                        # Contamos cuántos alumnos de este curso aparecen en la asistencia de ese día
-                        count = 0
-                        for alu_id in asis_dia["alumno_id"]:
-                            if dict_alu_curso.get(str(alu_id)) == id_curso_str:
-                                count += 1
-                        
-                        fila.append(count if count > 0 else "")
-                        total_curso += count
-                        totales_diarios[d-1] += count
-                    
-                    fila.append(total_curso)
-                    tabla_data.append(fila)
-
-                # Fila de Totales Verticales
-                fila_totales = ["TOTAL DÍA"] + [str(t) if t > 0 else "0" for t in totales_diarios] + [sum(totales_diarios)]
-                tabla_data.append(fila_totales)
-
-                # 5. GENERAR EL PDF (Landscape A4)
-                buffer = io.BytesIO()
-                c = canvas.Canvas(buffer, pagesize=landscape(A4))
-                page_width, page_height = landscape(A4)
-
-                draw_logo_centered(c, page_width, page_height - 200)
-                c.setFont("Helvetica-Bold", 18)
-                c.drawCentredString(page_width/2, page_height - 110, f"INFORME MENSUAL DE COMENSALES - {mes}/{año}")
+        def informe_mensual():
+            st.subheader("Informe Mensual")
+            col_m, col_a = st.columns(2)
+            with col_m:
+                mes = st.selectbox("Selecciona mes", list(range(1, 13)), index=datetime.now().month - 1, key="mes_pdf")
+            with col_a:
+                año = st.number_input("Año", min_value=2024, max_value=2030, value=datetime.now().year, key="año_pdf_input")
+
+            if st.button("Generar PDF Mensual", type="primary"):
+                with st.spinner("Recopilando datos mensuales..."):
+                    # 1. CARGA FRESCA DE DATOS BÁSICOS
+                    df_alumnos_fresco = db_select_cacheado("alumnos")
+                    df_cursos_fresco = db_select_cacheado("cursos")
+
+                    # 2. CARGA DE ASISTENCIA DEL MES DIRECTAMENTE DESDE SUPABASE
+                    dias_mes = calendar.monthrange(año, mes)[1]
+                    fecha_inicio = f"{año}-{mes:02d}-01"
+                    fecha_fin = f"{año}-{mes:02d}-{dias_mes:02d}"
+
+                    res_asis = supabase.table("asistencia")\
+                        .select("alumno_id, fecha, asiste")\
+                        .gte("fecha", fecha_inicio)\
+                        .lte("fecha", fecha_fin)\
+                        .eq("asiste", True)\
+                        .execute()
+
+                    df_asis_mes = tipar("asistencia", pd.DataFrame(res_asis.data))
+
+                if df_asis_mes.empty:
+                    st.warning(f"No hay registros de asistencia para el mes {mes}/{año}")
+                else:
+                    pdf_mensual = pdf_informe_mensual(df_asis_mes, df_alumnos_fresco, df_cursos_fresco, mes, año)
 
-                # Ajuste de tamaño de fuente
-                fontSize = 8 if dias_mes > 30 else 9
-                
-                # Calculamos anchos: Nombre curso (80), días (20 aprox), total (40)
-                anchos_dias = (page_width - 150) / dias_mes
-                tabla = Table(tabla_data, colWidths=[85] + [anchos_dias]*dias_mes + [45])
-                
-                estilo = [
-                    ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-                    ("BACKGROUND", (0,-1), (-1,-1), colors.lightgrey),
-                    ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-                    ("ALIGN", (0,0), (-1,-1), "CENTER"),
-                    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-                    ("FONTNAME", (0,-1), (-1,-1), "Helvetica-Bold"),
-                    ("FONTSIZE", (0,0), (-1,-1), fontSize),
-                    ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-                ]
-                
-                # Sombreado alterno para las filas de cursos
-                for i in range(1, len(tabla_data)-1):
-                    if i % 2 == 0:
-                        estilo.append(("BACKGROUND", (0,i), (-1,i), colors.whitesmoke))
-                
-                tabla.setStyle(TableStyle(estilo))
-                
-                w, h = tabla.wrap(0, 0)
-                # Centramos la tabla en la página
-                tabla.drawOn(c, (page_width - w)/2, page_height - 160 - h)
+                    st.success(f"Informe de {mes}/{año} generado correctamente.")
+                    st.download_button(
+                        label="📥 Descargar Informe Mensual",
+                        data=pdf_mensual,
+                        file_name=f"mensual_{año}_{mes:02d}.pdf",
+                        mime="application/pdf",
+                        use_container_width=True
+                    )
 
-                add_page_number(c)
-                c.save()
+        # =========================================================
+        # INFORME DE FALTAS (OPTIMIZADO Y SIN ERRORES)
+        # =========================================================
+        def informe_faltas():
+            st.subheader("Informe de Faltas")
 
-                st.success(f"Informe de {mes}/{año} generado correctamente.")
+            col1, col2 = st.columns(2)
+            with col1:
+                mes_f = st.selectbox("Selecciona mes", list(range(1, 13)), key="mes_faltas", index=datetime.now().month - 1)
+                año_f = st.number_input("Año", min_value=2024, max_value=2030, value=datetime.now().year, key="año_faltas")
+            with col2:
+                df_cursos = db_select_cacheado("cursos")
+                opciones_curso = ["Todos los cursos"] + df_cursos[df_cursos["nombre"].str.lower() != "ninguno"]["nombre"].tolist()
+                curso_f_nombre = st.selectbox("Selecciona curso", opciones_curso, key="curso_faltas")
+
+            if st.button("Generar PDF de Faltas", type="primary"):
+                with st.spinner("Procesando faltas mensuales..."):
+                    # 1. Solo las FALTAS (asiste = False) de todo el mes y, a la vez,
+                    # los alumnos (de la caché si no han cambiado)
+                    dias_mes = calendar.monthrange(año_f, mes_f)[1]
+                    f_inicio = f"{año_f}-{mes_f:02d}-01"
+                    f_fin = f"{año_f}-{mes_f:02d}-{dias_mes:02d}"
+
+                    leido = datos.db_select_varias({
+                        "alumnos": "alumnos",
+                        "faltas": ("asistencia", "alumno_id, fecha", [
+                            ("fecha", "gte", f_inicio), ("fecha", "lte", f_fin), ("asiste", "eq", False)
+                        ]),
+                    })
+                    df_alu_f = leido["alumnos"]
+                    df_cur_f = df_cursos  # recién leídos al abrir la pestaña
+
+                pdf_faltas = pdf_informe_faltas(leido["faltas"], df_alu_f, df_cur_f, mes_f, año_f, curso_f_nombre)
+
+                st.success("Informe de faltas generado correctamente.")
                 st.download_button(
-                    label="📥 Descargar Informe Mensual",
-                    data=buffer.getvalue(),
-                    file_name=f"mensual_{año}_{mes:02d}.pdf",
+                    label="📥 Descargar Informe de Faltas",
+                    data=pdf_faltas,
+                    file_name=f"faltas_{curso_f_nombre}_{mes_f}_{año_f}.pdf",
                     mime="application/pdf",
                     use_container_width=True
                 )
-        # =========================================================
-        # INFORME DE FALTAS (OPTIMIZADO Y SIN ERRORES)
-        # =========================================================
-        st.subheader("Informe de Faltas")
-
-        col1, col2 = st.columns(2)
-        with col1:
-            mes_f = st.selectbox("Selecciona mes", list(range(1, 13)), key="mes_faltas", index=datetime.now().month - 1)
-            año_f = st.number_input("Año", min_value=2024, max_value=2030, value=datetime.now().year, key="año_faltas")
-        with col2:
-            opciones_curso = ["Todos los cursos"] + df_cursos[df_cursos["nombre"].str.lower() != "ninguno"]["nombre"].tolist()
-            curso_f_nombre = st.selectbox("Selecciona curso", opciones_curso, key="curso_faltas")
-
-        if st.button("Generar PDF de Faltas", type="primary"):
-            with st.spinner("Procesando faltas mensuales..."):
-                # 1. Carga fresca de datos
-                df_alu_f = db_select("alumnos")
-                df_cur_f = db_select("cursos")
-                
-                # 2. Obtener solo las FALTAS (asiste = False) de todo el mes
-                dias_mes = calendar.monthrange(año_f, mes_f)[1]
-                f_inicio = f"{año_f}-{mes_f:02d}-01"
-                f_fin = f"{año_f}-{mes_f:02d}-{dias_mes:02d}"
-                
-                res_faltas = supabase.table("asistencia")\
-                    .select("alumno_id, fecha")\
-                    .gte("fecha", f_inicio)\
-                    .lte("fecha", f_fin)\
-                    .eq("asiste", False)\
-                    .execute()
-                
-                # Crear un set de búsqueda rápida: {(alumno_id, fecha), ...}
-                faltas_set = {(str(r['alumno_id']), r['fecha']) for r in res_faltas.data}
-
-            # 3. Filtrar cursos a procesar
-            if curso_f_nombre == "Todos los cursos":
-                cursos_a_procesar = df_cur_f[df_cur_f["nombre"].str.lower() != "ninguno"].to_dict(orient="records")
-            else:
-                cursos_a_procesar = df_cur_f[df_cur_f["nombre"] == curso_f_nombre].to_dict(orient="records")
-
-            buffer = io.BytesIO()
-            c = canvas.Canvas(buffer, pagesize=landscape(A4))
-            page_width, page_height = landscape(A4)
-
-            for i, curso in enumerate(cursos_a_procesar):
-                # Filtrar alumnos de este curso
-                alumnos_este_curso = df_alu_f[df_alu_f["curso_id"] == curso["id"]].sort_values("nombre")
-                
-                if alumnos_este_curso.empty and curso_f_nombre == "Todos los cursos":
-                    continue
-
-                if i > 0: c.showPage()
-
-                draw_logo_centered(c, page_width, page_height - 180)
-                
-                c.setFont("Helvetica-Bold", 16)
-                c.drawCentredString(page_width/2, page_height - 110, f"Control Mensual de Faltas - {mes_f}/{año_f}")
-                c.setFont("Helvetica-Bold", 13)
-                c.drawString(40, page_height - 140, f"Curso: {curso['nombre']}")
-
-                # Cabecera de tabla
-                tabla_data = [["Alumno"] + [str(d) for d in range(1, dias_mes+1)] + ["Total"]]
-                
-                # Estilos base
-                estilos = [
-                    ("BACKGROUND", (0,0), (-1,0), colors.black),
-                    ("TEXTCOLOR", (0,0), (-1,0), colors.white),
-                    ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-                    ("ALIGN", (0,0), (-1,-1), "CENTER"),
-                    ("ALIGN", (0,0), (0,-1), "LEFT"),
-                    ("FONTSIZE", (0,0), (-1,-1), 7),
-                    ("LEFTPADDING", (0,0), (-1,-1), 1),
-                    ("RIGHTPADDING", (0,0), (-1,-1), 1),
-                ]
-
-                # Rellenar filas de alumnos
-                total_faltas_curso = 0
-                for fila_idx, (_, alu) in enumerate(alumnos_este_curso.iterrows()):
-                    id_alu_str = str(alu["id"])
-                    fila = [alu["nombre"]]
-                    faltas_alu = 0
-                    
-                    for d in range(1, dias_mes+1):
-                        f_check = f"{año_f}-{mes_f:02d}-{d:02d}"
-                        if (id_alu_str, f_check) in faltas_set:
-                            fila.append("F")
-                            faltas_alu += 1
-                            # Color rojo para la 'F'
-                            estilos.append(('TEXTCOLOR', (d, fila_idx + 1), (d, fila_idx + 1), colors.red))
-                            estilos.append(('FONTNAME', (d, fila_idx + 1), (d, fila_idx + 1), "Helvetica-Bold"))
-                        else:
-                            fila.append("")
-                    
-                    fila.append(faltas_alu)
-                    total_faltas_curso += faltas_alu
-                    tabla_data.append(fila)
-                    
-                    if (fila_idx + 1) % 2 == 0:
-                        estilos.append(("BACKGROUND", (0, fila_idx + 1), (-1, fila_idx + 1), colors.whitesmoke))
-
-                # Fila de total inferior
-                idx_total = len(tabla_data)
-                fila_total = ["TOTAL FALTAS DEL CURSO"] + [""] * dias_mes + [total_faltas_curso]
-                tabla_data.append(fila_total)
-                
-                estilos.append(("BACKGROUND", (0, -1), (-1, -1), colors.lightgrey))
-                estilos.append(("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"))
-                estilos.append(("SPAN", (0, -1), (dias_mes, -1)))
-                estilos.append(("ALIGN", (0, -1), (0, -1), "RIGHT"))
-
-                # Dibujar tabla
-                # Ajuste de anchos para que no se salga del papel
-                anchos_dias = (page_width - 200) / dias_mes
-                tabla = Table(tabla_data, colWidths=[120] + [anchos_dias]*dias_mes + [25])
-                tabla.setStyle(TableStyle(estilos))
-                
-                # --- BUSCA LA LÍNEA tabla.drawOn Y CÁMBIALA POR ESTA ---
-                w, h = tabla.wrap(0, 0)
-                x_centered = (page_width - w) / 2  # Calcula el centro exacto
-                tabla.drawOn(c, x_centered, page_height - 160 - h)
-                add_page_number(c)
-
-            c.save()
-            st.success("Informe de faltas generado correctamente.")
-            st.download_button(
-                label="📥 Descargar Informe de Faltas",
-                data=buffer.getvalue(),
-                file_name=f"faltas_{curso_f_nombre}_{mes_f}_{año_f}.pdf",
-                mime="application/pdf",
-                use_container_width=True
-            )
 
         # # =========================
         # # INFORME INDIVIDUAL (FACTURA)
@@ -1825,420 +1640,435 @@ if rol == "admin":
                 # mime="application/pdf"
             # )
 
-     
         # =========================================================
         # CUADRANTE MAESTROS CON SALTO DE PÁGINA AUTOMÁTICO (CORREGIDO)
         # =========================================================
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
+        def cuadrante_maestros():
+            st.subheader("Cuadrante de Maestros (Optimizado y Multipage)")
 
-        st.subheader("Cuadrante de Maestros (Optimizado y Multipage)")
-
-        rango_m = st.date_input(
-            "Selecciona el intervalo de fechas",
-            value=[datetime.now().date(), datetime.now().date()],
-            key="rango_maestros_multipage"
-        )
+            rango_m = st.date_input(
+                "Selecciona el intervalo de fechas",
+                value=[datetime.now().date(), datetime.now().date()],
+                key="rango_maestros_multipage"
+            )
 
-        if isinstance(rango_m, (list, tuple)) and len(rango_m) == 2:
-            fecha_inicio, fecha_fin = rango_m
-            f_ini_str = fecha_inicio.strftime("%Y-%m-%d")
-            f_fin_str = fecha_fin.strftime("%Y-%m-%d")
+            if isinstance(rango_m, (list, tuple)) and len(rango_m) == 2:
+                fecha_inicio, fecha_fin = rango_m
+                f_ini_str = fecha_inicio.strftime("%Y-%m-%d")
+                f_fin_str = fecha_fin.strftime("%Y-%m-%d")
 
-            if st.button("Generar Informe Multipágina"):
-                # CARGA DE DATOS CON PROTECCIÓN DE COLUMNAS
-                df_profes = db_select("profesores")
-        
-                # Leemos comidas
-                df_comidas_raw = db_select("maestros_comidas")
-                if df_comidas_raw is None or df_comidas_raw.empty:
-                    df_comidas_raw = pd.DataFrame(columns=["fecha", "maestro_id"])
-            
-                # Leemos agua
-                df_agua_raw = db_select("maestros_agua")
-                if df_agua_raw is None or df_agua_raw.empty:
-                    df_agua_raw = pd.DataFrame(columns=["fecha", "maestro_id", "agua_025", "agua_060"])
-
-                # 1. Filtrar actividad por rango de fechas
-                comidas_rango = df_comidas_raw[(df_comidas_raw["fecha"] >= f_ini_str) & (df_comidas_raw["fecha"] <= f_fin_str)]
-                agua_rango = df_agua_raw[(df_agua_raw["fecha"] >= f_ini_str) & (df_agua_raw["fecha"] <= f_fin_str)]
-
-                # 2. Días activos (Evitamos errores si unique() devuelve vacío)
-                set_comidas = set(comidas_rango["fecha"].unique()) if "fecha" in comidas_rango.columns else set()
-                set_agua = set(agua_rango["fecha"].unique()) if "fecha" in agua_rango.columns else set()
-        
-                fechas_activas = sorted(list(set_comidas | set_agua))
-                dias_datos = [datetime.strptime(f, "%Y-%m-%d").date() for f in fechas_activas]
-                num_dias = len(dias_datos)
+                if st.button("Generar Informe Multipágina"):
+                    # CARGA DE DATOS
+                    df_profes = db_select_cacheado("profesores")
+                    df_comidas_raw = db_select("maestros_comidas")
+                    df_agua_raw = db_select("maestros_agua")
 
-                if num_dias == 0:
-                    st.warning("No hay actividad (comidas ni agua) registrada para los maestros en estas fechas.")
-                else:
-                    # Obtener IDs de maestros con actividad
-                    ids_comidas = set(comidas_rango["maestro_id"].unique()) if not comidas_rango.empty else set()
-                    ids_agua = set(agua_rango["maestro_id"].unique()) if not agua_rango.empty else set()
-                    ids_activos = ids_comidas | ids_agua
-            
-                    profes_activos = df_profes[df_profes["id"].isin(ids_activos)]
+                    pdf_cuadrante = pdf_cuadrante_maestros(df_profes, df_comidas_raw, df_agua_raw, fecha_inicio, fecha_fin)
 
-                    buffer = io.BytesIO()
-                    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), 
-                                            rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-            
-                    elementos = [] 
-                    estilos = getSampleStyleSheet()
-            
-                    # Título
-                    titulo = f"Informe de Maestros: {fecha_inicio.strftime('%d/%m/%y')} al {fecha_fin.strftime('%d/%m/%y')}"
-                    elementos.append(Paragraph(f"<b>{titulo}</b>", estilos['Title']))
-                    elementos.append(Spacer(1, 20))
-
-                    # --- TABLA COMIDAS ---
-                    elementos.append(Paragraph("<b>Asistencia a Comedor:</b>", estilos['Normal']))
-                    elementos.append(Spacer(1, 10))
-    
-                    header_c = ["Maestro"] + [d.strftime('%d/%m') for d in dias_datos] + ["Total"]
-                    data_c = [header_c]
-    
-                    for _, p in profes_activos.iterrows():
-                        fila = [p["usuario"]]
-                        tot = 0
-                        for d in dias_datos:
-                            f_s = d.strftime("%Y-%m-%d")
-                            check = not comidas_rango[(comidas_rango["maestro_id"] == p["id"]) & (comidas_rango["fecha"] == f_s)].empty
-                            fila.append("X" if check else "")
-                            if check: tot += 1
-                        fila.append(tot)
-                        data_c.append(fila)
-
-                    ancho_col = 35 if num_dias < 10 else 25
-                    t1 = Table(data_c, colWidths=[110] + [ancho_col]*num_dias + [40], repeatRows=1)
-                    t1.setStyle(TableStyle([
-                        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-                        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-                        ("ALIGN", (1,0), (-1,-1), "CENTER"),
-                        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-                        ("FONTSIZE", (0,0), (-1,-1), 8),
-                    ]))
-                    elementos.append(t1)
-                    elementos.append(Spacer(1, 30))
-
-                    # --- TABLA AGUA ---
-                    elementos.append(Paragraph("<b>Consumo de Agua (0.25 | 0.60):</b>", estilos['Normal']))
-                    elementos.append(Spacer(1, 10))
-
-                    data_a = [["Maestro"] + [d.strftime('%d/%m') for d in dias_datos]]
-                    for _, p in profes_activos.iterrows():
-                        fila = [p["usuario"]]
-                        for d in dias_datos:
-                            f_s = d.strftime("%Y-%m-%d")
-                            reg = agua_rango[(agua_rango["maestro_id"] == p["id"]) & (agua_rango["fecha"] == f_s)]
-                            if not reg.empty:
-                                a25 = reg.iloc[0].get("agua_025", 0) or 0
-                                a60 = reg.iloc[0].get("agua_060", 0) or 0
-                                fila.append(f"{int(a25)}|{int(a60)}" if (a25 > 0 or a60 > 0) else "")
-                            else:
-                                fila.append("")
-                        data_a.append(fila)
-
-                    t2 = Table(data_a, colWidths=[110] + [ancho_col]*num_dias, repeatRows=1)
-                    t2.setStyle(TableStyle([
-                        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
-                        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-                        ("ALIGN", (1,0), (-1,-1), "CENTER"),
-                        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-                        ("FONTSIZE", (0,0), (-1,-1), 7),
-                    ]))
-                    elementos.append(t2)
-    
-                    # Nota final
-                    elementos.append(Spacer(1, 20))
-                    elementos.append(Paragraph("<font size=8><i>* Solo se muestran días con actividad. Formato agua: (Bot. 0.25€ | Bot. 0.60€)</i></font>", estilos['Normal']))
+                    if pdf_cuadrante is None:
+                        st.warning("No hay actividad (comidas ni agua) registrada para los maestros en estas fechas.")
+                    else:
+                        st.success("Informe generado con éxito.")
+                        st.download_button(
+                            "📩 Descargar Informe de Maestros", 
+                            data=pdf_cuadrante, 
+                            file_name=f"maestros_{f_ini_str}_al_{f_fin_str}.pdf",
+                            mime="application/pdf",
+                            use_container_width=True
+                        )
 
-                    # Construir PDF
-                    doc.build(elementos)
-    
-                    st.success("Informe generado con éxito.")
-                    st.download_button(
-                        "📩 Descargar Informe de Maestros", 
-                        data=buffer.getvalue(), 
-                        file_name=f"maestros_{f_ini_str}_al_{f_fin_str}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
         # =========================================================
         # FACTURACIÓN DE MAESTROS (INDIVIDUAL Y MASIVA)
         # =========================================================
-        st.subheader("Generación de Facturas - Maestros")
-
-        # Controles de mes y precios
-        col_f1, col_f2, col_f3 = st.columns(3)
-        with col_f1:
-            mes_f = st.selectbox("Mes de facturación", list(range(1, 13)), index=datetime.now().month-1, key="mes_fac_m")
-        with col_f2:
-            año_f = st.number_input("Año", value=datetime.now().year, key="año_fac_m")
-        with col_f3:
-            p_menu = st.number_input("Precio Menú (€)", value=4.50, step=0.10)
-
-        col_f4, col_f5 = st.columns(2)
-        with col_f4:
-            p_agua_025 = st.number_input("Precio Agua 0.25€ (€)", value=0.25, step=0.05)
-        with col_f5:
-            p_agua_060 = st.number_input("Precio Agua 0.60€ (€)", value=0.60, step=0.05)
-
-        # Función interna para dibujar una factura en el canvas
-        def dibujar_factura_maestro(canvas_obj, maestro, f_ini, f_fin, p_m, p_a25, p_a60):
-            page_width, page_height = A4
-
-            # Obtener datos de la base de datos
-            df_c = db_select("maestros_comidas")
-            df_a = db_select("maestros_agua")
-        
-            # Filtrado por rango de fechas (usando las variables f_ini y f_fin)
-            mask_c = (df_c["maestro_id"] == maestro["id"]) & (df_c["fecha"] >= f_ini) & (df_c["fecha"] <= f_fin)
-            mask_a = (df_a["maestro_id"] == maestro["id"]) & (df_a["fecha"] >= f_ini) & (df_a["fecha"] <= f_fin)
-    
-            # Cálculo de totales basados en el filtrado por rango
-            total_comidas = len(df_c[mask_c])
-            reg_agua = df_a[mask_a]
-    
-            total_a25 = reg_agua["agua_025"].sum() if not reg_agua.empty else 0
-            total_a60 = reg_agua["agua_060"].sum() if not reg_agua.empty else 0
-    
-            # Si no hay ningún consumo, no generamos la página
-            if total_comidas == 0 and total_a25 == 0 and total_a60 == 0:
-                return False 
-
-            # Encabezado y Logo
-            draw_logo_centered(canvas_obj, page_width, page_height - 180)
-            canvas_obj.setFont("Helvetica-Bold", 20)
-            canvas_obj.drawCentredString(page_width/2, 700, "RECIBO DE COMEDOR")
-    
-            # Datos del Maestro
-            canvas_obj.setFont("Helvetica-Bold", 12)
-            canvas_obj.drawString(70, 650, f"MAESTRO/A: {maestro['usuario']}")
-            canvas_obj.setFont("Helvetica", 12)
-    
-            # Formateamos las fechas para que el recibo se vea más profesional (DD/MM/YYYY)
-            f_ini_dt = datetime.strptime(f_ini, "%Y-%m-%d").strftime("%d/%m/%Y")
-            f_fin_dt = datetime.strptime(f_fin, "%Y-%m-%d").strftime("%d/%m/%Y")
-    
-            canvas_obj.drawString(70, 635, f"Periodo: del {f_ini_dt} al {f_fin_dt}")
-            canvas_obj.drawString(70, 620, f"Fecha emisión: {datetime.now().strftime('%d/%m/%Y')}")
-
-            # Tabla de conceptos
-            data = [
-                ["CONCEPTO", "CANTIDAD", "PRECIO", "TOTAL"],
-                ["Menú Escolar", total_comidas, f"{p_m:.2f} €", f"{total_comidas * p_m:.2f} €"],
-                ["Agua 0.25€", int(total_a25), f"{p_a25:.2f} €", f"{total_a25 * p_a25:.2f} €"],
-                ["Agua 0.60€", int(total_a60), f"{p_a60:.2f} €", f"{total_a60 * p_a60:.2f} €"]
-            ]
-    
-            t = Table(data, colWidths=[200, 80, 80, 80])
-            t.setStyle(TableStyle([
-                ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-                ("GRID", (0,0), (-1,-1), 1, colors.black),
-                ("ALIGN", (1,0), (-1,-1), "CENTER"),
-                ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-                ("BOTTOMPADDING", (0,0), (-1,-1), 10),
-                ("TOPPADDING", (0,0), (-1,-1), 10),
-            ]))
-    
-            w, h = t.wrap(page_width, page_height)
-            t.drawOn(canvas_obj, 70, 500)
-    
-            # TOTAL FINAL
-            gran_total = (total_comidas * p_m) + (total_a25 * p_a25) + (total_a60 * p_a60)
-            canvas_obj.setFont("Helvetica-Bold", 16)
-            canvas_obj.drawString(350, 470, f"TOTAL A PAGAR: {gran_total:.2f} €")
-    
-            return True
-        # --- Interfaz de Botones Actualizada ---
-        df_p = db_select("profesores")
-
-        # Extraemos las fechas del selector de rango (rango_m es el st.date_input que pusimos antes)
-        if isinstance(rango_m, (list, tuple)) and len(rango_m) == 2:
-            f_ini_str = rango_m[0].strftime("%Y-%m-%d")
-            f_fin_str = rango_m[1].strftime("%Y-%m-%d")
-    
-            col_b1, col_b2 = st.columns(2)
-    
-            with col_b1:
-                maestro_u = st.selectbox("Seleccionar Maestro para factura individual", 
-                                        df_p.to_dict(orient="records"), format_func=lambda x: x["usuario"])
-        
-                if st.button("Generar Factura Individual"):
-                    buffer = io.BytesIO()
-                    c = canvas.Canvas(buffer, pagesize=A4)
-                    # Pasamos f_ini_str y f_fin_str en lugar de mes/año
-                    if dibujar_factura_maestro(c, maestro_u, f_ini_str, f_fin_str, p_menu, p_agua_025, p_agua_060):
-                        c.save()
-                        st.download_button(
-                            label=f"Descargar Factura {maestro_u['usuario']}", 
-                            data=buffer.getvalue(), 
-                            file_name=f"factura_{maestro_u['usuario']}_{f_ini_str}.pdf"
-                        )
-                    else:
-                        st.warning("Este maestro no tiene consumos en el periodo seleccionado.")
+        def facturas_maestros():
+            st.subheader("Generación de Facturas - Maestros")
+
+            # Controles de periodo y precios
+            col_f1, col_f3 = st.columns([2, 1])
+            with col_f1:
+                rango_m = st.date_input(
+                    "Periodo de facturación",
+                    value=[datetime.now().date(), datetime.now().date()],
+                    key="rango_facturas_maestros"
+                )
+            with col_f3:
+                p_menu = st.number_input("Precio Menú (€)", value=4.50, step=0.10)
+
+            col_f4, col_f5 = st.columns(2)
+            with col_f4:
+                p_agua_025 = st.number_input("Precio Agua 0.25€ (€)", value=0.25, step=0.05)
+            with col_f5:
+                p_agua_060 = st.number_input("Precio Agua 0.60€ (€)", value=0.60, step=0.05)
+
+            # Extraemos las fechas del selector de periodo
+            if isinstance(rango_m, (list, tuple)) and len(rango_m) == 2:
+                f_ini_str = rango_m[0].strftime("%Y-%m-%d")
+                f_fin_str = rango_m[1].strftime("%Y-%m-%d")
+
+                col_b1, col_b2 = st.columns(2)
+
+                with col_b1:
+                    # Opciones y nombres del índice de profesores; la fila del maestro solo se lee al generar
+                    maestro_id = busqueda.selector(
+                        "Seleccionar Maestro para factura individual", "profesores", key="maestro_factura"
+                    )
 
-            with col_b2:
-                st.write("Generar todas las facturas del periodo:")
-                if st.button("Generar TODAS las Facturas (PDF Masivo)"):
-                    buffer = io.BytesIO()
-                    c = canvas.Canvas(buffer, pagesize=A4)
-                    facturas_generadas = 0
-    
-                    for _, prof in df_p.iterrows():
-                        # Intentamos dibujar la factura del maestro con el rango
-                        if dibujar_factura_maestro(c, prof, f_ini_str, f_fin_str, p_menu, p_agua_025, p_agua_060):
-                            c.showPage() 
-                            facturas_generadas += 1
-    
-                    if facturas_generadas > 0:
-                        c.save()
-                        st.success(f"Se han generado {facturas_generadas} facturas.")
-                        st.download_button(
-                            label="Descargar PDF Masivo", 
-                            data=buffer.getvalue(), 
-                            file_name=f"facturas_maestros_{f_ini_str}_al_{f_fin_str}.pdf"
+                    if st.button("Generar Factura Individual") and maestro_id is not None:
+                        df_p = db_select_cacheado("profesores")
+                        maestro_u = df_p[df_p["id"] == maestro_id].to_dict(orient="records")[0]
+                        # Pasamos f_ini_str y f_fin_str en lugar de mes/año
+                        pdf_factura, _ = pdf_facturas_maestros(
+                            [maestro_u], db_select("maestros_comidas"), db_select("maestros_agua"),
+                            f_ini_str, f_fin_str, p_menu, p_agua_025, p_agua_060
+                        )
+                        if pdf_factura:
+                            st.download_button(
+                                label=f"Descargar Factura {maestro_u['usuario']}", 
+                                data=pdf_factura, 
+                                file_name=f"factura_{maestro_u['usuario']}_{f_ini_str}.pdf"
+                            )
+                        else:
+                            st.warning("Este maestro no tiene consumos en el periodo seleccionado.")
+
+                with col_b2:
+                    st.write("Generar todas las facturas del periodo:")
+                    if st.button("Generar TODAS las Facturas (PDF Masivo)"):
+                        pdf_masivo, facturas_generadas = pdf_facturas_maestros(
+                            db_select_cacheado("profesores").to_dict(orient="records"),
+                            db_select("maestros_comidas"), db_select("maestros_agua"),
+                            f_ini_str, f_fin_str, p_menu, p_agua_025, p_agua_060
                         )
-                    else:
-                        st.error("No hay consumos registrados para ningún maestro en este periodo.")
-        else:
-            st.info("Por favor, selecciona un rango de fechas (Inicio y Fin) en el calendario de arriba para habilitar la facturación.")
-            
-    # ---------------------------------------------------------
-    # PROMOCIÓN DE CURSO
-    # ---------------------------------------------------------
-    if fin_curso == "🎓 Promoción de curso":
-        st.header("Promoción automática de alumnos")
 
-        PROMOCIONES = {
-        "INF 3": "INF 4",
-        "INF 4": "INF 5",
-        "INF 5": "1º A",
-        "1º A": "2º A",
-        "2º A": "3º A",
-        "3º A": "4º A",
-        "4º A": "5º A",
-        "5º A": "6º A",
-        "5º B": "6º B",
-        "6º A": "Ninguno",
-        "6º B": "Ninguno"
+                        if facturas_generadas > 0:
+                            st.success(f"Se han generado {facturas_generadas} facturas.")
+                            st.download_button(
+                                label="Descargar PDF Masivo", 
+                                data=pdf_masivo, 
+                                file_name=f"facturas_maestros_{f_ini_str}_al_{f_fin_str}.pdf"
+                            )
+                        else:
+                            st.error("No hay consumos registrados para ningún maestro en este periodo.")
+            else:
+                st.info("Por favor, selecciona un periodo (Inicio y Fin) en el calendario para habilitar la facturación.")
+
+        INFORMES_PDF = {
+            "🍽️ Diario": informe_diario,
+            "📍 Situación en mesa": informe_mesa,
+            "🏫 Por curso": informe_curso,
+            "📅 Mensual": informe_mensual,
+            "❌ Faltas": informe_faltas,
+            "👩‍🏫 Cuadrante de maestros": cuadrante_maestros,
+            "🧾 Facturas de maestros": facturas_maestros,
         }
+        pestanas = st.tabs(list(INFORMES_PDF), key="pestana_informes_pdf", on_change="rerun")
+        for pestana, informe in zip(pestanas, INFORMES_PDF.values()):
+            if pestana.open:
+                with pestana:
+                    informe()
 
-        df_alumnos = db_select("alumnos")
-        df_cursos = db_select("cursos")
+    # ---------------------------------------------------------
+    # EXPORTAR DATOS A HOJA DE CÁLCULO (XLSX / CSV)
+    # ---------------------------------------------------------
+    if st.session_state.informes == "📤 Exportar datos":
+        from exportacion import EXPORTABLES, filtros_exportacion, paginas_exportacion, exportar_xlsx, exportar_csv, ruta_temporal
+        from profesorado import profesores_del_curso
 
-        datos = df_alumnos.merge(
-            df_cursos,
-            left_on="curso_id",
-            right_on="id",
-            suffixes=("", "_curso")
-        )
+        st.header("Exportar datos a hoja de cálculo")
+        st.info("Exporta la asistencia y los consumos de maestros filtrados por fechas y curso. Los datos se leen por páginas, sin cargar tablas completas.")
 
-        datos["curso_destino_nombre"] = datos["nombre_curso"].map(PROMOCIONES)
+        df_cursos = db_select_cacheado("cursos")
 
-        datos_promocionables = datos[~datos["curso_destino_nombre"].isna()].copy()
+        col_e1, col_e2 = st.columns(2)
+        with col_e1:
+            rango_exp = st.date_input(
+                "Intervalo de fechas",
+                value=[datetime.now().date().replace(day=1), datetime.now().date()],
+                key="rango_exportar"
+            )
+            # ids como opciones (None = todos), el nombre se muestra con format_func
+            cursos_exp = df_cursos[df_cursos["nombre"].str.lower() != "ninguno"].sort_values("orden")
+            nombres_cursos_exp = dict(zip(cursos_exp["id"].astype(int), cursos_exp["nombre"]))
+            curso_id_exp = st.selectbox(
+                "Curso",
+                [None] + list(nombres_cursos_exp),
+                format_func=lambda c: "Todos los cursos" if c is None else nombres_cursos_exp[c],
+                key="curso_exportar"
+            )
+        with col_e2:
+            tablas_exp = st.multiselect(
+                "Datos a exportar",
+                list(EXPORTABLES),
+                default=list(EXPORTABLES),
+                format_func=lambda t: EXPORTABLES[t]["titulo"],
+                key="tablas_exportar"
+            )
+            formato_exp = st.radio("Formato", ["XLSX", "CSV"], horizontal=True, key="formato_exportar")
+
+        if not (isinstance(rango_exp, (list, tuple)) and len(rango_exp) == 2):
+            st.info("Selecciona un rango de fechas (Inicio y Fin).")
+        elif not tablas_exp:
+            st.info("Selecciona al menos una tabla para exportar.")
+        elif st.button("📤 Generar exportación", type="primary"):
+            f_ini_exp = rango_exp[0].strftime("%Y-%m-%d")
+            f_fin_exp = rango_exp[1].strftime("%Y-%m-%d")
+
+            with st.spinner("Exportando datos..."):
+                df_alumnos = db_select_cacheado("alumnos")
+                df_profes = db_select_cacheado("profesores")
+
+                # Catálogos pequeños para unir nombres en cada página
+                catalogos = {
+                    "alumnos": dict(zip(df_alumnos["id"], df_alumnos["nombre"])) if not df_alumnos.empty else {},
+                    "cursos": dict(zip(df_cursos["id"], df_cursos["nombre"])),
+                    "profesores": dict(zip(df_profes["id"], df_profes["usuario"])) if not df_profes.empty else {},
+                }
 
-        if datos_promocionables.empty:
-            st.info("No hay alumnos con curso de destino definido.")
-            st.stop()
+                maestros_del_curso = set()
+                if curso_id_exp is not None:
+                    maestros_del_curso = profesores_del_curso(curso_id_exp, colegio_actual())
 
-        df_cursos_dict = df_cursos.set_index("nombre")["id"].to_dict()
-        datos_promocionables["curso_destino_id"] = datos_promocionables["curso_destino_nombre"].map(df_cursos_dict)
+                def paginas_de(tabla):
+                    filtros = filtros_exportacion(tabla, f_ini_exp, f_fin_exp, curso_id_exp, maestros_del_curso)
+                    return paginas_exportacion(tabla, filtros, catalogos)
 
-        if "promocion_estado" not in st.session_state:
-            st.session_state.promocion_estado = {
-                row["id"]: True
-                for _, row in datos_promocionables.iterrows()
-            }
+                sufijo_nombre = f"{f_ini_exp}_al_{f_fin_exp}"
+                if curso_id_exp is not None:
+                    sufijo_nombre += f"_{nombres_cursos_exp[curso_id_exp]}"
 
-        st.subheader("Alumnos que promocionan (agrupados por curso)")
+                if formato_exp == "XLSX":
+                    ruta = ruta_temporal(".xlsx")
+                    totales = exportar_xlsx({t: paginas_de(t) for t in tablas_exp}, ruta)
+                    with open(ruta, "rb") as f:
+                        st.download_button(
+                            "📥 Descargar XLSX",
+                            f,
+                            f"comedor_{sufijo_nombre}.xlsx",
+                            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            use_container_width=True
+                        )
+                    os.remove(ruta)
+                else:
+                    totales = {}
+                    for tabla in tablas_exp:
+                        ruta = ruta_temporal(".csv")
+                        totales[tabla] = exportar_csv(tabla, paginas_de(tabla), ruta)
+                        with open(ruta, "rb") as f:
+                            st.download_button(
+                                f"📥 Descargar {EXPORTABLES[tabla]['titulo']}",
+                                f,
+                                f"{tabla}_{sufijo_nombre}.csv",
+                                "text/csv",
+                                key=f"descargar_csv_{tabla}"
+                            )
+                        os.remove(ruta)
+
+            st.success("Exportación generada: " + ", ".join(f"{EXPORTABLES[t]['titulo']}: {n} filas" for t, n in totales.items()))
 
-        for curso, grupo in datos_promocionables.groupby("nombre_curso"):
-            st.markdown(f"### {curso}")
+    # ---------------------------------------------------------
+    # HISTÓRICO DE TEMPORADAS (ARCHIVO PARQUET + DUCKDB)
+    # ---------------------------------------------------------
+    if st.session_state.informes == "🗄️ Histórico de temporadas":
+        from archivo_temporadas import temporadas_archivadas, resumen_temporada
 
-            for _, row in grupo.iterrows():
-                alumno_id = row["id"]
-                alumno_nombre = row["nombre"]
+        st.header("Histórico de temporadas")
 
-                # --- NUEVO FILTRO VISUAL (AÑADIR AQUÍ) ---
-                destino_visual = row['curso_destino_nombre']
-                if destino_visual == "Ninguno":
-                    destino_visual = "1º ESO (Instituto)"
-                # ----------------------------------------
+        temporadas = temporadas_archivadas()
+        if not temporadas:
+            st.info("Todavía no hay temporadas archivadas. Se archivan desde 'Fin de curso → Cerrar curso académico'.")
+        else:
+            temporada_sel = st.selectbox("Temporada", temporadas, key="temporada_historico")
+            resumen = resumen_temporada(temporada_sel)
 
-                # Ahora usamos 'destino_visual' dentro del texto del checkbox
-                nuevo_estado = st.checkbox(
-                    f"{alumno_nombre} → {destino_visual}",
-                    value=st.session_state.promocion_estado[alumno_id],
-                    key=f"promo_{alumno_id}"
-                )
+            if "por_curso" in resumen:
+                por_curso = resumen["por_curso"]
+                col_h1, col_h2 = st.columns(2)
+                col_h1.metric("Comidas de alumnos", int(por_curso["comidas"].sum()))
+                col_h2.metric("Faltas", int(por_curso["faltas"].sum()))
 
-                st.session_state.promocion_estado[alumno_id] = nuevo_estado
+                st.subheader("Por curso")
+                st.dataframe(por_curso.rename(columns={"curso": "Curso", "comidas": "Comidas", "faltas": "Faltas"}), hide_index=True)
+                st.subheader("Por mes")
+                st.dataframe(resumen["por_mes"].rename(columns={"mes": "Mes", "comidas": "Comidas", "faltas": "Faltas"}), hide_index=True)
 
-        st.subheader("Alumnos que repiten curso")
+            if "maestros_comidas" in resumen:
+                st.subheader("Comidas de maestros")
+                st.dataframe(resumen["maestros_comidas"].rename(columns={"maestro": "Maestro", "comidas": "Comidas"}), hide_index=True)
 
-        repetidores = [
-            row for _, row in datos_promocionables.iterrows()
-            if not st.session_state.promocion_estado[row["id"]]
-        ]
+            if "maestros_agua" in resumen:
+                st.subheader("Agua de maestros")
+                st.dataframe(resumen["maestros_agua"].rename(columns={"maestro": "Maestro", "agua_025": "Agua 0,25€", "agua_060": "Agua 0,60€"}), hide_index=True)
 
-        if not repetidores:
-            st.info("Ningún alumno repite curso.")
+    # ---------------------------------------------------------
+    # RENDIMIENTO (LLAMADAS, TIEMPOS Y CACHÉ POR PÁGINA)
+    # ---------------------------------------------------------
+    if st.session_state.informes == "⏱️ Rendimiento":
+        st.header("Rendimiento por página")
+        st.caption(
+            f"Últimas {rendimiento.TAM_REGISTRO} ejecuciones de la app (todas las sesiones). "
+            "Los bytes son aproximados; las ejecuciones que terminan antes de tiempo (st.stop) "
+            "se miden hasta su última operación."
+        )
+
+        df_ejecuciones = rendimiento.ejecuciones(colegio_actual())
+        if df_ejecuciones.empty:
+            st.info("Todavía no hay ejecuciones registradas.")
         else:
-            df_rep = pd.DataFrame(repetidores)
-            for curso, grupo in df_rep.groupby("nombre_curso"):
-                st.markdown(f"### {curso}")
-                for _, row in grupo.iterrows():
-                    alumno_id = row["id"]
-                    alumno_nombre = row["nombre"]
-
-                    volver_a_promocionar = st.checkbox(
-                        f"{alumno_nombre} (se queda en {curso})",
-                        value=False,
-                        key=f"rep_{alumno_id}"
-                    )
+            col_r1, col_r2, col_r3 = st.columns(3)
+            col_r1.metric("Ejecuciones", len(df_ejecuciones))
+            col_r2.metric("Llamadas a la base de datos", int(df_ejecuciones["llamadas"].sum()))
+            col_r3.metric("Datos recibidos", f"{df_ejecuciones['bytes'].sum() / 1024 / 1024:.1f} MB")
+
+            st.subheader("Por página")
+            st.dataframe(rendimiento.resumen_por_pagina(df_ejecuciones), use_container_width=True)
+
+            st.subheader("Llamadas por tabla")
+            st.dataframe(rendimiento.llamadas_por_tabla(df_ejecuciones), hide_index=True, use_container_width=True)
+
+            st.subheader("Últimas ejecuciones")
+            ultimas = df_ejecuciones.sort_values("momento", ascending=False).head(50)
+            st.dataframe(
+                ultimas.drop(columns=["colegio_id", "tablas"]).round({"total_ms": 1, "red_ms": 1, "pandas_ms": 1, "reportlab_ms": 1}).rename(columns={
+                    "momento": "Hora", "usuario": "Usuario", "pagina": "Página", "terminada": "Completa",
+                    "total_ms": "Total (ms)", "llamadas": "Llamadas", "filas": "Filas", "bytes": "Bytes",
+                    "red_ms": "Red (ms)", "pandas_ms": "pandas (ms)", "reportlab_ms": "reportlab (ms)",
+                    "cache_aciertos": "Aciertos caché", "cache_fallos": "Fallos caché"
+                }),
+                hide_index=True,
+                use_container_width=True
+            )
 
-                    if volver_a_promocionar:
-                        st.session_state.promocion_estado[alumno_id] = True
+            if st.button("🗑️ Vaciar registro"):
+                rendimiento.vaciar(colegio_actual())
+                st.rerun()
 
-        if st.button("Aplicar promoción"):
-            st.warning("Esta acción actualizará el curso de todos los alumnos seleccionados. ¿Deseas continuar?")
+    # ---------------------------------------------------------
+    # PROMOCIÓN DE CURSO
+    # ---------------------------------------------------------
+    if fin_curso == "🎓 Promoción de curso":
+        st.header("Promoción automática de alumnos")
 
-            col1, col2 = st.columns(2)
+        from promocion import (
+            alumnos_promocionables, aplicar_promocion, deshacer_ultima_promocion, guardar_siguientes,
+            proponer_siguientes, resumen_promocion, siguientes, validar_siguientes
+        )
 
-            with col1:
-                confirmar = st.button("Sí, confirmar promoción")
+        if "aviso_promocion" in st.session_state:
+            st.success(st.session_state.pop("aviso_promocion"))
 
-            with col2:
-                cancelar = st.button("Cancelar")
+        df_cursos = db_select_cacheado("cursos").sort_values("orden")
+        df_alumnos = pd.DataFrame(
+            supabase.table("alumnos").select("id, nombre, curso_id").execute().data,
+            columns=["id", "nombre", "curso_id"]
+        )
+        nombre_curso = dict(zip(df_cursos["id"], df_cursos["nombre"]))
+        id_por_nombre = {nombre: c_id for c_id, nombre in nombre_curso.items()}
+        grafo = siguientes(df_cursos)
+        errores = validar_siguientes(df_cursos)
+
+        # ======================================================
+        # 1. A QUÉ CURSO PASA CADA CURSO (cursos.curso_siguiente_id)
+        # ======================================================
+        with st.expander("🔗 Curso siguiente de cada curso", expanded=grafo.empty or bool(errores)):
+            st.caption("Vacío = los alumnos de ese curso no promocionan.")
+            tabla_grafo = pd.DataFrame({
+                "id": df_cursos["id"],
+                "Curso": df_cursos["nombre"],
+                "Pasa a": df_cursos["id"].map(grafo).map(nombre_curso),
+            })
+            with st.form("form_siguientes"):
+                grafo_editado = st.data_editor(
+                    tabla_grafo,
+                    column_config={
+                        "id": None,
+                        "Curso": st.column_config.TextColumn("Curso", disabled=True),
+                        "Pasa a": st.column_config.SelectboxColumn("Pasa a", options=list(nombre_curso.values())),
+                    },
+                    hide_index=True,
+                    num_rows="fixed",
+                    use_container_width=True,
+                    key="editor_siguientes"
+                )
+                guardar_grafo = st.form_submit_button("💾 Guardar cursos siguientes")
 
-            if confirmar:
+            propuesta = proponer_siguientes(df_cursos)
+            proponer = st.button(
+                f"✨ Proponer según los nombres ({len(propuesta)} cursos sin siguiente)",
+                disabled=propuesta.empty
+            )
 
-                seleccionados = datos_promocionables[
-                    datos_promocionables["id"].apply(lambda x: st.session_state.promocion_estado[x])
-                ]
+            cambios = None
+            if guardar_grafo:
+                nuevo_grafo = grafo_editado.set_index("id")["Pasa a"].map(id_por_nombre)
+                cambios = {
+                    c_id: destino for c_id, destino in nuevo_grafo.items()
+                    if (None if pd.isna(destino) else int(destino)) != (int(grafo[c_id]) if c_id in grafo.index else None)
+                }
+            elif proponer:
+                cambios = propuesta.to_dict()
+
+            if cambios is not None:
+                # Se valida el grafo resultante antes de guardar nada
+                df_nuevo = df_cursos.copy()
+                df_nuevo["curso_siguiente_id"] = df_nuevo["id"].map(grafo)
+                for c_id, destino in cambios.items():
+                    df_nuevo.loc[df_nuevo["id"] == c_id, "curso_siguiente_id"] = destino
+                errores_nuevos = validar_siguientes(df_nuevo)
+                if errores_nuevos:
+                    for error in errores_nuevos:
+                        st.error(error)
+                elif not cambios:
+                    st.info("No hay cambios que guardar.")
+                else:
+                    guardar_siguientes(cambios)
+                    st.session_state.pop("editor_siguientes", None)
+                    st.session_state["aviso_promocion"] = f"Cursos siguientes guardados: {len(cambios)}."
+                    st.rerun()
+
+        if errores:
+            for error in errores:
+                st.error(error)
+            st.stop()
 
-                for _, row in seleccionados.iterrows():
+        # ======================================================
+        # 2. VISTA PREVIA Y REPETIDORES
+        # ======================================================
+        datos_promocionables = alumnos_promocionables(df_alumnos, df_cursos)
 
-                    db_insert("promociones_log", [{
-                        "alumno_id": row["id"],
-                        "curso_origen": row["curso_id"],
-                        "curso_destino": row["curso_destino_id"],
-                        "fecha": datetime.now().strftime("%Y-%m-%d")
-                    }])
+        if datos_promocionables.empty:
+            st.info("No hay alumnos con curso de destino definido.")
+        else:
+            # Solo los repetidores necesitan un control: el resto promociona según el grafo.
+            # La ronda cambia al aplicar, así la selección no se arrastra a la siguiente promoción.
+            ronda = st.session_state.setdefault("ronda_promocion", 0)
+            etiquetas = dict(zip(
+                datos_promocionables["id"],
+                datos_promocionables["nombre"] + " (" + datos_promocionables["nombre_curso"] + ")"
+            ))
+            repetidores = st.multiselect(
+                "Alumnos que repiten curso",
+                sorted(etiquetas, key=lambda a_id: normalizar(etiquetas[a_id])),
+                format_func=etiquetas.get,
+                placeholder="Escribe para buscar alumnos",
+                key=f"repetidores_{ronda}"
+            )
 
-                    db_upsert("alumnos", [{
-                        "id": row["id"],
-                        "curso_id": row["curso_destino_id"]
-                    }])
+            st.subheader("Vista previa por curso")
+            resumen = resumen_promocion(datos_promocionables, repetidores)
+            st.dataframe(resumen, hide_index=True, use_container_width=True)
 
-                st.success("Promoción aplicada correctamente.")
+            seleccionados = datos_promocionables[~datos_promocionables["id"].isin(repetidores)]
+            confirmar = st.checkbox(
+                f"Confirmo que quiero cambiar de curso a {len(seleccionados)} alumnos",
+                key=f"confirmar_promocion_{ronda}"
+            )
 
-            elif cancelar:
-                st.info("Promoción cancelada.")
+            if st.button("Aplicar promoción", type="primary", disabled=not confirmar):
+                aplicar_promocion(seleccionados)
+                st.session_state["ronda_promocion"] = ronda + 1
+                st.session_state["aviso_promocion"] = (
+                    f"Promoción aplicada: {len(seleccionados)} alumnos cambian de curso, {len(repetidores)} repiten."
+                )
+                st.rerun()
 
         st.divider()
 
@@ -2249,21 +2079,8 @@ if rol == "admin":
         if log.empty:
             st.info("No hay promociones para deshacer.")
         else:
-            log = log.sort_values("fecha", ascending=False)
-
             if st.button("Deshacer última promoción"):
-                ultima_fecha = log.iloc[0]["fecha"]
-                lote = log[log["fecha"] == ultima_fecha]
-
-                for _, row in lote.iterrows():
-                    db_upsert("alumnos", [{
-                        "id": row["alumno_id"],
-                        "curso_id": row["curso_origen"]
-                    }])
-
-                for _, row in lote.iterrows():
-                    db_delete("promociones_log", {"id": row["id"]})
-
+                deshacer_ultima_promocion()
                 st.success("Promoción revertida correctamente.")
 
       
@@ -2283,20 +2100,52 @@ if rol == "admin":
         # ---------------------------------------------------------
         st.subheader("1. Copia de seguridad del curso actual")
 
+        from copias import TABLAS_COPIA, FORMATOS_COPIA, generar_copia
+        from exportacion import ruta_temporal
+
+        formato_copia = st.radio(
+            "Formato de la copia",
+            list(FORMATOS_COPIA),
+            format_func=lambda f: FORMATOS_COPIA[f],
+            horizontal=True,
+            key="formato_copia"
+        )
+
         if st.button("Generar copia de seguridad"):
-            df_asistencia = db_select("asistencia")
-            df_alumnos = db_select("alumnos")
-            df_cursos = db_select("cursos")
-            df_profesores = db_select("profesores")
-            df_promolog = db_select("promociones_log")
+            barra = st.progress(0.0, text="Preparando copia...")
 
-            st.download_button("Descargar asistencia", df_asistencia.to_csv(index=False), "asistencia_backup.csv")
-            st.download_button("Descargar alumnos", df_alumnos.to_csv(index=False), "alumnos_backup.csv")
-            st.download_button("Descargar cursos", df_cursos.to_csv(index=False), "cursos_backup.csv")
-            st.download_button("Descargar profesores", df_profesores.to_csv(index=False), "profesores_backup.csv")
-            st.download_button("Descargar promociones_log", df_promolog.to_csv(index=False), "promociones_log_backup.csv")
+            def progreso_copia(tabla, filas):
+                indice = TABLAS_COPIA.index(tabla)
+                barra.progress(indice / len(TABLAS_COPIA), text=f"Copiando {tabla}: {filas} filas...")
 
-            st.success("Copia de seguridad generada correctamente.")
+            ruta = ruta_temporal(".zip")
+            try:
+                manifiesto = generar_copia(ruta, formato_copia, progreso=progreso_copia)
+                barra.progress(1.0, text="Copia completada.")
+
+                fecha_copia = datetime.now().strftime("%Y-%m-%d")
+                with open(ruta, "rb") as f:
+                    st.download_button(
+                        "📥 Descargar copia completa (.zip)",
+                        f,
+                        f"copia_comedor_{curso_actual.replace('/', '-')}_{fecha_copia}.zip",
+                        "application/zip",
+                        use_container_width=True
+                    )
+
+                st.dataframe(
+                    pd.DataFrame([
+                        {"Tabla": t, "Filas": info["filas"], "SHA-256": info["sha256"]}
+                        for t, info in manifiesto["tablas"].items()
+                    ]),
+                    hide_index=True,
+                    use_container_width=True
+                )
+                st.success("Copia de seguridad generada correctamente.")
+            except Exception as e:
+                st.error(f"Error al generar la copia: {e}")
+            finally:
+                os.remove(ruta)
 
         st.divider()
 
@@ -2309,15 +2158,58 @@ if rol == "admin":
         st.divider()
 
         # ---------------------------------------------------------
-        # 3. Crear nuevo curso académico (VACIADO SEGURO)
+        # 3. Archivar temporada (Parquet local + DuckDB)
         # ---------------------------------------------------------
-        st.subheader("3. Vaciar base de datos y preparar nuevo curso")
+        from archivo_temporadas import TABLAS_ARCHIVABLES, archivar_temporada, temporadas_archivadas
+
+        st.subheader("3. Archivar temporada en el histórico")
+        st.write(
+            "Mueve la asistencia y los consumos de maestros de una temporada a ficheros Parquet locales "
+            "y los borra de la base de datos. Los informes de años anteriores se consultan en "
+            "'📄 Informes → 🗄️ Histórico de temporadas'."
+        )
+
+        curso_archivar = st.text_input("Temporada a archivar", curso_actual, key="curso_archivar")
+        if temporadas_archivadas():
+            st.caption("Temporadas ya archivadas: " + ", ".join(temporadas_archivadas()))
+
+        if st.button("🗄️ Archivar temporada"):
+            if not re.fullmatch(r"\d{4}/\d{4}", curso_archivar.strip()):
+                st.error("La temporada debe tener el formato 2025/2026.")
+            else:
+                barra = st.progress(0.0, text="Archivando...")
+
+                def progreso_archivo(tabla, fase, filas):
+                    indice = TABLAS_ARCHIVABLES.index(tabla)
+                    barra.progress(indice / len(TABLAS_ARCHIVABLES), text=f"{tabla}: {fase} ({filas} filas)")
+
+                try:
+                    resultado = archivar_temporada(curso_archivar.strip(), progreso=progreso_archivo)
+                    barra.progress(1.0, text="Temporada archivada.")
+                    st.dataframe(
+                        pd.DataFrame([
+                            {"Tabla": t, "Archivadas": archivadas, "Borradas de la base de datos": borradas}
+                            for t, (archivadas, borradas) in resultado.items()
+                        ]),
+                        hide_index=True
+                    )
+                    st.success(f"Temporada {curso_archivar} archivada correctamente.")
+                except Exception as e:
+                    st.error(f"Error al archivar la temporada: {e}")
+
+        st.divider()
+
+        # ---------------------------------------------------------
+        # 4. Crear nuevo curso académico (VACIADO SEGURO)
+        # ---------------------------------------------------------
+        st.subheader("4. Vaciar base de datos y preparar nuevo curso")
         
         st.warning(
             "⚠️ ¡ATENCIÓN! Este proceso eliminará permanentemente todos los registros de asistencia "
             "del curso actual para dejar la base de datos limpia. Asegúrate de haber descargado "
             "la copia de seguridad en el Paso 1 antes de continuar."
         )
+        st.info("Si quieres conservar el histórico para informes de años anteriores, archiva antes la temporada (Paso 3).")
 
         # Campo de confirmación manual para evitar accidentes
         confirmacion_texto = st.text_input(
@@ -2325,40 +2217,73 @@ if rol == "admin":
             key="confirmar_vaciado"
         )
 
-        if st.button("🚨 EJECUTAR LIMPIEZA DE TEMPORADA", type="primary"):
+        from tareas import tarea, lanzar, TERMINADA
+        from limpieza import NOMBRE_TAREA, limpiar_temporada
+
+        # La limpieza se ejecuta en segundo plano por tramos de id; aquí solo se lanza y se sigue
+        limpieza = tarea(NOMBRE_TAREA, colegio_actual())
+        limpieza_en_curso = limpieza is not None and limpieza.en_curso
+
+        if st.button("🚨 EJECUTAR LIMPIEZA DE TEMPORADA", type="primary", disabled=limpieza_en_curso):
             if confirmacion_texto != "ELIMINAR":
                 st.error("❌ No has escrito la palabra 'ELIMINAR' correctamente. Operación cancelada.")
             else:
-                with st.spinner("Limpiando la base de datos para el nuevo curso..."):
-                    try:
-                        # A. ELIMINAR TODAS LAS ASISTENCIAS
-                        # En Supabase gratuito, un .delete().neq("id", 0) borra toda la tabla de golpe
-                        supabase.table("asistencia").delete().neq("id", 0).execute()
-                        
-                        # B. ELIMINAR EL LOG DE PROMOCIONES ANTERIOR
-                        supabase.table("promociones_log").delete().neq("id", 0).execute()
-                        
-                        # C. LIMPIAR ALUMNOS GRADUADOS (OPCIONAL)
-                        # Si quieres borrar por completo a los alumnos que pasaron a "Ninguno" (6º de primaria), 
-                        # puedes buscar el ID del curso 'Ninguno' y eliminarlos para liberar espacio visual:
-                        df_cursos = db_select("cursos")
-                        id_ninguno = df_cursos[df_cursos["nombre"] == "Ninguno"]["id"].iloc[0] if not df_cursos[df_cursos["nombre"] == "Ninguno"].empty else None
-                        
-                        if id_ninguno:
-                            supabase.table("alumnos").delete().eq("curso_id", int(id_ninguno)).execute()
-                            st.info("🎓 Alumnos graduados (6º de Primaria) removidos del sistema activamente.")
-
-                        st.success(f"✨ ¡Base de datos vaciada con éxito! Lista para el curso académico {curso_nuevo}.")
-                        st.balloons()
-                        st.cache_data.clear()
-                        
-                    except Exception as e:
-                        st.error(f"Hubo un error durante la limpieza: {e}")
+                # Los alumnos que pasaron a "Ninguno" (terminaron 6º) también se borran
+                df_cursos = db_select_cacheado("cursos")
+                ninguno = df_cursos.loc[df_cursos["nombre"] == "Ninguno", "id"] if not df_cursos.empty else pd.Series(dtype="int64")
+                id_ninguno = int(ninguno.iloc[0]) if not ninguno.empty else None
+
+                # El hilo no tiene sesión de Streamlit: cliente con el colegio fijado
+                cliente_limpieza = datos.ClienteColegio(supabase.cliente, colegio_actual())
+                lanzar(NOMBRE_TAREA, colegio_actual(), limpiar_temporada, cliente_limpieza, id_ninguno)
+                st.rerun()
+
+        @st.fragment(run_every=1 if limpieza_en_curso else None)
+        def progreso_limpieza():
+            limpieza = tarea(NOMBRE_TAREA, colegio_actual())
+            if limpieza is None:
+                return
+
+            pasos = pd.DataFrame(
+                [{"Paso": paso, "Borradas": hechas, "Total": total} for paso, (hechas, total) in limpieza.pasos.items()]
+            )
+            if limpieza.en_curso:
+                st.progress(limpieza.fraccion, text=limpieza.mensaje or "Preparando la limpieza...")
+                if not pasos.empty:
+                    st.dataframe(pasos, hide_index=True, use_container_width=True)
+                return
+
+            # Acaba de terminar: se recarga la página una vez (deja de consultar). Las
+            # cachés y el índice de alumnos ya se renuevan por la versión de las tablas
+            if st.session_state.get("limpieza_vista") != limpieza.inicio:
+                st.session_state["limpieza_vista"] = limpieza.inicio
+                st.rerun()
+
+            if limpieza.resultado:
+                st.dataframe(
+                    pd.DataFrame([{"Paso": paso, **r} for paso, r in limpieza.resultado.items()]),
+                    hide_index=True,
+                    use_container_width=True
+                )
+            elif not pasos.empty:
+                st.dataframe(pasos, hide_index=True, use_container_width=True)
+            if limpieza.estado == TERMINADA:
+                st.success(
+                    f"✨ ¡Base de datos vaciada con éxito! Lista para el curso académico {curso_nuevo}. "
+                    f"(Terminó a las {limpieza.fin:%H:%M:%S})"
+                )
+            else:
+                st.error(
+                    f"Hubo un error durante la limpieza: {limpieza.error}. "
+                    "Vuelve a pulsar el botón para continuar con lo que queda."
+                )
+
+        progreso_limpieza()
 
         # ---------------------------------------------------------
-        # 4. Deshacer última promoción
+        # 5. Deshacer última promoción
         # ---------------------------------------------------------
-        st.subheader("4. Deshacer última promoción")
+        st.subheader("5. Deshacer última promoción")
 
         log = db_select("promociones_log")
 
@@ -2369,20 +2294,113 @@ if rol == "admin":
             ultima_fecha = log.iloc[0]["fecha"]
             lote = log[log["fecha"] == ultima_fecha]
 
-            st.write(f"Última promoción realizada el {ultima_fecha}: {len(lote)} alumnos.")
+            st.write(f"Última promoción realizada el {ultima_fecha:%d/%m/%Y}: {len(lote)} alumnos.")
 
             if st.button("Deshacer última promoción"):
-                for _, row in lote.iterrows():
-                    db_upsert("alumnos", [{
-                        "id": row["alumno_id"],
-                        "curso_id": row["curso_origen"]
-                    }])
-
-                for _, row in lote.iterrows():
-                    db_delete("promociones_log", {"id": row["id"]})
+                from promocion import deshacer_ultima_promocion
 
+                deshacer_ultima_promocion()
                 st.success("Promoción revertida correctamente.")
 
+        st.divider()
+
+        # ---------------------------------------------------------
+        # 6. Restaurar copia de seguridad
+        # ---------------------------------------------------------
+        st.subheader("6. Restaurar copia de seguridad")
+        st.write("Vuelve a cargar en la base de datos una copia generada en el Paso 1 (por ejemplo, tras una limpieza por error).")
+        st.caption(
+            "Requisito: la app debe conectarse con una clave authenticated o service_role. "
+            "Con la clave anónima no se pueden reajustar las secuencias de id y no se restaura nada."
+        )
+
+        from copias import (
+            MODOS_CONFLICTO, validar_copia, restaurar_copia, huella_copia, leer_punto_control,
+            comprobar_permiso_secuencias,
+        )
+        import zipfile
+
+        archivo_copia = st.file_uploader("Copia de seguridad (.zip)", type=["zip"], key="archivo_restaurar")
+        error_permiso = comprobar_permiso_secuencias() if archivo_copia is not None else None
+
+        if error_permiso:
+            st.error(error_permiso)
+        elif archivo_copia is not None:
+            try:
+                zf_copia = zipfile.ZipFile(archivo_copia)
+                manifiesto, errores_copia = validar_copia(zf_copia)
+            except zipfile.BadZipFile:
+                manifiesto, errores_copia = None, ["El fichero no es un .zip válido."]
+
+            if errores_copia:
+                for err in errores_copia:
+                    st.error(err)
+            else:
+                st.success(f"Copia válida del {manifiesto['creado']} (formato {manifiesto['formato']}).")
+                st.dataframe(
+                    pd.DataFrame([
+                        {"Tabla": t, "Filas": info["filas"]}
+                        for t, info in manifiesto["tablas"].items()
+                    ]),
+                    hide_index=True
+                )
+
+                punto_previo = leer_punto_control(huella_copia(zf_copia))
+                if punto_previo:
+                    st.info(
+                        "Hay una restauración anterior de esta copia sin terminar. Se continuará donde se quedó: "
+                        + ", ".join(f"{t}: {n} filas" for t, n in punto_previo.items())
+                    )
+
+                tablas_restaurar = st.multiselect(
+                    "Tablas a restaurar",
+                    list(manifiesto["tablas"]),
+                    default=list(manifiesto["tablas"]),
+                    key="tablas_restaurar"
+                )
+                modo_conflicto = st.radio(
+                    "Si una fila ya existe",
+                    list(MODOS_CONFLICTO),
+                    format_func=lambda m: MODOS_CONFLICTO[m],
+                    key="modo_conflicto_restaurar"
+                )
+                confirmacion_restaurar = st.text_input(
+                    "Para confirmar, escribe 'RESTAURAR' en mayúsculas:",
+                    key="confirmar_restaurar"
+                )
+
+                if st.button("♻️ Restaurar copia", type="primary"):
+                    if confirmacion_restaurar != "RESTAURAR":
+                        st.error("❌ No has escrito la palabra 'RESTAURAR' correctamente. Operación cancelada.")
+                    elif not tablas_restaurar:
+                        st.error("Selecciona al menos una tabla.")
+                    else:
+                        barra = st.progress(0.0, text="Restaurando...")
+
+                        def progreso_restauracion(tabla, hechas, total):
+                            fraccion = hechas / total if total else 1.0
+                            barra.progress(fraccion, text=f"Restaurando {tabla}: {hechas}/{total} filas")
+
+                        try:
+                            restauradas = restaurar_copia(
+                                zf_copia,
+                                tablas=tablas_restaurar,
+                                modo_conflicto=modo_conflicto,
+                                progreso=progreso_restauracion
+                            )
+                            barra.progress(1.0, text="Restauración completada.")
+                            st.success("✅ Copia restaurada: " + ", ".join(f"{t}: {n}" for t, n in restauradas.items()))
+                        except Exception as e:
+                            st.error(f"Error durante la restauración: {e}. Vuelve a pulsar 'Restaurar copia' para continuar donde se quedó.")
+                        finally:
+                            # Aunque falle a medias ya hay filas escritas. Solo se renuevan las
+                            # cachés y los índices de este colegio, no los de los demás
+                            for tabla in tablas_restaurar:
+                                datos.anotar_cambio(tabla, colegio_actual())
+                            datos.refrescar_versiones()
+                            for catalogo in busqueda.CATALOGOS:
+                                busqueda.invalidar(catalogo)
+
 
     # ---------------------------------------------------------
     # COMEDOR MAESTROS
@@ -2391,7 +2409,7 @@ if rol == "admin":
         st.header("Comedor Maestros")
 
         # Cargamos profesores (maestros)
-        df_profes = db_select("profesores")
+        df_profes = db_select_cacheado("profesores")
 
         if df_profes.empty:
             st.info("No hay profesores registrados.")
@@ -2402,6 +2420,24 @@ if rol == "admin":
                 # horizontal=True
             # )
 
+            # Cada página es una sola tabla editable con los datos de ese día. Al
+            # guardar solo se envían los maestros que han cambiado: se borran sus
+            # registros del día y se insertan los nuevos, todo en un lote.
+            def guardar_cambios_maestros(tabla, fecha_str, ids_cambiados, filas_nuevas, clave_editor, aviso):
+                if not ids_cambiados:
+                    st.info("No hay cambios que guardar.")
+                    return
+                supabase.table(tabla).delete().eq("fecha", fecha_str).in_("maestro_id", ids_cambiados).execute()
+                if filas_nuevas:
+                    supabase.table(tabla).insert(filas_nuevas).execute()
+                # Se recarga la página para partir de lo que hay ahora en la base de datos
+                st.session_state.pop(clave_editor, None)
+                st.session_state["aviso_maestros"] = aviso
+                st.rerun()
+
+            if "aviso_maestros" in st.session_state:
+                st.success(st.session_state.pop("aviso_maestros"))
+
             # =========================
             # SUBAPARTADO: COMIDAS MAESTROS
             # =========================
@@ -2416,58 +2452,52 @@ if rol == "admin":
                 )
                 fecha_comidas_str = fecha_comidas.strftime("%Y-%m-%d")
 
-                # Cargamos registros existentes de esa fecha
-                df_comidas = db_select("maestros_comidas")
-                
-                # Cargamos registros existentes de esa fecha
-                df_comidas = db_select("maestros_comidas")
-
-                # Verificamos si el DataFrame tiene la columna 'fecha'
-                if not df_comidas.empty and "fecha" in df_comidas.columns:
-                    df_comidas_dia = df_comidas[df_comidas["fecha"] == fecha_comidas_str]
-                else:
-                    # Si está vacío o no tiene la columna, creamos un DF vacío con la estructura correcta
-                    df_comidas_dia = pd.DataFrame(columns=["maestro_id", "fecha", "come"])
-
-                # Conjunto de maestros que ya tienen marcado 'come' ese día
-                # Nota: 'maestro_id' es el nombre en la tabla 'maestros_comidas'
-                maestros_que_comen = set(df_comidas_dia["maestro_id"].tolist())
-
-                st.write("Marca los maestros que se quedan a comer:")
-
-                checks_comen = {}
-                for _, prof in df_profes.iterrows():
-                    # ID de la tabla profesores para vincular
-                    id_real = prof["id"] 
-                    # Columna que identifica al maestro para mostrar en pantalla
-                    nombre_maestro = prof["usuario"] 
-
-                    marcado = id_real in maestros_que_comen
+                # Registros de esa fecha (solo ese día, no la tabla entera)
+                comidas_dia = supabase.table("maestros_comidas").select("maestro_id").eq("fecha", fecha_comidas_str).execute().data
+                maestros_que_comen = {r["maestro_id"] for r in comidas_dia}
 
-                    checks_comen[id_real] = st.checkbox(
-                        nombre_maestro,
-                        value=marcado,
-                        key=f"come_maestro_{id_real}_{fecha_comidas_str}"
-                    )
-
-                if st.button("Guardar comidas de maestros"):
-                    # Borramos registros existentes de ese día
-                    supabase.table("maestros_comidas").delete().eq("fecha", fecha_comidas_str).execute()
-
-                    # Insertamos solo los que están marcados
-                    filas_insertar = []
-                    for maestro_id, come in checks_comen.items():
-                        if come:
-                            filas_insertar.append({
-                                "maestro_id": maestro_id,
-                                "fecha": fecha_comidas_str,
-                                "come": True
-                            })
+                tabla_comidas = pd.DataFrame({
+                    "id": df_profes["id"].to_numpy(),
+                    "Maestro": df_profes["usuario"].to_numpy(),
+                    "Come": df_profes["id"].isin(maestros_que_comen).to_numpy(),
+                })
 
-                    if filas_insertar:
-                        supabase.table("maestros_comidas").insert(filas_insertar).execute()
+                # Tabla y guardado en un fragmento dentro de un formulario: marcar
+                # maestros no provoca ejecuciones hasta pulsar Guardar
+                @st.fragment
+                def marcar_comidas_maestros(tabla_comidas, fecha_comidas_str):
+                    clave_editor = f"editor_comidas_{fecha_comidas_str}"
+                    with st.form(f"form_comidas_{fecha_comidas_str}"):
+                        st.write("Marca los maestros que se quedan a comer:")
+                        editada = st.data_editor(
+                            tabla_comidas,
+                            column_config={
+                                "id": None,
+                                "Maestro": st.column_config.TextColumn("Maestro", disabled=True),
+                                "Come": st.column_config.CheckboxColumn("Come"),
+                            },
+                            hide_index=True,
+                            num_rows="fixed",
+                            use_container_width=True,
+                            key=clave_editor
+                        )
+                        guardar = st.form_submit_button("Guardar comidas de maestros")
+
+                    if guardar:
+                        cambiados = editada[editada["Come"] != tabla_comidas["Come"]]
+                        guardar_cambios_maestros(
+                            "maestros_comidas",
+                            fecha_comidas_str,
+                            [int(i) for i in cambiados["id"]],
+                            [
+                                {"maestro_id": int(r["id"]), "fecha": fecha_comidas_str, "come": True}
+                                for _, r in cambiados[cambiados["Come"]].iterrows()
+                            ],
+                            clave_editor,
+                            f"Comidas de maestros guardadas correctamente ({len(cambiados)} cambios)."
+                        )
 
-                    st.success("Comidas de maestros guardadas correctamente.")
+                marcar_comidas_maestros(tabla_comidas, fecha_comidas_str)
 
             # =========================
             # SUBAPARTADO: AGUA MAESTROS
@@ -2483,85 +2513,67 @@ if rol == "admin":
                 )
                 fecha_agua_str = fecha_agua.strftime("%Y-%m-%d")
 
-                # Cargamos registros existentes de esa fecha
-                df_agua = db_select("maestros_agua")
-                # Sección Agua Maestros
-                df_agua = db_select("maestros_agua")
-
-                if not df_agua.empty and "fecha" in df_agua.columns:
-                    df_agua_dia = df_agua[df_agua["fecha"] == fecha_agua_str]
-                else:
-                    df_agua_dia = pd.DataFrame(columns=["maestro_id", "fecha", "agua_025", "agua_060"])
-
-                # Diccionario maestro_id -> (agua_025, agua_060)
-                agua_existente = {
-                    row["maestro_id"]: (row.get("agua_025", 0), row.get("agua_060", 0))
-                    for _, row in df_agua_dia.iterrows()
-                }
-
-                st.write("Registra el consumo de botellas de agua por maestro:")
-
-                # 1. Ajustamos proporciones: [1.5, 1, 1] hace la columna del nombre más pequeña
-                proporciones = [1.5, 1, 1]
-
-                h_col1, h_col2, h_col3 = st.columns(proporciones)
-                # Alineamos también los encabezados para que coincidan
-                h_col1.markdown("<p style='text-align: right; font-weight: bold; margin-bottom: 0;'>Maestro</p>", unsafe_allow_html=True)
-                # Aguas centradas sobre sus columnas
-                h_col2.markdown("<p style='text-align: center; font-weight: bold; margin-bottom: 0;'>Agua 0,25€</p>", unsafe_allow_html=True)
-                h_col3.markdown("<p style='text-align: center; font-weight: bold; margin-bottom: 0;'>Agua 0,60€</p>", unsafe_allow_html=True)
-
-                inputs_agua = {}
-
-                for _, prof in df_profes.iterrows():
-                    id_real = prof["id"]
-                    nombre_maestro = prof["usuario"]
-                    valor_025, valor_060 = agua_existente.get(id_real, (0, 0))
+                # Registros de esa fecha (solo ese día, no la tabla entera)
+                df_agua_dia = pd.DataFrame(
+                    supabase.table("maestros_agua").select("maestro_id, agua_025, agua_060").eq("fecha", fecha_agua_str).execute().data,
+                    columns=["maestro_id", "agua_025", "agua_060"]
+                )
+                agua_dia = df_agua_dia.groupby("maestro_id")[["agua_025", "agua_060"]].sum()
 
-                    row_col1, row_col2, row_col3 = st.columns(proporciones)
+                tabla_agua = pd.DataFrame({
+                    "id": df_profes["id"].to_numpy(),
+                    "Maestro": df_profes["usuario"].to_numpy(),
+                    "Agua 0,25€": df_profes["id"].map(agua_dia["agua_025"]).fillna(0).astype(int).to_numpy(),
+                    "Agua 0,60€": df_profes["id"].map(agua_dia["agua_060"]).fillna(0).astype(int).to_numpy(),
+                })
 
-                    with row_col1:
-                        # text-align: right para que el nombre se acerque a los números
-                        st.markdown(
-                            f"<div style='padding-top: 10px; text-align: right; padding-right: 15px;'>"
-                            f"{nombre_maestro}</div>", 
-                            unsafe_allow_html=True
+                # Tabla y guardado en un fragmento dentro de un formulario: cambiar
+                # cantidades no provoca ejecuciones hasta pulsar Guardar
+                @st.fragment
+                def registrar_agua_maestros(tabla_agua, fecha_agua_str):
+                    clave_editor = f"editor_agua_{fecha_agua_str}"
+                    with st.form(f"form_agua_{fecha_agua_str}"):
+                        st.write("Registra el consumo de botellas de agua por maestro:")
+                        editada = st.data_editor(
+                            tabla_agua,
+                            column_config={
+                                "id": None,
+                                "Maestro": st.column_config.TextColumn("Maestro", disabled=True),
+                                "Agua 0,25€": st.column_config.NumberColumn("Agua 0,25€", min_value=0, max_value=20, step=1),
+                                "Agua 0,60€": st.column_config.NumberColumn("Agua 0,60€", min_value=0, max_value=20, step=1),
+                            },
+                            hide_index=True,
+                            num_rows="fixed",
+                            use_container_width=True,
+                            key=clave_editor
                         )
-    
-                    with row_col2:
-                        n_025 = st.number_input(
-                            "Cantidad 0.25", 
-                            min_value=0, max_value=20, value=int(valor_025),
-                            step=1, key=f"agua025_{id_real}_{fecha_agua_str}",
-                            label_visibility="collapsed"
+                        guardar = st.form_submit_button("Guardar consumo de agua")
+
+                    if guardar:
+                        editada = editada.fillna(0)
+                        cambiados = editada[
+                            (editada["Agua 0,25€"] != tabla_agua["Agua 0,25€"]) | (editada["Agua 0,60€"] != tabla_agua["Agua 0,60€"])
+                        ]
+                        # Solo se guardan los maestros con algún consumo
+                        con_consumo = cambiados[(cambiados["Agua 0,25€"] > 0) | (cambiados["Agua 0,60€"] > 0)]
+                        guardar_cambios_maestros(
+                            "maestros_agua",
+                            fecha_agua_str,
+                            [int(i) for i in cambiados["id"]],
+                            [
+                                {
+                                    "maestro_id": int(r["id"]),
+                                    "fecha": fecha_agua_str,
+                                    "agua_025": int(r["Agua 0,25€"]),
+                                    "agua_060": int(r["Agua 0,60€"])
+                                }
+                                for _, r in con_consumo.iterrows()
+                            ],
+                            clave_editor,
+                            f"Consumo de agua de maestros guardado correctamente ({len(cambiados)} cambios)."
                         )
-        
-                    with row_col3:
-                        n_060 = st.number_input(
-                            "Cantidad 0.60", 
-                            min_value=0, max_value=20, value=int(valor_060),
-                            step=1, key=f"agua060_{id_real}_{fecha_agua_str}",
-                            label_visibility="collapsed" 
-                    )
-
-                    inputs_agua[id_real] = (n_025, n_060)
-
-                if st.button("Guardar consumo de agua"):
-                    # Borramos registros existentes de ese día
-                    supabase.table("maestros_agua").delete().eq("fecha", fecha_agua_str).execute()
-
-                    # Insertamos solo los maestros que tienen consumo
-                    filas_insertar = []
-                    for maestro_id, (n_025, n_060) in inputs_agua.items():
-                        if n_025 > 0 or n_060 > 0:
-                            filas_insertar.append({
-                                "maestro_id": maestro_id,
-                                "fecha": fecha_agua_str,
-                                "agua_025": int(n_025),
-                                "agua_060": int(n_060)
-                            })
 
-                    if filas_insertar:
-                        supabase.table("maestros_agua").insert(filas_insertar).execute()
+                registrar_agua_maestros(tabla_agua, fecha_agua_str)
 
-                    st.success("Consumo de agua de maestros guardado correctamente.")
+# Fin de la ejecución: se guarda en el registro de rendimiento
+rendimiento.terminar()
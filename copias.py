@@ -0,0 +1,377 @@
+# ---------------------------------------------------------
+# COPIAS DE SEGURIDAD (ARCHIVO ZIP CON MANIFIESTO)
+# ---------------------------------------------------------
+# Cada tabla se lee por páginas y se escribe comprimida dentro de un único
+# .zip junto a un manifest.json con el número de filas y el SHA-256 de cada
+# fichero. La memoria usada no depende del tamaño de las tablas.
+# La restauración lee el mismo .zip, lo valida contra el manifiesto y
+# vuelve a cargar las filas por lotes conservando los id originales.
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+
+import datos
+from datos import db_select_paginado, colegio_actual
+from tipos import ESQUEMA, ENTERO, BOOLEANO
+
+# Orden de copia (y de restauración): primero las tablas de las que dependen las demás.
+# Si se añade una, añadirla también a la lista de sql/001_reajustar_secuencias.sql
+TABLAS_COPIA = [
+    "cursos",
+    "alumnos",
+    "profesores",
+    "profesores_cursos",
+    "config_filas",
+    "config_mesas",
+    "asistencia",
+    "promociones_log",
+    "maestros_comidas",
+    "maestros_agua",
+]
+
+FORMATOS_COPIA = {
+    "csv.gz": "CSV comprimido (gzip)",
+    "parquet": "Parquet",
+}
+
+VERSION_MANIFIESTO = 1
+
+
+class _EscritorConHash(io.RawIOBase):
+    """
+    Envuelve el fichero de destino y va calculando el SHA-256 de lo que se escribe.
+    """
+
+    def __init__(self, destino):
+        self.destino = destino
+        self.hash = hashlib.sha256()
+        self.posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, bloque):
+        self.destino.write(bloque)
+        self.hash.update(bloque)
+        self.posicion += len(bloque)
+        return len(bloque)
+
+    def tell(self):
+        return self.posicion
+
+
+def _enteros_con_huecos(df):
+    # Pandas convierte una columna entera con huecos en float (3.0): la devolvemos a entero
+    for col in df.columns:
+        if pd.api.types.is_float_dtype(df[col]):
+            valores = df[col].dropna()
+            if (valores % 1 == 0).all():
+                df[col] = df[col].astype("Int64")
+    return df
+
+
+def _listas_a_texto(df):
+    # Columnas text[] (p. ej. alumnos.dietas): en CSV van como literal de array de Postgres {a,b}
+    for col in df.columns:
+        if df[col].dtype == object and df[col].map(lambda v: isinstance(v, list)).any():
+            df[col] = df[col].map(
+                lambda v: "{" + ",".join('"' + str(x).replace("\\", "\\\\").replace('"', '\\"') + '"' for x in v) + "}"
+                if isinstance(v, list) else v
+            )
+    return df
+
+
+def _escribir_csv_gz(paginas, destino):
+    filas, columnas = 0, None
+    with gzip.GzipFile(fileobj=destino, mode="wb") as gz:
+        texto = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        for pagina in paginas:
+            pagina = _listas_a_texto(pagina)
+            if columnas is None:
+                columnas = pagina.columns.tolist()
+                pagina.to_csv(texto, header=True, index=False)
+            else:
+                pagina.reindex(columns=columnas).to_csv(texto, header=False, index=False)
+            filas += len(pagina)
+        texto.flush()
+        texto.detach()
+    return filas, columnas or []
+
+
+def _esquema_parquet(tabla, pagina):
+    """
+    Esquema Arrow del fichero. Los enteros y booleanos de tipos.ESQUEMA tienen
+    tipo fijo; el resto se toma de la primera página, y las columnas que
+    vienen vacías en ella se guardan como texto (las páginas siguientes se
+    convierten a este esquema, ver escribir_parquet).
+    """
+    import pyarrow as pa
+
+    tipos = ESQUEMA.get(tabla, {})
+    campos = []
+    for campo in pa.Schema.from_pandas(pagina, preserve_index=False):
+        tipo = tipos.get(campo.name)
+        if tipo == ENTERO:
+            # Como en Postgres (bigint): la restauración devuelve los mismos valores
+            campo = pa.field(campo.name, pa.int64())
+        elif tipo == BOOLEANO:
+            campo = pa.field(campo.name, pa.bool_())
+        elif pa.types.is_dictionary(campo.type) or pa.types.is_null(campo.type):
+            # Las categorías (motivo, curso académico) cambian de una página a otra
+            campo = pa.field(campo.name, pa.string())
+        elif pa.types.is_list(campo.type) and pa.types.is_null(campo.type.value_type):
+            campo = pa.field(campo.name, pa.list_(pa.string()))
+        campos.append(campo)
+    return pa.schema(campos)
+
+
+def escribir_parquet(paginas, destino, tabla=None):
+    """
+    Escribe las páginas en Parquet (un grupo de filas por página). destino: ruta o fichero.
+    tabla: nombre de la tabla, para tomar de tipos.ESQUEMA el tipo de sus columnas.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    filas, columnas, esquema, escritor = 0, None, None, None
+    for pagina in paginas:
+        if escritor is None:
+            columnas = pagina.columns.tolist()
+            esquema = _esquema_parquet(tabla, pagina)
+            escritor = pq.ParquetWriter(destino, esquema, compression="zstd")
+        # Cada página se lee con sus propios tipos y se convierte al esquema del
+        # fichero: una columna vacía en la primera página y con valores después
+        # (o al revés) no rompe la escritura
+        datos_pagina = pa.Table.from_pandas(pagina.reindex(columns=columnas), preserve_index=False)
+        escritor.write_table(datos_pagina.cast(esquema))
+        filas += len(pagina)
+    if escritor is not None:
+        escritor.close()
+    return filas, columnas or []
+
+
+def generar_copia(ruta_zip, formato="csv.gz", tablas=None, progreso=None):
+    """
+    Genera la copia completa en ruta_zip y devuelve el manifiesto.
+    progreso(tabla, filas) se llama después de cada página leída.
+    """
+    tablas = tablas or TABLAS_COPIA
+    manifiesto = {
+        "version": VERSION_MANIFIESTO,
+        "creado": datetime.now().isoformat(timespec="seconds"),
+        "formato": formato,
+        "colegio_id": colegio_actual(),
+        "tablas": {},
+    }
+
+    # Los ficheros ya van comprimidos: el zip solo los agrupa (ZIP_STORED)
+    with zipfile.ZipFile(ruta_zip, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for tabla in tablas:
+            archivo = f"{tabla}.{formato}"
+
+            def paginas_con_progreso(tabla=tabla):
+                leidas = 0
+                for pagina in db_select_paginado(tabla):
+                    pagina = _enteros_con_huecos(pagina)
+                    leidas += len(pagina)
+                    if progreso:
+                        progreso(tabla, leidas)
+                    yield pagina
+
+            with zf.open(archivo, "w", force_zip64=True) as miembro:
+                escritor = _EscritorConHash(miembro)
+                if formato == "parquet":
+                    filas, columnas = escribir_parquet(paginas_con_progreso(), escritor, tabla)
+                else:
+                    filas, columnas = _escribir_csv_gz(paginas_con_progreso(), escritor)
+
+            manifiesto["tablas"][tabla] = {
+                "archivo": archivo,
+                "filas": filas,
+                "columnas": columnas,
+                "sha256": escritor.hash.hexdigest(),
+            }
+
+        zf.writestr("manifest.json", json.dumps(manifiesto, indent=2, ensure_ascii=False))
+
+    return manifiesto
+
+
+# ---------------------------------------------------------
+# RESTAURACIÓN
+# ---------------------------------------------------------
+TAM_LOTE_RESTAURACION = 1000
+
+MODOS_CONFLICTO = {
+    "actualizar": "Sobrescribir las filas que ya existen (mismo id)",
+    "ignorar": "Conservar las filas que ya existen (mismo id)",
+}
+
+
+def leer_manifiesto(zf):
+    return json.loads(zf.read("manifest.json"))
+
+
+def huella_copia(zf):
+    """
+    Identificador de la copia (SHA-256 del manifiesto), usado para el punto de control.
+    """
+    return hashlib.sha256(zf.read("manifest.json")).hexdigest()
+
+
+def validar_copia(zf):
+    """
+    Comprueba que la copia tiene manifiesto y que cada fichero existe y
+    coincide con su SHA-256. Devuelve (manifiesto, lista_de_errores).
+    """
+    if "manifest.json" not in zf.namelist():
+        return None, ["La copia no contiene manifest.json."]
+
+    manifiesto = leer_manifiesto(zf)
+    errores = []
+    if manifiesto.get("version") != VERSION_MANIFIESTO:
+        errores.append(f"Versión de manifiesto no soportada: {manifiesto.get('version')}")
+    if manifiesto.get("formato") not in FORMATOS_COPIA:
+        errores.append(f"Formato desconocido: {manifiesto.get('formato')}")
+    # Restaurar la copia de otro colegio movería sus filas (mismos id) a este
+    if manifiesto.get("colegio_id", colegio_actual()) != colegio_actual():
+        errores.append(f"La copia es de otro colegio (colegio_id {manifiesto.get('colegio_id')}).")
+
+    for tabla, info in manifiesto.get("tablas", {}).items():
+        if info["archivo"] not in zf.namelist():
+            errores.append(f"Falta el fichero {info['archivo']}.")
+            continue
+        h = hashlib.sha256()
+        with zf.open(info["archivo"]) as f:
+            for bloque in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(bloque)
+        if h.hexdigest() != info["sha256"]:
+            errores.append(f"El fichero {info['archivo']} está dañado (SHA-256 distinto).")
+
+    return manifiesto, errores
+
+
+def _lotes_copia(zf, info, formato, tam_lote):
+    if info["filas"] == 0:
+        return
+    with zf.open(info["archivo"]) as miembro:
+        if formato == "parquet":
+            import pyarrow.parquet as pq
+            for lote in pq.ParquetFile(miembro).iter_batches(batch_size=tam_lote):
+                yield lote.to_pandas()
+        else:
+            # Todo como texto: el servidor convierte los tipos y no se pierden ceros a la izquierda
+            with gzip.GzipFile(fileobj=miembro, mode="rb") as gz:
+                yield from pd.read_csv(gz, chunksize=tam_lote, dtype=str, keep_default_na=False, na_values=[""])
+
+
+def _a_registros(df):
+    df = _enteros_con_huecos(df).astype(object)
+    df = df.where(df.notna(), None)
+    # Los arrays de Parquet llegan como numpy: JSON necesita listas
+    df = df.map(lambda v: v.tolist() if hasattr(v, "tolist") and not isinstance(v, str) else v)
+    return df.to_dict(orient="records")
+
+
+def ruta_punto_control(huella):
+    return os.path.join(tempfile.gettempdir(), f"restauracion_comedor_{colegio_actual()}_{huella[:16]}.json")
+
+
+def leer_punto_control(huella):
+    ruta = ruta_punto_control(huella)
+    if os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _guardar_punto_control(huella, punto):
+    with open(ruta_punto_control(huella), "w", encoding="utf-8") as f:
+        json.dump(punto, f)
+
+
+def borrar_punto_control(huella):
+    ruta = ruta_punto_control(huella)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+def comprobar_permiso_secuencias():
+    """
+    Llama a reajustar_secuencias con una lista vacía, sin tocar ninguna tabla.
+    Con la clave anónima falla: la función no se puede llamar desde el rol anon
+    (sql/001_reajustar_secuencias.sql). Devuelve None si hay permiso o el error.
+    """
+    try:
+        datos.supabase.rpc("reajustar_secuencias", {"tablas": []}).execute()
+    except Exception as e:
+        return (
+            "La clave de la app no puede ejecutar reajustar_secuencias, necesaria para terminar "
+            f"la restauración. Conéctate con una clave authenticated o service_role. ({e})"
+        )
+    return None
+
+
+def restaurar_copia(zf, tablas=None, modo_conflicto="actualizar", tam_lote=TAM_LOTE_RESTAURACION, progreso=None):
+    """
+    Restaura las tablas indicadas por lotes de tam_lote filas, conservando los id.
+    El avance se guarda en un punto de control tras cada lote: si la restauración
+    falla, al relanzarla con la misma copia continúa donde se quedó.
+    progreso(tabla, filas_hechas, filas_totales) se llama tras cada lote.
+    Devuelve {tabla: filas_restauradas}.
+    """
+    # Antes de escribir nada: si al final no se pueden reajustar las secuencias,
+    # las filas quedarían cargadas con las secuencias por detrás de los id
+    error = comprobar_permiso_secuencias()
+    if error:
+        raise PermissionError(error)
+
+    manifiesto = leer_manifiesto(zf)
+    formato = manifiesto["formato"]
+    huella = huella_copia(zf)
+    punto = leer_punto_control(huella)
+    tablas = [t for t in TABLAS_COPIA if t in manifiesto["tablas"] and (tablas is None or t in tablas)]
+
+    for tabla in tablas:
+        info = manifiesto["tablas"][tabla]
+        hechas = punto.get(tabla, 0)
+        if hechas >= info["filas"]:
+            if progreso:
+                progreso(tabla, info["filas"], info["filas"])
+            continue
+
+        leidas = 0
+        for lote in _lotes_copia(zf, info, formato, tam_lote):
+            leidas += len(lote)
+            # Lotes ya restaurados en un intento anterior
+            if leidas <= hechas:
+                continue
+            if leidas - len(lote) < hechas:
+                lote = lote.iloc[hechas - (leidas - len(lote)):]
+
+            datos.supabase.table(tabla).upsert(
+                _a_registros(lote),
+                on_conflict="id",
+                ignore_duplicates=(modo_conflicto == "ignorar")
+            ).execute()
+
+            punto[tabla] = leidas
+            _guardar_punto_control(huella, punto)
+            if progreso:
+                progreso(tabla, leidas, info["filas"])
+
+        if leidas != info["filas"]:
+            raise ValueError(f"{tabla}: el manifiesto indica {info['filas']} filas pero la copia contiene {leidas}.")
+
+    # Los id se han insertado a mano: las secuencias deben continuar después del máximo
+    datos.supabase.rpc("reajustar_secuencias", {"tablas": tablas}).execute()
+
+    borrar_punto_control(huella)
+    return {t: manifiesto["tablas"][t]["filas"] for t in tablas}
@@ -0,0 +1,432 @@
+# ---------------------------------------------------------
+# FUNCIONES DE BASE DE DATOS
+# ---------------------------------------------------------
+import functools
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from almacen import columnas_de
+from rendimiento import cache_medida, en_medicion, medicion_actual, tramo
+from tipos import tipar
+
+# Cliente de Supabase compartido (lo configura comedor2.py al arrancar)
+supabase = None
+
+# Máximo de filas que devuelve Supabase por petición
+TAM_PAGINA = 1000
+
+# Tablas comunes a todos los colegios (no llevan colegio_id)
+TABLAS_GLOBALES = {"colegios"}
+
+# Máximo de peticiones a la vez en db_select_varias
+MAX_LECTURAS_PARALELAS = 6
+
+
+# Colegio fijado para el hilo actual (hilos en segundo plano, sin sesión)
+_hilo = threading.local()
+
+
+def colegio_actual():
+    """
+    Colegio de la sesión de Streamlit (se elige al iniciar sesión), o el
+    fijado con en_colegio en los hilos en segundo plano.
+    """
+    colegio_id = getattr(_hilo, "colegio_id", None)
+    if colegio_id is not None:
+        return colegio_id
+    return st.session_state.get("colegio_id")
+
+
+@contextmanager
+def en_colegio(colegio_id):
+    """
+    Limita al colegio las consultas de este hilo hechas con el cliente de la
+    app (datos.supabase), p. ej. las funciones con caché llamadas desde un hilo.
+    """
+    anterior = getattr(_hilo, "colegio_id", None)
+    _hilo.colegio_id = colegio_id
+    try:
+        yield
+    finally:
+        _hilo.colegio_id = anterior
+
+
+class _TablaColegio:
+    """
+    Envuelve el constructor de consultas de una tabla para que todas las
+    lecturas, modificaciones y borrados se limiten al colegio, y todas las
+    inserciones lo lleven.
+    """
+
+    def __init__(self, consulta, colegio_id, tabla):
+        self._consulta = consulta
+        self._colegio_id = colegio_id
+        self._tabla = tabla
+
+    def _con_colegio(self, filas):
+        if isinstance(filas, dict):
+            return {**filas, "colegio_id": self._colegio_id}
+        return [{**f, "colegio_id": self._colegio_id} for f in filas]
+
+    def _escritura(self, consulta):
+        return _Escritura(consulta, self._tabla, self._colegio_id)
+
+    def select(self, *args, **kwargs):
+        return self._consulta.select(*args, **kwargs).eq("colegio_id", self._colegio_id)
+
+    def update(self, valores, **kwargs):
+        return self._escritura(self._consulta.update(valores, **kwargs).eq("colegio_id", self._colegio_id))
+
+    def delete(self, **kwargs):
+        return self._escritura(self._consulta.delete(**kwargs).eq("colegio_id", self._colegio_id))
+
+    def insert(self, filas, **kwargs):
+        return self._escritura(self._consulta.insert(self._con_colegio(filas), **kwargs))
+
+    def upsert(self, filas, **kwargs):
+        return self._escritura(self._consulta.upsert(self._con_colegio(filas), **kwargs))
+
+
+class _Escritura:
+    """
+    Inserción, modificación o borrado en construcción: los filtros encadenados
+    siguen envueltos y, tras execute(), se anota el cambio de la tabla (ver
+    version_tablas).
+    """
+
+    def __init__(self, consulta, tabla, colegio_id):
+        self._consulta = consulta
+        self._tabla = tabla
+        self._colegio_id = colegio_id
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._consulta, nombre)
+        if not callable(atributo):
+            return atributo
+
+        @functools.wraps(atributo)
+        def encadenado(*args, **kwargs):
+            return _Escritura(atributo(*args, **kwargs), self._tabla, self._colegio_id)
+        return encadenado
+
+    def execute(self):
+        respuesta = self._consulta.execute()
+        anotar_cambio(self._tabla, self._colegio_id)
+        return respuesta
+
+
+class ClienteColegio:
+    """
+    Cliente de Supabase limitado a un colegio. Si no se indica colegio_id se
+    usa el de la sesión, así un único cliente sirve a todos los colegios sin
+    que una sesión vea los datos de otra.
+    """
+
+    def __init__(self, cliente, colegio_id=None):
+        self.cliente = cliente
+        self.colegio_id = colegio_id
+
+    def table(self, nombre):
+        if nombre in TABLAS_GLOBALES:
+            return self.cliente.table(nombre)
+        colegio_id = self.colegio_id if self.colegio_id is not None else colegio_actual()
+        if colegio_id is None:
+            raise RuntimeError(f"No hay colegio seleccionado para consultar {nombre}.")
+        return _TablaColegio(self.cliente.table(nombre), colegio_id, nombre)
+
+    def rpc(self, funcion, parametros=None):
+        return self.cliente.rpc(funcion, parametros or {})
+
+
+# ---------------------------------------------------------
+# VERSIONES DE LAS TABLAS
+# ---------------------------------------------------------
+# Para saber si una tabla ha cambiado sin volver a leerla. Cada tabla tiene
+# dos contadores por colegio:
+#   - el de versiones_tablas, que suben los disparadores de la base de datos
+#     con cualquier cambio, también los hechos desde fuera de la app (ver
+#     sql/007_versiones_tablas.sql). Se consulta con una sola petición para
+#     todas las tablas, como mucho cada TTL_VERSIONES segundos.
+#   - el de los cambios hechos desde este proceso (_Escritura), que se ve al
+#     momento, sin esperar a la siguiente consulta.
+# Las funciones con cache_versionada incluyen los dos en la clave de la caché:
+# si no ha cambiado ninguna de sus tablas, no vuelven a consultar nada.
+TTL_VERSIONES = 5
+
+_cambios = defaultdict(int)
+_cerrojo_cambios = threading.Lock()
+
+
+def anotar_cambio(tabla, colegio_id):
+    with _cerrojo_cambios:
+        _cambios[(tabla, colegio_id)] += 1
+
+
+@cache_medida(ttl=TTL_VERSIONES, show_spinner=False)
+def _versiones_bd(colegio_id):
+    try:
+        filas = supabase.table("versiones_tablas").select("tabla, version").execute().data or []
+    except Exception:
+        # Sin la migración 007 solo cuentan los cambios hechos desde la app
+        return {}
+    return {f["tabla"]: f["version"] for f in filas}
+
+
+def refrescar_versiones(colegio_id=None):
+    """
+    Vuelve a leer versiones_tablas sin esperar a TTL_VERSIONES. Se usa justo
+    después de un cambio hecho desde la app, para que la versión que suba su
+    disparador no se confunda luego con un cambio hecho desde fuera.
+    """
+    _versiones_bd.clear(colegio_id if colegio_id is not None else colegio_actual())
+
+
+def version_tablas(*tablas, colegio_id=None):
+    """
+    Tupla con la versión de cada tabla en el colegio (por defecto, el de la
+    sesión). Cambia en cuanto cambia cualquiera de las tablas.
+    """
+    colegio_id = colegio_id if colegio_id is not None else colegio_actual()
+    en_bd = _versiones_bd(colegio_id)
+    return tuple((en_bd.get(tabla, 0), _cambios[(tabla, colegio_id)]) for tabla in tablas)
+
+
+def cache_versionada(*tablas, **opciones):
+    """
+    Igual que cache_medida(**opciones), pero el resultado se vuelve a calcular
+    en cuanto cambia alguna de las tablas: no hace falta borrar la caché a
+    mano después de escribir.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def con_version(*args, version=None, **kwargs):
+            return funcion(*args, **kwargs)
+
+        cacheada = cache_medida(**opciones)(con_version)
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            return cacheada(*args, version=version_tablas(*tablas), **kwargs)
+
+        envoltura.clear = cacheada.clear
+        return envoltura
+    return decorador
+
+
+@st.cache_resource
+def _cliente_sqlite(ruta):
+    # Una sola conexión por fichero para todas las sesiones
+    from cliente_sqlite import ClienteSQLite
+    return ClienteSQLite(ruta)
+
+
+def crear_cliente(config):
+    """
+    Crea el cliente de almacenamiento según config (st.secrets o un dict):
+      BACKEND = "supabase" (por defecto) -> SUPABASE_URL y SUPABASE_KEY
+      BACKEND = "sqlite"                 -> SQLITE_RUTA (por defecto comedor.db)
+    Los dos implementan la misma interfaz (ver almacen.py).
+    """
+    backend = config.get("BACKEND", "supabase")
+    if backend == "sqlite":
+        return _cliente_sqlite(config.get("SQLITE_RUTA", "comedor.db"))
+    if backend != "supabase":
+        raise ValueError(f"Almacenamiento desconocido: {backend}")
+    from supabase import create_client
+    return create_client(config["SUPABASE_URL"], config["SUPABASE_KEY"])
+
+
+def configurar_cliente(cliente):
+    global supabase
+    supabase = cliente
+
+
+def aplicar_filtros(consulta, filtros):
+    """
+    Aplica una lista de filtros (columna, operador, valor) a una consulta.
+    Los operadores son los del cliente de Supabase: eq, neq, gt, gte, lt, lte, in_, ilike.
+    """
+    for columna, operador, valor in (filtros or []):
+        consulta = getattr(consulta, operador)(columna, valor)
+    return consulta
+
+
+def db_select(table):
+    # Con los tipos de cada columna ya fijados (ver tipos.py)
+    try:
+        response = supabase.table(table).select("*").execute()
+        data = response.data or []
+        with tramo("pandas"):
+            return tipar(table, pd.DataFrame(data))
+    except Exception as e:
+        st.error(f"Error leyendo {table}: {e}")
+        return pd.DataFrame()
+
+
+@cache_medida(ttl=600, show_spinner=False)
+def _tabla_completa(table, colegio_id, version):
+    response = supabase.table(table).select("*").execute()
+    with tramo("pandas"):
+        return tipar(table, pd.DataFrame(response.data or []))
+
+
+def db_select_cacheado(table):
+    """
+    Como db_select, pero la tabla se guarda en caché hasta que cambia su
+    versión (ver version_tablas): para alumnos, cursos y profesores, que se
+    leen en casi todas las páginas y cambian poco durante el día.
+    """
+    try:
+        colegio_id = colegio_actual()
+        return _tabla_completa(table, colegio_id, version_tablas(table, colegio_id=colegio_id))
+    except Exception as e:
+        st.error(f"Error leyendo {table}: {e}")
+        return pd.DataFrame()
+
+
+def _leer(lectura, colegio_id):
+    if callable(lectura):
+        return lectura()
+    if isinstance(lectura, str):
+        return _tabla_completa(lectura, colegio_id, version_tablas(lectura, colegio_id=colegio_id))
+    tabla, columnas, filtros = lectura
+    filas = aplicar_filtros(supabase.table(tabla).select(columnas), filtros).execute().data or []
+    with tramo("pandas"):
+        return tipar(tabla, pd.DataFrame(filas, columns=columnas_de(columnas)))
+
+
+def db_select_varias(lecturas):
+    """
+    Hace a la vez (una petición por hilo) las lecturas independientes de una
+    página y devuelve {nombre: resultado} cuando han llegado todas: la página
+    espera lo que tarda la más lenta, no la suma. lecturas es {nombre: lectura}:
+      "tabla"                      -> la tabla entera, de la caché si no ha cambiado (db_select_cacheado)
+      (tabla, columnas, filtros)   -> una consulta, con los tipos de tipos.py
+      función sin argumentos       -> su resultado (p. ej. una función con caché)
+    Los hilos usan el colegio y la medición de quien llama; las funciones no
+    deben usar st.* (no tienen sesión). Si una lectura falla, se lanza su error.
+    """
+    colegio_id = colegio_actual()
+    if len(lecturas) <= 1:
+        return {nombre: _leer(lectura, colegio_id) for nombre, lectura in lecturas.items()}
+
+    medicion = medicion_actual()
+
+    def en_hilo(lectura):
+        with en_colegio(colegio_id), en_medicion(medicion):
+            return _leer(lectura, colegio_id)
+
+    # Un grupo de hilos por llamada: una lectura puede hacer a su vez otra
+    # db_select_varias (p. ej. plan_del_dia) sin quedarse esperando un hilo libre
+    hilos = min(len(lecturas), MAX_LECTURAS_PARALELAS)
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="lectura") as grupo:
+        pendientes = {nombre: grupo.submit(en_hilo, lectura) for nombre, lectura in lecturas.items()}
+        return {nombre: pendiente.result() for nombre, pendiente in pendientes.items()}
+
+
+def db_select_pagina(table, columnas="*", filtros=None, orden="id", pagina=0, tam_pagina=TAM_PAGINA):
+    """
+    (DataFrame, total) con una página de resultados ordenados y el total de filas
+    que cumplen los filtros, en una sola petición. pagina empieza en 0.
+    """
+    desde = pagina * tam_pagina
+    consulta = aplicar_filtros(supabase.table(table).select(columnas, count="exact"), filtros)
+    if orden != "id":
+        consulta = consulta.order(orden)
+    respuesta = consulta.order("id").range(desde, desde + tam_pagina - 1).execute()
+    with tramo("pandas"):
+        df = tipar(table, pd.DataFrame(respuesta.data or []))
+    return df, respuesta.count or 0
+
+
+def db_select_paginado(table, columnas="*", filtros=None, tam_pagina=TAM_PAGINA):
+    """
+    Recorre una tabla por páginas ordenadas por id y devuelve cada página como DataFrame.
+    Se pagina por id (id > último visto) para que cada petición cueste lo mismo
+    aunque la tabla sea muy grande. Las páginas no se tipan (ver tipos.py): las
+    copias y exportaciones guardan los valores tal como están en la base de datos.
+    """
+    if columnas != "*" and "id" not in [c.strip() for c in columnas.split(",")]:
+        columnas = f"id, {columnas}"
+
+    ultimo_id = None
+    while True:
+        consulta = aplicar_filtros(supabase.table(table).select(columnas), filtros)
+        if ultimo_id is not None:
+            consulta = consulta.gt("id", ultimo_id)
+        datos = consulta.order("id").limit(tam_pagina).execute().data or []
+
+        if not datos:
+            break
+        with tramo("pandas"):
+            pagina = pd.DataFrame(datos)
+        yield pagina
+
+        if len(datos) < tam_pagina:
+            break
+        ultimo_id = datos[-1]["id"]
+
+
+def db_contar(table, filtros=None, cliente=None):
+    """
+    Número de filas que cumplen los filtros (sin traer las filas).
+    """
+    cliente = cliente or supabase
+    respuesta = aplicar_filtros(cliente.table(table).select("id", count="exact"), filtros).limit(1).execute()
+    return respuesta.count or 0
+
+
+@cache_versionada("alumnos", ttl=600, show_spinner=False)
+def alumnos_por_curso(curso_ids, colegio_id):
+    """
+    {curso_id: número de alumnos}, con un recuento por curso: no trae filas,
+    así que no le afecta el límite de 1000 filas por consulta.
+    colegio_id separa la caché de cada colegio. Se renueva al cambiar alumnos.
+    """
+    return {c: db_contar("alumnos", [("curso_id", "eq", c)]) for c in curso_ids}
+
+
+def db_delete_por_lotes(table, filtros, tam_lote=TAM_PAGINA, progreso=None, cliente=None):
+    """
+    Borra las filas que cumplen los filtros por tramos de id de tam_lote filas,
+    para que ninguna petición supere el tiempo máximo de la base de datos.
+    progreso(filas_borradas) se llama tras cada tramo. Devuelve el total borrado.
+    cliente permite usar un cliente con el colegio fijado (p. ej. desde un hilo
+    sin sesión de Streamlit); por defecto, el de la app.
+    """
+    cliente = cliente or supabase
+    borradas = 0
+    while True:
+        consulta = aplicar_filtros(cliente.table(table).select("id"), filtros)
+        ids = [r["id"] for r in consulta.order("id").limit(tam_lote).execute().data or []]
+        if not ids:
+            break
+
+        consulta = aplicar_filtros(cliente.table(table).delete(), filtros)
+        consulta.gte("id", ids[0]).lte("id", ids[-1]).execute()
+
+        borradas += len(ids)
+        if progreso:
+            progreso(borradas)
+    return borradas
+
+
+def db_insert(table, rows):
+    # Devuelve las filas insertadas (con su id)
+    return supabase.table(table).insert(rows).execute().data
+
+
+def db_upsert(table, rows, conflict_cols=None):
+    if conflict_cols:
+        supabase.table(table).upsert(rows, on_conflict=conflict_cols).execute()
+    else:
+        supabase.table(table).upsert(rows).execute()
+
+
+def db_delete(table, conditions):
+    supabase.table(table).delete().match(conditions).execute()
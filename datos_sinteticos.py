@@ -0,0 +1,164 @@
+# ---------------------------------------------------------
+# DATOS SINTÉTICOS PARA BENCHMARKS
+# ---------------------------------------------------------
+# Genera uno o varios colegios completos (cursos, alumnos, profesores, un
+# curso académico entero de asistencia y el consumo de los maestros).
+# Con la misma semilla siempre salen exactamente los mismos datos.
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+NIVELES = ["INF 3", "INF 4", "INF 5", "1º", "2º", "3º", "4º", "5º", "6º"]
+APELLIDOS = [
+    "García", "Martínez", "López", "Sánchez", "González", "Gómez", "Fernández", "Moreno",
+    "Jiménez", "Pérez", "Rodríguez", "Navarro", "Ruiz", "Díaz", "Serrano", "Hernández",
+    "Muñoz", "Sáez", "Romero", "Rubio", "Alfaro", "Molina", "Lozano", "Castillo",
+]
+NOMBRES = [
+    "Lucía", "Hugo", "Martina", "Mateo", "Sofía", "Leo", "María", "Daniel", "Julia", "Pablo",
+    "Paula", "Álvaro", "Valeria", "Manuel", "Emma", "Adrián", "Daniela", "Enzo", "Carla", "Mario",
+]
+
+# Proporción de alumnos con alguna dieta y dietas posibles
+PROPORCION_DIETAS = 0.08
+DIETAS_SINTETICAS = ["sin_gluten", "sin_lactosa", "halal", "vegetariana", "sin_huevo"]
+
+
+def dias_lectivos(curso_academico="2025/2026"):
+    """
+    Días de lunes a viernes entre el 8 de septiembre y el 20 de junio,
+    sin Navidad ni Semana Santa (aproximada a la primera semana de abril).
+    """
+    año = int(curso_academico.split("/")[0])
+    dia, fin = date(año, 9, 8), date(año + 1, 6, 20)
+    navidad = (date(año, 12, 22), date(año + 1, 1, 7))
+    semana_santa = (date(año + 1, 3, 30), date(año + 1, 4, 6))
+    dias = []
+    while dia <= fin:
+        if dia.weekday() < 5 and not (navidad[0] <= dia <= navidad[1]) and not (semana_santa[0] <= dia <= semana_santa[1]):
+            dias.append(dia.strftime("%Y-%m-%d"))
+        dia += timedelta(days=1)
+    return dias
+
+
+def generar(colegios=1, semilla=2025, lineas=2, alumnos_por_curso=25, curso_academico="2025/2026"):
+    """
+    Devuelve {tabla: DataFrame} con colegios colegios completos.
+    lineas: grupos por nivel (A, B...). Los id son únicos entre colegios,
+    como en la base de datos real.
+    """
+    rng = np.random.default_rng(semilla)
+    dias = dias_lectivos(curso_academico)
+    letras = "ABCDEFGH"[:lineas]
+
+    cursos, alumnos, profesores, profesores_cursos, filas_mesas = [], [], [], [], []
+    id_curso = id_alumno = id_profesor = id_fila = 0
+
+    for colegio_id in range(1, colegios + 1):
+        ids_cursos = []
+        for orden, nivel in enumerate(NIVELES, start=1):
+            for letra in letras:
+                id_curso += 1
+                # Mismos nombres que en el colegio real ("INF 3", "1º A"...) para que la promoción funcione
+                nombre = nivel if nivel.startswith("INF") and letra == "A" else f"{nivel} {letra}"
+                cursos.append({"id": id_curso, "nombre": nombre, "orden": orden, "letra": letra, "colegio_id": colegio_id})
+                ids_cursos.append(id_curso)
+
+                n = int(rng.integers(alumnos_por_curso - 3, alumnos_por_curso + 4))
+                for _ in range(n):
+                    id_alumno += 1
+                    dietas = []
+                    if rng.random() < PROPORCION_DIETAS:
+                        dietas = [str(rng.choice(DIETAS_SINTETICAS))]
+                    apellido1, apellido2 = rng.choice(APELLIDOS, 2)
+                    alumnos.append({
+                        "id": id_alumno,
+                        "nombre": f"{apellido1} {apellido2}, {rng.choice(NOMBRES)}",
+                        "curso_id": id_curso,
+                        "dietas": dietas,
+                        "colegio_id": colegio_id,
+                    })
+
+        id_curso += 1
+        cursos.append({"id": id_curso, "nombre": "Ninguno", "orden": 99, "letra": "", "colegio_id": colegio_id,
+                       "curso_siguiente_id": None})
+
+        # Cada grupo pasa al mismo grupo del nivel siguiente; 6º pasa a "Ninguno"
+        for curso in cursos[-len(ids_cursos) - 1:-1]:
+            siguiente = curso["id"] + lineas
+            curso["curso_siguiente_id"] = siguiente if siguiente <= ids_cursos[-1] else id_curso
+
+        # Un tutor por curso, más administración y cocina
+        for i, c_id in enumerate(ids_cursos, start=1):
+            id_profesor += 1
+            profesores.append({"id": id_profesor, "usuario": f"maestro{i}", "password": "x", "rol": "profesor",
+                               "colegio_id": colegio_id})
+            profesores_cursos.append({"id": len(profesores_cursos) + 1, "profesor_id": id_profesor, "curso_id": c_id,
+                                      "colegio_id": colegio_id})
+        for rol in ["admin", "cocina"]:
+            id_profesor += 1
+            profesores.append({"id": id_profesor, "usuario": rol, "password": "x", "rol": rol,
+                               "colegio_id": colegio_id})
+
+        for fila, nombre in enumerate(["INFANTIL", "MEDIANOS", "GRANDES"], start=1):
+            id_fila += 1
+            filas_mesas.append({"id": id_fila, "fila": fila, "nombre": nombre, "mesas": 6, "plazas_por_mesa": 12,
+                                "colegio_id": colegio_id})
+
+    df_alumnos = pd.DataFrame(alumnos)
+    df_profes = pd.DataFrame(profesores)
+
+    # Asistencia: una fila por alumno y día lectivo (93 % asiste)
+    n_alumnos, n_dias = len(df_alumnos), len(dias)
+    asiste = rng.random(n_alumnos * n_dias) < 0.93
+    df_asistencia = pd.DataFrame({
+        "id": np.arange(1, n_alumnos * n_dias + 1),
+        "alumno_id": np.repeat(df_alumnos["id"].to_numpy(), n_dias),
+        "curso_id": np.repeat(df_alumnos["curso_id"].to_numpy(), n_dias),
+        "fecha": np.tile(np.array(dias, dtype=object), n_alumnos),
+        "asiste": asiste,
+        "motivo": np.where(~asiste & (rng.random(n_alumnos * n_dias) < 0.3), "Enfermedad", None),
+        "curso_academico": curso_academico,
+        "colegio_id": np.repeat(df_alumnos["colegio_id"].to_numpy(), n_dias),
+    })
+
+    # Maestros: comen el 40 % de los días; agua el 30 %
+    maestros = df_profes[df_profes["rol"] == "profesor"]
+    n_maestros = len(maestros)
+    ids_m = np.repeat(maestros["id"].to_numpy(), n_dias)
+    colegios_m = np.repeat(maestros["colegio_id"].to_numpy(), n_dias)
+    fechas_m = np.tile(np.array(dias, dtype=object), n_maestros)
+
+    come = rng.random(n_maestros * n_dias) < 0.4
+    df_comidas = pd.DataFrame({
+        "id": np.arange(1, int(come.sum()) + 1),
+        "maestro_id": ids_m[come],
+        "fecha": fechas_m[come],
+        "colegio_id": colegios_m[come],
+    })
+
+    bebe = rng.random(n_maestros * n_dias) < 0.3
+    n_agua = int(bebe.sum())
+    df_agua = pd.DataFrame({
+        "id": np.arange(1, n_agua + 1),
+        "maestro_id": ids_m[bebe],
+        "fecha": fechas_m[bebe],
+        "agua_025": rng.integers(0, 3, n_agua),
+        "agua_060": rng.integers(0, 2, n_agua),
+        "colegio_id": colegios_m[bebe],
+    })
+
+    return {
+        "colegios": pd.DataFrame({"id": range(1, colegios + 1), "nombre": [f"Colegio {i}" for i in range(1, colegios + 1)]}),
+        "cursos": pd.DataFrame(cursos),
+        "alumnos": df_alumnos,
+        "profesores": df_profes,
+        "profesores_cursos": pd.DataFrame(profesores_cursos),
+        "config_filas": pd.DataFrame(filas_mesas),
+        "config_mesas": pd.DataFrame(columns=["id", "id_alumno", "fila", "mesa", "colegio_id"]),
+        "asistencia": df_asistencia,
+        "promociones_log": pd.DataFrame(columns=["id", "alumno_id", "curso_origen", "curso_destino", "fecha", "colegio_id"]),
+        "maestros_comidas": df_comidas,
+        "maestros_agua": df_agua,
+    }
@@ -0,0 +1,81 @@
+# ---------------------------------------------------------
+# DIETAS Y ALERGIAS
+# ---------------------------------------------------------
+# Cada alumno guarda sus dietas en alumnos.dietas (text[]), p. ej.
+# {sin_gluten, sin_lactosa}. Los recuentos para cocina se calculan de una
+# vez sobre los comensales del día, sin buscar nombres uno a uno.
+import pandas as pd
+from reportlab.lib import colors
+
+# Código -> (nombre, abreviatura para las celdas de los PDF)
+DIETAS = {
+    "sin_gluten": ("Sin gluten", "SG"),
+    "sin_lactosa": ("Sin lactosa", "SL"),
+    "sin_huevo": ("Sin huevo", "SH"),
+    "sin_frutos_secos": ("Sin frutos secos", "FS"),
+    "halal": ("Halal", "HA"),
+    "vegetariana": ("Vegetariana", "VG"),
+}
+
+# Color de las celdas de alumnos con alguna dieta en los PDF
+COLOR_DIETA = colors.orange
+
+
+def nombre_dieta(codigo):
+    return DIETAS.get(codigo, (codigo, codigo))[0]
+
+
+def abreviatura_dieta(codigo):
+    return DIETAS.get(codigo, (codigo, codigo[:2].upper()))[1]
+
+
+def _como_lista(valor):
+    # Supabase devuelve el text[] como lista; una celda vacía llega como None/NaN
+    if isinstance(valor, (list, tuple)):
+        return list(valor)
+    if hasattr(valor, "tolist"):
+        return valor.tolist()
+    return []
+
+
+def columna_dietas(df_alumnos):
+    """
+    Serie de listas de dietas alineada con df_alumnos (vacía si la columna no existe).
+    """
+    if "dietas" not in df_alumnos.columns:
+        return pd.Series([[] for _ in range(len(df_alumnos))], index=df_alumnos.index, dtype=object)
+    return df_alumnos["dietas"].map(_como_lista)
+
+
+def indice_dietas(df_alumnos):
+    """
+    {dieta: frozenset(id_alumno)} con los alumnos que siguen cada dieta.
+    """
+    if df_alumnos.empty:
+        return {}
+    explotado = pd.DataFrame({"id": df_alumnos["id"], "dieta": columna_dietas(df_alumnos)}).explode("dieta", ignore_index=True).dropna()
+    return {dieta: frozenset(ids) for dieta, ids in explotado.groupby("dieta")["id"]}
+
+
+def conteo_dietas(df_comensales, columna_curso="nombre_curso"):
+    """
+    Tabla curso x dieta con el número de comensales de cada dieta.
+    df_comensales necesita la columna del curso y la columna dietas.
+    Devuelve un DataFrame vacío si nadie tiene dietas.
+    """
+    if df_comensales.empty:
+        return pd.DataFrame()
+    explotado = pd.DataFrame({
+        "curso": df_comensales[columna_curso],
+        "dieta": columna_dietas(df_comensales),
+    }).explode("dieta", ignore_index=True).dropna()
+    if explotado.empty:
+        return pd.DataFrame()
+
+    tabla = pd.crosstab(explotado["curso"], explotado["dieta"])
+    # Columnas en el orden del catálogo; las desconocidas al final
+    orden = [d for d in DIETAS if d in tabla.columns] + sorted(d for d in tabla.columns if d not in DIETAS)
+    tabla = tabla[orden].rename(columns=nombre_dieta)
+    tabla.index.name = "Curso"
+    tabla.columns.name = None
+    return tabla
@@ -0,0 +1,105 @@
+# ---------------------------------------------------------
+# EXPORTACIÓN A HOJA DE CÁLCULO (XLSX / CSV)
+# ---------------------------------------------------------
+# Los datos se leen por páginas y se escriben a disco según llegan,
+# así nunca hay una tabla completa en memoria.
+import os
+import tempfile
+
+import xlsxwriter
+
+from datos import db_select_paginado
+
+# Tablas exportables: nombre de la hoja y columnas de salida (en orden)
+EXPORTABLES = {
+    "asistencia": {
+        "titulo": "Asistencia alumnos",
+        "columnas": ["fecha", "alumno", "curso", "asiste", "motivo"],
+    },
+    "maestros_comidas": {
+        "titulo": "Comidas maestros",
+        "columnas": ["fecha", "maestro", "come"],
+    },
+    "maestros_agua": {
+        "titulo": "Agua maestros",
+        "columnas": ["fecha", "maestro", "agua_025", "agua_060"],
+    },
+}
+
+
+def filtros_exportacion(tabla, fecha_ini, fecha_fin, curso_id=None, maestros_del_curso=None):
+    """
+    Filtros de servidor para una tabla: rango de fechas y, opcionalmente, curso.
+    En las tablas de maestros el curso se traduce a los maestros asignados a él.
+    """
+    filtros = [("fecha", "gte", fecha_ini), ("fecha", "lte", fecha_fin)]
+    if curso_id is not None:
+        if tabla == "asistencia":
+            filtros.append(("curso_id", "eq", int(curso_id)))
+        else:
+            filtros.append(("maestro_id", "in_", sorted(maestros_del_curso or [])))
+    return filtros
+
+
+def paginas_exportacion(tabla, filtros, catalogos):
+    """
+    Devuelve las páginas de la tabla con los nombres de alumno, curso y maestro ya unidos.
+    catalogos: {"alumnos": {id: nombre}, "cursos": {id: nombre}, "profesores": {id: usuario}}
+    """
+    for pagina in db_select_paginado(tabla, filtros=filtros):
+        if tabla == "asistencia":
+            pagina["alumno"] = pagina["alumno_id"].map(catalogos["alumnos"])
+            pagina["curso"] = pagina["curso_id"].map(catalogos["cursos"])
+        else:
+            pagina["maestro"] = pagina["maestro_id"].map(catalogos["profesores"])
+        yield pagina.reindex(columns=EXPORTABLES[tabla]["columnas"])
+
+
+def _filas(pagina):
+    # Los huecos (NaN) se escriben como celdas vacías
+    pagina = pagina.astype(object).where(pagina.notna(), None)
+    return pagina.itertuples(index=False, name=None)
+
+
+def exportar_xlsx(paginas_por_tabla, ruta):
+    """
+    Escribe una hoja por tabla con el modo de memoria constante de xlsxwriter
+    (cada fila se vuelca a disco en cuanto se completa). Devuelve {tabla: filas}.
+    """
+    libro = xlsxwriter.Workbook(ruta, {"constant_memory": True})
+    formato_cabecera = libro.add_format({"bold": True, "bg_color": "#D3D3D3"})
+    totales = {}
+
+    for tabla, paginas in paginas_por_tabla.items():
+        hoja = libro.add_worksheet(EXPORTABLES[tabla]["titulo"])
+        hoja.write_row(0, 0, EXPORTABLES[tabla]["columnas"], formato_cabecera)
+
+        fila = 1
+        for pagina in paginas:
+            for valores in _filas(pagina):
+                hoja.write_row(fila, 0, valores)
+                fila += 1
+        totales[tabla] = fila - 1
+
+    libro.close()
+    return totales
+
+
+def exportar_csv(tabla, paginas, ruta):
+    """
+    Escribe la tabla en CSV página a página. Devuelve el número de filas escritas.
+    """
+    total = 0
+    # utf-8-sig para que Excel reconozca las tildes al abrirlo
+    with open(ruta, "w", encoding="utf-8-sig", newline="") as f:
+        f.write(",".join(EXPORTABLES[tabla]["columnas"]) + "\n")
+        for pagina in paginas:
+            pagina.to_csv(f, header=False, index=False)
+            total += len(pagina)
+    return total
+
+
+def ruta_temporal(sufijo):
+    descriptor, ruta = tempfile.mkstemp(suffix=sufijo)
+    os.close(descriptor)
+    return ruta
@@ -0,0 +1,138 @@
+# ---------------------------------------------------------
+# IMPORTACIÓN DE ALUMNOS DESDE CSV O EXCEL
+# ---------------------------------------------------------
+# Para dar de alta un colegio entero al empezar el curso (p. ej. con la
+# exportación oficial del listado de alumnos). El fichero se valida de una
+# vez con operaciones de columna: cursos por nombre, dietas y duplicados
+# (contra la base de datos y dentro del propio fichero) por nombre
+# normalizado. Se muestra una vista previa y solo entonces se insertan las
+# filas válidas, por lotes.
+import io
+import re
+
+import pandas as pd
+
+import busqueda
+from busqueda import normalizar
+from datos import db_insert
+from dietas import DIETAS
+
+TAM_LOTE_IMPORTACION = 500
+
+# Nombres de columna habituales en las exportaciones (ya normalizados)
+COLUMNAS_NOMBRE = ["nombre", "alumno", "alumno/a", "apellidos y nombre", "apellidos, nombre", "nombre completo"]
+COLUMNAS_CURSO = ["curso", "grupo", "unidad", "clase"]
+COLUMNAS_DIETAS = ["dietas", "dieta", "alergias", "dietas y alergias"]
+
+# Estado de cada fila en la vista previa
+NUEVO = "Nuevo"
+YA_EXISTE = "Ya existe en la base de datos"
+REPETIDO = "Repetido en el fichero"
+SIN_CURSO = "Curso desconocido"
+SIN_NOMBRE = "Sin nombre"
+
+
+def leer_fichero(contenido, nombre_fichero):
+    """
+    DataFrame (todo texto) con el contenido de un .csv, .xlsx o .xls.
+    En CSV se detecta el separador (, o ;) y la codificación (UTF-8 o Latin-1).
+    """
+    if nombre_fichero.lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(io.BytesIO(contenido), dtype=str).fillna("")
+    for codificacion in ("utf-8-sig", "latin-1"):
+        try:
+            return pd.read_csv(io.BytesIO(contenido), sep=None, engine="python", dtype=str,
+                               encoding=codificacion, keep_default_na=False)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("No se ha podido leer el fichero.")
+
+
+def adivinar_columna(columnas, candidatas):
+    """
+    Primera columna del fichero cuyo nombre normalizado está en candidatas (o None).
+    """
+    for columna in columnas:
+        if normalizar(str(columna)) in candidatas:
+            return columna
+    return None
+
+
+def _clave_curso(serie):
+    # "1º A", "1ºA" y "1º a" son el mismo curso
+    return serie.map(normalizar).str.replace(r"[^a-z0-9]+", "", regex=True)
+
+
+def _clave_dieta(texto):
+    return re.sub(r"[^a-z0-9]+", "", normalizar(texto))
+
+
+# Código o nombre de la dieta (normalizados) -> código
+_DIETA_POR_CLAVE = {
+    **{_clave_dieta(codigo): codigo for codigo in DIETAS},
+    **{_clave_dieta(nombre): codigo for codigo, (nombre, _) in DIETAS.items()},
+}
+
+
+def _dietas(texto):
+    # "Sin gluten; sin lactosa" -> ["sin_gluten", "sin_lactosa"]; las desconocidas se conservan tal cual
+    partes = [p.strip() for p in re.split(r"[,;/|]", texto or "") if p.strip()]
+    return [_DIETA_POR_CLAVE.get(_clave_dieta(p), p) for p in partes]
+
+
+def preparar_importacion(df, col_nombre, col_curso, df_cursos, col_dietas=None):
+    """
+    Vista previa de la importación: una fila por fila del fichero con
+    Alumno, Curso, curso_id, Dietas y Estado (NUEVO o el motivo por el que
+    no se importa). Los duplicados se comprueban contra el índice de alumnos.
+    """
+    nombres = df[col_nombre].fillna("").astype(str).str.strip().str.replace(r"\s+", " ", regex=True)
+    claves = nombres.map(normalizar)
+
+    cursos = df[col_curso].fillna("").astype(str).str.strip()
+    id_por_clave = dict(zip(_clave_curso(df_cursos["nombre"].astype(str)), df_cursos["id"]))
+    curso_ids = _clave_curso(cursos).map(id_por_clave)
+
+    if col_dietas:
+        dietas = df[col_dietas].fillna("").astype(str).map(_dietas)
+    else:
+        dietas = pd.Series([[] for _ in range(len(df))], index=df.index, dtype=object)
+
+    existentes = busqueda.indice("alumnos").normalizados()
+
+    # Se comprueba en orden: el primer motivo que aplica es el que se muestra
+    estado = pd.Series(NUEVO, index=df.index)
+    estado = estado.mask(claves.duplicated(), REPETIDO)
+    estado = estado.mask(claves.isin(existentes), YA_EXISTE)
+    estado = estado.mask(curso_ids.isna(), SIN_CURSO)
+    estado = estado.mask(claves == "", SIN_NOMBRE)
+
+    return pd.DataFrame({
+        "Alumno": nombres,
+        "Curso": cursos,
+        "curso_id": curso_ids.astype("Int64"),
+        "Dietas": dietas,
+        "Estado": estado,
+    })
+
+
+def importar_alumnos(vista_previa, tam_lote=TAM_LOTE_IMPORTACION, progreso=None):
+    """
+    Inserta las filas NUEVO de la vista previa en lotes de tam_lote.
+    progreso(hechas, total) se llama tras cada lote. Devuelve las filas insertadas.
+    """
+    nuevos = vista_previa[vista_previa["Estado"] == NUEVO]
+    registros = [
+        {"nombre": nombre, "curso_id": int(curso_id), "dietas": list(dietas)}
+        for nombre, curso_id, dietas in zip(nuevos["Alumno"], nuevos["curso_id"], nuevos["Dietas"])
+    ]
+
+    insertadas = []
+    for desde in range(0, len(registros), tam_lote):
+        insertadas.extend(db_insert("alumnos", registros[desde:desde + tam_lote]) or [])
+        if progreso:
+            progreso(min(desde + tam_lote, len(registros)), len(registros))
+
+    # Cambio masivo: el índice de búsqueda se reconstruye al volver a usarlo
+    busqueda.invalidar("alumnos")
+    return insertadas
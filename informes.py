@@ -0,0 +1,543 @@
+# ---------------------------------------------------------
+# INFORMES PDF COMPARTIDOS
+# ---------------------------------------------------------
+# Cada función recibe los datos ya cargados y devuelve el PDF en bytes, así
+# pueden usarse desde la app y desde benchmark.py sin Streamlit.
+import calendar
+import io
+from datetime import datetime
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfgen import canvas
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from mesas import ETAPAS
+from dietas import COLOR_DIETA, abreviatura_dieta, conteo_dietas, indice_dietas
+from rendimiento import tramo
+from tipos import tipar
+
+
+def draw_logo_centered(c, page_width, y):
+    logo_width = 300
+    logo_height = 300
+    x = (page_width - logo_width) / 2
+    c.drawImage("logo.png", x, y, width=logo_width, height=logo_height, preserveAspectRatio=True)
+
+
+def add_page_number(pdf_canvas):
+    """
+    Añade número de página en la parte inferior centrada.
+    """
+    page_num = pdf_canvas.getPageNumber()
+    pdf_canvas.setFont("Helvetica", 9)
+    pdf_canvas.drawCentredString(
+        pdf_canvas._pagesize[0] / 2,   # centro horizontal
+        20,                            # altura desde abajo
+        f"Página {page_num}"
+    )
+
+
+def _numero_pagina_apaisado(canvas, doc):
+    canvas.setFont("Helvetica", 9)
+    canvas.drawRightString(landscape(A4)[0] - 30, 20, f"Página {canvas.getPageNumber()}")
+
+
+def tabla_dietas(conteo):
+    """
+    Tabla reportlab con los comensales de cada dieta por curso (dietas.conteo_dietas).
+    """
+    tabla_data = [["Curso"] + list(conteo.columns)]
+    for curso, fila in conteo.iterrows():
+        tabla_data.append([str(curso)] + [int(v) for v in fila])
+    tabla_data.append(["TOTAL"] + [int(v) for v in conteo.sum()])
+
+    tabla = Table(tabla_data, repeatRows=1)
+    tabla.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), COLOR_DIETA),
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ("ALIGN", (0,0), (-1,-1), "CENTER"),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+        ("FONTNAME", (0,-1), (-1,-1), "Helvetica-Bold"),
+        ("BACKGROUND", (0,-1), (-1,-1), colors.whitesmoke),
+    ]))
+    return tabla
+
+
+@tramo("reportlab")
+def pdf_situacion_mesa(plan, df_filas, fecha):
+    """
+    PDF de situación en mesa a partir del plan del día (mesas.planificar_mesas).
+    Una columna por fila de mesas; dentro, cada mesa con sus alumnos coloreados por etapa.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=30, leftMargin=30, topMargin=40, bottomMargin=30)
+    elementos = []
+    estilos_p = getSampleStyleSheet()
+
+    # Título
+    titulo = f"SITUACIÓN EN MESA - {datetime.strptime(fecha, '%Y-%m-%d').strftime('%d/%m/%Y')}"
+    elementos.append(Paragraph(f"<b>{titulo}</b>", estilos_p['Title']))
+    elementos.append(Spacer(1, 15))
+
+    filas = df_filas.sort_values("fila")
+    indice = indice_dietas(plan) if "dietas" in plan.columns else {}
+    columnas = []  # Por cada fila: lista de (texto, color, es_cabecera_de_mesa)
+    for _, f in filas.iterrows():
+        celdas = []
+        del_plan = plan[plan["fila"] == f["fila"]]
+        for mesa, grupo in del_plan.groupby("mesa", sort=True):
+            if "extra" in grupo.columns and grupo["extra"].any():
+                celdas.append((f"Mesa {mesa} EXTRA - sin sitio ({len(grupo)})", colors.orange, True))
+            else:
+                celdas.append((f"Mesa {mesa} ({len(grupo)})", colors.lightgrey, True))
+            for alu in grupo.itertuples(index=False):
+                marcas = [abreviatura_dieta(d) for d, ids in indice.items() if alu.id in ids]
+                if marcas:
+                    celdas.append((f"{alu.nombre} [{', '.join(marcas)}]\n({alu.nombre_curso})", COLOR_DIETA, False))
+                else:
+                    celdas.append((f"{alu.nombre}\n({alu.nombre_curso})", ETAPAS[alu.etapa][1], False))
+        columnas.append(celdas)
+
+    tabla_data = [[str(f["nombre"]) for _, f in filas.iterrows()]]
+    estilos_tabla = [
+        ("BACKGROUND", (0,0), (-1,0), colors.black),
+        ("TEXTCOLOR", (0,0), (-1,0), colors.white),
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ("ALIGN", (0,0), (-1,-1), "CENTER"),
+        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+        ("FONTSIZE", (0,0), (-1,-1), 10),
+    ]
+
+    max_filas = max((len(c) for c in columnas), default=0)
+    for i in range(max_filas):
+        fila_cont = []
+        for col_idx, celdas in enumerate(columnas):
+            if i < len(celdas):
+                texto, color_celda, es_mesa = celdas[i]
+                fila_cont.append(texto)
+                estilos_tabla.append(("BACKGROUND", (col_idx, i+1), (col_idx, i+1), color_celda))
+                if es_mesa:
+                    estilos_tabla.append(("FONTNAME", (col_idx, i+1), (col_idx, i+1), "Helvetica-Bold"))
+            else:
+                fila_cont.append("")
+        tabla_data.append(fila_cont)
+
+    # Subtotales
+    tabla_data.append([f"Total: {int((plan['fila'] == f['fila']).sum())}" for _, f in filas.iterrows()])
+    idx_last = len(tabla_data) - 1
+    estilos_tabla.append(("BACKGROUND", (0, idx_last), (-1, idx_last), colors.lightgrey))
+    estilos_tabla.append(("FONTNAME", (0, idx_last), (-1, idx_last), "Helvetica-Bold"))
+
+    ancho_util = landscape(A4)[0] - 60
+    t_mesas = Table(tabla_data, colWidths=[ancho_util/len(filas)]*len(filas), repeatRows=1)
+    t_mesas.setStyle(TableStyle(estilos_tabla))
+    elementos.append(t_mesas)
+
+    # Total Final
+    elementos.append(Spacer(1, 20))
+    elementos.append(Paragraph(f"<para align='right' size='14'><b>TOTAL COMENSALES: <font color='blue'>{len(plan)}</font></b></para>", estilos_p['Normal']))
+
+    # Dietas por curso
+    if indice:
+        elementos.append(Spacer(1, 20))
+        elementos.append(tabla_dietas(conteo_dietas(plan)))
+
+    doc.build(elementos, onFirstPage=_numero_pagina_apaisado, onLaterPages=_numero_pagina_apaisado)
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------
+# INFORME MENSUAL
+# ---------------------------------------------------------
+@tramo("reportlab")
+def pdf_informe_mensual(df_asis_mes, df_alumnos, df_cursos, mes, año):
+    """
+    Matriz curso x día con los comensales del mes (df_asis_mes: alumno_id, fecha
+    de las asistencias con asiste = True, con los tipos de tipos.py).
+    """
+    dias_mes = calendar.monthrange(año, mes)[1]
+    dias = range(1, dias_mes + 1)
+
+    # Cursos válidos (excluyendo 'ninguno')
+    df_cur_filt = df_cursos[df_cursos["nombre"].str.lower() != "ninguno"].copy()
+    df_cur_filt = df_cur_filt.sort_values("nombre")
+
+    # Comensales por curso actual del alumno y día del mes, de una vez
+    del_mes = df_asis_mes[(df_asis_mes["fecha"].dt.year == año) & (df_asis_mes["fecha"].dt.month == mes)]
+    curso_alumno = del_mes["alumno_id"].map(df_alumnos.set_index("id")["curso_id"])
+    conteo = (
+        pd.crosstab(curso_alumno, del_mes["fecha"].dt.day)
+        .reindex(index=df_cur_filt["id"], columns=dias, fill_value=0)
+        .astype(int)
+    )
+
+    # Matriz (Curso x Días)
+    tabla_data = [["Curso"] + [str(d) for d in dias] + ["Total"]]
+    for nombre, cuentas in zip(df_cur_filt["nombre"], conteo.to_numpy().tolist()):
+        tabla_data.append([nombre] + [n if n > 0 else "" for n in cuentas] + [sum(cuentas)])
+
+    # Fila de Totales Verticales
+    totales_diarios = conteo.sum(axis=0).tolist()
+    fila_totales = ["TOTAL DÍA"] + [str(t) if t > 0 else "0" for t in totales_diarios] + [sum(totales_diarios)]
+    tabla_data.append(fila_totales)
+
+    # PDF (Landscape A4)
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=landscape(A4))
+    page_width, page_height = landscape(A4)
+
+    draw_logo_centered(c, page_width, page_height - 200)
+    c.setFont("Helvetica-Bold", 18)
+    c.drawCentredString(page_width/2, page_height - 110, f"INFORME MENSUAL DE COMENSALES - {mes}/{año}")
+
+    # Ajuste de tamaño de fuente
+    fontSize = 8 if dias_mes > 30 else 9
+
+    # Calculamos anchos: Nombre curso (80), días (20 aprox), total (40)
+    anchos_dias = (page_width - 150) / dias_mes
+    tabla = Table(tabla_data, colWidths=[85] + [anchos_dias]*dias_mes + [45])
+
+    estilo = [
+        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+        ("BACKGROUND", (0,-1), (-1,-1), colors.lightgrey),
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ("ALIGN", (0,0), (-1,-1), "CENTER"),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+        ("FONTNAME", (0,-1), (-1,-1), "Helvetica-Bold"),
+        ("FONTSIZE", (0,0), (-1,-1), fontSize),
+        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+    ]
+
+    # Sombreado alterno para las filas de cursos
+    for i in range(1, len(tabla_data)-1):
+        if i % 2 == 0:
+            estilo.append(("BACKGROUND", (0,i), (-1,i), colors.whitesmoke))
+
+    tabla.setStyle(TableStyle(estilo))
+
+    w, h = tabla.wrap(0, 0)
+    # Centramos la tabla en la página
+    tabla.drawOn(c, (page_width - w)/2, page_height - 160 - h)
+
+    add_page_number(c)
+    c.save()
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------
+# INFORME DE FALTAS
+# ---------------------------------------------------------
+@tramo("reportlab")
+def pdf_informe_faltas(faltas, df_alumnos, df_cursos, mes, año, curso_nombre="Todos los cursos"):
+    """
+    Una página por curso con las faltas de cada alumno en el mes.
+    faltas: registros o DataFrame (alumno_id, fecha) con asiste = False.
+    """
+    dias_mes = calendar.monthrange(año, mes)[1]
+
+    # Set de búsqueda rápida: {(alumno_id, día del mes), ...}
+    df_faltas = tipar("asistencia", pd.DataFrame(faltas, columns=["alumno_id", "fecha"]))
+    if not df_faltas.empty:
+        df_faltas = df_faltas[(df_faltas["fecha"].dt.year == año) & (df_faltas["fecha"].dt.month == mes)]
+    faltas_set = set(zip(df_faltas["alumno_id"].tolist(), df_faltas["fecha"].dt.day.tolist())) if not df_faltas.empty else set()
+
+    # Cursos a procesar
+    if curso_nombre == "Todos los cursos":
+        cursos_a_procesar = df_cursos[df_cursos["nombre"].str.lower() != "ninguno"].to_dict(orient="records")
+    else:
+        cursos_a_procesar = df_cursos[df_cursos["nombre"] == curso_nombre].to_dict(orient="records")
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=landscape(A4))
+    page_width, page_height = landscape(A4)
+
+    for i, curso in enumerate(cursos_a_procesar):
+        # Filtrar alumnos de este curso
+        alumnos_este_curso = df_alumnos[df_alumnos["curso_id"] == curso["id"]].sort_values("nombre")
+
+        if alumnos_este_curso.empty and curso_nombre == "Todos los cursos":
+            continue
+
+        if i > 0: c.showPage()
+
+        draw_logo_centered(c, page_width, page_height - 180)
+
+        c.setFont("Helvetica-Bold", 16)
+        c.drawCentredString(page_width/2, page_height - 110, f"Control Mensual de Faltas - {mes}/{año}")
+        c.setFont("Helvetica-Bold", 13)
+        c.drawString(40, page_height - 140, f"Curso: {curso['nombre']}")
+
+        # Cabecera de tabla
+        tabla_data = [["Alumno"] + [str(d) for d in range(1, dias_mes+1)] + ["Total"]]
+
+        # Estilos base
+        estilos = [
+            ("BACKGROUND", (0,0), (-1,0), colors.black),
+            ("TEXTCOLOR", (0,0), (-1,0), colors.white),
+            ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+            ("ALIGN", (0,0), (-1,-1), "CENTER"),
+            ("ALIGN", (0,0), (0,-1), "LEFT"),
+            ("FONTSIZE", (0,0), (-1,-1), 7),
+            ("LEFTPADDING", (0,0), (-1,-1), 1),
+            ("RIGHTPADDING", (0,0), (-1,-1), 1),
+        ]
+
+        # Rellenar filas de alumnos
+        total_faltas_curso = 0
+        for fila_idx, (_, alu) in enumerate(alumnos_este_curso.iterrows()):
+            id_alu = int(alu["id"])
+            fila = [alu["nombre"]]
+            faltas_alu = 0
+
+            for d in range(1, dias_mes+1):
+                if (id_alu, d) in faltas_set:
+                    fila.append("F")
+                    faltas_alu += 1
+                    # Color rojo para la 'F'
+                    estilos.append(('TEXTCOLOR', (d, fila_idx + 1), (d, fila_idx + 1), colors.red))
+                    estilos.append(('FONTNAME', (d, fila_idx + 1), (d, fila_idx + 1), "Helvetica-Bold"))
+                else:
+                    fila.append("")
+
+            fila.append(faltas_alu)
+            total_faltas_curso += faltas_alu
+            tabla_data.append(fila)
+
+            if (fila_idx + 1) % 2 == 0:
+                estilos.append(("BACKGROUND", (0, fila_idx + 1), (-1, fila_idx + 1), colors.whitesmoke))
+
+        # Fila de total inferior
+        fila_total = ["TOTAL FALTAS DEL CURSO"] + [""] * dias_mes + [total_faltas_curso]
+        tabla_data.append(fila_total)
+
+        estilos.append(("BACKGROUND", (0, -1), (-1, -1), colors.lightgrey))
+        estilos.append(("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"))
+        estilos.append(("SPAN", (0, -1), (dias_mes, -1)))
+        estilos.append(("ALIGN", (0, -1), (0, -1), "RIGHT"))
+
+        # Ajuste de anchos para que no se salga del papel
+        anchos_dias = (page_width - 200) / dias_mes
+        tabla = Table(tabla_data, colWidths=[120] + [anchos_dias]*dias_mes + [25])
+        tabla.setStyle(TableStyle(estilos))
+
+        w, h = tabla.wrap(0, 0)
+        x_centered = (page_width - w) / 2  # Calcula el centro exacto
+        tabla.drawOn(c, x_centered, page_height - 160 - h)
+        add_page_number(c)
+
+    c.save()
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------
+# CUADRANTE DE MAESTROS
+# ---------------------------------------------------------
+@tramo("reportlab")
+def pdf_cuadrante_maestros(df_profes, df_comidas_raw, df_agua_raw, fecha_inicio, fecha_fin):
+    """
+    Comidas y agua de cada maestro por día, solo en los días con actividad.
+    fecha_inicio y fecha_fin son date; las tablas llegan con los tipos de tipos.py.
+    Devuelve None si no hay actividad.
+    """
+    f_ini_str = fecha_inicio.strftime("%Y-%m-%d")
+    f_fin_str = fecha_fin.strftime("%Y-%m-%d")
+
+    if df_comidas_raw is None or df_comidas_raw.empty:
+        df_comidas_raw = pd.DataFrame({"fecha": pd.Series(dtype="datetime64[us]"), "maestro_id": pd.Series(dtype="int32")})
+    if df_agua_raw is None or df_agua_raw.empty:
+        df_agua_raw = pd.DataFrame({
+            "fecha": pd.Series(dtype="datetime64[us]"), "maestro_id": pd.Series(dtype="int32"),
+            "agua_025": pd.Series(dtype="int32"), "agua_060": pd.Series(dtype="int32"),
+        })
+
+    # 1. Filtrar actividad por rango de fechas
+    comidas_rango = df_comidas_raw[(df_comidas_raw["fecha"] >= f_ini_str) & (df_comidas_raw["fecha"] <= f_fin_str)]
+    agua_rango = df_agua_raw[(df_agua_raw["fecha"] >= f_ini_str) & (df_agua_raw["fecha"] <= f_fin_str)]
+
+    # 2. Días activos
+    dias_datos = sorted(set(comidas_rango["fecha"].dt.date) | set(agua_rango["fecha"].dt.date))
+    num_dias = len(dias_datos)
+
+    if num_dias == 0:
+        return None
+
+    # Obtener IDs de maestros con actividad
+    ids_comidas = set(comidas_rango["maestro_id"].unique()) if not comidas_rango.empty else set()
+    ids_agua = set(agua_rango["maestro_id"].unique()) if not agua_rango.empty else set()
+    ids_activos = ids_comidas | ids_agua
+
+    profes_activos = df_profes[df_profes["id"].isin(ids_activos)]
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4),
+                            rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+
+    elementos = []
+    estilos = getSampleStyleSheet()
+
+    # Título
+    titulo = f"Informe de Maestros: {fecha_inicio.strftime('%d/%m/%y')} al {fecha_fin.strftime('%d/%m/%y')}"
+    elementos.append(Paragraph(f"<b>{titulo}</b>", estilos['Title']))
+    elementos.append(Spacer(1, 20))
+
+    # --- TABLA COMIDAS ---
+    elementos.append(Paragraph("<b>Asistencia a Comedor:</b>", estilos['Normal']))
+    elementos.append(Spacer(1, 10))
+
+    header_c = ["Maestro"] + [d.strftime('%d/%m') for d in dias_datos] + ["Total"]
+    data_c = [header_c]
+
+    # Días con comida de cada maestro: {(maestro_id, día), ...}
+    comidas_set = set(zip(comidas_rango["maestro_id"].tolist(), comidas_rango["fecha"].dt.date))
+    for _, p in profes_activos.iterrows():
+        fila = [p["usuario"]]
+        tot = 0
+        for d in dias_datos:
+            check = (p["id"], d) in comidas_set
+            fila.append("X" if check else "")
+            if check: tot += 1
+        fila.append(tot)
+        data_c.append(fila)
+
+    ancho_col = 35 if num_dias < 10 else 25
+    t1 = Table(data_c, colWidths=[110] + [ancho_col]*num_dias + [40], repeatRows=1)
+    t1.setStyle(TableStyle([
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+        ("ALIGN", (1,0), (-1,-1), "CENTER"),
+        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+        ("FONTSIZE", (0,0), (-1,-1), 8),
+    ]))
+    elementos.append(t1)
+    elementos.append(Spacer(1, 30))
+
+    # --- TABLA AGUA ---
+    elementos.append(Paragraph("<b>Consumo de Agua (0.25 | 0.60):</b>", estilos['Normal']))
+    elementos.append(Spacer(1, 10))
+
+    data_a = [["Maestro"] + [d.strftime('%d/%m') for d in dias_datos]]
+    # Botellas de cada maestro y día (el primer registro, como antes): {(maestro_id, día): (a25, a60)}
+    agua_dia = {}
+    for m_id, dia, a25, a60 in zip(
+        agua_rango["maestro_id"].tolist(), agua_rango["fecha"].dt.date,
+        agua_rango["agua_025"].fillna(0).tolist(), agua_rango["agua_060"].fillna(0).tolist()
+    ):
+        agua_dia.setdefault((m_id, dia), (int(a25), int(a60)))
+    for _, p in profes_activos.iterrows():
+        fila = [p["usuario"]]
+        for d in dias_datos:
+            a25, a60 = agua_dia.get((p["id"], d), (0, 0))
+            fila.append(f"{a25}|{a60}" if (a25 > 0 or a60 > 0) else "")
+        data_a.append(fila)
+
+    t2 = Table(data_a, colWidths=[110] + [ancho_col]*num_dias, repeatRows=1)
+    t2.setStyle(TableStyle([
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+        ("ALIGN", (1,0), (-1,-1), "CENTER"),
+        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+        ("FONTSIZE", (0,0), (-1,-1), 7),
+    ]))
+    elementos.append(t2)
+
+    # Nota final
+    elementos.append(Spacer(1, 20))
+    elementos.append(Paragraph("<font size=8><i>* Solo se muestran días con actividad. Formato agua: (Bot. 0.25€ | Bot. 0.60€)</i></font>", estilos['Normal']))
+
+    doc.build(elementos)
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------
+# FACTURAS DE MAESTROS
+# ---------------------------------------------------------
+def dibujar_factura_maestro(canvas_obj, maestro, df_c, df_a, f_ini, f_fin, p_m, p_a25, p_a60):
+    """
+    Dibuja el recibo de un maestro en el canvas. Devuelve False (y no dibuja
+    nada) si no tiene consumos en el periodo.
+    """
+    page_width, page_height = A4
+
+    # Filtrado por rango de fechas
+    mask_c = (df_c["maestro_id"] == maestro["id"]) & (df_c["fecha"] >= f_ini) & (df_c["fecha"] <= f_fin)
+    mask_a = (df_a["maestro_id"] == maestro["id"]) & (df_a["fecha"] >= f_ini) & (df_a["fecha"] <= f_fin)
+
+    # Cálculo de totales basados en el filtrado por rango
+    total_comidas = len(df_c[mask_c])
+    reg_agua = df_a[mask_a]
+
+    total_a25 = reg_agua["agua_025"].sum() if not reg_agua.empty else 0
+    total_a60 = reg_agua["agua_060"].sum() if not reg_agua.empty else 0
+
+    # Si no hay ningún consumo, no generamos la página
+    if total_comidas == 0 and total_a25 == 0 and total_a60 == 0:
+        return False
+
+    # Encabezado y Logo
+    draw_logo_centered(canvas_obj, page_width, page_height - 180)
+    canvas_obj.setFont("Helvetica-Bold", 20)
+    canvas_obj.drawCentredString(page_width/2, 700, "RECIBO DE COMEDOR")
+
+    # Datos del Maestro
+    canvas_obj.setFont("Helvetica-Bold", 12)
+    canvas_obj.drawString(70, 650, f"MAESTRO/A: {maestro['usuario']}")
+    canvas_obj.setFont("Helvetica", 12)
+
+    # Formateamos las fechas para que el recibo se vea más profesional (DD/MM/YYYY)
+    f_ini_dt = datetime.strptime(f_ini, "%Y-%m-%d").strftime("%d/%m/%Y")
+    f_fin_dt = datetime.strptime(f_fin, "%Y-%m-%d").strftime("%d/%m/%Y")
+
+    canvas_obj.drawString(70, 635, f"Periodo: del {f_ini_dt} al {f_fin_dt}")
+    canvas_obj.drawString(70, 620, f"Fecha emisión: {datetime.now().strftime('%d/%m/%Y')}")
+
+    # Tabla de conceptos
+    data = [
+        ["CONCEPTO", "CANTIDAD", "PRECIO", "TOTAL"],
+        ["Menú Escolar", total_comidas, f"{p_m:.2f} €", f"{total_comidas * p_m:.2f} €"],
+        ["Agua 0.25€", int(total_a25), f"{p_a25:.2f} €", f"{total_a25 * p_a25:.2f} €"],
+        ["Agua 0.60€", int(total_a60), f"{p_a60:.2f} €", f"{total_a60 * p_a60:.2f} €"]
+    ]
+
+    t = Table(data, colWidths=[200, 80, 80, 80])
+    t.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+        ("GRID", (0,0), (-1,-1), 1, colors.black),
+        ("ALIGN", (1,0), (-1,-1), "CENTER"),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+        ("BOTTOMPADDING", (0,0), (-1,-1), 10),
+        ("TOPPADDING", (0,0), (-1,-1), 10),
+    ]))
+
+    w, h = t.wrap(page_width, page_height)
+    t.drawOn(canvas_obj, 70, 500)
+
+    # TOTAL FINAL
+    gran_total = (total_comidas * p_m) + (total_a25 * p_a25) + (total_a60 * p_a60)
+    canvas_obj.setFont("Helvetica-Bold", 16)
+    canvas_obj.drawString(350, 470, f"TOTAL A PAGAR: {gran_total:.2f} €")
+
+    return True
+
+
+@tramo("reportlab")
+def pdf_facturas_maestros(maestros, df_c, df_a, f_ini, f_fin, p_m, p_a25, p_a60):
+    """
+    Un recibo por página para cada maestro con consumos en el periodo.
+    Devuelve (pdf, facturas_generadas); pdf es None si no se generó ninguna.
+    """
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    facturas_generadas = 0
+
+    for maestro in maestros:
+        if dibujar_factura_maestro(c, maestro, df_c, df_a, f_ini, f_fin, p_m, p_a25, p_a60):
+            c.showPage()
+            facturas_generadas += 1
+
+    if facturas_generadas == 0:
+        return None, 0
+    c.save()
+    return buffer.getvalue(), facturas_generadas
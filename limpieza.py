@@ -0,0 +1,73 @@
+# ---------------------------------------------------------
+# LIMPIEZA DE FIN DE TEMPORADA
+# ---------------------------------------------------------
+# Vacía la asistencia y el log de promociones (y, si se indica, borra a los
+# alumnos graduados) por tramos de id, para que ninguna petición supere el
+# tiempo máximo de la base de datos. Se ejecuta como tarea en segundo plano
+# (tareas.py) que va anotando el progreso de cada paso.
+# Si se interrumpe, volver a lanzarla continúa con lo que quede: las filas
+# ya borradas no se vuelven a tocar. Al final se cuenta lo que queda en
+# cada tabla para comprobar que está vacía.
+# Las cachés no se vacían: los borrados suben la versión de cada tabla
+# (datos.version_tablas) y las lecturas con caché se renuevan solas.
+import busqueda
+import datos
+from datos import TAM_PAGINA, db_contar, db_delete_por_lotes
+
+NOMBRE_TAREA = "limpieza_temporada"
+
+
+def pasos_limpieza(id_graduados=None):
+    """
+    [(paso, tabla, filtros)] en el orden en que se borran.
+    """
+    pasos = [
+        ("Asistencia", "asistencia", []),
+        ("Log de promociones", "promociones_log", []),
+    ]
+    if id_graduados is not None:
+        pasos.append(("Alumnos graduados", "alumnos", [("curso_id", "eq", int(id_graduados))]))
+    return pasos
+
+
+def limpiar_temporada(tarea, cliente, id_graduados=None, tam_lote=TAM_PAGINA):
+    """
+    Cuerpo de la tarea. cliente debe llevar el colegio fijado
+    (datos.ClienteColegio(..., colegio_id)): el hilo no tiene sesión.
+    Devuelve {paso: {"Borradas": n, "Quedan": n}}; si queda alguna fila, falla.
+    """
+    pasos = pasos_limpieza(id_graduados)
+    totales = {}
+    for paso, tabla, filtros in pasos:
+        totales[paso] = db_contar(tabla, filtros, cliente)
+        tarea.avance(paso, 0, totales[paso])
+
+    try:
+        for paso, tabla, filtros in pasos:
+            tarea.avance(paso, 0, totales[paso], f"Borrando {paso.lower()}...")
+            db_delete_por_lotes(
+                tabla, filtros, tam_lote,
+                progreso=lambda n, paso=paso: tarea.avance(
+                    paso, min(n, totales[paso]), totales[paso], f"Borrando {paso.lower()}: {n}/{totales[paso]}"
+                ),
+                cliente=cliente
+            )
+            tarea.avance(paso, totales[paso], totales[paso])
+    finally:
+        # Aunque falle a medias puede haber borrado alumnos: el índice de
+        # búsqueda del colegio se reconstruye la próxima vez que se use
+        if id_graduados is not None:
+            with datos.en_colegio(cliente.colegio_id):
+                busqueda.invalidar("alumnos")
+
+    # Verificación: se vuelve a contar cada tabla
+    tarea.mensaje = "Comprobando..."
+    resultado = {
+        paso: {"Borradas": totales[paso], "Quedan": db_contar(tabla, filtros, cliente)}
+        for paso, tabla, filtros in pasos
+    }
+    tarea.resultado = resultado
+    pendientes = [f"{paso}: {r['Quedan']}" for paso, r in resultado.items() if r["Quedan"]]
+    if pendientes:
+        raise RuntimeError("Quedan filas sin borrar (" + ", ".join(pendientes) + "). Vuelve a lanzar la limpieza.")
+    return resultado
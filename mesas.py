@@ -0,0 +1,241 @@
+# ---------------------------------------------------------
+# PLANIFICADOR DE MESAS DEL COMEDOR
+# ---------------------------------------------------------
+# Cada curso tiene guardada su etapa y la fila de mesas que le corresponde
+# (columnas cursos.etapa y cursos.fila). Con eso el plan del día se calcula
+# solo: los comensales de hoy se reparten en su fila, por mesas y respetando
+# la capacidad de config_filas. config_mesas guarda solo las excepciones
+# manuales (alumno -> fila y, si se quiere, mesa concreta).
+import pandas as pd
+from reportlab.lib import colors
+
+import datos
+from datos import db_select, cache_versionada
+from dietas import columna_dietas
+from tipos import tipar
+
+# Etapa -> (nombre, color de la celda en los PDF)
+ETAPAS = {
+    1: ("Infantil", colors.Color(0.9, 0.9, 1)),    # Azul muy claro
+    2: ("1º y 2º", colors.Color(0.9, 1, 0.9)),     # Verde muy claro
+    3: ("3º y 4º", colors.Color(1, 1, 0.8)),       # Amarillento
+    4: ("5º y 6º", colors.Color(1, 0.9, 0.9)),     # Rojizo/Salmón
+    5: ("Otros", colors.white),
+}
+
+# Fila que se propone para cada etapa al crear un curso
+FILA_POR_ETAPA = {1: 1, 2: 2, 3: 2, 4: 3, 5: 3}
+
+# Se usa si todavía no existe la tabla config_filas: 3 filas x 10 mesas x 10
+# plazas = 300 comensales, lo que se espera en un día normal
+FILAS_POR_DEFECTO = pd.DataFrame([
+    {"fila": 1, "nombre": "INFANTIL", "mesas": 10, "plazas_por_mesa": 10},
+    {"fila": 2, "nombre": "MEDIANOS", "mesas": 10, "plazas_por_mesa": 10},
+    {"fila": 3, "nombre": "GRANDES", "mesas": 10, "plazas_por_mesa": 10},
+])
+
+
+def etapa_por_nombre(nombre_curso):
+    """
+    Etapa deducida del nombre del curso. Solo para cursos que aún no tienen
+    la columna etapa rellena.
+    """
+    nombre = str(nombre_curso).upper()
+    if any(x in nombre for x in ["INF", "INFANTIL"]):
+        return 1
+    if any(x in nombre for x in ["1º", "2º"]):
+        return 2
+    if any(x in nombre for x in ["3º", "4º"]):
+        return 3
+    if any(x in nombre for x in ["5º", "6º"]):
+        return 4
+    return 5
+
+
+def completar_cursos(df_cursos):
+    """
+    Devuelve los cursos con etapa y fila siempre rellenas (las que falten se deducen).
+    """
+    df = df_cursos.copy()
+    if "etapa" not in df.columns:
+        df["etapa"] = None
+    if "fila" not in df.columns:
+        df["fila"] = None
+    sin_etapa = df["etapa"].isna()
+    if sin_etapa.any():
+        df.loc[sin_etapa, "etapa"] = df.loc[sin_etapa, "nombre"].map(etapa_por_nombre)
+    sin_fila = df["fila"].isna()
+    if sin_fila.any():
+        df.loc[sin_fila, "fila"] = df.loc[sin_fila, "etapa"].map(FILA_POR_ETAPA)
+    df["etapa"] = df["etapa"].astype(int)
+    df["fila"] = df["fila"].astype(int)
+    return df
+
+
+def planificar_mesas(df_comensales, df_cursos, df_filas, df_excepciones=None):
+    """
+    Reparte a los comensales en filas y mesas.
+
+    df_comensales: id, nombre, curso_id de los alumnos que comen.
+    df_cursos: id, nombre, orden, etapa, fila.
+    df_filas: fila, nombre, mesas, plazas_por_mesa.
+    df_excepciones: id_alumno, fila y mesa (opcional) fijados a mano.
+
+    Devuelve (plan, avisos). plan tiene una fila por comensal con
+    fila, mesa, etapa y nombre_curso, ordenado para pintarlo. Nadie se queda
+    fuera: si no hay sitio en ninguna mesa, el comensal va a una mesa extra
+    al final de su fila (columna extra = True) y se avisa.
+    """
+    columnas_plan = ["id", "nombre", "curso_id", "nombre_curso", "orden", "etapa", "fila", "mesa", "extra"]
+    avisos = []
+    if df_comensales.empty:
+        return pd.DataFrame(columns=columnas_plan), avisos
+
+    cursos = completar_cursos(df_cursos).rename(columns={"id": "curso_id", "nombre": "nombre_curso"})
+    if "orden" not in cursos.columns:
+        cursos["orden"] = 0
+    plan = df_comensales[["id", "nombre", "curso_id"]].merge(
+        cursos[["curso_id", "nombre_curso", "orden", "etapa", "fila"]],
+        on="curso_id",
+        how="left"
+    )
+    plan["etapa"] = plan["etapa"].fillna(5).astype(int)
+    plan["fila"] = plan["fila"].fillna(FILA_POR_ETAPA[5]).astype(int)
+    plan["orden"] = plan["orden"].fillna(0)
+    plan["mesa"] = pd.NA
+
+    # Excepciones manuales
+    if df_excepciones is not None and not df_excepciones.empty:
+        excepciones = df_excepciones.drop_duplicates("id_alumno", keep="last").set_index("id_alumno")
+        fijados = plan["id"].isin(excepciones.index)
+        # Una excepción sin fila (la columna admite nulos) deja la fila de su curso
+        filas_fijadas = plan.loc[fijados, "id"].map(excepciones["fila"])
+        plan.loc[fijados, "fila"] = filas_fijadas.fillna(plan.loc[fijados, "fila"]).astype(int)
+        if "mesa" in excepciones.columns:
+            plan.loc[fijados, "mesa"] = plan.loc[fijados, "id"].map(excepciones["mesa"])
+
+    capacidad = {
+        int(f["fila"]): (int(f["mesas"]), int(f["plazas_por_mesa"]))
+        for _, f in df_filas.iterrows()
+    }
+    for fila in plan["fila"].unique():
+        if fila not in capacidad:
+            capacidad[int(fila)] = (1, len(plan))
+            avisos.append(f"La fila {fila} no está configurada: se usa una sola mesa.")
+
+    plan = plan.sort_values(["fila", "etapa", "orden", "nombre_curso", "nombre"]).reset_index(drop=True)
+
+    # El reparto se hace sobre listas: con 300 comensales tarda menos de un milisegundo
+    filas_plan = plan["fila"].tolist()
+    mesas_plan = [None if pd.isna(m) else int(m) for m in plan["mesa"]]
+    nombres = plan["nombre"].tolist()
+
+    # Ocupación de cada mesa con los puestos fijados a mano
+    ocupacion = {fila: [0] * mesas for fila, (mesas, _) in capacidad.items()}
+    for i, mesa in enumerate(mesas_plan):
+        if mesa is None:
+            continue
+        fila = filas_plan[i]
+        mesas, plazas = capacidad[fila]
+        if 1 <= mesa <= mesas and ocupacion[fila][mesa - 1] < plazas:
+            ocupacion[fila][mesa - 1] += 1
+        else:
+            mesas_plan[i] = None
+            avisos.append(f"{nombres[i]}: la mesa {mesa} de la fila {fila} no existe o está llena.")
+
+    # Resto de comensales, en orden, a la primera mesa libre de su fila
+    # (si la fila está llena, a la fila más cercana con sitio)
+    siguiente_libre = {fila: 0 for fila in capacidad}
+
+    def primera_mesa_libre(fila):
+        mesas, plazas = capacidad[fila]
+        while siguiente_libre[fila] < mesas and ocupacion[fila][siguiente_libre[fila]] >= plazas:
+            siguiente_libre[fila] += 1
+        return siguiente_libre[fila] if siguiente_libre[fila] < mesas else None
+
+    # Sin sitio en ninguna mesa: a la mesa extra de su fila (la siguiente a
+    # la última configurada), para que sigan contando en el plan y en los PDF
+    extra = [False] * len(plan)
+    sin_sitio = {}
+    movidos = {}
+    for i, mesa in enumerate(mesas_plan):
+        if mesa is not None:
+            continue
+        fila = filas_plan[i]
+        for f in sorted(capacidad, key=lambda f: (abs(f - fila), f)):
+            libre = primera_mesa_libre(f)
+            if libre is not None:
+                if f != fila:
+                    movidos[(fila, f)] = movidos.get((fila, f), 0) + 1
+                filas_plan[i] = f
+                mesas_plan[i] = libre + 1
+                ocupacion[f][libre] += 1
+                break
+        else:
+            mesas_plan[i] = capacidad[fila][0] + 1
+            extra[i] = True
+            sin_sitio[fila] = sin_sitio.get(fila, 0) + 1
+
+    # Un aviso por cada par de filas, no uno por comensal
+    for (fila, f), n in sorted(movidos.items()):
+        avisos.append(f"Fila {fila} completa: {n} comensales se sientan en la fila {f}.")
+    for fila, n in sorted(sin_sitio.items()):
+        avisos.append(
+            f"No hay sitio para {n} comensales: se sientan en la mesa extra {capacidad[fila][0] + 1} "
+            f"de la fila {fila}. Añade mesas o plazas en 'Filas y capacidad de las mesas'."
+        )
+
+    plan["fila"] = filas_plan
+    plan["mesa"] = mesas_plan
+    plan["extra"] = extra
+    plan["mesa"] = plan["mesa"].astype(int)
+    plan = plan.sort_values(["fila", "mesa", "etapa", "orden", "nombre_curso", "nombre"]).reset_index(drop=True)
+    return plan[columnas_plan], avisos
+
+
+def cargar_filas():
+    return _filas_o_defecto(db_select("config_filas"))
+
+
+def _filas_o_defecto(df_filas):
+    if df_filas.empty:
+        return FILAS_POR_DEFECTO.copy()
+    return df_filas.sort_values("fila")
+
+
+@cache_versionada("asistencia", ttl=600, show_spinner=False)
+def asistencia_del_dia(fecha, colegio_id):
+    """
+    Registros de asistencia de una fecha (alumno_id, curso_id, asiste), para
+    los recuentos del panel de cocina y el control de asistencia. Se renueva
+    al guardar asistencia.
+    """
+    filas = datos.supabase.table("asistencia").select("alumno_id, curso_id, asiste").eq("fecha", fecha).execute().data
+    return tipar("asistencia", pd.DataFrame(filas, columns=["alumno_id", "curso_id", "asiste"]))
+
+
+@cache_versionada("asistencia", "alumnos", "cursos", "config_mesas", "config_filas", ttl=600, show_spinner=False)
+def plan_del_dia(fecha, colegio_id):
+    """
+    (plan, filas, avisos) de una fecha, calculado una vez y compartido por el
+    panel de cocina y los informes. El plan incluye las dietas de cada comensal.
+    colegio_id separa la caché de cada colegio (las consultas ya van limitadas
+    al colegio de la sesión). Se renueva al cambiar cualquiera de sus tablas.
+    """
+    # Las cinco lecturas a la vez; alumnos y cursos, de la caché si no han cambiado
+    leido = datos.db_select_varias({
+        "asistencia": ("asistencia", "alumno_id", [("fecha", "eq", fecha), ("asiste", "eq", True)]),
+        "alumnos": "alumnos",
+        "cursos": "cursos",
+        "excepciones": ("config_mesas", "*", None),
+        "filas": ("config_filas", "*", None),
+    })
+    ids_hoy = set(leido["asistencia"]["alumno_id"].tolist())
+    df_alumnos, df_cursos, df_excepciones = leido["alumnos"], leido["cursos"], leido["excepciones"]
+
+    df_filas = _filas_o_defecto(leido["filas"])
+
+    df_comensales = df_alumnos[df_alumnos["id"].isin(ids_hoy)] if not df_alumnos.empty else df_alumnos
+    plan, avisos = planificar_mesas(df_comensales, df_cursos, df_filas, df_excepciones)
+    plan["dietas"] = plan["id"].map(dict(zip(df_alumnos["id"], columna_dietas(df_alumnos)))) if not plan.empty else []
+    return plan, df_filas, avisos
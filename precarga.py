@@ -0,0 +1,53 @@
+# ---------------------------------------------------------
+# PRECARGA DE LA CACHÉ AL INICIAR SESIÓN
+# ---------------------------------------------------------
+# Cada rol empieza casi siempre por la misma página: el profesor pasa lista
+# de sus cursos, cocina mira el panel y la situación en mesa y el
+# administrador el control de asistencia. Al iniciar sesión se lanza un hilo
+# (tareas.py) que llama a las funciones con caché de esa primera página, así
+# cuando se abre ya encuentra los datos leídos. Si la precarga falla no pasa
+# nada: la página hace las consultas como siempre.
+from datetime import datetime
+
+import datos
+from mesas import asistencia_del_dia, plan_del_dia
+from profesorado import cursos_del_profesor, lista_de_clase
+from tareas import lanzar
+
+
+def _precargar(tarea, rol, profesor_id, colegio_id, fecha):
+    with datos.en_colegio(colegio_id):
+        if rol == "cocina":
+            tarea.avance("asistencia", 0, 2)
+            asistencia_del_dia(fecha, colegio_id)
+            tarea.avance("asistencia", 1, 2)
+            plan_del_dia(fecha, colegio_id)
+            tarea.avance("asistencia", 2, 2)
+        elif rol == "admin":
+            # Control de asistencia lee la asistencia del día y los cursos;
+            # la lista completa, para cuando pase lista
+            tarea.avance("asistencia", 0, 3)
+            asistencia_del_dia(fecha, colegio_id)
+            tarea.avance("asistencia", 1, 3)
+            datos.db_select_cacheado("cursos")
+            tarea.avance("asistencia", 2, 3)
+            lista_de_clase(None, colegio_id)
+            tarea.avance("asistencia", 3, 3)
+        else:
+            tarea.avance("lista", 0, 2)
+            curso_ids = cursos_del_profesor(profesor_id, colegio_id)
+            tarea.avance("lista", 1, 2)
+            lista_de_clase(curso_ids, colegio_id)
+            tarea.avance("lista", 2, 2)
+
+
+def precargar(profesor, colegio_id):
+    """
+    Lanza en segundo plano la precarga de la primera página del rol del
+    profesor (un diccionario de la tabla profesores). Devuelve la Tarea.
+    """
+    fecha = datetime.now().strftime("%Y-%m-%d")
+    return lanzar(
+        f"precarga_{profesor['id']}", colegio_id, _precargar,
+        profesor.get("rol"), profesor["id"], colegio_id, fecha
+    )
@@ -0,0 +1,69 @@
+# ---------------------------------------------------------
+# CURSOS DE CADA PROFESOR
+# ---------------------------------------------------------
+# Relación profesor <-> curso en la tabla profesores_cursos, una fila por
+# pareja (ver sql/005_profesores_cursos.sql). Sustituye a la lista "1,4,7"
+# que se guardaba en profesores.curso_id: ahora se puede filtrar en la base
+# de datos (p. ej. los alumnos de los cursos de un profesor) y no hay que
+# volver a partir el texto en cada ejecución.
+from collections import defaultdict
+
+import datos
+from datos import cache_versionada
+
+
+@cache_versionada("profesores_cursos", ttl=600, show_spinner=False)
+def cursos_del_profesor(profesor_id, colegio_id):
+    """
+    Tupla ordenada con los curso_id del profesor (una consulta filtrada por profesor).
+    colegio_id separa la caché de cada colegio. Se renueva al cambiar profesores_cursos.
+    """
+    filas = datos.supabase.table("profesores_cursos").select("curso_id").eq("profesor_id", profesor_id).execute().data
+    return tuple(sorted(int(f["curso_id"]) for f in filas))
+
+
+@cache_versionada("profesores_cursos", ttl=600, show_spinner=False)
+def asignaciones(colegio_id):
+    """
+    {profesor_id: tupla de curso_id} de todo el colegio, para las tablas de administración.
+    """
+    filas = datos.supabase.table("profesores_cursos").select("profesor_id, curso_id").execute().data
+    por_profesor = defaultdict(list)
+    for f in filas:
+        por_profesor[int(f["profesor_id"])].append(int(f["curso_id"]))
+    return {p_id: tuple(sorted(cursos)) for p_id, cursos in por_profesor.items()}
+
+
+def profesores_del_curso(curso_id, colegio_id):
+    """
+    Conjunto de profesor_id que tienen asignado el curso.
+    """
+    return {p_id for p_id, cursos in asignaciones(colegio_id).items() if int(curso_id) in cursos}
+
+
+@cache_versionada("cursos", "alumnos", ttl=600, show_spinner=False)
+def lista_de_clase(curso_ids, colegio_id):
+    """
+    (cursos, alumnos) para pasar lista: los cursos de curso_ids (None = todos)
+    y sus alumnos (id, nombre, curso_id). Se renueva al cambiar cursos o alumnos.
+    """
+    filtros_cursos = filtros_alumnos = None
+    if curso_ids is not None:
+        filtros_cursos = [("id", "in_", list(curso_ids))]
+        filtros_alumnos = [("curso_id", "in_", list(curso_ids))]
+    leido = datos.db_select_varias({
+        "cursos": ("cursos", "*", filtros_cursos),
+        "alumnos": ("alumnos", "id, nombre, curso_id", filtros_alumnos),
+    })
+    return leido["cursos"], leido["alumnos"]
+
+
+def asignar_cursos(profesor_id, curso_ids):
+    """
+    Sustituye los cursos del profesor por curso_ids (un borrado y una inserción).
+    """
+    profesor_id = int(profesor_id)
+    datos.supabase.table("profesores_cursos").delete().eq("profesor_id", profesor_id).execute()
+    filas = [{"profesor_id": profesor_id, "curso_id": int(c)} for c in sorted(set(curso_ids))]
+    if filas:
+        datos.supabase.table("profesores_cursos").insert(filas).execute()
@@ -0,0 +1,183 @@
+# ---------------------------------------------------------
+# PROMOCIÓN DE CURSO
+# ---------------------------------------------------------
+# Cada curso guarda a qué curso pasan sus alumnos en cursos.curso_siguiente_id
+# (vacío = no promociona; ver sql/006_curso_siguiente.sql). Es un grafo con
+# una sola salida por curso que no puede tener ciclos. La promoción se
+# calcula de una vez con un map sobre curso_id: cada alumno pasa al
+# siguiente de su curso actual, salvo los repetidores que se indiquen.
+from datetime import datetime
+
+import pandas as pd
+
+import datos
+from datos import db_insert, db_upsert, db_select
+from busqueda import normalizar
+
+TAM_LOTE_PROMOCION = 500
+
+# Niveles en orden, para proponer el siguiente curso a partir del nombre
+NIVELES = ["inf3", "inf4", "inf5", "1º", "2º", "3º", "4º", "5º", "6º"]
+
+# Nombre con el que se muestra el curso de los que terminan primaria
+DESTINO_FINAL = {"Ninguno": "1º ESO (Instituto)"}
+
+
+def siguientes(df_cursos):
+    """
+    Serie {curso_id: curso_siguiente_id} (sin los cursos que no promocionan).
+    """
+    if df_cursos.empty or "curso_siguiente_id" not in df_cursos.columns:
+        return pd.Series(dtype="int64")
+    serie = df_cursos.set_index("id")["curso_siguiente_id"].dropna()
+    return serie.astype("int64")
+
+
+def validar_siguientes(df_cursos):
+    """
+    Lista de errores del grafo de promoción (vacía si es válido): cursos de
+    destino que no existen, cursos que pasan a sí mismos y ciclos.
+    """
+    nombres = dict(zip(df_cursos["id"], df_cursos["nombre"])) if not df_cursos.empty else {}
+    grafo = siguientes(df_cursos).to_dict()
+    errores = []
+
+    for origen, destino in grafo.items():
+        if destino not in nombres:
+            errores.append(f"{nombres[origen]}: el curso siguiente ({destino}) no existe.")
+        elif destino == origen:
+            errores.append(f"{nombres[origen]} no puede pasar a sí mismo.")
+
+    # Cada curso tiene como mucho una salida: basta con seguir la cadena
+    # desde cada curso sin visitar hasta llegar al final o a un curso de esta misma cadena
+    terminados = set()
+    for inicio in grafo:
+        cadena, actual = [], inicio
+        while actual in grafo and actual not in terminados and actual not in cadena:
+            cadena.append(actual)
+            actual = grafo[actual]
+        if actual in cadena and grafo.get(actual) != actual:
+            ciclo = cadena[cadena.index(actual):]
+            errores.append("Ciclo en la promoción: " + " → ".join(nombres[c] for c in ciclo + [actual]))
+        terminados.update(cadena)
+    return errores
+
+
+def _nivel_y_letra(df_cursos):
+    # "INF 5 B" -> ("inf5", "b"); "1º A" -> ("1º", "a"). La letra de la columna letra tiene prioridad
+    clave = df_cursos["nombre"].astype(str).map(normalizar).str.replace(" ", "", regex=False)
+    partes = clave.str.extract(r"^(inf[345]|[1-6]º)([a-z]?)$")
+    letra = partes[1].where(partes[1] != "", "a")
+    if "letra" in df_cursos.columns:
+        letra = df_cursos["letra"].fillna("").astype(str).str.strip().str.lower().where(
+            lambda l: l.str.fullmatch(r"[a-z]"), letra
+        )
+    return partes[0], letra
+
+
+def proponer_siguientes(df_cursos):
+    """
+    Serie {curso_id: curso_siguiente_id propuesto} para los cursos sin
+    siguiente: el nivel siguiente con la misma letra (o la A si no existe);
+    6º pasa a "Ninguno". Los cursos que no se reconocen se quedan sin propuesta.
+    """
+    nivel, letra = _nivel_y_letra(df_cursos)
+    posicion = nivel.map({n: i for i, n in enumerate(NIVELES)})
+    cursos = pd.DataFrame({"id": df_cursos["id"], "posicion": posicion, "letra": letra}).dropna()
+
+    por_clave = {(int(p), l): int(c) for c, p, l in zip(cursos["id"], cursos["posicion"], cursos["letra"])}
+    ninguno = df_cursos.loc[df_cursos["nombre"].astype(str).map(normalizar) == "ninguno", "id"]
+
+    propuesta = {}
+    for c_id, p, l in zip(cursos["id"], cursos["posicion"], cursos["letra"]):
+        p = int(p)
+        if p == len(NIVELES) - 1:
+            destino = int(ninguno.iloc[0]) if not ninguno.empty else None
+        else:
+            destino = por_clave.get((p + 1, l), por_clave.get((p + 1, "a")))
+        if destino is not None:
+            propuesta[int(c_id)] = destino
+
+    actuales = siguientes(df_cursos)
+    return pd.Series({c: d for c, d in propuesta.items() if c not in actuales.index}, dtype="int64")
+
+
+def guardar_siguientes(cambios):
+    """
+    Guarda {curso_id: curso_siguiente_id o None}; una actualización por curso cambiado.
+    """
+    for curso_id, destino in cambios.items():
+        datos.supabase.table("cursos").update(
+            {"curso_siguiente_id": None if destino is None or pd.isna(destino) else int(destino)}
+        ).eq("id", int(curso_id)).execute()
+
+
+def alumnos_promocionables(df_alumnos, df_cursos):
+    """
+    Alumnos cuyo curso tiene siguiente curso, con las columnas nombre_curso,
+    curso_destino_id y curso_destino_nombre.
+    """
+    grafo = siguientes(df_cursos)
+    nombres = dict(zip(df_cursos["id"], df_cursos["nombre"]))
+    if df_alumnos.empty or grafo.empty:
+        return pd.DataFrame(columns=["id", "nombre", "curso_id", "nombre_curso", "curso_destino_id", "curso_destino_nombre"])
+
+    datos_promocion = df_alumnos[["id", "nombre", "curso_id"]].copy()
+    datos_promocion["curso_destino_id"] = datos_promocion["curso_id"].map(grafo)
+    datos_promocion = datos_promocion.dropna(subset=["curso_destino_id"])
+    datos_promocion["curso_destino_id"] = datos_promocion["curso_destino_id"].astype("int64")
+    datos_promocion["nombre_curso"] = datos_promocion["curso_id"].map(nombres)
+    datos_promocion["curso_destino_nombre"] = datos_promocion["curso_destino_id"].map(nombres)
+    return datos_promocion
+
+
+def resumen_promocion(promocionables, repetidores=()):
+    """
+    Vista previa por curso: alumnos, cuántos pasan, cuántos repiten y a qué curso.
+    """
+    if promocionables.empty:
+        return pd.DataFrame()
+    repite = promocionables["id"].isin(list(repetidores))
+    resumen = pd.DataFrame({
+        "Curso": promocionables["nombre_curso"],
+        "Pasan a": promocionables["curso_destino_nombre"].replace(DESTINO_FINAL),
+        "Promocionan": ~repite,
+        "Repiten": repite,
+    }).groupby(["Curso", "Pasan a"], sort=False).agg(
+        Alumnos=("Promocionan", "size"), Promocionan=("Promocionan", "sum"), Repiten=("Repiten", "sum")
+    ).reset_index()
+    return resumen
+
+
+def aplicar_promocion(seleccionados, fecha=None, tam_lote=TAM_LOTE_PROMOCION):
+    """
+    Registra en promociones_log y mueve al curso de destino a los alumnos
+    seleccionados, por lotes de tam_lote (una inserción y un upsert por lote).
+    """
+    fecha = fecha or datetime.now().strftime("%Y-%m-%d")
+    filas = list(zip(
+        seleccionados["id"].astype(int), seleccionados["curso_id"].astype(int), seleccionados["curso_destino_id"].astype(int)
+    ))
+    for desde in range(0, len(filas), tam_lote):
+        lote = filas[desde:desde + tam_lote]
+        db_insert("promociones_log", [
+            {"alumno_id": a, "curso_origen": o, "curso_destino": d, "fecha": fecha} for a, o, d in lote
+        ])
+        db_upsert("alumnos", [{"id": a, "curso_id": d} for a, _, d in lote])
+
+
+def deshacer_ultima_promocion(tam_lote=TAM_LOTE_PROMOCION):
+    """
+    Devuelve a su curso de origen a los alumnos de la última promoción y
+    borra esas filas de promociones_log. Devuelve el número de alumnos.
+    """
+    log = db_select("promociones_log")
+    if log.empty:
+        return 0
+    lote = log[log["fecha"] == log["fecha"].max()]
+    filas = list(zip(lote["alumno_id"].astype(int), lote["curso_origen"].astype(int), lote["id"].astype(int)))
+    for desde in range(0, len(filas), tam_lote):
+        parte = filas[desde:desde + tam_lote]
+        db_upsert("alumnos", [{"id": a, "curso_id": o} for a, o, _ in parte])
+        datos.supabase.table("promociones_log").delete().in_("id", [i for _, _, i in parte]).execute()
+    return len(filas)
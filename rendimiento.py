@@ -0,0 +1,313 @@
+# ---------------------------------------------------------
+# MEDICIÓN DE RENDIMIENTO POR EJECUCIÓN
+# ---------------------------------------------------------
+# Cada ejecución del script (cada rerun de Streamlit) acumula:
+#   - llamadas a la base de datos, por tabla, con filas y bytes recibidos
+#   - tiempo en red (execute), en pandas (helpers de datos) y en reportlab (PDF);
+#     con lecturas en paralelo la red es la suma de todas y puede pasar del total
+#   - aciertos y fallos de las funciones con caché
+# Al terminar se guarda en un registro circular común a todas las sesiones
+# (las últimas TAM_REGISTRO ejecuciones) que muestra la página de Rendimiento.
+#
+# Una ejecución que acaba con st.stop() o st.rerun() no llega a terminar():
+# se cierra al empezar la siguiente de la misma sesión, con la hora de su
+# última operación medida como final.
+import functools
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ContextDecorator, contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+TAM_REGISTRO = 500
+
+# Filas que se serializan para estimar los bytes de cada respuesta
+MUESTRA_BYTES = 50
+
+_registro = deque(maxlen=TAM_REGISTRO)
+_cerrojo = threading.Lock()
+
+# Ejecución en curso del hilo (Streamlit ejecuta cada sesión en su hilo)
+_local = threading.local()
+
+
+class _Medicion:
+    def __init__(self, colegio_id, usuario):
+        self.momento = datetime.now()
+        self.inicio = time.perf_counter()
+        self.ultima = self.inicio
+        self.colegio_id = colegio_id
+        self.usuario = usuario
+        self.pagina = "Inicio"
+        self.tablas = Counter()
+        self.filas = 0
+        self.bytes = 0
+        self.tiempos = Counter()
+        self.cache_aciertos = 0
+        self.cache_fallos = 0
+        # Las lecturas en paralelo (datos.db_select_varias) anotan desde varios hilos
+        self.cerrojo = threading.Lock()
+
+    def como_registro(self, fin, terminada):
+        return {
+            "momento": self.momento,
+            "colegio_id": self.colegio_id,
+            "usuario": self.usuario,
+            "pagina": self.pagina,
+            "terminada": terminada,
+            "total_ms": (fin - self.inicio) * 1000,
+            "llamadas": sum(self.tablas.values()),
+            "tablas": dict(self.tablas),
+            "filas": self.filas,
+            "bytes": self.bytes,
+            "red_ms": self.tiempos["red"] * 1000,
+            "pandas_ms": self.tiempos["pandas"] * 1000,
+            "reportlab_ms": self.tiempos["reportlab"] * 1000,
+            "cache_aciertos": self.cache_aciertos,
+            "cache_fallos": self.cache_fallos,
+        }
+
+
+def _actual():
+    return getattr(_local, "medicion", None)
+
+
+def medicion_actual():
+    """
+    Medición de la ejecución en curso de este hilo (o None), para pasarla a en_medicion.
+    """
+    return _actual()
+
+
+@contextmanager
+def en_medicion(medicion):
+    """
+    Anota en medicion lo que se mida en este hilo (hilos lanzados durante una
+    ejecución, p. ej. las lecturas en paralelo de datos.db_select_varias).
+    """
+    anterior = _actual()
+    _local.medicion = medicion
+    try:
+        yield
+    finally:
+        _local.medicion = anterior
+
+
+def _guardar(medicion, fin, terminada):
+    with _cerrojo:
+        _registro.append(medicion.como_registro(fin, terminada))
+
+
+# ---------------------------------------------------------
+# INICIO Y FIN DE CADA EJECUCIÓN (los llama comedor2.py)
+# ---------------------------------------------------------
+def empezar():
+    pendiente = st.session_state.pop("_medicion_pendiente", None)
+    if pendiente is not None:
+        _guardar(pendiente, pendiente.ultima, terminada=False)
+
+    profesor = st.session_state.get("profesor") or {}
+    medicion = _Medicion(st.session_state.get("colegio_id"), profesor.get("usuario"))
+    _local.medicion = medicion
+    st.session_state["_medicion_pendiente"] = medicion
+
+
+def nombrar_pagina(pagina):
+    medicion = _actual()
+    if medicion is not None and pagina:
+        medicion.pagina = pagina
+
+
+def terminar():
+    medicion = _actual()
+    if medicion is None:
+        return
+    _guardar(medicion, time.perf_counter(), terminada=True)
+    st.session_state.pop("_medicion_pendiente", None)
+    _local.medicion = None
+
+
+# ---------------------------------------------------------
+# PUNTOS DE MEDIDA
+# ---------------------------------------------------------
+def sumar(tipo, segundos):
+    """
+    Añade segundos al tiempo de tipo ("red", "pandas" o "reportlab").
+    """
+    medicion = _actual()
+    if medicion is not None:
+        with medicion.cerrojo:
+            medicion.tiempos[tipo] += segundos
+            medicion.ultima = time.perf_counter()
+
+
+class tramo(ContextDecorator):
+    """
+    Mide un bloque o una función:  with tramo("pandas"): ...  o  @tramo("reportlab")
+    """
+
+    def __init__(self, tipo):
+        self.tipo = tipo
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        sumar(self.tipo, time.perf_counter() - self._inicio)
+        return False
+
+
+def _bytes_aproximados(filas):
+    # Se serializa una muestra y se extrapola: medir la respuesta entera costaría más que la consulta
+    if not filas:
+        return 0
+    muestra = filas[:MUESTRA_BYTES]
+    return int(len(json.dumps(muestra, default=str)) * len(filas) / len(muestra))
+
+
+def _registrar_llamada(tabla, data, segundos):
+    medicion = _actual()
+    if medicion is None:
+        return
+    filas = data if isinstance(data, list) else []
+    tam = _bytes_aproximados(filas)
+    with medicion.cerrojo:
+        medicion.tablas[tabla] += 1
+        medicion.filas += len(filas)
+        medicion.bytes += tam
+    sumar("red", segundos)
+
+
+class _ConsultaMedida:
+    """
+    Envuelve el constructor de consultas: los métodos encadenados siguen
+    envueltos y execute() se cronometra.
+    """
+
+    def __init__(self, consulta, tabla):
+        self._consulta = consulta
+        self._tabla = tabla
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._consulta, nombre)
+        if not callable(atributo):
+            return atributo
+        if nombre == "execute":
+            return self._execute
+
+        @functools.wraps(atributo)
+        def encadenado(*args, **kwargs):
+            return _ConsultaMedida(atributo(*args, **kwargs), self._tabla)
+        return encadenado
+
+    def _execute(self):
+        inicio = time.perf_counter()
+        respuesta = self._consulta.execute()
+        _registrar_llamada(self._tabla, respuesta.data, time.perf_counter() - inicio)
+        return respuesta
+
+
+class ClienteMedido:
+    """
+    Cliente de almacenamiento (ver almacen.py) que anota cada llamada en la ejecución en curso.
+    """
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    def table(self, nombre):
+        return _ConsultaMedida(self.cliente.table(nombre), nombre)
+
+    def rpc(self, funcion, parametros=None):
+        return _ConsultaMedida(self.cliente.rpc(funcion, parametros or {}), f"rpc:{funcion}")
+
+
+def cache_medida(**opciones):
+    """
+    Igual que st.cache_data(**opciones), contando aciertos y fallos de caché.
+    El cuerpo de la función solo se ejecuta en los fallos.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def cuerpo(*args, **kwargs):
+            medicion = _actual()
+            if medicion is not None:
+                medicion.cache_fallos += 1
+            return funcion(*args, **kwargs)
+
+        cacheada = st.cache_data(**opciones)(cuerpo)
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            medicion = _actual()
+            fallos = medicion.cache_fallos if medicion is not None else 0
+            resultado = cacheada(*args, **kwargs)
+            if medicion is not None and medicion.cache_fallos == fallos:
+                medicion.cache_aciertos += 1
+            return resultado
+
+        envoltura.clear = cacheada.clear
+        return envoltura
+    return decorador
+
+
+# ---------------------------------------------------------
+# CONSULTA DEL REGISTRO
+# ---------------------------------------------------------
+def ejecuciones(colegio_id=None):
+    """
+    DataFrame con las ejecuciones del registro (solo las de colegio_id si se indica).
+    """
+    with _cerrojo:
+        registros = list(_registro)
+    df = pd.DataFrame(registros)
+    if df.empty or colegio_id is None:
+        return df
+    return df[df["colegio_id"] == colegio_id].reset_index(drop=True)
+
+
+def vaciar(colegio_id=None):
+    with _cerrojo:
+        conservar = [r for r in _registro if colegio_id is not None and r["colegio_id"] != colegio_id]
+        _registro.clear()
+        _registro.extend(conservar)
+
+
+def resumen_por_pagina(df):
+    """
+    Una fila por página con medias por ejecución, p95 del tiempo total y % de aciertos de caché.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    grupos = df.groupby("pagina")
+    resumen = pd.DataFrame({
+        "Ejecuciones": grupos.size(),
+        "Total medio (ms)": grupos["total_ms"].mean(),
+        "Total p95 (ms)": grupos["total_ms"].quantile(0.95),
+        "Llamadas / ejecución": grupos["llamadas"].mean(),
+        "Llamadas totales": grupos["llamadas"].sum(),
+        "Filas / ejecución": grupos["filas"].mean(),
+        "KB / ejecución": grupos["bytes"].mean() / 1024,
+        "Red (ms)": grupos["red_ms"].mean(),
+        "pandas (ms)": grupos["pandas_ms"].mean(),
+        "reportlab (ms)": grupos["reportlab_ms"].mean(),
+    })
+    consultas_cache = grupos["cache_aciertos"].sum() + grupos["cache_fallos"].sum()
+    resumen["Aciertos caché (%)"] = (grupos["cache_aciertos"].sum() / consultas_cache * 100).where(consultas_cache > 0)
+    resumen.index.name = "Página"
+    return resumen.sort_values("Total medio (ms)", ascending=False).round(1)
+
+
+def llamadas_por_tabla(df):
+    """
+    Llamadas a la base de datos por tabla en todo el registro (lo que consume la cuota).
+    """
+    total = Counter()
+    for tablas in df.get("tablas", []):
+        total.update(tablas)
+    return pd.DataFrame(total.most_common(), columns=["Tabla", "Llamadas"])
@@ -0,0 +1,43 @@
+-- ---------------------------------------------------------
+-- Reajuste de secuencias tras restaurar una copia de seguridad
+-- ---------------------------------------------------------
+-- La restauración inserta las filas con su id original; después hay que
+-- mover cada secuencia al máximo id para que los nuevos registros no choquen.
+-- Se llama desde la app con supabase.rpc("reajustar_secuencias", {"tablas": [...]}).
+-- Se ejecuta con los permisos de su dueño (security definer): solo acepta
+-- las tablas de la copia (copias.TABLAS_COPIA), fija el search_path y no la
+-- puede llamar el rol anon. Para restaurar, la app debe conectarse con una
+-- clave que no sea la anónima (authenticated o service_role).
+
+create or replace function reajustar_secuencias(tablas text[])
+returns void
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    -- Mantener igual que copias.TABLAS_COPIA
+    permitidas constant text[] := array[
+        'cursos', 'alumnos', 'profesores', 'profesores_cursos', 'config_filas',
+        'config_mesas', 'asistencia', 'promociones_log', 'maestros_comidas', 'maestros_agua'
+    ];
+    t text;
+    secuencia text;
+begin
+    foreach t in array tablas loop
+        if not (t = any(permitidas)) then
+            raise exception 'reajustar_secuencias: tabla no permitida: %', t;
+        end if;
+        secuencia := pg_get_serial_sequence(format('public.%I', t), 'id');
+        if secuencia is not null then
+            execute format(
+                'select setval(%L, coalesce((select max(id) from public.%I), 0) + 1, false)',
+                secuencia, t
+            );
+        end if;
+    end loop;
+end;
+$$;
+
+revoke execute on function reajustar_secuencias(text[]) from public, anon;
+grant execute on function reajustar_secuencias(text[]) to authenticated, service_role;
@@ -0,0 +1,44 @@
+-- ---------------------------------------------------------
+-- Situación en mesa automática
+-- ---------------------------------------------------------
+-- Cada curso guarda su etapa y la fila de mesas que le corresponde; la
+-- capacidad de cada fila va en config_filas. config_mesas pasa a guardar
+-- solo las excepciones manuales (alumno -> fila y, opcionalmente, mesa).
+
+alter table cursos add column if not exists etapa smallint;
+alter table cursos add column if not exists fila smallint;
+
+-- Mismas reglas que mesas.etapa_por_nombre
+update cursos set etapa = case
+    when upper(nombre) like '%INF%' then 1
+    when nombre like '%1º%' or nombre like '%2º%' then 2
+    when nombre like '%3º%' or nombre like '%4º%' then 3
+    when nombre like '%5º%' or nombre like '%6º%' then 4
+    else 5
+end
+where etapa is null;
+
+-- Mismas reglas que mesas.FILA_POR_ETAPA
+update cursos set fila = case etapa
+    when 1 then 1
+    when 2 then 2
+    when 3 then 2
+    else 3
+end
+where fila is null;
+
+create table if not exists config_filas (
+    id bigint generated by default as identity primary key,
+    fila smallint not null unique,
+    nombre text not null,
+    mesas smallint not null default 4 check (mesas > 0),
+    plazas_por_mesa smallint not null default 10 check (plazas_por_mesa > 0)
+);
+
+insert into config_filas (fila, nombre, mesas, plazas_por_mesa) values
+    (1, 'INFANTIL', 4, 10),
+    (2, 'MEDIANOS', 4, 10),
+    (3, 'GRANDES', 4, 10)
+on conflict (fila) do nothing;
+
+alter table config_mesas add column if not exists mesa smallint;
@@ -0,0 +1,15 @@
+-- ---------------------------------------------------------
+-- Dietas y alergias de los alumnos
+-- ---------------------------------------------------------
+-- Sustituye a la lista de nombres que había escrita en el código.
+-- Los códigos son los de dietas.DIETAS (sin_gluten, sin_lactosa, halal...).
+
+alter table alumnos add column if not exists dietas text[] not null default '{}';
+
+-- Búsqueda de alumnos por dieta (dietas @> '{sin_gluten}')
+create index if not exists alumnos_dietas_idx on alumnos using gin (dietas);
+
+-- Alumnas que estaban marcadas a mano como sin gluten
+update alumnos set dietas = array_append(dietas, 'sin_gluten')
+where nombre in ('Ceballos Ruíz, Lucía', 'García Ruíz, Lucía')
+  and not ('sin_gluten' = any(dietas));
@@ -0,0 +1,40 @@
+-- ---------------------------------------------------------
+-- Varios colegios en un mismo despliegue
+-- ---------------------------------------------------------
+-- Cada tabla lleva colegio_id. La app (datos.ClienteColegio) añade el
+-- filtro colegio_id a todas las lecturas, modificaciones y borrados, y el
+-- valor a todas las inserciones. Los datos que ya existían pasan al colegio 1.
+-- Para dar de alta otro colegio basta con insertarlo en colegios y crear
+-- su usuario administrador en profesores.
+
+create table if not exists colegios (
+    id bigint generated by default as identity primary key,
+    nombre text not null unique
+);
+
+insert into colegios (id, nombre) values (1, 'Colegio principal')
+on conflict (id) do nothing;
+select setval(pg_get_serial_sequence('colegios', 'id'), greatest((select max(id) from colegios), 1));
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array[
+        'cursos', 'alumnos', 'profesores', 'config_filas', 'config_mesas',
+        'asistencia', 'promociones_log', 'maestros_comidas', 'maestros_agua'
+    ] loop
+        execute format('alter table %I add column if not exists colegio_id bigint references colegios(id)', t);
+        execute format('update %I set colegio_id = 1 where colegio_id is null', t);
+        execute format('alter table %I alter column colegio_id set not null', t);
+        execute format('create index if not exists %I on %I (colegio_id)', t || '_colegio_idx', t);
+    end loop;
+end;
+$$;
+
+-- Las consultas diarias filtran por colegio y fecha
+create index if not exists asistencia_colegio_fecha_idx on asistencia (colegio_id, fecha);
+
+-- Cada colegio tiene sus propias filas de mesas
+alter table config_filas drop constraint if exists config_filas_fila_key;
+alter table config_filas add constraint config_filas_colegio_fila_key unique (colegio_id, fila);
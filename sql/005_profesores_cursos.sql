@@ -0,0 +1,30 @@
+-- ---------------------------------------------------------
+-- Cursos de cada profesor en una tabla propia
+-- ---------------------------------------------------------
+-- Sustituye a profesores.curso_id, donde los cursos se guardaban como
+-- texto ("1,4,7"). Una fila por profesor y curso (ver profesorado.py).
+-- La columna antigua se conserva por si hay que volver atrás; la app ya no
+-- la lee ni la escribe.
+
+create table if not exists profesores_cursos (
+    id bigint generated by default as identity primary key,
+    profesor_id bigint not null references profesores(id) on delete cascade,
+    curso_id bigint not null references cursos(id) on delete cascade,
+    colegio_id bigint not null references colegios(id),
+    unique (profesor_id, curso_id)
+);
+
+-- Cursos de un profesor (Pasar lista) y profesores de un curso (exportación)
+create index if not exists profesores_cursos_colegio_profesor_idx on profesores_cursos (colegio_id, profesor_id);
+create index if not exists profesores_cursos_curso_idx on profesores_cursos (curso_id);
+
+-- Migración única desde el texto "1,4,7". Se puede repetir sin duplicar
+-- filas (p. ej. después de restaurar una copia anterior a esta migración).
+insert into profesores_cursos (profesor_id, curso_id, colegio_id)
+select p.id, c.id, p.colegio_id
+from profesores p
+cross join lateral unnest(string_to_array(p.curso_id, ',')) as s(valor)
+join cursos c on c.id::text = trim(s.valor) and c.colegio_id = p.colegio_id
+on conflict (profesor_id, curso_id) do nothing;
+
+comment on column profesores.curso_id is 'Obsoleta: los cursos de cada profesor están en profesores_cursos';
@@ -0,0 +1,40 @@
+-- ---------------------------------------------------------
+-- Promoción de curso guardada en los datos
+-- ---------------------------------------------------------
+-- Cada curso indica a qué curso pasan sus alumnos al final del año
+-- (vacío = no promociona). Sustituye al diccionario PROMOCIONES que había
+-- escrito en el código. La app comprueba que no haya ciclos antes de
+-- guardar y antes de promocionar (promocion.validar_siguientes).
+
+alter table cursos add column if not exists curso_siguiente_id bigint
+    references cursos(id) on delete set null;
+
+alter table cursos drop constraint if exists cursos_siguiente_distinto;
+alter table cursos add constraint cursos_siguiente_distinto check (curso_siguiente_id is null or curso_siguiente_id <> id);
+
+-- Mismo grupo del nivel siguiente (1º A -> 2º A, INF 5 B -> 1º B), igual
+-- que promocion.proponer_siguientes; los que no tienen grupo pasan a la A.
+-- 6º pasa a "Ninguno". Solo se rellenan los cursos que aún no tienen siguiente.
+with niveles (nivel, posicion) as (
+    values ('INF3', 1), ('INF4', 2), ('INF5', 3), ('1º', 4), ('2º', 5), ('3º', 6), ('4º', 7), ('5º', 8), ('6º', 9)
+),
+claves as (
+    select c.id, c.colegio_id, n.posicion,
+           coalesce(nullif(upper(trim(c.letra)), ''), nullif(substring(upper(replace(c.nombre, ' ', '')) from '^(?:INF[345]|[1-6]º)([A-Z])$'), ''), 'A') as letra
+    from cursos c
+    join niveles n on upper(replace(c.nombre, ' ', '')) ~ ('^' || n.nivel || '[A-Z]?$')
+),
+propuesta as (
+    select o.id,
+           coalesce(
+               (select d.id from claves d where d.colegio_id = o.colegio_id and d.posicion = o.posicion + 1 and d.letra = o.letra limit 1),
+               (select d.id from claves d where d.colegio_id = o.colegio_id and d.posicion = o.posicion + 1 and d.letra = 'A' limit 1),
+               case when o.posicion = 9 then
+                   (select n.id from cursos n where n.colegio_id = o.colegio_id and lower(n.nombre) = 'ninguno' limit 1)
+               end
+           ) as siguiente
+    from claves o
+)
+update cursos c set curso_siguiente_id = p.siguiente
+from propuesta p
+where c.id = p.id and c.curso_siguiente_id is null and p.siguiente is not null;
@@ -0,0 +1,67 @@
+-- ---------------------------------------------------------
+-- Versión de las tablas que cambian poco
+-- ---------------------------------------------------------
+-- Una fila por colegio y tabla con un contador que sube con cada
+-- inserción, modificación o borrado, hecho desde la app o desde fuera
+-- (panel de Supabase, SQL a mano). La app guarda en caché alumnos, cursos,
+-- profesores... y antes de usarlos solo consulta esta tabla (una petición
+-- pequeña): si la versión no ha cambiado, no vuelve a leerlos
+-- (ver datos.version_tablas).
+-- Los disparadores son por sentencia: una importación de 500 alumnos sube
+-- la versión una vez, no 500.
+
+create table if not exists versiones_tablas (
+    colegio_id bigint not null references colegios(id) on delete cascade,
+    tabla text not null,
+    version bigint not null default 0,
+    actualizado timestamptz not null default now(),
+    primary key (colegio_id, tabla)
+);
+
+-- security definer: los disparadores escriben en versiones_tablas aunque
+-- quien cambia la tabla no tenga permiso sobre ella. Con el search_path fijo
+-- nadie puede colar otra versiones_tablas en un esquema propio.
+create or replace function subir_version_tabla()
+returns trigger
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+begin
+    insert into versiones_tablas (colegio_id, tabla, version)
+    select distinct colegio_id, tg_table_name, 1 from filas_cambiadas where colegio_id is not null
+    on conflict (colegio_id, tabla) do update
+        set version = versiones_tablas.version + 1, actualizado = now();
+    return null;
+end;
+$$;
+
+-- Solo la usan los disparadores: nadie la llama directamente
+revoke execute on function subir_version_tabla() from public, anon;
+
+-- Las tablas de transición solo se admiten en disparadores de un único
+-- evento: tres disparadores por tabla (las filas nuevas en inserciones y
+-- modificaciones, las antiguas en borrados)
+do $$
+declare
+    t text;
+begin
+    foreach t in array array['alumnos', 'cursos', 'profesores', 'profesores_cursos', 'config_filas', 'config_mesas'] loop
+        execute format('drop trigger if exists %I on %I', t || '_version_insert', t);
+        execute format('drop trigger if exists %I on %I', t || '_version_update', t);
+        execute format('drop trigger if exists %I on %I', t || '_version_delete', t);
+        execute format(
+            'create trigger %I after insert on %I referencing new table as filas_cambiadas '
+            'for each statement execute function subir_version_tabla()', t || '_version_insert', t
+        );
+        execute format(
+            'create trigger %I after update on %I referencing new table as filas_cambiadas '
+            'for each statement execute function subir_version_tabla()', t || '_version_update', t
+        );
+        execute format(
+            'create trigger %I after delete on %I referencing old table as filas_cambiadas '
+            'for each statement execute function subir_version_tabla()', t || '_version_delete', t
+        );
+    end loop;
+end;
+$$;
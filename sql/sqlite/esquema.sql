@@ -0,0 +1,224 @@
+-- ---------------------------------------------------------
+-- Esquema para el almacenamiento local en SQLite
+-- ---------------------------------------------------------
+-- Equivale al esquema de Supabase con las migraciones 001-007 aplicadas.
+-- cliente_sqlite.py lo ejecuta al abrir la base de datos (es idempotente);
+-- las columnas añadidas después a tablas ya creadas están en
+-- cliente_sqlite.COLUMNAS_NUEVAS.
+-- Tipos: BOOLEAN se guarda como 0/1 y JSON como texto; el cliente los
+-- devuelve como bool y como lista igual que Supabase.
+
+create table if not exists colegios (
+    id integer primary key autoincrement,
+    nombre text not null unique
+);
+
+insert or ignore into colegios (id, nombre) values (1, 'Colegio principal');
+
+create table if not exists cursos (
+    id integer primary key autoincrement,
+    nombre text,
+    orden integer,
+    letra text,
+    etapa integer,
+    fila integer,
+    curso_siguiente_id integer references cursos(id) on delete set null,
+    colegio_id integer not null references colegios(id),
+    check (curso_siguiente_id is null or curso_siguiente_id != id)
+);
+
+create table if not exists alumnos (
+    id integer primary key autoincrement,
+    nombre text,
+    curso_id integer,
+    dietas json not null default '[]',
+    colegio_id integer not null references colegios(id)
+);
+
+create table if not exists profesores (
+    id integer primary key autoincrement,
+    usuario text,
+    password text,
+    rol text default 'profesor',
+    curso_id text,  -- obsoleta: ver profesores_cursos
+    colegio_id integer not null references colegios(id)
+);
+
+create table if not exists profesores_cursos (
+    id integer primary key autoincrement,
+    profesor_id integer not null references profesores(id) on delete cascade,
+    curso_id integer not null references cursos(id) on delete cascade,
+    colegio_id integer not null references colegios(id),
+    unique (profesor_id, curso_id)
+);
+
+create table if not exists config_filas (
+    id integer primary key autoincrement,
+    fila integer not null,
+    nombre text not null,
+    mesas integer not null default 4 check (mesas > 0),
+    plazas_por_mesa integer not null default 10 check (plazas_por_mesa > 0),
+    colegio_id integer not null references colegios(id),
+    unique (colegio_id, fila)
+);
+
+create table if not exists config_mesas (
+    id integer primary key autoincrement,
+    id_alumno integer,
+    fila integer,
+    mesa integer,
+    colegio_id integer not null references colegios(id)
+);
+
+create table if not exists asistencia (
+    id integer primary key autoincrement,
+    alumno_id integer,
+    curso_id integer,
+    fecha date,
+    asiste boolean,
+    motivo text,
+    curso_academico text,
+    colegio_id integer not null references colegios(id),
+    unique (alumno_id, fecha)
+);
+
+create table if not exists promociones_log (
+    id integer primary key autoincrement,
+    alumno_id integer,
+    curso_origen integer,
+    curso_destino integer,
+    fecha date,
+    colegio_id integer not null references colegios(id)
+);
+
+create table if not exists maestros_comidas (
+    id integer primary key autoincrement,
+    maestro_id integer,
+    fecha date,
+    come boolean default 1,
+    colegio_id integer not null references colegios(id)
+);
+
+create table if not exists maestros_agua (
+    id integer primary key autoincrement,
+    maestro_id integer,
+    fecha date,
+    agua_025 integer default 0,
+    agua_060 integer default 0,
+    colegio_id integer not null references colegios(id)
+);
+
+create index if not exists cursos_colegio_idx on cursos (colegio_id);
+create index if not exists alumnos_colegio_idx on alumnos (colegio_id);
+create index if not exists profesores_colegio_idx on profesores (colegio_id);
+create index if not exists config_mesas_colegio_idx on config_mesas (colegio_id);
+create index if not exists asistencia_colegio_fecha_idx on asistencia (colegio_id, fecha);
+create index if not exists promociones_log_colegio_idx on promociones_log (colegio_id);
+create index if not exists maestros_comidas_colegio_fecha_idx on maestros_comidas (colegio_id, fecha);
+create index if not exists maestros_agua_colegio_fecha_idx on maestros_agua (colegio_id, fecha);
+create index if not exists profesores_cursos_colegio_profesor_idx on profesores_cursos (colegio_id, profesor_id);
+create index if not exists profesores_cursos_curso_idx on profesores_cursos (curso_id);
+
+-- Versión de las tablas que cambian poco (ver sql/007_versiones_tablas.sql).
+-- SQLite solo tiene disparadores por fila: una importación sube la versión
+-- una vez por alumno, pero lo único que importa es que cambie.
+create table if not exists versiones_tablas (
+    colegio_id integer not null references colegios(id) on delete cascade,
+    tabla text not null,
+    version integer not null default 0,
+    actualizado text not null default current_timestamp,
+    primary key (colegio_id, tabla)
+);
+
+create trigger if not exists alumnos_version_insert after insert on alumnos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'alumnos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists alumnos_version_update after update on alumnos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'alumnos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists alumnos_version_delete after delete on alumnos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (old.colegio_id, 'alumnos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+
+create trigger if not exists cursos_version_insert after insert on cursos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'cursos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists cursos_version_update after update on cursos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'cursos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists cursos_version_delete after delete on cursos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (old.colegio_id, 'cursos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+
+create trigger if not exists profesores_version_insert after insert on profesores begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'profesores', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists profesores_version_update after update on profesores begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'profesores', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists profesores_version_delete after delete on profesores begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (old.colegio_id, 'profesores', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+
+create trigger if not exists profesores_cursos_version_insert after insert on profesores_cursos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'profesores_cursos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists profesores_cursos_version_update after update on profesores_cursos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'profesores_cursos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists profesores_cursos_version_delete after delete on profesores_cursos begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (old.colegio_id, 'profesores_cursos', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+
+create trigger if not exists config_filas_version_insert after insert on config_filas begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'config_filas', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists config_filas_version_update after update on config_filas begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'config_filas', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists config_filas_version_delete after delete on config_filas begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (old.colegio_id, 'config_filas', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+
+create trigger if not exists config_mesas_version_insert after insert on config_mesas begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'config_mesas', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists config_mesas_version_update after update on config_mesas begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (new.colegio_id, 'config_mesas', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+create trigger if not exists config_mesas_version_delete after delete on config_mesas begin
+    insert into versiones_tablas (colegio_id, tabla, version) values (old.colegio_id, 'config_mesas', 1)
+    on conflict (colegio_id, tabla) do update set version = version + 1, actualizado = current_timestamp;
+end;
+-- Migración de profesores.curso_id ("1,4,7") a profesores_cursos. Después se
+-- vacía la columna, así al volver a abrir la base de datos no se repite (y
+-- una copia antigua restaurada se migra la próxima vez que se abra).
+with recursive partes (profesor_id, colegio_id, valor, resto) as (
+    select id, colegio_id, '', curso_id || ',' from profesores where curso_id is not null and curso_id != ''
+    union all
+    select profesor_id, colegio_id, trim(substr(resto, 1, instr(resto, ',') - 1)), substr(resto, instr(resto, ',') + 1)
+    from partes where resto != ''
+)
+insert or ignore into profesores_cursos (profesor_id, curso_id, colegio_id)
+select p.profesor_id, c.id, p.colegio_id
+from partes p
+join cursos c on cast(c.id as text) = p.valor and c.colegio_id = p.colegio_id;
+
+update profesores set curso_id = null where curso_id is not null;
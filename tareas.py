@@ -0,0 +1,84 @@
+# ---------------------------------------------------------
+# TAREAS EN SEGUNDO PLANO
+# ---------------------------------------------------------
+# Operaciones largas (p. ej. la limpieza de fin de temporada) que se
+# ejecutan en un hilo para que la página no se quede esperando a una sola
+# petición. El estado de cada tarea se guarda en memoria del proceso, común
+# a todas las sesiones: la página lo consulta cada segundo para mostrar el
+# progreso, aunque se recargue o la abra otro administrador del colegio.
+# Solo puede haber una tarea de cada tipo en curso por colegio.
+import threading
+from datetime import datetime
+
+EN_CURSO = "en curso"
+TERMINADA = "terminada"
+FALLIDA = "fallida"
+
+_tareas = {}
+_cerrojo = threading.Lock()
+
+
+class Tarea:
+    """
+    Estado de una tarea: pasos {nombre: (hechas, total)}, mensaje, resultado y error.
+    """
+
+    def __init__(self, nombre, colegio_id):
+        self.nombre = nombre
+        self.colegio_id = colegio_id
+        self.estado = EN_CURSO
+        self.inicio = datetime.now()
+        self.fin = None
+        self.pasos = {}
+        self.mensaje = ""
+        self.resultado = None
+        self.error = None
+
+    def avance(self, paso, hechas, total, mensaje=""):
+        self.pasos[paso] = (hechas, total)
+        if mensaje:
+            self.mensaje = mensaje
+
+    @property
+    def fraccion(self):
+        hechas = sum(h for h, _ in self.pasos.values())
+        total = sum(t for _, t in self.pasos.values())
+        return min(hechas / total, 1.0) if total else 0.0
+
+    @property
+    def en_curso(self):
+        return self.estado == EN_CURSO
+
+
+def tarea(nombre, colegio_id):
+    """
+    Última tarea de ese tipo del colegio (en curso o ya acabada), o None.
+    """
+    return _tareas.get((nombre, colegio_id))
+
+
+def lanzar(nombre, colegio_id, funcion, *args, **kwargs):
+    """
+    Ejecuta funcion(tarea, *args, **kwargs) en un hilo y devuelve la Tarea.
+    Si ya hay una del mismo tipo en curso en el colegio, devuelve esa.
+    """
+    with _cerrojo:
+        actual = _tareas.get((nombre, colegio_id))
+        if actual is not None and actual.en_curso:
+            return actual
+        nueva = Tarea(nombre, colegio_id)
+        _tareas[(nombre, colegio_id)] = nueva
+
+    def ejecutar():
+        try:
+            nueva.resultado = funcion(nueva, *args, **kwargs)
+            estado = TERMINADA
+        except Exception as e:
+            nueva.error = str(e)
+            estado = FALLIDA
+        # El estado se cambia lo último: quien lo vea acabado ya tiene resultado y hora de fin
+        nueva.fin = datetime.now()
+        nueva.estado = estado
+
+    threading.Thread(target=ejecutar, name=f"tarea-{nombre}-{colegio_id}", daemon=True).start()
+    return nueva
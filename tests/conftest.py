@@ -0,0 +1,183 @@
+# ---------------------------------------------------------
+# CLIENTE FALSO PARA LAS PRUEBAS
+# ---------------------------------------------------------
+# Misma cadena fluida que el cliente de Supabase (table().select().eq()...
+# .execute()) sobre listas de diccionarios en memoria, para probar los
+# módulos que leen y escriben con datos.supabase sin red.
+import pytest
+
+import datos
+
+
+class _Respuesta:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class _Consulta:
+    def __init__(self, cliente, tabla, accion, valores=None, columnas="*", count=None,
+                 on_conflict="id", ignore_duplicates=False):
+        self._cliente = cliente
+        self._tabla = tabla
+        self._accion = accion
+        self._valores = valores
+        self._columnas = columnas
+        self._count = count
+        self._on_conflict = on_conflict
+        self._ignore_duplicates = ignore_duplicates
+        self._filtros = []
+        self._orden = []
+        self._desde = 0
+        self._limite = None
+
+    def _filtro(self, columna, prueba):
+        self._filtros.append((columna, prueba))
+        return self
+
+    def eq(self, columna, valor):
+        return self._filtro(columna, lambda v: v == valor)
+
+    def neq(self, columna, valor):
+        return self._filtro(columna, lambda v: v != valor)
+
+    def gt(self, columna, valor):
+        return self._filtro(columna, lambda v: v is not None and v > valor)
+
+    def gte(self, columna, valor):
+        return self._filtro(columna, lambda v: v is not None and v >= valor)
+
+    def lt(self, columna, valor):
+        return self._filtro(columna, lambda v: v is not None and v < valor)
+
+    def lte(self, columna, valor):
+        return self._filtro(columna, lambda v: v is not None and v <= valor)
+
+    def in_(self, columna, valores):
+        valores = list(valores)
+        return self._filtro(columna, lambda v: v in valores)
+
+    def match(self, condiciones):
+        for columna, valor in condiciones.items():
+            self.eq(columna, valor)
+        return self
+
+    def order(self, columna, desc=False):
+        self._orden.append((columna, desc))
+        return self
+
+    def limit(self, n):
+        self._limite = n
+        return self
+
+    def range(self, desde, hasta):
+        self._desde, self._limite = desde, hasta - desde + 1
+        return self
+
+    def _seleccionadas(self):
+        filas = self._cliente.tablas.setdefault(self._tabla, [])
+        return [f for f in filas if all(prueba(f.get(c)) for c, prueba in self._filtros)]
+
+    def execute(self):
+        self._cliente.peticiones.append((self._tabla, self._accion))
+        filas = self._cliente.tablas.setdefault(self._tabla, [])
+        if self._accion == "select":
+            elegidas = self._seleccionadas()
+            for columna, desc in reversed(self._orden):
+                elegidas = sorted(elegidas, key=lambda f: f.get(columna), reverse=desc)
+            total = len(elegidas)
+            fin = None if self._limite is None else self._desde + self._limite
+            elegidas = elegidas[self._desde:fin]
+            if self._columnas.strip() != "*":
+                columnas = [c.strip() for c in self._columnas.split(",")]
+                elegidas = [{c: f.get(c) for c in columnas} for f in elegidas]
+            return _Respuesta([dict(f) for f in elegidas], total if self._count else None)
+        if self._accion in ("insert", "upsert"):
+            nuevas = [dict(f) for f in ([self._valores] if isinstance(self._valores, dict) else self._valores)]
+            claves = [c.strip() for c in self._on_conflict.split(",")]
+            por_clave = {tuple(str(f.get(c)) for c in claves): f for f in filas}
+            escritas = []
+            for fila in nuevas:
+                if "id" not in fila or fila["id"] is None:
+                    fila["id"] = max((int(f["id"]) for f in filas), default=0) + 1
+                clave = tuple(str(fila.get(c)) for c in claves)
+                existente = por_clave.get(clave)
+                if existente is not None and self._accion == "upsert":
+                    if not self._ignore_duplicates:
+                        existente.update(fila)
+                        escritas.append(dict(existente))
+                    continue
+                filas.append(fila)
+                por_clave[clave] = fila
+                escritas.append(dict(fila))
+            return _Respuesta(escritas)
+        if self._accion == "update":
+            elegidas = self._seleccionadas()
+            for fila in elegidas:
+                fila.update(self._valores)
+            return _Respuesta([dict(f) for f in elegidas])
+        if self._accion == "delete":
+            elegidas = self._seleccionadas()
+            ids = {id(f) for f in elegidas}
+            filas[:] = [f for f in filas if id(f) not in ids]
+            return _Respuesta([dict(f) for f in elegidas])
+        raise ValueError(self._accion)
+
+
+class _Tabla:
+    def __init__(self, cliente, nombre):
+        self._cliente = cliente
+        self._nombre = nombre
+
+    def select(self, columnas="*", count=None):
+        return _Consulta(self._cliente, self._nombre, "select", columnas=columnas, count=count)
+
+    def insert(self, filas, **kwargs):
+        return _Consulta(self._cliente, self._nombre, "insert", valores=filas)
+
+    def upsert(self, filas, on_conflict="id", ignore_duplicates=False, **kwargs):
+        return _Consulta(self._cliente, self._nombre, "upsert", valores=filas,
+                         on_conflict=on_conflict, ignore_duplicates=ignore_duplicates)
+
+    def update(self, valores, **kwargs):
+        return _Consulta(self._cliente, self._nombre, "update", valores=valores)
+
+    def delete(self, **kwargs):
+        return _Consulta(self._cliente, self._nombre, "delete")
+
+
+class _Rpc:
+    def __init__(self, cliente, funcion, parametros):
+        self._cliente = cliente
+        self._llamada = (funcion, parametros)
+
+    def execute(self):
+        if self._llamada[0] in self._cliente.rpc_denegadas:
+            raise PermissionError(f"permission denied for function {self._llamada[0]}")
+        self._cliente.rpc_llamadas.append(self._llamada)
+        return _Respuesta(None)
+
+
+class ClienteFalso:
+    def __init__(self, tablas=None):
+        self.tablas = {nombre: [dict(f) for f in filas] for nombre, filas in (tablas or {}).items()}
+        self.peticiones = []
+        self.rpc_llamadas = []
+        # Funciones que el rol de la clave no puede ejecutar (p. ej. con la clave anónima)
+        self.rpc_denegadas = set()
+
+    def table(self, nombre):
+        return _Tabla(self, nombre)
+
+    def rpc(self, funcion, parametros=None):
+        return _Rpc(self, funcion, parametros or {})
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    """
+    ClienteFalso vacío configurado como datos.supabase.
+    """
+    falso = ClienteFalso()
+    monkeypatch.setattr(datos, "supabase", falso)
+    return falso
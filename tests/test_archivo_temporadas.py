@@ -0,0 +1,89 @@
+import pytest
+
+import archivo_temporadas
+from archivo_temporadas import (
+    archivar_temporada, consultar_archivo, curso_academico_de_fecha, resumen_temporada, temporadas_archivadas,
+)
+
+
+def _dias(año, mes, n):
+    return [f"{año}-{mes:02d}-{d:02d}" for d in range(1, n + 1)]
+
+
+@pytest.fixture
+def colegio(cliente, tmp_path, monkeypatch):
+    monkeypatch.setattr(archivo_temporadas, "DIR_ARCHIVO", str(tmp_path / "archivo"))
+    asistencia = []
+    # Temporada 2024/2025 (octubre y marzo) y un día de la temporada en curso
+    for fecha in _dias(2024, 10, 20) + _dias(2025, 3, 10) + ["2025-09-15"]:
+        for alumno_id, curso_id in [(1, 1), (2, 1), (3, 2)]:
+            asistencia.append({
+                "id": len(asistencia) + 1, "alumno_id": alumno_id, "curso_id": curso_id,
+                "fecha": fecha, "asiste": alumno_id != 3, "curso_academico": curso_academico_de_fecha(fecha),
+            })
+    cliente.tablas.update({
+        "alumnos": [{"id": 1, "nombre": "Ana"}, {"id": 2, "nombre": "Luis"}, {"id": 3, "nombre": "Eva"}],
+        "cursos": [{"id": 1, "nombre": "1º A"}, {"id": 2, "nombre": "2º A"}],
+        "profesores": [{"id": 7, "usuario": "maestro1"}],
+        "asistencia": asistencia,
+        "maestros_comidas": [
+            # El último día el maestro no come
+            {"id": i + 1, "maestro_id": 7, "fecha": fecha, "come": i < 4}
+            for i, fecha in enumerate(_dias(2024, 11, 5))
+        ],
+        "maestros_agua": [{"id": 1, "maestro_id": 7, "fecha": "2024-11-04", "agua_025": 2, "agua_060": 1}],
+    })
+    return cliente
+
+
+def test_curso_academico_de_fecha():
+    assert curso_academico_de_fecha("2025-09-01") == "2025/2026"
+    assert curso_academico_de_fecha("2026-08-31") == "2025/2026"
+
+
+def test_archivar_y_consultar_temporada(colegio):
+    resultado = archivar_temporada("2024/2025")
+
+    assert resultado == {"asistencia": (90, 90), "maestros_comidas": (5, 5), "maestros_agua": (1, 1)}
+    # En la tabla viva solo queda la temporada en curso
+    assert [f["fecha"] for f in colegio.tablas["asistencia"]] == ["2025-09-15"] * 3
+    assert colegio.tablas["maestros_comidas"] == []
+    assert temporadas_archivadas() == ["2024/2025"]
+
+    resumen = resumen_temporada("2024/2025")
+    por_curso = resumen["por_curso"].set_index("curso")
+    assert por_curso.loc["1º A", "comidas"] == 60
+    assert por_curso.loc["2º A", "faltas"] == 30
+    assert resumen["por_mes"]["mes"].tolist() == ["2024-10", "2025-03"]
+    assert resumen["maestros_comidas"].set_index("maestro").loc["maestro1", "comidas"] == 4
+    assert resumen["maestros_agua"]["agua_025"].tolist() == [2]
+
+    # Los nombres se guardan con cada fila: el histórico sigue legible aunque se borre el alumno
+    df = consultar_archivo("select distinct alumno from asistencia order by alumno")
+    assert df["alumno"].tolist() == ["Ana", "Eva", "Luis"]
+
+
+def test_repetir_tras_un_borrado_fallido_no_duplica_filas(colegio, monkeypatch):
+    borrar = archivo_temporadas.db_delete_por_lotes
+
+    def borrado_cortado(tabla, filtros, progreso=None):
+        # Se borra una parte de la temporada y se corta la conexión
+        borrar(tabla, filtros + [("id", "lte", 30)], progreso)
+        raise ConnectionError("se cortó la conexión")
+
+    monkeypatch.setattr(archivo_temporadas, "db_delete_por_lotes", borrado_cortado)
+    with pytest.raises(ConnectionError):
+        archivar_temporada("2024/2025", tablas=["asistencia"])
+    assert len(colegio.tablas["asistencia"]) == 63
+
+    monkeypatch.setattr(archivo_temporadas, "db_delete_por_lotes", borrar)
+    assert archivar_temporada("2024/2025", tablas=["asistencia"]) == {"asistencia": (0, 60)}
+    assert [f["fecha"] for f in colegio.tablas["asistencia"]] == ["2025-09-15"] * 3
+    df = consultar_archivo("select count(*) as filas, count(distinct id) as ids from asistencia")
+    assert df.iloc[0].tolist() == [90, 90]
+
+
+def test_temporada_sin_filas_no_crea_ficheros(colegio):
+    assert archivar_temporada("2020/2021") == {"asistencia": (0, 0), "maestros_comidas": (0, 0), "maestros_agua": (0, 0)}
+    assert temporadas_archivadas() == []
+    assert len(colegio.tablas["asistencia"]) == 93
@@ -0,0 +1,120 @@
+import pytest
+
+import busqueda
+import datos
+from busqueda import IndiceNombres, normalizar, trigramas
+
+NOMBRES = [
+    (1, "Ruíz García, Lucía"),
+    (2, "Ruiz Garcia, Lucia"),
+    (3, "Pérez López, Juan"),
+    (4, "Rodríguez Ruano, Marta"),
+    (5, "Martínez Pérez, Juana"),
+]
+
+
+def test_normalizar_quita_tildes_y_mayusculas():
+    assert normalizar("  Ruíz GARCÍA ") == "ruiz garcia"
+    assert normalizar(None) == ""
+    assert " ru" in trigramas("ruiz")
+
+
+def test_buscar_sin_tildes_y_en_cualquier_orden():
+    idx = IndiceNombres(NOMBRES)
+    assert idx.buscar("lucia ruiz")[:2] == [1, 2]
+    assert set(idx.buscar("perez")) == {3, 5}
+    assert idx.buscar("juana")[0] == 5
+    assert idx.buscar("") == []
+
+
+def test_buscar_una_o_dos_letras():
+    idx = IndiceNombres(NOMBRES)
+    # Primero los nombres con una palabra que empieza así, luego los que la contienen
+    assert idx.buscar("m") == [5, 4]
+    assert idx.buscar("Ju") == [5, 3]
+    assert idx.buscar("ez") == [5, 3, 4]
+
+
+def test_duplicados_iguales_y_parecidos():
+    idx = IndiceNombres(NOMBRES)
+    iguales, parecidos = idx.duplicados("RUIZ GARCÍA, LUCÍA")
+    assert iguales == [1, 2]
+    assert parecidos == []
+    # Una errata también se detecta, como parecido
+    iguales, parecidos = idx.duplicados("Perez Lopez, Juann")
+    assert iguales == []
+    assert parecidos == [3]
+
+
+def test_agregar_y_quitar_actualizan_el_indice():
+    idx = IndiceNombres(NOMBRES)
+    idx.agregar(3, "Pérez Gómez, Juan")
+    assert idx.nombre(3) == "Pérez Gómez, Juan"
+    assert 3 not in idx.buscar("lopez")
+    idx.quitar(1)
+    assert idx.duplicados("Ruiz Garcia, Lucia")[0] == [2]
+    assert len(idx) == 4
+
+
+# ---------------------------------------------------------
+# ÍNDICE COMPARTIDO
+# ---------------------------------------------------------
+@pytest.fixture
+def alumnos(cliente, monkeypatch):
+    monkeypatch.setattr(busqueda, "_indices", {})
+    monkeypatch.setattr(busqueda, "_versiones", busqueda.defaultdict(int))
+    datos._versiones_bd.clear()
+    cliente.tablas["alumnos"] = [{"id": i, "nombre": n, "curso_id": 1} for i, n in NOMBRES]
+    return cliente
+
+
+def _lecturas(cliente):
+    return sum(1 for tabla, accion in cliente.peticiones if tabla == "alumnos" and accion == "select")
+
+
+def test_el_indice_se_construye_una_vez(alumnos):
+    idx = busqueda.indice("alumnos")
+    assert busqueda.indice("alumnos") is idx
+    assert _lecturas(alumnos) == 1
+
+
+def test_altas_y_bajas_desde_la_app_no_reconstruyen_el_indice(alumnos):
+    busqueda.indice("alumnos")
+    busqueda.actualizar("alumnos", 6, "Núñez Sáez, Iñigo")
+    busqueda.actualizar("alumnos", 3, "Pérez Gómez, Juan")
+    busqueda.eliminar("alumnos", [5])
+
+    idx = busqueda.indice("alumnos")
+    assert _lecturas(alumnos) == 1
+    assert idx.buscar("nunez") == [6]
+    assert idx.nombre(3) == "Pérez Gómez, Juan"
+    assert idx.nombre(5) is None
+
+
+def test_invalidar_reconstruye_con_los_datos_nuevos(alumnos):
+    busqueda.indice("alumnos")
+    alumnos.tablas["alumnos"].append({"id": 9, "nombre": "Importado, Nuevo", "curso_id": 1})
+    busqueda.invalidar("alumnos")
+
+    assert busqueda.indice("alumnos").buscar("importado") == [9]
+    assert _lecturas(alumnos) == 2
+
+
+def test_al_caducar_la_version_solo_reconstruyen_los_cambios_externos(alumnos):
+    alumnos.tablas["versiones_tablas"] = [{"tabla": "alumnos", "version": 1}]
+    busqueda.indice("alumnos")
+
+    # Alta desde la app: el disparador sube la versión de la tabla
+    alumnos.tablas["alumnos"].append({"id": 9, "nombre": "Nuevo, Alumno", "curso_id": 1})
+    alumnos.tablas["versiones_tablas"][0]["version"] = 2
+    busqueda.actualizar("alumnos", 9, "Nuevo, Alumno")
+    datos._versiones_bd.clear()  # pasan TTL_VERSIONES segundos
+    assert busqueda.indice("alumnos").buscar("nuevo") == [9]
+    assert _lecturas(alumnos) == 1
+
+    # Cambio hecho desde fuera de la app
+    alumnos.tablas["alumnos"].append({"id": 10, "nombre": "Externo, Alumno", "curso_id": 1})
+    alumnos.tablas["versiones_tablas"][0]["version"] = 3
+    datos._versiones_bd.clear()
+    assert busqueda.indice("alumnos").buscar("externo") == [10]
+    assert _lecturas(alumnos) == 2
@@ -0,0 +1,101 @@
+import pytest
+
+from cliente_memoria import ClienteMemoria
+from cliente_sqlite import ClienteSQLite
+
+TABLAS = {
+    "cursos": [
+        {"id": 1, "nombre": "1º A", "orden": 1, "colegio_id": 1},
+        {"id": 2, "nombre": "2º A", "orden": 2, "colegio_id": 1},
+    ],
+    "alumnos": [
+        {"id": 1, "nombre": "Ana Ruiz", "curso_id": 1, "dietas": ["celiaco"], "colegio_id": 1},
+        {"id": 2, "nombre": "Luis Pérez", "curso_id": 1, "dietas": [], "colegio_id": 1},
+        {"id": 3, "nombre": "Eva 100%", "curso_id": 2, "dietas": [], "colegio_id": 1},
+    ],
+    "asistencia": [
+        {"id": i, "alumno_id": i % 3 + 1, "curso_id": 1, "fecha": f"2025-10-{i:02d}", "asiste": i % 2 == 0,
+         "motivo": None, "curso_academico": "2025/2026", "colegio_id": 1}
+        for i in range(1, 21)
+    ],
+}
+
+
+def _clientes(tmp_path):
+    memoria = ClienteMemoria(TABLAS)
+    sqlite = ClienteSQLite(str(tmp_path / "comedor.db"))
+    for nombre, filas in TABLAS.items():
+        sqlite.cargar(nombre, filas)
+    return memoria, sqlite
+
+
+def _ordenadas(filas):
+    return sorted(filas, key=lambda f: f.get("id") or 0)
+
+
+CONSULTAS = {
+    "todo": lambda c: c.table("alumnos").select("*"),
+    "columnas": lambda c: c.table("alumnos").select("id, nombre"),
+    "eq": lambda c: c.table("alumnos").select("id").eq("curso_id", 1),
+    "neq_texto_numero": lambda c: c.table("alumnos").select("id").neq("curso_id", "1"),
+    "in": lambda c: c.table("asistencia").select("id").in_("alumno_id", [1, 3]),
+    "rango_fechas": lambda c: c.table("asistencia").select("id, fecha").gte("fecha", "2025-10-05").lt("fecha", "2025-10-09"),
+    "booleano": lambda c: c.table("asistencia").select("id").eq("asiste", True),
+    "match": lambda c: c.table("asistencia").select("id").match({"alumno_id": 2, "asiste": False}),
+    "orden_y_limite": lambda c: c.table("asistencia").select("id, fecha").order("fecha", desc=True).limit(3),
+    "paginado_por_id": lambda c: c.table("asistencia").select("id").gt("id", 15).order("id").limit(10),
+}
+
+
+@pytest.mark.parametrize("nombre", list(CONSULTAS))
+def test_mismas_respuestas_en_memoria_y_sqlite(tmp_path, nombre):
+    memoria, sqlite = _clientes(tmp_path)
+    consulta = CONSULTAS[nombre]
+    esperado = consulta(memoria).execute().data
+    obtenido = consulta(sqlite).execute().data
+    if nombre in ("orden_y_limite", "paginado_por_id"):
+        assert obtenido == esperado
+    else:
+        assert _ordenadas(obtenido) == _ordenadas(esperado)
+
+
+def test_contar(tmp_path):
+    for cliente in _clientes(tmp_path):
+        respuesta = cliente.table("asistencia").select("id", count="exact").eq("asiste", True).limit(1).execute()
+        assert respuesta.count == 10
+        assert len(respuesta.data) == 1
+
+
+def test_escrituras(tmp_path):
+    finales = []
+    for cliente in _clientes(tmp_path):
+        nuevos = cliente.table("alumnos").insert([{"nombre": "Nuevo", "curso_id": 2, "dietas": [], "colegio_id": 1}]).execute().data
+        assert nuevos[0]["id"] == 4
+        cliente.table("alumnos").update({"curso_id": 2}).eq("id", 1).execute()
+        cliente.table("asistencia").delete().lte("id", 5).execute()
+        # Upsert por clave compuesta: una fila existente y una nueva
+        cliente.table("asistencia").upsert([
+            {"alumno_id": 1, "curso_id": 1, "fecha": "2025-10-06", "asiste": True, "colegio_id": 1,
+             "curso_academico": "2025/2026", "id": 6},
+            {"alumno_id": 1, "curso_id": 1, "fecha": "2025-11-03", "asiste": True, "colegio_id": 1,
+             "curso_academico": "2025/2026", "id": 21},
+        ], on_conflict="alumno_id, fecha").execute()
+        # Con ignore_duplicates no se toca la fila que ya existe
+        cliente.table("cursos").upsert([{"id": 1, "nombre": "Otro", "orden": 9, "colegio_id": 1}], ignore_duplicates=True).execute()
+        finales.append({
+            t: _ordenadas(cliente.table(t).select(columnas).execute().data)
+            for t, columnas in [("alumnos", "*"), ("asistencia", "*"), ("cursos", "id, nombre, orden")]
+        })
+
+    memoria, sqlite = finales
+    assert sqlite == memoria
+    assert [f["id"] for f in sqlite["asistencia"]][:2] == [6, 7]
+    assert sqlite["asistencia"][0]["asiste"] is True
+    assert sqlite["cursos"][0]["nombre"] == "1º A"
+    assert sqlite["alumnos"][0] == {"id": 1, "nombre": "Ana Ruiz", "curso_id": 2, "dietas": ["celiaco"], "colegio_id": 1}
+
+
+def test_sqlite_guarda_en_disco(tmp_path):
+    ruta = str(tmp_path / "comedor.db")
+    ClienteSQLite(ruta).cargar("cursos", TABLAS["cursos"])
+    assert [f["nombre"] for f in ClienteSQLite(ruta).table("cursos").select("nombre").order("id").execute().data] == ["1º A", "2º A"]
@@ -0,0 +1,194 @@
+import gzip
+import hashlib
+import io
+import json
+import zipfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import copias
+from copias import (
+    TABLAS_COPIA, comprobar_permiso_secuencias, escribir_parquet, generar_copia, huella_copia, leer_punto_control, restaurar_copia,
+    validar_copia,
+)
+
+
+def _asistencia(n):
+    return [
+        {"id": i, "alumno_id": i % 40 + 1, "curso_id": i % 5 + 1, "fecha": "2025-10-01", "asiste": i % 3 != 0}
+        for i in range(1, n + 1)
+    ]
+
+
+@pytest.fixture
+def colegio(cliente):
+    cliente.tablas.update({
+        "cursos": [{"id": 1, "nombre": "1º A"}, {"id": 2, "nombre": "2º A"}],
+        "alumnos": [{"id": 1, "nombre": "Ana Ruiz", "curso_id": 1}, {"id": 2, "nombre": "Luis Pérez", "curso_id": 2}],
+        "asistencia": _asistencia(2500),
+    })
+    return cliente
+
+
+def _leer(zf, info, formato):
+    with zf.open(info["archivo"]) as f:
+        if formato == "parquet":
+            return pq.read_table(io.BytesIO(f.read())).to_pandas()
+        with gzip.GzipFile(fileobj=f) as gz:
+            return pd.read_csv(gz)
+
+
+@pytest.mark.parametrize("formato", ["csv.gz", "parquet"])
+def test_copia_completa_con_manifiesto(colegio, tmp_path, formato):
+    ruta = tmp_path / f"copia.{formato}.zip"
+    leidas = []
+    manifiesto = generar_copia(ruta, formato, progreso=lambda tabla, filas: leidas.append((tabla, filas)))
+
+    assert list(manifiesto["tablas"]) == TABLAS_COPIA
+    assert manifiesto["tablas"]["asistencia"]["filas"] == 2500
+    assert manifiesto["tablas"]["alumnos"]["filas"] == 2
+    # La asistencia se lee por páginas: el progreso se anota tras cada una
+    assert [filas for tabla, filas in leidas if tabla == "asistencia"] == [1000, 2000, 2500]
+
+    with zipfile.ZipFile(ruta) as zf:
+        assert json.loads(zf.read("manifest.json")) == manifiesto
+        for tabla, info in manifiesto["tablas"].items():
+            assert hashlib.sha256(zf.read(info["archivo"])).hexdigest() == info["sha256"]
+        asistencia = _leer(zf, manifiesto["tablas"]["asistencia"], formato)
+
+    assert asistencia["id"].tolist() == list(range(1, 2501))
+    assert asistencia["asiste"].sum() == sum(f["asiste"] for f in _asistencia(2500))
+
+
+def test_tablas_vacias_quedan_en_el_manifiesto(colegio, tmp_path):
+    manifiesto = generar_copia(tmp_path / "copia.zip")
+    assert manifiesto["tablas"]["maestros_agua"]["filas"] == 0
+    assert manifiesto["tablas"]["maestros_agua"]["columnas"] == []
+
+
+# ---------------------------------------------------------
+# RESTAURACIÓN
+# ---------------------------------------------------------
+@pytest.fixture
+def punto_control_temporal(tmp_path, monkeypatch):
+    # Los puntos de control van al directorio temporal del sistema
+    monkeypatch.setattr(copias.tempfile, "tempdir", str(tmp_path))
+
+
+@pytest.mark.parametrize("formato", ["csv.gz", "parquet"])
+def test_restaurar_copia_en_base_vacia(colegio, tmp_path, punto_control_temporal, formato):
+    ruta = tmp_path / "copia.zip"
+    generar_copia(ruta, formato)
+    originales = {t: [dict(f) for f in filas] for t, filas in colegio.tablas.items() if filas}
+    colegio.tablas.clear()
+
+    with zipfile.ZipFile(ruta) as zf:
+        assert validar_copia(zf)[1] == []
+        restauradas = restaurar_copia(zf, tam_lote=700)
+
+    assert restauradas["asistencia"] == 2500
+    for tabla, filas in originales.items():
+        # En CSV todo llega como texto: el servidor lo convierte al tipo de la columna
+        assert sorted(int(f["id"]) for f in colegio.tablas[tabla]) == [f["id"] for f in filas]
+    assert colegio.tablas["asistencia"][10]["asiste"] in (True, "True")
+    # Al final se reajustan las secuencias de las tablas restauradas
+    assert colegio.rpc_llamadas == [
+        ("reajustar_secuencias", {"tablas": []}),
+        ("reajustar_secuencias", {"tablas": TABLAS_COPIA}),
+    ]
+
+
+def test_restauracion_interrumpida_continua_donde_se_quedo(colegio, tmp_path, punto_control_temporal, monkeypatch):
+    ruta = tmp_path / "copia.zip"
+    generar_copia(ruta, "parquet")
+    colegio.tablas.clear()
+
+    lotes = []
+    upsert_original = copias._a_registros
+
+    def falla_en_el_tercer_lote(df):
+        lotes.append(len(df))
+        if len(lotes) == 3 and df["id"].iloc[0] > 1000:
+            raise ConnectionError("se cortó la conexión")
+        return upsert_original(df)
+
+    monkeypatch.setattr(copias, "_a_registros", falla_en_el_tercer_lote)
+    with zipfile.ZipFile(ruta) as zf:
+        with pytest.raises(ConnectionError):
+            restaurar_copia(zf, tablas=["asistencia"], tam_lote=500)
+        assert leer_punto_control(huella_copia(zf)) == {"asistencia": 1000}
+
+        peticiones_antes = len(colegio.peticiones)
+        restaurar_copia(zf, tablas=["asistencia"], tam_lote=500)
+        # Solo se envían los tres lotes que faltaban
+        assert len(colegio.peticiones) - peticiones_antes == 3
+        assert leer_punto_control(huella_copia(zf)) == {}
+
+    assert sorted(f["id"] for f in colegio.tablas["asistencia"]) == list(range(1, 2501))
+
+
+def test_sin_permiso_para_las_secuencias_no_se_restaura_nada(colegio, tmp_path, punto_control_temporal):
+    ruta = tmp_path / "copia.zip"
+    generar_copia(ruta, "parquet")
+    colegio.tablas.clear()
+    colegio.rpc_denegadas.add("reajustar_secuencias")
+
+    with zipfile.ZipFile(ruta) as zf:
+        assert comprobar_permiso_secuencias() is not None
+        peticiones_antes = len(colegio.peticiones)
+        with pytest.raises(PermissionError):
+            restaurar_copia(zf)
+        assert len(colegio.peticiones) == peticiones_antes
+        assert leer_punto_control(huella_copia(zf)) == {}
+
+
+def test_copia_danada_no_pasa_la_validacion(colegio, tmp_path):
+    ruta = tmp_path / "copia.zip"
+    generar_copia(ruta, tablas=["cursos", "alumnos"])
+    with zipfile.ZipFile(ruta) as zf:
+        contenido = {n: zf.read(n) for n in zf.namelist()}
+    contenido["alumnos.csv.gz"] = gzip.compress(b"id,nombre\n1,Otro\n")
+    with zipfile.ZipFile(ruta, "w") as zf:
+        for nombre, datos_fichero in contenido.items():
+            zf.writestr(nombre, datos_fichero)
+
+    with zipfile.ZipFile(ruta) as zf:
+        _, errores = validar_copia(zf)
+    assert errores == ["El fichero alumnos.csv.gz está dañado (SHA-256 distinto)."]
+
+
+# ---------------------------------------------------------
+# PARQUET
+# ---------------------------------------------------------
+def _leer_parquet(destino):
+    destino.seek(0)
+    return pq.read_table(destino).to_pandas()
+
+
+def test_columna_vacia_solo_en_la_primera_pagina():
+    paginas = [
+        pd.DataFrame({"id": [1, 2], "alumno_id": [10, 11], "motivo": [None, None], "observaciones": [None, None]}),
+        pd.DataFrame({"id": [3, 4], "alumno_id": [12, 13], "motivo": ["Enfermedad", None], "observaciones": [7, None]}),
+    ]
+    destino = io.BytesIO()
+    filas, columnas = escribir_parquet(iter(paginas), destino, "asistencia")
+    assert filas == 4
+    assert columnas == ["id", "alumno_id", "motivo", "observaciones"]
+    df = _leer_parquet(destino)
+    assert df["id"].tolist() == [1, 2, 3, 4]
+    assert df["motivo"].tolist()[2] == "Enfermedad"
+    assert df["observaciones"].tolist()[2] == "7"
+
+
+def test_enteros_con_huecos_en_una_pagina_posterior():
+    paginas = [
+        pd.DataFrame({"id": [1], "curso_id": [5]}),
+        pd.DataFrame({"id": [2], "curso_id": [None]}),
+    ]
+    destino = io.BytesIO()
+    filas, _ = escribir_parquet(iter(paginas), destino, "alumnos")
+    assert filas == 2
+    assert pq.read_schema(io.BytesIO(destino.getvalue())).field("curso_id").type == "int64"
+    assert _leer_parquet(destino)["curso_id"].isna().tolist() == [False, True]
@@ -0,0 +1,106 @@
+import pytest
+
+import datos
+from cliente_memoria import ClienteMemoria
+
+
+class _Contador:
+    """
+    Envuelve un cliente y anota la tabla de cada consulta.
+    """
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.tablas = []
+
+    def table(self, nombre):
+        self.tablas.append(nombre)
+        return self.cliente.table(nombre)
+
+    def rpc(self, funcion, parametros=None):
+        return self.cliente.rpc(funcion, parametros)
+
+
+@pytest.fixture
+def base(monkeypatch):
+    memoria = _Contador(ClienteMemoria({
+        "cursos": [{"id": 1, "nombre": "1º A", "colegio_id": 1}, {"id": 2, "nombre": "1º A", "colegio_id": 2}],
+        "versiones_tablas": [{"colegio_id": 1, "tabla": "cursos", "version": 1}],
+    }))
+    monkeypatch.setattr(datos, "supabase", datos.ClienteColegio(memoria))
+    monkeypatch.setattr(datos, "_cambios", datos.defaultdict(int))
+    datos._versiones_bd.clear()
+    datos._tabla_completa.clear()
+    return memoria
+
+
+def _lecturas(base, tabla="cursos"):
+    return base.tablas.count(tabla)
+
+
+def test_la_tabla_no_se_vuelve_a_leer_si_no_cambia(base):
+    with datos.en_colegio(1):
+        assert datos.db_select_cacheado("cursos")["nombre"].tolist() == ["1º A"]
+        datos.db_select_cacheado("cursos")
+    assert _lecturas(base) == 1
+
+
+def test_una_escritura_desde_la_app_cambia_la_version_al_momento(base):
+    with datos.en_colegio(1):
+        antes = datos.version_tablas("cursos")
+        datos.db_select_cacheado("cursos")
+        datos.supabase.table("cursos").insert({"nombre": "2º A"}).execute()
+        assert datos.version_tablas("cursos") != antes
+        assert datos.db_select_cacheado("cursos")["nombre"].tolist() == ["1º A", "2º A"]
+    assert _lecturas(base) == 3  # lectura, inserción y relectura
+
+
+def test_las_versiones_son_por_colegio(base):
+    with datos.en_colegio(1):
+        datos.db_select_cacheado("cursos")
+    with datos.en_colegio(2):
+        datos.supabase.table("cursos").update({"nombre": "1º B"}).eq("id", 2).execute()
+    with datos.en_colegio(1):
+        datos.db_select_cacheado("cursos")
+    assert _lecturas(base) == 2  # lectura del colegio 1 y escritura del 2: no se vuelve a leer
+
+
+def test_un_cambio_hecho_desde_fuera_se_ve_al_caducar_la_version(base):
+    with datos.en_colegio(1):
+        datos.db_select_cacheado("cursos")
+        # Lo que haría el disparador de la base de datos con un cambio desde el panel de Supabase
+        base.cliente.table("cursos").update({"nombre": "1º A (bis)"}).eq("id", 1).execute()
+        base.cliente.table("versiones_tablas").update({"version": 2}).eq("tabla", "cursos").execute()
+        assert datos.db_select_cacheado("cursos")["nombre"].tolist() == ["1º A"]
+
+        datos._versiones_bd.clear()  # pasan TTL_VERSIONES segundos
+        assert datos.version_tablas("cursos") == ((2, 0),)
+        assert datos.db_select_cacheado("cursos")["nombre"].tolist() == ["1º A (bis)"]
+
+
+def test_cache_versionada(base):
+    llamadas = []
+
+    @datos.cache_versionada("cursos")
+    def cuantos_cursos(colegio_id):
+        llamadas.append(colegio_id)
+        return len(datos.db_select("cursos"))
+
+    with datos.en_colegio(1):
+        assert cuantos_cursos(1) == 1
+        assert cuantos_cursos(1) == 1
+        datos.supabase.table("cursos").delete().eq("id", 1).execute()
+        assert cuantos_cursos(1) == 0
+    assert llamadas == [1, 1]
+
+
+def test_alumnos_por_curso_cuenta_sin_traer_filas(base):
+    base.cliente.cargar("alumnos", [
+        {"id": i, "nombre": f"Alumno {i}", "curso_id": 1 if i <= 1200 else 2, "colegio_id": 1}
+        for i in range(1, 1501)
+    ])
+    datos.alumnos_por_curso.clear()
+    with datos.en_colegio(1):
+        assert datos.alumnos_por_curso((1, 2, 3), 1) == {1: 1200, 2: 300, 3: 0}
+        datos.alumnos_por_curso((1, 2, 3), 1)
+    assert _lecturas(base, "alumnos") == 3  # un recuento por curso, solo la primera vez
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+import busqueda
+from importacion import (
+    COLUMNAS_CURSO, COLUMNAS_DIETAS, COLUMNAS_NOMBRE, NUEVO, REPETIDO, SIN_CURSO, SIN_NOMBRE, YA_EXISTE,
+    adivinar_columna, importar_alumnos, leer_fichero, preparar_importacion,
+)
+
+CURSOS = pd.DataFrame([{"id": 1, "nombre": "1º A"}, {"id": 2, "nombre": "INF 5 B"}])
+
+FICHERO = (
+    "Apellidos y nombre;Grupo;Alergias\n"
+    "Ruíz García, Lucía;1ºA;Sin gluten\n"
+    "Nuevo Alumno, Pedro;inf 5 b;sin lactosa, Halal\n"
+    "NUEVO ALUMNO, PEDRO;1º A;\n"
+    "Sin Curso, Eva;3º C;\n"
+    ";1º A;\n"
+    "Otra Nueva, Ana;1º a;marisco\n"
+)
+
+
+@pytest.fixture
+def colegio(cliente, monkeypatch):
+    monkeypatch.setattr(busqueda, "_indices", {})
+    monkeypatch.setattr(busqueda, "_versiones", busqueda.defaultdict(int))
+    cliente.tablas["alumnos"] = [{"id": 1, "nombre": "Ruiz Garcia, Lucia", "curso_id": 1, "dietas": []}]
+    return cliente
+
+
+def test_leer_csv_con_punto_y_coma_y_latin1():
+    df = leer_fichero(FICHERO.encode("latin-1"), "alumnos.csv")
+    assert df.columns.tolist() == ["Apellidos y nombre", "Grupo", "Alergias"]
+    assert df.iloc[0, 0] == "Ruíz García, Lucía"
+    assert adivinar_columna(df.columns, COLUMNAS_NOMBRE) == "Apellidos y nombre"
+    assert adivinar_columna(df.columns, COLUMNAS_CURSO) == "Grupo"
+    assert adivinar_columna(df.columns, COLUMNAS_DIETAS) == "Alergias"
+
+
+def test_vista_previa_valida_cada_fila(colegio):
+    df = leer_fichero(FICHERO.encode("utf-8"), "alumnos.csv")
+    vista = preparar_importacion(df, "Apellidos y nombre", "Grupo", CURSOS, "Alergias")
+
+    assert vista["Estado"].tolist() == [YA_EXISTE, NUEVO, REPETIDO, SIN_CURSO, SIN_NOMBRE, NUEVO]
+    assert vista["curso_id"].tolist()[:3] == [1, 2, 1]
+    assert vista["Dietas"].tolist()[0] == ["sin_gluten"]
+    assert vista["Dietas"].tolist()[1] == ["sin_lactosa", "halal"]
+    # Las dietas desconocidas se conservan tal cual
+    assert vista["Dietas"].tolist()[5] == ["marisco"]
+
+
+def test_importar_inserta_solo_las_nuevas_por_lotes(colegio):
+    df = leer_fichero(FICHERO.encode("utf-8"), "alumnos.csv")
+    vista = preparar_importacion(df, "Apellidos y nombre", "Grupo", CURSOS, "Alergias")
+    avance = []
+
+    insertadas = importar_alumnos(vista, tam_lote=1, progreso=lambda hechas, total: avance.append((hechas, total)))
+
+    assert [f["nombre"] for f in insertadas] == ["Nuevo Alumno, Pedro", "Otra Nueva, Ana"]
+    assert avance == [(1, 2), (2, 2)]
+    assert sum(1 for tabla, accion in colegio.peticiones if accion == "insert") == 2
+    # El índice se reconstruye: volver a importar el mismo fichero ya no añade nada
+    vista = preparar_importacion(df, "Apellidos y nombre", "Grupo", CURSOS, "Alergias")
+    assert NUEVO not in vista["Estado"].tolist()
+    assert len(colegio.tablas["alumnos"]) == 3
@@ -0,0 +1,59 @@
+import pandas as pd
+
+from mesas import FILAS_POR_DEFECTO, planificar_mesas
+
+
+def _cursos():
+    return pd.DataFrame([
+        {"id": 1, "nombre": "INF 3 AÑOS", "orden": 1, "etapa": 1, "fila": 1},
+        {"id": 2, "nombre": "3º A", "orden": 2, "etapa": 3, "fila": 2},
+        {"id": 3, "nombre": "6º A", "orden": 3, "etapa": 4, "fila": 3},
+    ])
+
+
+def _comensales(n):
+    return pd.DataFrame({
+        "id": range(1, n + 1),
+        "nombre": [f"Alumno {i:03d}" for i in range(1, n + 1)],
+        "curso_id": [i % 3 + 1 for i in range(n)],
+    })
+
+
+def test_300_comensales_caben_con_las_filas_por_defecto():
+    df_comensales = _comensales(300)
+    plan, avisos = planificar_mesas(df_comensales, _cursos(), FILAS_POR_DEFECTO)
+    assert len(plan) == len(df_comensales)
+    assert not plan["extra"].any()
+    assert avisos == []
+
+
+def test_sin_sitio_van_a_una_mesa_extra():
+    df_comensales = _comensales(30)
+    df_filas = pd.DataFrame([{"fila": f, "nombre": f"F{f}", "mesas": 1, "plazas_por_mesa": 5} for f in (1, 2, 3)])
+    plan, avisos = planificar_mesas(df_comensales, _cursos(), df_filas)
+    assert len(plan) == len(df_comensales)
+    assert set(plan["id"]) == set(df_comensales["id"])
+    extra = plan[plan["extra"]]
+    assert len(extra) == 15
+    assert (extra["mesa"] == 2).all()
+    # Un aviso por cada (fila de origen, fila de destino) y por cada mesa extra
+    assert len(avisos) == 4
+    assert avisos[:2] == [
+        "Fila 1 completa: 5 comensales se sientan en la fila 2.",
+        "Fila 2 completa: 5 comensales se sientan en la fila 3.",
+    ]
+    assert sum("mesa extra" in a for a in avisos) == 2
+
+
+def test_excepcion_sin_fila_mantiene_la_fila_del_curso():
+    df_comensales = _comensales(6)
+    df_excepciones = pd.DataFrame([
+        {"id_alumno": 3, "fila": None, "mesa": 3},
+        {"id_alumno": 2, "fila": 1, "mesa": None},
+    ])
+    plan, _ = planificar_mesas(df_comensales, _cursos(), FILAS_POR_DEFECTO, df_excepciones)
+    assert len(plan) == len(df_comensales)
+    alumno_3 = plan.set_index("id").loc[3]
+    assert alumno_3["fila"] == 3  # curso 3 -> fila 3
+    assert alumno_3["mesa"] == 3
+    assert plan.set_index("id").loc[2, "fila"] == 1
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from promocion import (
+    aplicar_promocion, alumnos_promocionables, deshacer_ultima_promocion, proponer_siguientes,
+    resumen_promocion, validar_siguientes,
+)
+
+
+def _cursos(siguientes=None):
+    nombres = ["INF 5 A", "INF 5 B", "1º A", "5º A", "6º A", "Ninguno"]
+    df = pd.DataFrame({"id": range(1, len(nombres) + 1), "nombre": nombres})
+    df["curso_siguiente_id"] = pd.array([(siguientes or {}).get(i) for i in df["id"]], dtype="Int64")
+    return df
+
+
+GRAFO = {1: 3, 2: 3, 3: 4, 4: 5, 5: 6}
+
+
+def test_proponer_siguientes_por_nivel_y_letra():
+    propuesta = proponer_siguientes(_cursos())
+    # INF 5 B pasa a 1º A porque no hay 1º B; 6º pasa a Ninguno; 1º A no tiene 2º
+    assert propuesta.to_dict() == {1: 3, 2: 3, 4: 5, 5: 6}
+    # Los cursos que ya tienen siguiente no se proponen
+    assert 1 not in proponer_siguientes(_cursos({1: 3})).index
+
+
+def test_validar_grafo():
+    assert validar_siguientes(_cursos(GRAFO)) == []
+    errores = validar_siguientes(_cursos({1: 3, 3: 4, 4: 1, 2: 99, 6: 6}))
+    assert "INF 5 B: el curso siguiente (99) no existe." in errores
+    assert "Ninguno no puede pasar a sí mismo." in errores
+    assert any(e.startswith("Ciclo en la promoción: ") and "1º A" in e for e in errores)
+
+
+@pytest.fixture
+def colegio(cliente):
+    cliente.tablas["alumnos"] = [
+        {"id": 1, "nombre": "Ana", "curso_id": 1},
+        {"id": 2, "nombre": "Luis", "curso_id": 2},
+        {"id": 3, "nombre": "Eva", "curso_id": 5},
+        {"id": 4, "nombre": "Sara", "curso_id": 5},
+        {"id": 5, "nombre": "Iker", "curso_id": 6},
+    ]
+    return cliente
+
+
+def test_promocion_con_repetidores_y_deshacer(colegio):
+    df_alumnos = pd.DataFrame(colegio.tablas["alumnos"])
+    promocionables = alumnos_promocionables(df_alumnos, _cursos(GRAFO))
+    # Los de "Ninguno" no promocionan
+    assert promocionables["id"].tolist() == [1, 2, 3, 4]
+
+    resumen = resumen_promocion(promocionables, repetidores=[4]).set_index("Curso")
+    assert resumen.loc["6º A", "Pasan a"] == "1º ESO (Instituto)"
+    assert resumen.loc["6º A", ["Alumnos", "Promocionan", "Repiten"]].tolist() == [2, 1, 1]
+
+    aplicar_promocion(promocionables[promocionables["id"] != 4], fecha="2026-06-30", tam_lote=2)
+    assert {f["id"]: f["curso_id"] for f in colegio.tablas["alumnos"]} == {1: 3, 2: 3, 3: 6, 4: 5, 5: 6}
+    assert len(colegio.tablas["promociones_log"]) == 3
+    assert sum(1 for tabla, accion in colegio.peticiones if tabla == "alumnos" and accion == "upsert") == 2
+
+    assert deshacer_ultima_promocion() == 3
+    assert {f["id"]: f["curso_id"] for f in colegio.tablas["alumnos"]} == {1: 1, 2: 2, 3: 5, 4: 5, 5: 6}
+    assert colegio.tablas["promociones_log"] == []
@@ -0,0 +1,74 @@
+# ---------------------------------------------------------
+# TIPOS DE LAS TABLAS LEÍDAS
+# ---------------------------------------------------------
+# Supabase devuelve JSON y pd.DataFrame adivina los tipos: las fechas llegan
+# como texto, los booleanos con algún hueco como object y los ids con huecos
+# como float. Aquí se fija el tipo de cada columna una sola vez, al leer la
+# tabla (datos.db_select y db_select_pagina), para que el resto del código
+# compare y una columnas sin volver a convertirlas:
+#   - ids y cantidades -> int32 (Int32 si la columna tiene huecos)
+#   - fechas           -> datetime64 (se siguen pudiendo comparar con "2025-09-08")
+#   - booleanos        -> bool (un hueco cuenta como False)
+#   - textos que se repiten en cada fila de asistencia (motivo, curso académico) -> category
+# Las columnas que no están en ESQUEMA se dejan como vengan.
+import pandas as pd
+
+ENTERO = "entero"
+FECHA = "fecha"
+BOOLEANO = "booleano"
+CATEGORIA = "categoria"
+
+ESQUEMA = {
+    "colegios": {"id": ENTERO},
+    "cursos": {
+        "id": ENTERO, "orden": ENTERO, "etapa": ENTERO, "fila": ENTERO,
+        "curso_siguiente_id": ENTERO, "colegio_id": ENTERO,
+    },
+    "alumnos": {"id": ENTERO, "curso_id": ENTERO, "colegio_id": ENTERO},
+    # profesores.curso_id no se toca: es la lista "1,4,7" obsoleta (ver profesorado.py)
+    "profesores": {"id": ENTERO, "colegio_id": ENTERO},
+    "profesores_cursos": {"id": ENTERO, "profesor_id": ENTERO, "curso_id": ENTERO, "colegio_id": ENTERO},
+    "config_filas": {
+        "id": ENTERO, "fila": ENTERO, "mesas": ENTERO, "plazas_por_mesa": ENTERO, "colegio_id": ENTERO,
+    },
+    "config_mesas": {"id": ENTERO, "id_alumno": ENTERO, "fila": ENTERO, "mesa": ENTERO, "colegio_id": ENTERO},
+    "asistencia": {
+        "id": ENTERO, "alumno_id": ENTERO, "curso_id": ENTERO, "colegio_id": ENTERO,
+        "fecha": FECHA, "asiste": BOOLEANO, "motivo": CATEGORIA, "curso_academico": CATEGORIA,
+    },
+    "promociones_log": {
+        "id": ENTERO, "alumno_id": ENTERO, "curso_origen": ENTERO, "curso_destino": ENTERO,
+        "colegio_id": ENTERO, "fecha": FECHA,
+    },
+    "maestros_comidas": {"id": ENTERO, "maestro_id": ENTERO, "colegio_id": ENTERO, "fecha": FECHA, "come": BOOLEANO},
+    "maestros_agua": {
+        "id": ENTERO, "maestro_id": ENTERO, "colegio_id": ENTERO, "fecha": FECHA,
+        "agua_025": ENTERO, "agua_060": ENTERO,
+    },
+}
+
+
+def _convertir(serie, tipo):
+    if tipo == ENTERO:
+        serie = pd.to_numeric(serie, errors="coerce")
+        return serie.astype("Int32" if serie.isna().any() else "int32")
+    if tipo == FECHA:
+        return pd.to_datetime(serie, format="ISO8601", errors="coerce")
+    if tipo == BOOLEANO:
+        return serie.astype("boolean").fillna(False).astype(bool)
+    if tipo == CATEGORIA:
+        return serie.astype("category")
+    raise ValueError(f"Tipo desconocido: {tipo}")
+
+
+def tipar(tabla, df):
+    """
+    Devuelve df con las columnas de la tabla convertidas a los tipos de ESQUEMA.
+    Sirve también para los DataFrame que se montan a mano con .execute().data.
+    """
+    esquema = ESQUEMA.get(tabla)
+    if not esquema:
+        return df
+    return df.assign(**{
+        columna: _convertir(df[columna], tipo) for columna, tipo in esquema.items() if columna in df.columns
+    })